@@ -1,8 +1,19 @@
+import time
 import click
 from flask.cli import with_appcontext
 
 from .extensions import extensiones
 from app.models.userModel import User
+from app.models.domainModel import Domain
+from app.models.subdomainModel import Subdomain
+from app.controllers.whoisController import WhoisController
+from app.controllers.monitorController import MonitorController
+from app.controllers.taskController import TaskController
+from app.controllers.reconController import ReconController
+from app.utils.asnIndex import IndiceAsn
+from app.utils.passiveImport import ImportadorPasivo
+from app.utils.bulk import Bulk
+from app.utils.migracion import Migracion
 
 from flask import current_app
 from sqlalchemy.exc import OperationalError
@@ -30,4 +41,104 @@ def create_users():
     three = User(username="Three",hashed_password=extensiones.guard.hash_password('three'), roles="developer", is_active=True)
 
     extensiones.db.session.add_all([one, two, three])
-    extensiones.db.session.commit()
\ No newline at end of file
+    extensiones.db.session.commit()
+
+@click.command(name="whois_batch")
+@click.argument("domains", nargs=-1)
+@with_appcontext
+def whois_batch(domains):
+    """Refresca el whois de los dominios indicados (o de todos los registrados)."""
+    dominios = Domain.query.filter(Domain.domain.in_(domains)).all() if domains else Domain.readAll()
+    resumen = WhoisController.refrescar(dominios)
+    click.echo(f"Actualizados: {len(resumen['updated'])}")
+    for dominio, error in resumen['failed'].items():
+        click.echo(f"  [X] {dominio}: {error}")
+
+@click.command(name="asn_index")
+@click.argument("tsv")
+@click.argument("output", required=False)
+@with_appcontext
+def asn_index(tsv, output):
+    """Compila un TSV tipo ip2asn (inicio, fin, asn, país, organización) al índice ASN local."""
+    destino = output or current_app.config.get('ASN_INDEX_PATH')
+    if not destino:
+        raise click.UsageError("Indique el archivo de salida o configure ASN_INDEX_PATH.")
+    rangos = IndiceAsn.compilar(tsv, destino)
+    IndiceAsn.abrir.cache_clear()
+    click.echo(f"{rangos} rangos indexados en {destino}")
+
+@click.command(name="import_passive")
+@click.argument("files", nargs=-1, required=True, type=click.Path(exists=True, dir_okay=False))
+@click.option("--workers", type=int, default=None, help="Procesos a usar (por defecto, uno por núcleo).")
+@click.option("--chunk-mb", type=int, default=64, help="Tamaño de los trozos en que se reparten los archivos sin comprimir.")
+@with_appcontext
+def import_passive(files, workers, chunk_mb):
+    """Importa subdominios de volcados CT / DNS pasivo (NDJSON, CSV o texto, opcionalmente gzip)."""
+    dominios = {d.domain.lower(): d.id for d in Domain.readAll()}
+    if not dominios:
+        raise click.UsageError("No hay dominios registrados.")
+    insertados = [0]
+
+    def consumidor(pares):
+        ahora = extensiones.datetime.now()
+        # La columna subdomain admite 64 caracteres
+        insertados[0] += max(Bulk.insertar(Subdomain, [
+            dict(domain_id=dominios[dominio], subdomain=nombre, waf='Pendiente', source='passive', created_at=ahora)
+            for dominio, nombre in pares if len(nombre) <= 64
+        ], conflicto=['domain_id', 'subdomain']), 0)
+        extensiones.db.session.commit()
+
+    encontrados = ImportadorPasivo(dominios, workers, chunk_mb << 20).ejecutar(list(files), consumidor)
+    click.echo(f"Nombres encontrados: {encontrados}, subdominios nuevos: {insertados[0]}")
+
+@click.command(name="migrate_database")
+@with_appcontext
+def migrate_database():
+    """Lleva una base existente al esquema actual: tablas, columnas e índices nuevos. Se puede repetir sin efectos."""
+    for cambio in Migracion.ejecutar():
+        click.echo(f"  {cambio}")
+    completados = Subdomain.reindexar()
+    click.echo(f"Base de datos al día ({completados} nombres completados en el índice de búsqueda)")
+
+@click.command(name="reindex_subdomains")
+@with_appcontext
+def reindex_subdomains():
+    """Crea y completa los índices de búsqueda de subdominios (sufijo y trigram) en una base existente."""
+    Migracion.ejecutar()
+    completados = Subdomain.reindexar()
+    click.echo(f"Índices de búsqueda listos ({completados} nombres completados)")
+
+@click.command(name="monitor")
+@click.option("--once", is_flag=True, help="Ejecuta una sola vuelta y termina.")
+@with_appcontext
+def monitor(once):
+    """Monitoreo continuo: vuelve a escanear los dominios según su planificación y las señales de cambio."""
+    intervalo = current_app.config.get('MONITOR_TICK', 60)
+    while True:
+        inicio = time.monotonic()
+        for domain_id, etapa, estado in MonitorController.tick():
+            click.echo(f"[{extensiones.datetime.now().isoformat(timespec='seconds')}] dominio {domain_id} {etapa}: {estado}")
+        if once:
+            return
+        time.sleep(max(0, intervalo - (time.monotonic() - inicio)))
+
+@click.command(name="scan_worker")
+@click.option("--tag", "tags", multiple=True, help="Capacidad del worker (por ejemplo sudo-nmap); se puede repetir.")
+@click.option("--concurrency", type=int, default=None, help="Tareas a la vez (por defecto SCAN_WORKER_CONCURRENCY).")
+@click.option("--output-dir", default=None, help="Directorio de los reportes XML (por defecto ./result).")
+@click.option("--lease", type=int, default=None, help="Segundos de lease sin latido (por defecto SCAN_WORKER_LEASE).")
+@click.option("--drain", is_flag=True, help="Termina cuando la cola queda vacía.")
+@with_appcontext
+def scan_worker(tags, concurrency, output_dir, lease, drain):
+    """Worker de la cola distribuida: toma tareas nmap de la base compartida, las ejecuta e ingiere los resultados."""
+    configuracion = current_app.config
+    etiquetas = tags or configuracion.get('SCAN_WORKER_TAGS', [])
+
+    def evento(tarea, estado):
+        click.echo(f"[{extensiones.datetime.now().isoformat(timespec='seconds')}] tarea {tarea.id} {tarea.stage}/{tarea.tool}: {estado}")
+
+    cerradas = TaskController.trabajar(
+        etiquetas, concurrency or configuracion.get('SCAN_WORKER_CONCURRENCY', 4), output_dir,
+        lease or configuracion.get('SCAN_WORKER_LEASE', 300), ingerir=ReconController.ingerirTareas,
+        salir_sin_tareas=drain, on_event=evento)
+    click.echo(f"Tareas cerradas: {cerradas}")
@@ -1,8 +1,18 @@
-from flask import session, jsonify, request
+from flask import session, jsonify, request, current_app, url_for
+from datetime import timedelta
+from concurrent.futures import TimeoutError as HashTimeoutError
 from app.models.userModel import User
 from app.extensions import extensiones
+from app.utils.hashPool import PoolSaturadoError
+from app.utils.rateLimiter import SlidingWindowLimiter
 
 MAX_LOGIN_ATTEMPTS = 3
+# Intentos fallidos por IP con cualquier usuario: frena el rociado de nombres de usuario
+MAX_LOGIN_ATTEMPTS_PER_IP = 20
+LOGIN_WINDOW_SECONDS = 300
+
+login_limiter = SlidingWindowLimiter(MAX_LOGIN_ATTEMPTS, LOGIN_WINDOW_SECONDS)
+ip_limiter = SlidingWindowLimiter(MAX_LOGIN_ATTEMPTS_PER_IP, LOGIN_WINDOW_SECONDS)
 
 class AuthController():
     """
@@ -33,19 +43,41 @@ class AuthController():
         try:
             req = request.get_json(force=True)
             username, password = req.get("username"), req.get("password")
+
+            # Los intentos se rechazan antes de cualquier hashing
+            ip = request.remote_addr
+            llave = f"{username}|{ip}"
+            espera = max(login_limiter.permitido(llave), ip_limiter.permitido(ip))
+            if espera:
+                return jsonify({'error': 'Demasiados intentos de inicio de sesión.'}), 429, {'Retry-After': str(int(espera) + 1)}
+
             user = User.lookup(username)
 
             if not user:
+                login_limiter.registrar(llave)
+                ip_limiter.registrar(ip)
                 return jsonify({'error': 'Usuario no encontrado.'}), 404
 
-            if extensiones.guard.authenticate(username, password):
+            if extensiones.hash_pool.verify_password(extensiones.guard, password, user.password):
+                login_limiter.reiniciar(llave)
                 user.last_login = extensiones.datetime.now()
                 extensiones.db.session.commit()
                 access_token = extensiones.guard.encode_jwt_token(user)
-                return jsonify({"access_token": access_token}), 200
-            
+                respuesta = jsonify({"access_token": access_token})
+                # El stream SSE se autentica con esta cookie (EventSource no envía cabeceras propias)
+                ruta_stream = url_for('recon.stream', domain_name='_').rsplit('/', 1)[0]
+                respuesta.set_cookie(
+                    current_app.config.get('JWT_COOKIE_NAME', 'access_token'), access_token,
+                    max_age=int(timedelta(**current_app.config.get('JWT_ACCESS_LIFESPAN', {'hours': 12})).total_seconds()),
+                    path=ruta_stream, httponly=True, secure=request.is_secure, samesite='Strict')
+                return respuesta, 200
+
+            login_limiter.registrar(llave)
+            ip_limiter.registrar(ip)
             return jsonify({'error': 'Credenciales inválidas.'}), 401
-            
+
+        except (PoolSaturadoError, HashTimeoutError):
+            return jsonify({'error': 'Servidor ocupado, intente nuevamente.'}), 429, {'Retry-After': '1'}
         except extensiones.praetorian.exceptions.PraetorianError:
             return jsonify({'error': 'Nombre de usuario o contraseña inválidos.'}), 401        
         except Exception as e:
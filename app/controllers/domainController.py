@@ -3,6 +3,7 @@ from app.models.domainModel import Domain
 from app.models.userModel import User
 from app.extensions import extensiones
 from app.utils.core import Core
+from app.utils.publicSuffix import ListaSufijos
 
 class DomainController():
 
@@ -36,6 +37,9 @@ class DomainController():
             #waf_id = Core.validar(data.get('waf_id', None)),
             created_at = extensiones.datetime.now()
         )
+        # validators acepta "co.uk": un sufijo público no es un dominio que se pueda registrar
+        if domain_dict['domain'] and ListaSufijos.cargar().registrable(domain_dict['domain']) is None:
+            return jsonify({'error': f'{domain_dict["domain"]} es un sufijo público, no un dominio registrable'}), 400
 
         try:
             extensiones.db.session.add(Domain(**domain_dict))
@@ -0,0 +1,221 @@
+from flask import jsonify, current_app
+from sqlalchemy import func
+from app.models.domainModel import Domain
+from app.models.whoisModel import Whois
+from app.models.subdomainModel import Subdomain
+from app.models.certificateModel import Certificate
+from app.models.certificateblobModel import CertificateBlob
+from app.models.scheduleModel import Schedule
+from app.extensions import extensiones
+from app.utils.dnsResolver import ResolvedorDns
+from app.utils.bulk import Bulk
+from app.controllers.reconController import ReconController
+from app.controllers.whoisController import WhoisController
+
+import math
+import hashlib
+from datetime import datetime, timedelta
+
+# Etapas que el monitoreo mantiene al día, en el orden en que conviene correrlas
+ETAPAS = ('whois', 'subdomains', 'certificates', 'liveness', 'tech', 'services')
+# Registros del dominio que forman la señal DNS; el prefijo distingue este formato de señal
+SENAL_DNS = ('NS', 'SOA', 'CNAME')
+PREFIJO_SENAL = 'dns1:'
+
+
+class MonitorController():
+    """
+    Monitoreo continuo: vuelve a escanear cada dominio y etapa según su planificación.
+
+    Cada etapa de cada dominio tiene un intervalo y una fase propia (derivada de un
+    hash), así que los escaneos del parque quedan repartidos de forma pareja en el
+    tiempo. Señales baratas adelantan las etapas afectadas: un cambio en las
+    respuestas DNS del dominio o en la fecha ``updated_date`` del whois, los
+    certificados próximos a vencer y los hosts muertos que vuelven a contestar.
+    En cada vuelta se lanzan como mucho ``MONITOR_MAX_PER_TICK`` etapas, de la más
+    atrasada a la menos, de modo que un atraso acumulado se drena sin ráfagas.
+    """
+
+    @staticmethod
+    def siguiente(domain_id, etapa, intervalo, ahora):
+        """
+        Calcula la próxima ejecución de una etapa, alineada a su fase dentro del intervalo.
+
+        Returns:
+            datetime: El primer instante de la forma ``fase + n * intervalo`` posterior a ``ahora``.
+        """
+        fase = int(hashlib.sha1(f"{domain_id}:{etapa}".encode()).hexdigest()[:8], 16) % intervalo
+        vueltas = math.floor((ahora.timestamp() - fase) / intervalo) + 1
+        return datetime.fromtimestamp(fase + vueltas * intervalo)
+
+    @staticmethod
+    def sembrar(ahora):
+        """Crea la planificación de los dominios nuevos y aplica los intervalos configurados."""
+        intervalos = current_app.config.get('MONITOR_INTERVALS', {})
+        existentes = {(s.domain_id, s.stage): s for s in Schedule.query.all()}
+        filas = []
+        for dominio in Domain.readAll():
+            for etapa in ETAPAS:
+                intervalo = intervalos.get(etapa)
+                planificada = existentes.get((dominio.id, etapa))
+                if planificada is None:
+                    if intervalo:
+                        filas.append(dict(domain_id=dominio.id, stage=etapa, interval=intervalo, created_at=ahora,
+                                          next_run=MonitorController.siguiente(dominio.id, etapa, intervalo, ahora)))
+                elif not intervalo:
+                    # Una etapa sin intervalo configurado deja de monitorearse
+                    planificada.deleted_at = planificada.deleted_at or ahora
+                elif planificada.interval != intervalo or planificada.deleted_at is not None:
+                    planificada.interval, planificada.deleted_at = intervalo, None
+                    planificada.next_run = MonitorController.siguiente(dominio.id, etapa, intervalo, ahora)
+        Bulk.insertar(Schedule, filas, conflicto=['domain_id', 'stage'])
+        extensiones.db.session.commit()
+
+    @staticmethod
+    def adelantar(domain_id, etapas, motivo, ahora):
+        """Adelanta a ``ahora`` las etapas de un dominio que aún no vencieron."""
+        Schedule.query.filter(
+            Schedule.domain_id == domain_id, Schedule.stage.in_(etapas),
+            Schedule.next_run > ahora, Schedule.deleted_at.is_(None),
+        ).update({'next_run': ahora, 'reason': motivo}, synchronize_session=False)
+
+    @staticmethod
+    def senales(ahora):
+        """
+        Revisa las señales baratas de cambio y adelanta las etapas afectadas.
+
+        La señal DNS es una proyección estable de la zona: los NS, el SOA (con su
+        serial) y el CNAME del dominio. Las direcciones A/AAAA no cuentan porque un
+        CDN las rota entre consultas. Las respuestas se consultan a lo sumo una vez cada
+        ``MONITOR_SIGNAL_INTERVAL`` segundos por dominio y en lotes de
+        ``MONITOR_SIGNAL_BATCH`` dominios; el vencimiento de los certificados sale de
+        una sola consulta agrupada.
+        """
+        configuracion = current_app.config
+        vencidas = ahora - timedelta(seconds=configuracion.get('MONITOR_SIGNAL_INTERVAL', 3600))
+        revisar = Schedule.query.filter(
+            Schedule.stage == 'subdomains', Schedule.deleted_at.is_(None),
+            (Schedule.checked_at.is_(None)) | (Schedule.checked_at < vencidas),
+        ).order_by(Schedule.checked_at).limit(configuracion.get('MONITOR_SIGNAL_BATCH', 256)).all()
+        if revisar:
+            nombres = {d.id: d.domain for d in Domain.query.filter(Domain.id.in_([s.domain_id for s in revisar])).all()}
+            resolvedor = ResolvedorDns(
+                cache=extensiones.dns_cache,
+                servidores=configuracion.get('DNS_RESOLVERS') or None,
+                ttl_negativo=configuracion.get('DNS_NEGATIVE_TTL', 60),
+            )
+            resueltos = resolvedor.ejecutar(list(nombres.values()), tipos=SENAL_DNS)
+            for planificada in revisar:
+                registros = resueltos.get(nombres.get(planificada.domain_id))
+                planificada.checked_at = ahora
+                if registros is None or not registros.completa:
+                    # Sin respuesta (de alguno de los tipos) no hay señal: no se confunde una falla de red con un cambio
+                    continue
+                estable = sorted({(r.tipo, r.valor.lower()) for r in registros if r.tipo in SENAL_DNS})
+                senal = f"{PREFIJO_SENAL}{hashlib.sha1(repr(estable).encode()).hexdigest()[:16]}"
+                # Una señal de otro formato (p. ej. de las direcciones) no se compara: solo se reemplaza
+                if planificada.signal is not None and planificada.signal.startswith(PREFIJO_SENAL) and planificada.signal != senal:
+                    MonitorController.adelantar(planificada.domain_id, ('subdomains', 'certificates'), 'dns', ahora)
+                planificada.signal = senal
+
+        # Los certificados se revisan antes de que venza el primero de cada dominio; solo cuenta el
+        # vigente de cada host, no los que ya se rotaron
+        ventana = timedelta(seconds=configuracion.get('MONITOR_CERT_WINDOW', 14 * 86400))
+        vigentes = Certificate.latest()
+        vencimientos = extensiones.db.session.query(Subdomain.domain_id, func.min(CertificateBlob.not_after)) \
+            .join(vigentes, vigentes.c.subdomain_id == Subdomain.id) \
+            .join(CertificateBlob, CertificateBlob.fingerprint == vigentes.c.certificate_data) \
+            .filter(Subdomain.deleted_at.is_(None)).group_by(Subdomain.domain_id).all()
+        limites = {domain_id: vence - ventana for domain_id, vence in vencimientos if vence is not None}
+        if limites:
+            for planificada in Schedule.query.filter(Schedule.stage == 'certificates', Schedule.deleted_at.is_(None),
+                                                     Schedule.domain_id.in_(list(limites))).all():
+                limite = limites[planificada.domain_id]
+                # Una vez revisado dentro de la ventana no se vuelve a adelantar
+                if limite < planificada.next_run and (planificada.last_run is None or planificada.last_run < limite):
+                    planificada.next_run, planificada.reason = max(limite, ahora), 'cert_expiry'
+        extensiones.db.session.commit()
+
+    @staticmethod
+    def ejecutar(planificada, ahora):
+        """
+        Ejecuta una etapa planificada y calcula su próxima ejecución.
+
+        Returns:
+            str: ``ok`` o el error de la etapa.
+        """
+        dominio = Domain.query.get(planificada.domain_id)
+        if dominio is None:
+            planificada.deleted_at = ahora
+            extensiones.db.session.commit()
+            return 'Dominio no encontrado.'
+
+        try:
+            if planificada.stage == 'whois':
+                anterior = Whois.lookup(dominio.domain)
+                anterior = anterior.updated_date if anterior else None
+                error = WhoisController.refrescar([dominio])['failed'].get(dominio.domain)
+                whois = Whois.lookup(dominio.domain)
+                # Un cambio en el registro (NS, registrar...) puede traer cambios en la superficie
+                if error is None and whois and anterior and whois.updated_date != anterior:
+                    MonitorController.adelantar(dominio.id, ('subdomains', 'certificates', 'tech'), 'whois', ahora)
+            else:
+                metodo = {
+                    'subdomains': ReconController.searchSubdomains,
+                    'certificates': ReconController.certificate,
+                    'liveness': ReconController.liveness,
+                    'tech': ReconController.tech,
+                    'services': ReconController.services,
+                }[planificada.stage]
+                with current_app.test_request_context(json={'domain': dominio.domain}):
+                    respuesta = metodo()
+                    error = MonitorController._error(respuesta)
+                # Un host muerto que vuelve a contestar se escanea sin esperar a su próxima vuelta
+                if planificada.stage == 'liveness' and error is None and respuesta[0].get_json().get('revived'):
+                    MonitorController.adelantar(dominio.id, ('tech', 'services'), 'liveness', ahora)
+        except Exception as e:
+            extensiones.db.session.rollback()
+            error = str(e)
+
+        planificada.last_run, planificada.reason = ahora, None
+        planificada.status = (error or 'ok')[:255]
+        planificada.next_run = MonitorController.siguiente(dominio.id, planificada.stage, planificada.interval, ahora)
+        extensiones.db.session.commit()
+        return planificada.status
+
+    @staticmethod
+    def tick(ahora=None):
+        """
+        Una vuelta del monitoreo: planifica, revisa las señales y lanza las etapas vencidas.
+
+        Returns:
+            list: Las tuplas ``(dominio_id, etapa, estado)`` de las etapas ejecutadas.
+        """
+        ahora = ahora or extensiones.datetime.now()
+        MonitorController.sembrar(ahora)
+        MonitorController.senales(ahora)
+        ejecutadas = []
+        for planificada in Schedule.due(ahora, current_app.config.get('MONITOR_MAX_PER_TICK', 2)):
+            ejecutadas.append((planificada.domain_id, planificada.stage, MonitorController.ejecutar(planificada, ahora)))
+        return ejecutadas
+
+    @staticmethod
+    def listar(domain_name):
+        """
+        Devuelve la planificación del monitoreo de un dominio.
+
+        Returns:
+            Response: Un objeto JSON con las etapas, su intervalo, la próxima ejecución y el último estado.
+        """
+        dominio = Domain.lookup(domain_name)
+        if not dominio:
+            return jsonify({'error': 'Dominio no encontrado.'}), 404
+        return jsonify(Schedule.serialize(Schedule.lookup(dominio.id))), 200
+
+    @staticmethod
+    def _error(respuesta):
+        """Extrae el mensaje de error de la respuesta de una etapa, o None si terminó bien."""
+        if isinstance(respuesta, tuple) and len(respuesta) == 2 and isinstance(respuesta[1], int) and respuesta[1] >= 400:
+            contenido = respuesta[0].get_json(silent=True) or {}
+            return str(contenido.get('error', respuesta[1]))
+        return None
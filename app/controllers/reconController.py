@@ -1,4 +1,5 @@
-from flask import session, jsonify, request
+from flask import session, jsonify, request, Response, stream_with_context, current_app
+from sqlalchemy import update
 from sqlalchemy.exc import IntegrityError
 from app.models.domainModel import Domain
 from app.models.whoisModel import Whois
@@ -7,11 +8,35 @@ from app.models.nameserverModel import Nameserver
 from app.models.subdomainModel import Subdomain
 from app.models.techModel import Tech
 from app.models.portsserviceModel import PortsService
+from app.models.dnsrecordModel import DnsRecord
+from app.models.certificateModel import Certificate
+from app.models.certificateblobModel import CertificateBlob
+from app.models.httpprobeModel import HttpProbe
+from app.models.vulnModel import Vuln
+from app.models.snapshotModel import Snapshot
 from app.models.userModel import User
 from app.extensions import extensiones
 from app.utils.core import Core
+from app.utils.decoders import Decodificador
+from app.utils.axfr import Axfr
+from app.utils.wafEngine import DetectorWaf
+from app.utils.techEngine import MotorTecnologias
+from app.utils.tlsHarvester import RecolectorTls
+from app.utils.httpProbe import SondaHttp
+from app.utils.dnsResolver import ResolvedorDns
+from app.utils.liveness import SondaVida, PUERTOS_TOP, DESCONOCIDO, MUERTO, VIVO
+from app.utils.clustering import Agrupador
+from app.utils.asnIndex import IndiceAsn
+from app.utils.bulk import Bulk
+from app.utils.fechas import Fechas
+from app.controllers.whoisController import WhoisController
+from app.controllers.taskController import TaskController
+from app.utils.scanEvents import ScanEvents
 
 import os
+import json
+import hashlib
+from datetime import timedelta
 #from app.utils import 
 
 from typing import Optional, List, Dict
@@ -52,9 +77,9 @@ class ReconController:
             if not dominio:
                 return jsonify({'error': 'Dominio no encontrado.'}), 404
 
-            whois_info = Core.parsearWhois(Core.ejecutar(f"whois {dominio.domain}").split("\n"))
-            waf_info = Core.parsearWaf(dominio.domain, Core.parsear(Core.ejecutar(f"wafw00f {dominio.domain}")))
-            nameservers = Core.parsearNS(whois_info.get('Name Server').split(", "), Core.escaneoConcurrente([f"dig @{ns} axfr {dominio.domain}" for ns in whois_info.get('Name Server').split(", ")]))
+            whois_info = Core.consultarWhois(dominio.domain)
+            waf_info = DetectorWaf().ejecutar([dominio.domain])
+            nameservers = Axfr.probar((whois_info.get('Name Server') or "").split(", "), dominio.domain)
 
             return jsonify({'whois': whois_info, 'waf': waf_info, 'nameservers': nameservers}), 200
 
@@ -67,7 +92,8 @@ class ReconController:
         Busca información sobre un dominio específico.
 
         Este método espera recibir un JSON en el cuerpo de la solicitud con el nombre del dominio.
-        Devuelve información WHOIS y WAF si el dominio es válido.
+        Devuelve información WHOIS y WAF si el dominio es válido. Si el dominio ya se buscó,
+        sus registros se actualizan en lugar de rechazar la búsqueda.
         El formato esperado es el siguiente:
         {
             "domain": "dominio.com"
@@ -85,62 +111,59 @@ class ReconController:
             if not extensiones.validators.domain(domain_name):
                 return jsonify({'error': 'Dominio inválido.'}), 400
 
-            whois = Whois.lookup(domain_name)
-            if whois:
-                return jsonify({'error': f'Dominio {domain_name} ya existe'}), 404
+            existente = Whois.lookup(domain_name)
 
             dominio = Domain.lookup(domain_name)
             if not dominio:
                 return jsonify({'error': 'Dominio no encontrado.'}), 404
 
-            whois = Core.parsearWhois(Core.ejecutar(f"whois {dominio.domain}").split("\n"))
-            waf = Core.parsearWaf(Core.ejecutar(f"wafw00f {dominio.domain}"))
-            name_queries = [f"dig @{ns} axfr {dominio.domain}" for ns in whois.get('Name Server').split(", ")]
-            parsed_nameservers = Core.parsearNS(whois.get('Name Server').split(", "), Core.escaneoConcurrente(name_queries))
-
-            whois_dic = dict(
-                domain_id=dominio.id, 
-                domain=dominio.domain,
-                domain_name = whois['Domain Name'],
-                sponsoring_registrar = whois['Sponsoring Registrar'],
-                registry_domain_id = whois['Registry Domain ID'],
-                registrar_whois_server = whois['Registrar WHOIS Server'],
-                registrar_url = whois['Registrar URL'],
-                updated_date = whois['Updated Date'],
-                creation_date = whois['Creation Date'],
-                registry_expiry_date = whois['Registry Expiry Date'],
-                registrar = whois['Registrar'],
-                registrar_iana_id = whois['Registrar IANA ID'],
-                registrar_abuse_contact_email = whois['Registrar Abuse Contact Email'],
-                registrar_abuse_contact_phone = whois['Registrar Abuse Contact Phone'],
-                domain_status = whois['Domain Status'],
-                registrant_name = whois['Registrant Name'],
-                admin_name = whois['Admin Name'],
-                admin_email = whois['Admin Email'],
-                name_server = whois['Name Server'],
-                dnssec = whois['DNSSEC'],
-                url_ofthe_icann_whois_inaccuracy_complaint_form = whois['URL of the ICANN Whois Inaccuracy Complaint Form'],
-                created_at = extensiones.datetime.now()
+            whois = Core.consultarWhois(dominio.domain)
+            waf = DetectorWaf().ejecutar([dominio.domain])
+            parsed_nameservers = Axfr.probar((whois.get('Name Server') or "").split(", "), dominio.domain,
+                                             consumidor=ReconController._ingestarZona(dominio))
+
+            ahora = extensiones.datetime.now()
+            whois_dic = WhoisController.columnas(dominio, whois)
+            if existente:
+                whois_dic.pop('created_at')
+                for key, value in whois_dic.items():
+                    setattr(existente, key, value)
+                existente.update_at = ahora
+            else:
+                extensiones.db.session.add(Whois(**whois_dic))
+
+            waf_existente = Waf.query.filter_by(domain_id=dominio.id).first()
+            if waf_existente:
+                waf_existente.name = waf[dominio.domain]
+            else:
+                waf_dict = dict(
+                    domain_id = dominio.id,
+                    name = waf[dominio.domain],
+                    created_at = ahora
                 )
-            extensiones.db.session.add(Whois(**whois_dic))
-            
-            waf_dict = dict(
-                domain_id = dominio.id,
-                name = waf[dominio.domain],
-                created_at = extensiones.datetime.now()
-            )
-            extensiones.db.session.add(Waf(**waf_dict))
+                extensiones.db.session.add(Waf(**waf_dict))
 
+            # Los nameservers que ya no aparecen se marcan como eliminados
+            nameservers = {n.name: n for n in Nameserver.query.filter_by(domain_id=dominio.id).all()}
             for ns in parsed_nameservers:
+                if ns in nameservers:
+                    nameservers[ns].zone_transfer = parsed_nameservers[ns]
+                    nameservers[ns].update_at, nameservers[ns].deleted_at = ahora, None
+                    continue
                 nameserver_dict = dict(
                     domain_id = dominio.id,
                     name = ns,
                     zone_transfer = parsed_nameservers[ns],
-                    created_at = extensiones.datetime.now()
+                    created_at = ahora
                 )
                 extensiones.db.session.add(Nameserver(**nameserver_dict))
+            for nombre, nameserver in nameservers.items():
+                if nombre not in parsed_nameservers and nameserver.deleted_at is None:
+                    nameserver.deleted_at = ahora
 
             extensiones.db.session.commit()
+            if existente:
+                return jsonify({'message': f'Datos de {dominio.domain} actualizados correctamente.'}), 200
             return jsonify({'message': f'Datos de {dominio.domain} guardados correctamente.'}), 201
             #return jsonify({'whois': whois_dic, 'waf': waf_dict,'name_server':nameserver_dict}), 200
         except IntegrityError:
@@ -156,117 +179,1086 @@ class ReconController:
         Busca subdominios asociados a un dominio específico.
 
         Este método espera recibir un JSON en el cuerpo de la solicitud con el nombre del dominio.
-        Devuelve una lista de subdominios encontrados.
+        Si el dominio ya tiene subdominios el escaneo es incremental: la enumeración, la
+        resolución DNS y el sondeo HTTP (baratos) corren para todos, pero el WAF solo se
+        detecta en los subdominios nuevos o cuya huella DNS/HTTP cambió. Los que las
+        herramientas ya no devuelven se marcan con ``deleted_at`` solo si todas las
+        herramientas terminaron y devolvieron resultados; los que vinieron de otras
+        fuentes (importación pasiva, certificados, AXFR) solo si ya no resuelven. Con
+        ``"full": true`` se reanalizan todos.
 
         El formato esperado es el siguiente:
         {
-            "domain": "dominio.com"
+            "domain": "dominio.com",
+            "full": false
         }
 
         Returns:
-            Response: Un objeto JSON que contiene los subdominios o un mensaje de error con el código de estado correspondiente.
+            Response: Un objeto JSON con el resumen de subdominios nuevos, cambiados, sin cambios y eliminados,
+                o un mensaje de error con el código de estado correspondiente.
 
         Raises:
             Exception: Si ocurre un error inesperado durante la búsqueda.
         """
+        canal = None
         try:
             data = request.get_json(force=True)
             domain_name = data.get('domain')
-            
+            completo = bool(data.get('full'))
+
             # Validar el dominio
             if not extensiones.validators.domain(domain_name):
                 return jsonify({'error': 'Dominio inválido.'}), 400
 
             dominio = Domain.lookup(domain_name)
-            subdomains = Subdomain.lookup(dominio.id)
-            if subdomains:
-                return jsonify({'error': f'Los subdominios de {domain_name} ya existe'}), 404
-            
-            waf_id = Waf.identify(dominio.id)
             if not dominio:
                 return jsonify({'error': 'Dominio no encontrado.'}), 404
+            # Incluye los eliminados: si reaparecen se reactivan en lugar de duplicarse
+            existentes = {s.subdomain: s for s in Subdomain.query.filter_by(domain_id=dominio.id).all()}
 
-            comandos_subdominios  = [
-                    f"sublist3r -d {dominio.domain}", 
-                    f"knockpy -d {dominio.domain}",
-                    f"nmap --script dns-brute {dominio.domain}",
-                    f"fierce --domain {dominio.domain}",
-                    f"dnsmap {dominio.domain}",
-                    f"dnsenum --enum --threads 10 --dnsserver 1.1.1.1 --fqdns --noreverse {dominio.domain}",
-                    f"subfinder -d {dominio.domain}"
-                ]
-            # Obtener subdominios)
-            subdomains = Core.parsearSubDomain(dominio.domain, Core.escaneoConcurrente(comandos_subdominios))
-            subdomains_waf = Core.parsearWaf(Core.escaneoConcurrente([f"wafw00f {sf}" for sf in subdomains]))
-
-            for subdomain, waf in subdomains_waf.items():
-                subdomains_data = dict(
-                    domain_id = dominio.id,
-                    subdomain = subdomain,
-                    #waf_id = waf_id.id,
-                    waf = waf,
-                    created_at = extensiones.datetime.now()
-                )
-                extensiones.db.session.add(Subdomain(**subdomains_data))
+            comandos_subdominios = Decodificador.comandosSubdominios(dominio.domain)
+            canal = dominio.domain
+            extensiones.scan_events.iniciar(canal)
+            salidas = {}
 
+            def publicar_subdominios(comando, linea):
+                for sub in Core.parsearSubDomain(dominio.domain, [linea]):
+                    extensiones.scan_events.publicar(canal, 'subdominio', {'subdomain': sub, 'tool': comando.split()[0]}, unico=sub)
+
+            def publicar_waf(subdominio, waf):
+                extensiones.scan_events.publicar(canal, 'waf', {'subdomain': subdominio, 'waf': waf})
+
+            # Obtener subdominios
+            Core.escaneoConcurrente(
+                list(comandos_subdominios), on_line=publicar_subdominios,
+                on_result=ReconController._progreso(canal, 'subdominios', len(comandos_subdominios), salidas.__setitem__))
+            subdomains = Decodificador.subdominios(dominio.domain, salidas, comandos_subdominios)
+            enumerados = set(subdomains)
+            vigentes = {s: fila for s, fila in existentes.items() if fila.deleted_at is None}
+            # Los nombres de otras fuentes (pasivas, certificados, AXFR) que las herramientas no devolvieron
+            # se resuelven igual: solo se dan por eliminados si dejaron de existir en el DNS
+            externos = [s for s, fila in vigentes.items() if s not in enumerados and fila.source not in (None, 'enum')]
+            # Cada subdominio se resuelve una sola vez; las etapas siguientes conectan a esas direcciones
+            resueltos = ReconController._resolverNombres(canal, subdomains + externos)
+            # Cada subdominio se pide una sola vez; WAF y tecnologías leen la respuesta de la caché
+            sondeos = ReconController._sondear(canal, subdomains)
+            huellas = ReconController._huellas(subdomains, resueltos, sondeos,
+                                               {s: fila.fingerprint for s, fila in existentes.items()})
+
+            nuevos = [s for s in subdomains if s not in existentes]
+            cambiados = [
+                s for s in subdomains if s in existentes and (
+                    completo or existentes[s].deleted_at is not None or existentes[s].fingerprint != huellas[s])
+            ]
+            # Los nombres de la enumeración solo se expiran tras una corrida completa y con resultados:
+            # si una herramienta falló, su ausencia no dice nada
+            completa = bool(subdomains) and ReconController._enumeracionCompleta(salidas, comandos_subdominios)
+            eliminados = [
+                s for s, fila in vigentes.items() if s not in enumerados and (
+                    ReconController._inexistente(resueltos.get(s)) if fila.source not in (None, 'enum') else completa)
+            ]
+
+            # El WAF se detecta en el representante de cada grupo y se propaga a sus miembros
+            representantes = ReconController._agrupar(sondeos)
+            analizados = sorted({representantes.get(s, s) for s in nuevos + cambiados})
+            salidas_waf = DetectorWaf(cache=extensiones.http_cache).ejecutar(
+                analizados, on_result=ReconController._progreso(canal, 'waf', len(analizados), publicar_waf))
+            subdomains_waf = {sf: salidas_waf.get(representantes.get(sf, sf), "Falló al conectar") for sf in nuevos + cambiados}
+            origen_waf = {
+                sf: 'http' if representantes.get(sf, sf) == sf else f"cluster:{representantes[sf]}"[:128] for sf in nuevos + cambiados
+            }
+
+            ahora = extensiones.datetime.now()
+            ReconController._guardarSubdominios(
+                dominio, existentes, subdomains, nuevos, cambiados, eliminados, huellas,
+                {s: (subdomains_waf[s], origen_waf[s]) for s in nuevos + cambiados}, ahora)
+
+            extensiones.db.session.flush()
+            ids = Bulk.ids(Subdomain, 'subdomain', subdomains + externos, domain_id=dominio.id)
+            ReconController._guardarDns(ids, resueltos)
+            ReconController._guardarSondeos(ids, sondeos, representantes)
             extensiones.db.session.commit()
-            return jsonify({'message': f'Subdominios de {dominio.domain} guardados correctamente.'}), 201
-            #return jsonify({'whois': whois_dic, 'waf': waf_dict,'name_server':nameserver_dict}), 200    
+            resumen = {'new': len(nuevos), 'changed': len(cambiados), 'unchanged': len(subdomains) - len(nuevos) - len(cambiados),
+                       'deleted': len(eliminados)}
+            extensiones.scan_events.finalizar(canal, {'subdomains': len(subdomains), **resumen})
+            return jsonify({'message': f'Subdominios de {dominio.domain} guardados correctamente.', **resumen}), 201
         except IntegrityError:
             extensiones.db.session.rollback()
             return jsonify({'error': f'Los subdominios de {dominio.domain} ya existe.'}), 409
         except Exception as e:
             extensiones.db.session.rollback()
             return jsonify({'error': f'Error inesperado al ingresar subdominios.{e}'}), 500
+        finally:
+            extensiones.scan_events.cerrar(canal)
     
+    @staticmethod
+    def resolve():
+        """
+        Resuelve los registros A, AAAA y CNAME de los subdominios de un dominio y los guarda en ``DnsRecord``.
+
+        Las respuestas quedan en la caché DNS compartida (respetando su TTL, también las
+        negativas), de modo que el sondeo HTTP y la recolección TLS conectan a estas
+        mismas direcciones sin volver a resolver.
+        El formato esperado es el siguiente:
+        {
+            "domain": "dominio.com"
+        }
+
+        Returns:
+            Response: Un objeto JSON con los registros por subdominio o un mensaje de error con el código de estado correspondiente.
+        """
+        canal = None
+        try:
+            data = request.get_json(force=True)
+            domain_name = data.get('domain')
+            if not extensiones.validators.domain(domain_name):
+                return jsonify({'error': 'Dominio inválido.'}), 400
+
+            dominio = Domain.lookup(domain_name)
+            if not dominio:
+                return jsonify({'error': 'Dominio no encontrado.'}), 404
+
+            subdomains = {s.subdomain: s.id for s in Subdomain.lookup(dominio.id)}
+            if not subdomains:
+                return jsonify({'error': f'{domain_name} no tiene subdominios registrados.'}), 404
+
+            canal = dominio.domain
+            extensiones.scan_events.iniciar(canal)
+            resueltos = ReconController._resolverNombres(canal, list(subdomains))
+            ReconController._guardarDns(subdomains, resueltos)
+            extensiones.db.session.commit()
+            extensiones.scan_events.finalizar(canal, {'resueltos': sum(1 for r in resueltos.values() if r)})
+
+            return jsonify({'records': {
+                host: None if registros is None else [dict(type=r.tipo, value=r.valor, ttl=r.ttl) for r in registros]
+                for host, registros in resueltos.items()
+            }}), 200
+        except Exception as e:
+            extensiones.db.session.rollback()
+            return jsonify({'error': f'Error al resolver: {str(e)}'}), 500
+        finally:
+            extensiones.scan_events.cerrar(canal)
+
+    @staticmethod
+    def probe():
+        """
+        Sondea por HTTP los subdominios de un dominio y guarda el resultado en ``HttpProbe``.
+
+        Cada subdominio se pide una sola vez (https y, si falla, http); las respuestas
+        quedan en la caché compartida para que los analizadores no vuelvan a la red.
+        El formato esperado es el siguiente:
+        {
+            "domain": "dominio.com"
+        }
+
+        Returns:
+            Response: Un objeto JSON con los sondeos o un mensaje de error con el código de estado correspondiente.
+        """
+        canal = None
+        try:
+            data = request.get_json(force=True)
+            domain_name = data.get('domain')
+            if not extensiones.validators.domain(domain_name):
+                return jsonify({'error': 'Dominio inválido.'}), 400
+
+            dominio = Domain.lookup(domain_name)
+            if not dominio:
+                return jsonify({'error': 'Dominio no encontrado.'}), 404
+
+            subdomains = {s.subdomain: s.id for s in Subdomain.lookup(dominio.id)}
+            if not subdomains:
+                return jsonify({'error': f'{domain_name} no tiene subdominios registrados.'}), 404
+
+            canal = dominio.domain
+            extensiones.scan_events.iniciar(canal)
+            sondeos = ReconController._sondear(canal, list(subdomains))
+            ReconController._guardarSondeos(subdomains, sondeos, ReconController._agrupar(sondeos))
+            extensiones.db.session.commit()
+            extensiones.scan_events.finalizar(canal, {'sondeos': sum(1 for r in sondeos.values() if r)})
+
+            return jsonify({'probes': {
+                host: r._asdict() if r else None for host, r in sondeos.items()
+            }}), 200
+        except Exception as e:
+            extensiones.db.session.rollback()
+            return jsonify({'error': f'Error al sondear: {str(e)}'}), 500
+        finally:
+            extensiones.scan_events.cerrar(canal)
+
+    @staticmethod
+    def liveness():
+        """
+        Comprueba qué subdominios de un dominio siguen vivos, para que las etapas costosas salteen los muertos.
+
+        Cada subdominio queda marcado ``alive``, ``dead`` o ``unknown`` según resuelva y
+        conteste por TCP en alguno de ``LIVENESS_PORTS``. Solo se comprueban los hosts
+        cuya comprobación venció: los vivos tras ``LIVENESS_TTL`` segundos y los muertos,
+        más baratos de mantener, tras ``LIVENESS_DEAD_TTL``; con ``"full": true`` se
+        comprueban todos.
+        El formato esperado es el siguiente:
+        {
+            "domain": "dominio.com",
+            "full": false
+        }
+
+        Returns:
+            Response: Un objeto JSON con el estado de cada subdominio comprobado y los que revivieron,
+                o un mensaje de error con el código de estado correspondiente.
+        """
+        canal = None
+        try:
+            data = request.get_json(force=True)
+            domain_name = data.get('domain')
+            if not extensiones.validators.domain(domain_name):
+                return jsonify({'error': 'Dominio inválido.'}), 400
+
+            dominio = Domain.lookup(domain_name)
+            if not dominio:
+                return jsonify({'error': 'Dominio no encontrado.'}), 404
+            if not Subdomain.lookup(dominio.id):
+                return jsonify({'error': f'{domain_name} no tiene subdominios registrados.'}), 404
+
+            canal = dominio.domain
+            extensiones.scan_events.iniciar(canal)
+            resultados, revividos = ReconController._comprobarVida(canal, dominio, forzar=bool(data.get('full')))
+            extensiones.db.session.commit()
+            extensiones.scan_events.finalizar(canal, {'vivos': sum(1 for r in resultados.values() if r.estado == VIVO)})
+            return jsonify({
+                'liveness': {host: r._asdict() for host, r in resultados.items()},
+                'revived': revividos,
+            }), 200
+        except Exception as e:
+            extensiones.db.session.rollback()
+            return jsonify({'error': f'Error al comprobar los hosts: {str(e)}'}), 500
+        finally:
+            extensiones.scan_events.cerrar(canal)
+
     @staticmethod
     def tech():
-        data = request.get_json(force=True)
-        domain_name = data.get('domain')
-        ruta = os.getcwd()
-        wappalyzer = os.chdir(f"{ruta}/app/tools/wappalyzer-cli/src")
-        print(os.getcwd())
-        # Validar el dominio
-        if not extensiones.validators.domain(domain_name):
-            return jsonify({'error': 'Dominio inválido.'}), 400
+        """
+        Detecta las tecnologías de los subdominios de un dominio y las guarda en ``Tech``.
 
-        dominio = Domain.lookup(domain_name)
-        subdomains = Subdomain.lookup(dominio.id)
-        wappy = [f"./wappy -u {s.subdomain}" for s in subdomains]
-        whatweb = [f"whatweb {s.subdomain}" for s in subdomains]
-        print(wappy)
-        result = Core.escaneoConcurrente(wappy)
-        return result
+        Las reglas (formato Wappalyzer) se compilan una sola vez y se evalúan en proceso
+        sobre la página principal de cada subdominio, reutilizando las respuestas ya
+        descargadas por otras etapas. Solo se analizan los subdominios nuevos o que
+        cambiaron desde su último análisis, salvo con ``"full": true``.
+        El formato esperado es el siguiente:
+        {
+            "domain": "dominio.com",
+            "full": false
+        }
+
+        Returns:
+            Response: Un objeto JSON con las tecnologías por subdominio o un mensaje de error con el código de estado correspondiente.
+        """
+        canal = None
+        try:
+            data = request.get_json(force=True)
+            domain_name = data.get('domain')
+
+            # Validar el dominio
+            if not extensiones.validators.domain(domain_name):
+                return jsonify({'error': 'Dominio inválido.'}), 400
+
+            dominio = Domain.lookup(domain_name)
+            if not dominio:
+                return jsonify({'error': 'Dominio no encontrado.'}), 404
+
+            vigentes = Subdomain.lookup(dominio.id)
+            if not vigentes:
+                return jsonify({'error': f'{domain_name} no tiene subdominios registrados.'}), 404
+            pendientes = vigentes if data.get('full') else Subdomain.pending(dominio.id, 'tech_at')
+            subdomains = {s.subdomain: s.id for s in pendientes}
+
+            canal = dominio.domain
+            extensiones.scan_events.iniciar(canal)
+            # Solo se analiza el representante de cada grupo de respuestas equivalentes, aunque no esté pendiente
+            nombres = {s.id: s.subdomain for s in vigentes}
+            representantes = {
+                nombres[id]: nombres.get(rep, nombres[id]) for id, rep in HttpProbe.representatives(subdomains.values()).items()
+            }
+            motor = MotorTecnologias.cargar(current_app.config.get('TECH_RULES_PATH'))
+            analizados = sorted(set(representantes.values()))
+            detectadas = motor.ejecutar(
+                analizados, cache=extensiones.http_cache,
+                on_result=ReconController._progreso(canal, 'tecnologias', len(analizados)))
+            # Un miembro cuyo representante no respondió (o ya no existe) se analiza por sí mismo
+            huerfanos = sorted(host for host, rep in representantes.items() if rep != host and detectadas.get(rep) is None)
+            if huerfanos:
+                detectadas.update(motor.ejecutar(huerfanos, cache=extensiones.http_cache))
+                representantes.update({host: host for host in huerfanos})
+            resultados = {host: detectadas.get(rep) for host, rep in representantes.items()}
+
+            ahora = extensiones.datetime.now()
+            filas = [
+                dict(subdomain_id=subdomains[host], tech_data=nombre[:64], version=(version or None) and version[:32],
+                     source='http' if representantes[host] == host else f'cluster:{representantes[host]}'[:128], created_at=ahora)
+                for host, tecnologias in resultados.items() if tecnologias
+                for nombre, version in tecnologias.items()
+            ]
+            # Las tecnologías de un host que cambió se reemplazan, no se acumulan
+            anteriores = Tech.query.filter(Tech.subdomain_id.in_(list(subdomains.values())))
+            antes = {f"{nombres[t.subdomain_id]}|{t.tech_data}": t.version or '' for t in anteriores.all()}
+            anteriores.delete(synchronize_session=False)
+            Bulk.insertar(Tech, filas, conflicto=['subdomain_id', 'tech_data'])
+            for subdominio in pendientes:
+                subdominio.tech_at = ahora
+            Snapshot.record(dominio.id, 'tech', {'tech': (
+                antes, {f"{nombres[f['subdomain_id']]}|{f['tech_data']}": f['version'] or '' for f in filas})})
+            extensiones.db.session.commit()
+            extensiones.scan_events.finalizar(canal, {'tecnologias': len(filas)})
+            return jsonify({'tech': resultados}), 200
+        except Exception as e:
+            extensiones.db.session.rollback()
+            return jsonify({'error': f'Error al detectar tecnologías: {str(e)}'}), 500
+        finally:
+            extensiones.scan_events.cerrar(canal)
 
     @staticmethod
     def services():
+        """
+        Escanea los puertos de los subdominios nuevos o cambiados de un dominio con nmap.
+
+        Cada escaneo (host y herramienta) es una tarea reanudable de ``TaskController``:
+        si el proceso muere a mitad del escaneo, la siguiente llamada solo corre las
+        tareas que no terminaron, y los reportes XML incompletos se descartan y se
+        reintentan. Con ``"full": true`` se escanean todos los subdominios. Con
+        ``"queue": true`` las tareas solo se encolan para los workers de ``flask scan_worker``.
+        Los hosts muertos según ``ReconController.liveness`` no se escanean.
+        El formato esperado es el siguiente:
+        {
+            "domain": "dominio.com",
+            "full": false,
+            "queue": false
+        }
+
+        Returns:
+            Response: Un objeto JSON con los puertos de cada reporte completo, el resumen de las tareas
+                y los hosts muertos salteados, o la cantidad de tareas encoladas.
+        """
         xml_output_path = f"{os.getcwd()}/result"
-    
+
         # Validar el directorio
-        validacion = Core.validarEscaneos(xml_output_path)
-        print(validacion)
-        if "El directorio no existe" in validacion:
+        if not os.path.isdir(xml_output_path):
             return jsonify({'error': 'Directorio no encontrado.'}), 400
-        if not "El directorio está vacío" in validacion:
-            return jsonify({'services': Core.manipularXML(xml_output_path)}), 200
 
-        # Obtener el nombre de dominio y subdominios
-        domain_name = request.get_json(force=True).get('domain')
-        subdomains = Subdomain.lookup(Domain.lookup(domain_name).id)
+        # Obtener el nombre de dominio y los subdominios nuevos o cambiados desde su último escaneo de puertos
+        data = request.get_json(force=True)
+        domain_name = data.get('domain')
+        dominio = Domain.lookup(domain_name)
+        if not dominio:
+            return jsonify({'error': 'Dominio no encontrado.'}), 404
+        candidatos = Subdomain.lookup(dominio.id) if data.get('full') else Subdomain.pending(dominio.id, 'ports_at')
+        # Los hosts muertos no se escanean: un -Pn -p- contra ellos solo agota timeouts
+        subdomains = ReconController.vivos(dominio, candidatos)
 
-        # Generar comandos de escaneo
-        services = [
-            f"sudo nmap -Pn -f -A -O -sVC -p- {script} {s.subdomain} -oX {os.path.join(xml_output_path, f'scan_{script.split()[-1] if script.split() else 'default'}_{s.subdomain.replace('/', '_')}.xml')} 2>/dev/null"
-            for s in subdomains for script in [' ', '--script vuln']
+        # Generar las tareas de escaneo; la batería de scripts vuln solo corre en el representante de cada grupo HTTP
+        # y sus hallazgos se copian a los miembros al ingerirla (``ReconController._guardarScripts``)
+        representantes = HttpProbe.representatives([s.id for s in subdomains], programados=True)
+        tareas = [
+            dict(subdomain_id=s.id, tool=herramienta,
+                 command=f"sudo nmap -Pn -f -A -O -sVC -p- --max-rate {{max_rate}} {script} {s.subdomain} -oX {{salida}} 2>/dev/null",
+                 output=os.path.join(xml_output_path, f"scan_{herramienta}_{s.subdomain.replace('/', '_')}.xml"),
+                 requires='sudo-nmap')
+            for s in subdomains for script, herramienta in ((' ', 'default'), ('--script vuln', 'vuln'))
+            if not script.strip() or representantes[s.id] == s.id
         ]
+        if data.get('queue'):
+            TaskController.encolar(dominio, 'services', tareas)
+            extensiones.db.session.commit()
+            return jsonify({'queued': len(tareas), 'dead': len(candidatos) - len(subdomains)}), 202
 
-        print(services)
-        #return services
-        return Core.escaneoConcurrente(services)
+        canal = domain_name
+        extensiones.scan_events.iniciar(canal)
+
+        def publicar_puerto(comando, linea):
+            puerto = Core.parsearPuerto(linea)
+            if puerto:
+                host = next((s.subdomain for s in subdomains if s.subdomain in comando), None)
+                extensiones.scan_events.publicar(canal, 'puerto', {'subdomain': host, **puerto},
+                                                 unico=f"{host}:{puerto['portid']}/{puerto['protocol']}")
+
+        try:
+            resumen = TaskController.ejecutar(dominio, 'services', tareas, on_line=publicar_puerto,
+                                              on_result=ReconController._progreso(canal, 'servicios', len(tareas)))
+            # Solo se dan por escaneados los hosts con el reporte principal completo
+            ReconController.ingerirTareas(resumen['done'])
+            extensiones.scan_events.finalizar(canal)
+        finally:
+            extensiones.scan_events.cerrar(canal)
+        return jsonify({
+            'services': [{'dominio': os.path.basename(t.output)[5:-4], **Core.parsearPuertosXML(t.output)} for t in resumen['done']],
+            'tasks': {'executed': resumen['executed'], 'resumed': resumen['resumed'], 'failed': resumen['failed']},
+            'dead': len(candidatos) - len(subdomains),
+        }), 200
 
     @staticmethod
     def certificate():
-        pass
+        """
+        Recolecta los certificados TLS de los subdominios de un dominio.
+
+        Cada certificado distinto se guarda una sola vez en ``CertificateBlob`` y cada
+        subdominio queda enlazado a su huella en ``Certificate``. Los nombres SAN que
+        pertenecen al dominio y aún no están registrados se agregan como subdominios.
+        El formato esperado es el siguiente:
+        {
+            "domain": "dominio.com"
+        }
+
+        Returns:
+            Response: Un objeto JSON con el resumen de la recolección o un mensaje de error con el código de estado correspondiente.
+        """
+        try:
+            data = request.get_json(force=True)
+            domain_name = data.get('domain')
+            if not extensiones.validators.domain(domain_name):
+                return jsonify({'error': 'Dominio inválido.'}), 400
+
+            dominio = Domain.lookup(domain_name)
+            if not dominio:
+                return jsonify({'error': 'Dominio no encontrado.'}), 404
+
+            subdomains = {s.subdomain: s.id for s in Subdomain.lookup(dominio.id)}
+            if not subdomains:
+                return jsonify({'error': f'{domain_name} no tiene subdominios registrados.'}), 404
+
+            # Certificado vigente de cada host, para registrar solo los que cambiaron
+            nombres = {id: host for host, id in subdomains.items()}
+            vigentes = Certificate.current(subdomains.values())
+            certificados, por_host = RecolectorTls(dns=extensiones.dns_cache).ejecutar(list(subdomains))
+            ahora = extensiones.datetime.now()
+            # Los hosts que no respondieron no cuentan como cambio: se desconoce su certificado actual
+            vistos = {host: huella for host, huella in por_host.items() if isinstance(huella, str)}
+            antes = {nombres[id]: huella for id, huella in vigentes.items() if nombres[id] in vistos}
+            Bulk.insertar(CertificateBlob, [
+                dict(fingerprint=c.huella, serial=c.serial[:64], subject=c.sujeto and c.sujeto[:255], issuer=c.emisor and c.emisor[:255],
+                     not_before=c.desde, not_after=c.hasta, san=','.join(c.nombres), der=c.der, created_at=ahora)
+                for c in certificados.values()
+            ], conflicto=['fingerprint'])
+            Bulk.insertar(Certificate, [
+                dict(subdomain_id=subdomains[host], certificate_data=huella, created_at=ahora, last_seen=ahora)
+                for host, huella in vistos.items()
+            ], conflicto=['subdomain_id', 'certificate_data'])
+            # Un certificado que vuelve (A -> B -> A) ya tiene su fila: pasa a ser el vigente por last_seen
+            Certificate.seen({subdomains[host]: huella for host, huella in vistos.items()}, ahora)
+            Snapshot.record(dominio.id, 'certificates', {'certificate': (antes, vistos)})
+
+            # Nombres SAN bajo el dominio como nuevos candidatos a subdominio
+            sufijo = f".{dominio.domain.lower()}"
+            candidatos = {
+                nombre[2:] if nombre.startswith('*.') else nombre
+                for c in certificados.values() for nombre in c.nombres
+            }
+            nuevos = sorted(n for n in candidatos if n.endswith(sufijo) and n not in subdomains)
+            Bulk.insertar(Subdomain, [
+                dict(domain_id=dominio.id, subdomain=nombre, waf='Pendiente', source='certificate', created_at=ahora)
+                for nombre in nuevos
+            ], conflicto=['domain_id', 'subdomain'])
+            extensiones.db.session.commit()
+
+            return jsonify({
+                'certificates': len(certificados),
+                'hosts': sum(isinstance(h, str) for h in por_host.values()),
+                'failed': {host: str(e) for host, e in por_host.items() if not isinstance(e, str)},
+                'new_subdomains': nuevos,
+            }), 200
+        except Exception as e:
+            extensiones.db.session.rollback()
+            return jsonify({'error': f'Error al recolectar certificados: {str(e)}'}), 500
+
+    @staticmethod
+    def enrich():
+        """
+        Anota los registros A y AAAA de los subdominios de un dominio con su ASN, organización y país.
+
+        Las búsquedas se hacen sobre el índice local ``ASN_INDEX_PATH`` (ver el comando
+        ``asn_index``), sin consultas a la red. Cada dirección distinta se busca una sola
+        vez y las filas se actualizan en un único lote.
+        El formato esperado es el siguiente:
+        {
+            "domain": "dominio.com"
+        }
+
+        Returns:
+            Response: Un objeto JSON con el ASN de cada dirección o un mensaje de error con el código de estado correspondiente.
+        """
+        ruta = current_app.config.get('ASN_INDEX_PATH')
+        if not ruta or not os.path.exists(ruta):
+            return jsonify({'error': 'No hay un índice ASN configurado (ASN_INDEX_PATH).'}), 503
+        try:
+            data = request.get_json(force=True)
+            domain_name = data.get('domain')
+            if not extensiones.validators.domain(domain_name):
+                return jsonify({'error': 'Dominio inválido.'}), 400
+
+            dominio = Domain.lookup(domain_name)
+            if not dominio:
+                return jsonify({'error': 'Dominio no encontrado.'}), 404
+
+            registros = extensiones.db.session.query(DnsRecord.id, DnsRecord.value).join(
+                Subdomain, Subdomain.id == DnsRecord.subdomain_id
+            ).filter(Subdomain.domain_id == dominio.id, DnsRecord.type.in_(('A', 'AAAA'))).all()
+            if not registros:
+                return jsonify({'error': f'{domain_name} no tiene registros A/AAAA.'}), 404
+
+            encontrados = IndiceAsn.abrir(ruta).buscarMuchos(valor for _, valor in registros)
+            filas = [
+                dict(id=id, asn=a.asn, as_org=a.organizacion and a.organizacion[:255], country=a.pais and a.pais[:2])
+                for id, valor in registros for a in (encontrados[valor],) if a
+            ]
+            if filas:
+                extensiones.db.session.execute(update(DnsRecord), filas)
+            extensiones.db.session.commit()
+
+            return jsonify({'asn': {
+                ip: dict(asn=a.asn, as_org=a.organizacion, country=a.pais) if a else None for ip, a in encontrados.items()
+            }}), 200
+        except Exception as e:
+            extensiones.db.session.rollback()
+            return jsonify({'error': f'Error al enriquecer registros: {str(e)}'}), 500
+
+    @staticmethod
+    def stream(domain_name):
+        """
+        Transmite por Server-Sent Events el progreso y los hallazgos del escaneo de un dominio.
+
+        Los eventos emitidos son ``progreso``, ``subdominio``, ``waf``, ``puerto``, ``error``, ``reset`` y ``fin``.
+        Para reanudar tras una reconexión se envía la última secuencia recibida en la
+        cabecera ``Last-Event-ID`` (o en el parámetro ``desde``); si esos eventos ya no
+        están en el buffer llega un evento ``reset`` y el cliente debe recargar el estado.
+        Si la etapa falla llegan ``error`` y ``fin``.
+
+        Como ``EventSource`` no puede enviar la cabecera ``Authorization``, el token se
+        toma también de la cookie ``JWT_COOKIE_NAME`` que deja ``/login`` (limitada a esta
+        ruta); se abre con ``new EventSource(url, {withCredentials: true})``.
+
+        Args:
+            domain_name (str): El dominio cuyo escaneo se quiere observar.
+
+        Returns:
+            Response: Un flujo ``text/event-stream`` o un mensaje de error con el código de estado correspondiente.
+        """
+        if not extensiones.validators.domain(domain_name):
+            return jsonify({'error': 'Dominio inválido.'}), 400
+
+        try:
+            desde = int(request.headers.get('Last-Event-ID') or request.args.get('desde', 0))
+        except ValueError:
+            return jsonify({'error': 'Secuencia inválida.'}), 400
+
+        eventos = extensiones.scan_events.escuchar(domain_name, desde)
+        return Response(stream_with_context(ScanEvents.formatear(e) for e in eventos),
+                        mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+    @staticmethod
+    def inventory():
+        """
+        Busca en el inventario de subdominios.
+
+        Parámetros de la URL (todos opcionales y combinables):
+            suffix: ``dev.example.com`` (el nombre y lo que está bajo él) o ``*.dev.example.com``.
+            q: Una subcadena del nombre (``vpn``).
+            waf: El WAF detectado.
+            tech: Una tecnología detectada (``Nginx``).
+            port: Un puerto abierto (``443``).
+            domain_id: El dominio al que pertenecen.
+            limit: Máximo de resultados (hasta 1000, 100 por defecto).
+            after: El ``next`` de la página anterior.
+
+        Returns:
+            Response: Un objeto JSON con los subdominios y el cursor de la página siguiente o un mensaje de error con el código de estado correspondiente.
+        """
+        argumentos = request.args
+        try:
+            limite = min(max(int(argumentos.get('limit', 100)), 1), 1000)
+            despues = int(argumentos.get('after', 0))
+            puerto = int(argumentos['port']) if argumentos.get('port') else None
+            domain_id = int(argumentos['domain_id']) if argumentos.get('domain_id') else None
+        except ValueError:
+            return jsonify({'error': 'Parámetros numéricos inválidos.'}), 400
+
+        consulta = Subdomain.search(argumentos.get('suffix'), argumentos.get('q'), argumentos.get('waf'), domain_id)
+        if argumentos.get('tech'):
+            consulta = consulta.filter(Tech.query.filter(
+                Tech.subdomain_id == Subdomain.id,
+                extensiones.db.func.lower(Tech.tech_data) == argumentos['tech'].strip().lower(),
+            ).exists())
+        if puerto is not None:
+            # services_open guarda los puertos abiertos separados por comas ("22,80,443,53/udp"); los TCP van sin protocolo
+            consulta = consulta.filter(PortsService.query.filter(
+                PortsService.subdomain_id == Subdomain.id,
+                ("," + PortsService.services_open + ",").contains(f",{puerto},"),
+            ).exists())
+        subdominios = consulta.filter(Subdomain.id > despues).limit(limite).all()
+        return jsonify({
+            'subdomains': Subdomain.serialize(subdominios),
+            'next': subdominios[-1].id if len(subdominios) == limite else None,
+        }), 200
+
+    @staticmethod
+    def expiring():
+        """
+        Lista los dominios cuyo registro expira antes de una fecha.
+
+        Espera el parámetro ``before`` en la URL (por ejemplo ``?before=2025-12-31``).
+
+        Returns:
+            Response: Un objeto JSON con los whois que expiran o un mensaje de error con el código de estado correspondiente.
+        """
+        fecha = Fechas.intentar(request.args.get('before'))
+        if fecha is None:
+            return jsonify({'error': 'Fecha inválida.'}), 400
+        return jsonify(Whois.serialize(Whois.expiringBefore(fecha))), 200
+
+    @staticmethod
+    def snapshots(domain_name):
+        """
+        Lista las instantáneas de los escaneos de un dominio.
+
+        Returns:
+            Response: Un objeto JSON con las instantáneas (etapa, cantidad de cambios y fecha) o un mensaje de error.
+        """
+        dominio = Domain.lookup(domain_name)
+        if not dominio:
+            return jsonify({'error': 'Dominio no encontrado.'}), 404
+        return jsonify(Snapshot.serialize(Snapshot.lookup(dominio.id))), 200
+
+    @staticmethod
+    def diff(domain_name):
+        """
+        Calcula los cambios entre dos instantáneas de un dominio.
+
+        Espera los parámetros ``from`` y ``to`` en la URL con los id de las instantáneas
+        (por ejemplo ``?from=12&to=40``). Sin ``from`` se compara contra el estado vacío
+        y sin ``to`` contra la última instantánea.
+
+        Returns:
+            Response: Un objeto JSON con las altas, bajas y modificaciones por tipo o un mensaje de error.
+        """
+        dominio = Domain.lookup(domain_name)
+        if not dominio:
+            return jsonify({'error': 'Dominio no encontrado.'}), 404
+        desde = request.args.get('from', 0, type=int)
+        hasta = request.args.get('to', type=int)
+        if hasta is None:
+            ultima = Snapshot.query.filter_by(domain_id=dominio.id).order_by(Snapshot.id.desc()).first()
+            hasta = ultima.id if ultima else 0
+        for id in (desde, hasta):
+            if id and not Snapshot.query.filter_by(id=id, domain_id=dominio.id).first():
+                return jsonify({'error': f'Instantánea {id} no encontrada.'}), 404
+        return jsonify({'from': desde, 'to': hasta, 'changes': Snapshot.diff(dominio.id, desde, hasta)}), 200
+
+    @staticmethod
+    def _ingestarZona(dominio):
+        """
+        Crea el consumidor que guarda por lotes los registros de una transferencia de zona.
+
+        Los nombres bajo el dominio se insertan en ``Subdomain`` y sus registros A, AAAA
+        y CNAME en ``DnsRecord``, ignorando los que ya existen. Cada lote se escribe y se
+        descarta, por lo que la memoria no crece con el tamaño de la zona. ``Axfr`` llama
+        al consumidor desde otro hilo, así que cada lote usa su propio contexto de aplicación
+        (y su propia sesión).
+        """
+        sufijo = f".{dominio.domain.lower()}"
+        app, domain_id = current_app._get_current_object(), dominio.id
+
+        def consumidor(registros):
+            with app.app_context():
+                ahora = extensiones.datetime.now()
+                nombres = {r.nombre for r in registros if r.nombre.endswith(sufijo) and not r.nombre.startswith('*')}
+                try:
+                    Bulk.insertar(Subdomain, [
+                        dict(domain_id=domain_id, subdomain=nombre, waf='Pendiente', source='axfr', created_at=ahora)
+                        for nombre in nombres
+                    ], conflicto=['domain_id', 'subdomain'])
+                    ids = Bulk.ids(Subdomain, 'subdomain', nombres, domain_id=domain_id)
+                    Bulk.insertar(DnsRecord, [
+                        dict(subdomain_id=ids[r.nombre], type=r.tipo, value=r.valor, ttl=r.ttl, source='axfr', created_at=ahora)
+                        for r in registros if r.nombre in ids and r.tipo in ('A', 'AAAA', 'CNAME')
+                    ], conflicto=['subdomain_id', 'type', 'value'])
+                    extensiones.db.session.commit()
+                except Exception:
+                    extensiones.db.session.rollback()
+                    raise
+        return consumidor
+
+    @staticmethod
+    def _guardarSubdominios(dominio, existentes, subdomains, nuevos, cambiados, eliminados, huellas, wafs, ahora):
+        """
+        Inserta los subdominios nuevos, actualiza los cambiados, expira los eliminados y registra la instantánea.
+
+        Args:
+            dominio (Domain): El dominio escaneado.
+            existentes (dict): Un diccionario subdominio -> fila, incluidos los eliminados.
+            subdomains (list): Los subdominios que devolvió la enumeración.
+            nuevos (list): Los que no estaban registrados.
+            cambiados (list): Los registrados cuya huella cambió (o que reaparecieron).
+            eliminados (list): Los vigentes que se dan por eliminados.
+            huellas (dict): Un diccionario subdominio -> huella de los enumerados.
+            wafs (dict): Un diccionario subdominio -> ``(waf, origen)`` de los nuevos y cambiados.
+            ahora (datetime): La fecha del escaneo.
+        """
+        vigentes = {s: fila for s, fila in existentes.items() if fila.deleted_at is None}
+        # El estado anterior se lee antes de actualizar las filas
+        antes = {s: fila.fingerprint or '' for s, fila in vigentes.items()}
+        Bulk.insertar(Subdomain, [
+            dict(domain_id=dominio.id, subdomain=s, waf=wafs[s][0], waf_source=wafs[s][1], fingerprint=huellas[s],
+                 source='enum', created_at=ahora, update_at=ahora)
+            for s in nuevos
+        ], conflicto=['domain_id', 'subdomain'])
+        for s in cambiados:
+            fila = existentes[s]
+            fila.waf, fila.waf_source = wafs[s]
+            fila.fingerprint, fila.update_at, fila.deleted_at = huellas[s], ahora, None
+        for s in eliminados:
+            existentes[s].deleted_at = ahora
+        # Los nombres que no se expiraron siguen vigentes aunque esta corrida no los haya devuelto
+        despues = {s: fila.fingerprint or '' for s, fila in vigentes.items() if fila.deleted_at is None}
+        despues.update({s: huellas[s] for s in subdomains})
+        Snapshot.record(dominio.id, 'subdomains', {'subdomain': (antes, despues)})
+
+    @staticmethod
+    def _enumeracionCompleta(salidas, comandos):
+        """
+        Indica si todas las herramientas de enumeración terminaron sin error.
+
+        Args:
+            salidas (dict): Un diccionario comando -> salida de ``Core.escaneoConcurrente``.
+            comandos (dict): El resultado de ``Decodificador.comandosSubdominios``.
+
+        Returns:
+            bool: True si cada comando produjo una salida propia y no un mensaje de error.
+        """
+        return set(salidas) >= set(comandos) and all(
+            isinstance(salida, str) and not salida.startswith((f"{comando} generated an exception", f"{comando} failed with error"))
+            for comando, salida in salidas.items()
+        )
+
+    @staticmethod
+    def _resolverNombres(canal, hosts):
+        """Ejecuta la etapa DNS publicando su avance; las respuestas quedan en ``extensiones.dns_cache``."""
+        configuracion = current_app.config
+        resolvedor = ResolvedorDns(
+            cache=extensiones.dns_cache,
+            servidores=configuracion.get('DNS_RESOLVERS') or None,
+            ttl_negativo=configuracion.get('DNS_NEGATIVE_TTL', 60),
+        )
+        return resolvedor.ejecutar(hosts, on_result=ReconController._progreso(canal, 'dns', len(hosts)))
+
+    @staticmethod
+    def _guardarDns(ids, resueltos):
+        """
+        Guarda en ``DnsRecord`` la vista DNS actual de los subdominios resueltos.
+
+        Los registros nuevos se insertan y los de origen ``dns`` que ya no aparecen en la
+        respuesta se eliminan; los subdominios que no pudieron resolverse no se tocan, y de
+        los que resolvieron solo algunos tipos (A sí, AAAA no) solo se reemplazan esos tipos.
+
+        Args:
+            ids (dict): Un diccionario subdominio -> id.
+            resueltos (dict): El resultado de ``ResolvedorDns.ejecutar``.
+        """
+        ahora = extensiones.datetime.now()
+        actuales = {
+            (ids[host], r.tipo, r.valor[:512]): r.ttl
+            for host, registros in resueltos.items() if registros is not None and host in ids
+            for r in registros
+        }
+        resueltos_ids = [ids[host] for host, registros in resueltos.items() if registros is not None and host in ids]
+        if not resueltos_ids:
+            return
+        fallidos = {
+            ids[host]: set(registros.fallidos)
+            for host, registros in resueltos.items() if registros is not None and host in ids and not registros.completa
+        }
+        obsoletos = [
+            id for id, subdomain_id, tipo, valor in extensiones.db.session.query(
+                DnsRecord.id, DnsRecord.subdomain_id, DnsRecord.type, DnsRecord.value
+            ).filter(DnsRecord.subdomain_id.in_(resueltos_ids), DnsRecord.source == 'dns')
+            if (subdomain_id, tipo, valor) not in actuales and tipo not in fallidos.get(subdomain_id, ())
+        ]
+        if obsoletos:
+            DnsRecord.query.filter(DnsRecord.id.in_(obsoletos)).delete(synchronize_session=False)
+        Bulk.insertar(DnsRecord, [
+            dict(subdomain_id=subdomain_id, type=tipo, value=valor, ttl=ttl, source='dns', created_at=ahora)
+            for (subdomain_id, tipo, valor), ttl in actuales.items()
+        ], conflicto=['subdomain_id', 'type', 'value'])
+
+    @staticmethod
+    def _inexistente(registros):
+        """Indica si la respuesta DNS de un host dice que no existe (completa y sin registros)."""
+        return registros is not None and registros.completa and not registros
+
+    @staticmethod
+    def _huellas(hosts, resueltos, sondeos, anteriores=None):
+        """
+        Calcula la huella de la vista DNS/HTTP de cada host para detectar cambios entre escaneos.
+
+        Detrás de un CNAME solo cuenta la cadena de nombres: las direcciones de un CDN
+        rotan entre consultas y marcarían como cambiado a un host que no cambió. Un host
+        cuya respuesta DNS quedó incompleta (A sí, AAAA no) conserva su huella anterior.
+
+        Args:
+            hosts (list): Los hosts.
+            resueltos (dict): El resultado de ``ResolvedorDns.ejecutar``.
+            sondeos (dict): El resultado de ``SondaHttp.ejecutar``.
+            anteriores (dict, optional): Un diccionario host -> huella guardada.
+
+        Returns:
+            dict: Un diccionario host -> huella (SHA-1 en hexadecimal).
+        """
+        anteriores = anteriores or {}
+        huellas = {}
+        for host in hosts:
+            registros = resueltos.get(host)
+            if registros is not None and not registros.completa and anteriores.get(host):
+                huellas[host] = anteriores[host]
+                continue
+            registros = registros or []
+            cnames = sorted({r.valor for r in registros if r.tipo == 'CNAME'})
+            dns = cnames or sorted({r.valor for r in registros if r.tipo in ('A', 'AAAA')})
+            sondeo = sondeos.get(host)
+            http = (sondeo.estado, sondeo.titulo, sondeo.cabeceras.get('server')) if sondeo else None
+            huellas[host] = hashlib.sha1(repr((dns, http)).encode('utf-8')).hexdigest()
+        return huellas
+
+    @staticmethod
+    def _sondear(canal, hosts):
+        """Ejecuta la etapa de sondeo HTTP publicando su avance; las respuestas quedan en ``extensiones.http_cache``."""
+        configuracion = current_app.config
+        sonda = SondaHttp(
+            cache=extensiones.http_cache,
+            max_redirecciones=configuracion.get('HTTP_PROBE_MAX_REDIRECTS', 3),
+            max_cuerpo=configuracion.get('HTTP_PROBE_MAX_BODY', 256 * 1024),
+            dns=extensiones.dns_cache,
+        )
+        return sonda.ejecutar(hosts, on_result=ReconController._progreso(canal, 'sondeo', len(hosts)))
+
+    @staticmethod
+    def _comprobarVida(canal, dominio, candidatos=None, forzar=False):
+        """
+        Comprueba la vida de los subdominios vencidos de un dominio y guarda su estado.
+
+        Un resultado ``unknown`` (falla del DNS o local) no pisa un estado conocido: el host
+        conserva su estado anterior y se vuelve a comprobar en la próxima pasada.
+
+        Args:
+            canal (str | None): El canal donde publicar el avance, o None para no publicarlo.
+            dominio (Domain): El dominio.
+            candidatos (list, optional): Limita la comprobación a estos subdominios.
+            forzar (bool): Comprueba todos los subdominios aunque no hayan vencido.
+
+        Returns:
+            tuple: El diccionario host -> ``ResultadoVida`` de los comprobados y la lista de los que revivieron.
+        """
+        configuracion = current_app.config
+        ahora = extensiones.datetime.now()
+        if forzar:
+            pendientes = Subdomain.lookup(dominio.id)
+        else:
+            pendientes = Subdomain.stale_liveness(
+                dominio.id,
+                ahora - timedelta(seconds=configuracion.get('LIVENESS_TTL', 3600)),
+                ahora - timedelta(seconds=configuracion.get('LIVENESS_DEAD_TTL', 86400)),
+            )
+        if candidatos is not None:
+            ids = {s.id for s in candidatos}
+            pendientes = [s for s in pendientes if s.id in ids]
+        if not pendientes:
+            return {}, []
+
+        sonda = SondaVida(
+            ResolvedorDns(
+                cache=extensiones.dns_cache,
+                servidores=configuracion.get('DNS_RESOLVERS') or None,
+                ttl_negativo=configuracion.get('DNS_NEGATIVE_TTL', 60),
+            ),
+            puertos=configuracion.get('LIVENESS_PORTS') or PUERTOS_TOP,
+            timeout=configuracion.get('LIVENESS_TIMEOUT', 1.5),
+            concurrencia=configuracion.get('LIVENESS_CONCURRENCY', 512),
+        )
+        hosts = [s.subdomain for s in pendientes]
+        resultados = sonda.ejecutar(
+            hosts, on_result=ReconController._progreso(canal, 'vida', len(hosts)) if canal is not None else None)
+
+        antes = {s.subdomain: s.liveness for s in pendientes if s.liveness in (VIVO, MUERTO)}
+        revividos = []
+        for subdominio in pendientes:
+            estado = resultados[subdominio.subdomain].estado
+            if estado == DESCONOCIDO and subdominio.liveness in (VIVO, MUERTO):
+                continue
+            if subdominio.liveness == MUERTO and estado == VIVO:
+                revividos.append(subdominio.subdomain)
+            subdominio.liveness, subdominio.liveness_at = estado, ahora
+        Snapshot.record(dominio.id, 'liveness', {'liveness': (
+            antes, {s.subdomain: s.liveness for s in pendientes if s.liveness in (VIVO, MUERTO)})})
+        return resultados, revividos
+
+    @staticmethod
+    def vivos(dominio, subdomains):
+        """
+        Quita de una lista de subdominios los que están muertos, comprobando antes los vencidos.
+
+        Los de estado desconocido se conservan: no se deja de escanear un host sin pruebas de que no responde.
+
+        Returns:
+            list: Los subdominios vivos o de estado desconocido, en el mismo orden.
+        """
+        if subdomains:
+            ReconController._comprobarVida(None, dominio, candidatos=subdomains)
+            extensiones.db.session.commit()
+        return [s for s in subdomains if s.liveness != MUERTO]
+
+    @staticmethod
+    def _agrupar(sondeos):
+        """
+        Agrupa los hosts sondeados por cuerpo idéntico (hash) o casi idéntico (simhash).
+
+        Returns:
+            dict: Un diccionario host -> host representante de su grupo (él mismo si no tiene grupo).
+        """
+        agrupador = Agrupador(umbral=current_app.config.get('HTTP_CLUSTER_MAX_DISTANCE', 6))
+        for host, r in sorted(sondeos.items()):
+            if r:
+                agrupador.agregar(host, r.estado, r.hash_cuerpo if r.largo else None, r.simhash)
+            else:
+                agrupador.agregar(host)
+        return agrupador.representantes()
+
+    @staticmethod
+    def _guardarSondeos(ids, sondeos, representantes=None):
+        """
+        Reemplaza las filas de ``HttpProbe`` de los subdominios sondeados.
+
+        Args:
+            ids (dict): Un diccionario subdominio -> id.
+            sondeos (dict): El resultado de ``SondaHttp.ejecutar``.
+            representantes (dict, optional): El resultado de ``ReconController._agrupar``.
+        """
+        ahora = extensiones.datetime.now()
+        representantes = representantes or {}
+        filas = [
+            dict(subdomain_id=ids[host], url=r.url[:512], status=r.estado, title=r.titulo, headers=json.dumps(r.cabeceras),
+                 body_hash=r.hash_cuerpo, simhash=None if r.simhash is None else f"{r.simhash:016x}",
+                 cluster_id=ids.get(representantes[host]) if representantes.get(host, host) != host else None,
+                 content_length=r.largo, elapsed_ms=r.tiempo, redirects=r.redirecciones, created_at=ahora)
+            for host, r in sondeos.items() if r and host in ids
+        ]
+        HttpProbe.query.filter(HttpProbe.subdomain_id.in_([f['subdomain_id'] for f in filas])).delete(synchronize_session=False)
+        Bulk.insertar(HttpProbe, filas, conflicto=['subdomain_id'])
+
+    @staticmethod
+    def ingerirTareas(tareas):
+        """
+        Guarda en lote los resultados de las tareas nmap terminadas (locales o de los workers de la cola).
+
+        Las tareas ``default`` de la etapa ``services`` traen el reporte de puertos; se
+        agrupan por dominio y directorio para una sola inserción masiva e instantánea por grupo.
+        Las demás (scripts NSE) se guardan en ``Vuln`` con ``ReconController._guardarScripts``.
+        """
+        grupos = {}
+        for tarea in tareas:
+            if tarea.stage == 'services' and tarea.tool == 'default':
+                grupos.setdefault((tarea.domain_id, os.path.dirname(tarea.output)), []).append(tarea.subdomain_id)
+        ahora = extensiones.datetime.now()
+        ReconController._guardarScripts([t for t in tareas if not (t.stage == 'services' and t.tool == 'default')], ahora)
+        for (domain_id, directorio), ids in grupos.items():
+            subdomains = Subdomain.query.filter(Subdomain.id.in_(ids)).all()
+            ReconController._guardarPuertos(Domain.query.get(domain_id), subdomains, directorio, ahora)
+            for subdominio in subdomains:
+                subdominio.ports_at = ahora
+        extensiones.db.session.commit()
+
+    @staticmethod
+    def _guardarScripts(tareas, ahora):
+        """
+        Guarda en ``Vuln`` los resultados de los scripts NSE de las tareas terminadas.
+
+        Los scripts corren solo en el representante de cada grupo de respuestas HTTP
+        equivalentes, así que sus hallazgos se copian a los demás miembros vigentes del
+        grupo con ``source="cluster:<representante>"``, salvo a los que se escanearon por
+        sí mismos con la misma herramienta. Los hallazgos anteriores de cada host y
+        herramienta se reemplazan.
+        """
+        tareas = [t for t in tareas if os.path.exists(t.output)]
+        if not tareas:
+            return
+        miembros = HttpProbe.members({t.subdomain_id for t in tareas})
+        involucrados = {t.subdomain_id for t in tareas} | {m for ids in miembros.values() for m in ids}
+        nombres = dict(Subdomain.query.with_entities(Subdomain.id, Subdomain.subdomain).filter(
+            Subdomain.id.in_(involucrados), Subdomain.deleted_at.is_(None)).all())
+        directos = {(t.subdomain_id, t.tool) for t in tareas}
+
+        filas, reemplazados = [], {}
+        for tarea in tareas:
+            hallazgos = Core.parsearScriptsXML(tarea.output)
+            destinos = [(tarea.subdomain_id, 'nmap')] + [
+                (m, f"cluster:{nombres.get(tarea.subdomain_id, tarea.subdomain_id)}"[:128])
+                for m in miembros.get(tarea.subdomain_id, []) if m in nombres and (m, tarea.tool) not in directos
+            ]
+            for subdomain_id, origen in destinos:
+                reemplazados.setdefault(tarea.tool, set()).add(subdomain_id)
+                filas.extend(
+                    dict(subdomain_id=subdomain_id, tool=tarea.tool, vulnerability_data=(h['script'] or '')[:64],
+                         port=h['port'], output=h['output'], source=origen, created_at=ahora)
+                    for h in hallazgos
+                )
+        for herramienta, ids in reemplazados.items():
+            Vuln.query.filter(Vuln.subdomain_id.in_(ids), Vuln.tool == herramienta).delete(synchronize_session=False)
+        Bulk.insertar(Vuln, filas)
+
+    @staticmethod
+    def _guardarPuertos(dominio, subdomains, directorio, ahora):
+        """
+        Guarda en ``PortsService`` los puertos de los reportes XML recién generados y registra la instantánea.
+
+        Los hosts sin reporte (nmap falló o no terminó) conservan sus puertos anteriores.
+        """
+        reportes = {}
+        for subdominio in subdomains:
+            ruta = os.path.join(directorio, f"scan_default_{subdominio.subdomain.replace('/', '_')}.xml")
+            if os.path.exists(ruta):
+                reportes[subdominio] = Core.parsearPuertosXML(ruta)
+        ids = [s.id for s in reportes]
+        estados = ('open', 'closed', 'filtered')
+        columnas = dict(zip(estados, ('services_open', 'services_close', 'services_filtered')))
+
+        # Los puertos TCP se guardan sin protocolo ("443") y los demás con él ("53/udp")
+        antes = {}
+        anteriores = PortsService.query.filter(PortsService.subdomain_id.in_(ids))
+        nombres = {s.id: s.subdomain for s in reportes}
+        for fila in anteriores.all():
+            for estado, columna in columnas.items():
+                for puerto in filter(None, (getattr(fila, columna) or '').split(',')):
+                    antes[f"{nombres[fila.subdomain_id]}:{puerto if '/' in puerto else f'{puerto}/tcp'}"] = estado
+        anteriores.delete(synchronize_session=False)
+
+        despues, filas = {}, []
+        for subdominio, reporte in reportes.items():
+            puertos = {estado: [] for estado in estados}
+            for puerto, protocolo, estado in zip(reporte['portid'], reporte['protocol'], reporte['estado']):
+                if estado in puertos:
+                    protocolo = protocolo or 'tcp'
+                    puertos[estado].append(puerto if protocolo == 'tcp' else f"{puerto}/{protocolo}")
+                    despues[f"{subdominio.subdomain}:{puerto}/{protocolo}"] = estado
+            filas.append(dict(subdomain_id=subdominio.id, created_at=ahora,
+                              **{columnas[estado]: ','.join(lista) for estado, lista in puertos.items()}))
+        Bulk.insertar(PortsService, filas)
+        Snapshot.record(dominio.id, 'services', {'port': (antes, despues)})
+
+    @staticmethod
+    def _progreso(canal, etapa, total, callback=None):
+        """Crea un callback ``on_result`` que publica el avance de una etapa."""
+        completados = [0]
+        extensiones.scan_events.publicar(canal, 'progreso', {'etapa': etapa, 'completados': 0, 'total': total})
+
+        def on_result(comando, salida):
+            completados[0] += 1
+            if callback is not None:
+                callback(comando, salida)
+            extensiones.scan_events.publicar(canal, 'progreso', {'etapa': etapa, 'completados': completados[0], 'total': total})
+        return on_result
     '''
     def create():
         """
@@ -0,0 +1,316 @@
+from flask import jsonify, current_app
+from app.models.domainModel import Domain
+from app.models.scantaskModel import ScanTask
+from app.extensions import extensiones
+from app.utils.core import Core
+from app.utils.checkpoint import Checkpoint
+from app.utils.bulk import Bulk
+from app.utils.aimd import congestion
+from app.utils.nmapShard import FragmentadorNmap
+from sqlalchemy.exc import OperationalError
+
+import os
+import time
+import socket
+import concurrent.futures
+from datetime import timedelta
+
+
+class TaskController():
+    """
+    Ejecución reanudable de las tareas nmap de un escaneo.
+
+    Cada tarea (host, etapa, herramienta) se guarda en ``ScanTask`` y su estado se
+    confirma en la base en cuanto termina, así que si el proceso muere a mitad de
+    un escaneo la siguiente llamada solo corre las tareas que no quedaron
+    ``done``. Una tarea ``done`` cuyo reporte ya no existe o no valida se vuelve
+    a correr; un reporte truncado se descarta y la tarea se reintenta hasta
+    ``SCAN_TASK_MAX_ATTEMPTS`` veces.
+    """
+
+    @staticmethod
+    def ejecutar(dominio, etapa, tareas, on_line=None, on_result=None):
+        """
+        Ejecuta (o reanuda) las tareas de una etapa de un dominio.
+
+        Si todas las tareas indicadas ya habían terminado (bien o agotando sus reintentos),
+        el escaneo anterior se da por completo y se empieza uno nuevo.
+
+        Args:
+            dominio (Domain): El dominio escaneado.
+            etapa (str): La etapa (``services``, ``vuln``).
+            tareas (list): Diccionarios con ``subdomain_id``, ``tool``, ``output`` (la ruta del reporte XML)
+                y ``command``, con ``{salida}`` en el lugar de la ruta de ``-oX``.
+            on_line (callable, optional): Callback ``on_line(command, linea)`` por cada línea producida.
+            on_result (callable, optional): Callback ``on_result(command, output)`` al terminar cada comando.
+
+        Returns:
+            dict: Las tareas terminadas (``done``: lista de ``ScanTask``), cuántas se ejecutaron,
+                cuántas se reanudaron ya completas y las que fallaron (ruta -> error).
+        """
+        filas = TaskController.encolar(dominio, etapa, tareas)
+        extensiones.db.session.commit()
+        owner = f"{socket.gethostname()}:{os.getpid()}:local"
+        maximo = current_app.config.get('SCAN_TASK_MAX_ATTEMPTS', 3)
+        reanudadas = sum(f.status == 'done' and Checkpoint.validar(f.output) is None for f in filas)
+        ejecutadas = 0
+        while True:
+            # Las tareas ``running`` de un proceso que murió se vuelven a correr
+            ahora = extensiones.datetime.now()
+            pendientes = [
+                f for f in filas
+                if not (f.status == 'done' and Checkpoint.validar(f.output) is None)
+                and not (f.status == 'failed' and f.attempts >= maximo)
+                # Las que tiene un worker de la cola con el lease vigente no se tocan
+                and not (f.status == 'running' and f.lease_expires is not None and f.lease_expires > ahora)
+            ]
+            if not pendientes:
+                extensiones.db.session.commit()
+                break
+            # Cada tarea se toma con un UPDATE condicional, igual que en la cola: si un worker
+            # la tomó entre la lectura y la toma, queda para él
+            pendientes = [f for f in pendientes if ScanTask.acquire(f, owner, ahora)]
+            extensiones.db.session.commit()
+            if not pendientes:
+                break
+            for fila in pendientes:
+                Checkpoint.descartar(fila.output, reporte=True)
+            comandos = {TaskController._comando(f, f.output): f for f in pendientes}
+            # Con NMAP_SHARDS el descubrimiento de los escaneos de rango completo se divide en
+            # fragmentos de puertos que compiten por el mismo control de admisión que el resto; al
+            # terminar el último fragmento, la detección corre en una pasada sobre los puertos abiertos
+            fragmentador = FragmentadorNmap(current_app.config.get('NMAP_SHARDS', 1))
+            fragmentos, restantes, salidas, detalles = {}, {}, {}, {}
+            for comando in comandos:
+                partes = fragmentador.dividir(comando) or [(comando, None)]
+                restantes[comando], salidas[comando] = len(partes), []
+                for indice, (parte, reporte) in enumerate(partes):
+                    fragmentos[parte] = (comando, reporte, indice if reporte is not None else None)
+
+            def terminar_fragmento(parte, salida):
+                comando, _, _ = fragmentos[parte]
+                salidas[comando].append(salida if isinstance(salida, str) else str(salida))
+                restantes[comando] -= 1
+                if restantes[comando]:
+                    return
+                reportes = [r for c, r, _ in fragmentos.values() if c == comando and r is not None]
+                if reportes:
+                    detalle, error = FragmentadorNmap.completar(comando, reportes)
+                    if detalle is not None:
+                        detalles[detalle] = comando
+                        return
+                    if error is not None:
+                        salidas[comando].append(error)
+                terminar(comando, "\n".join(salidas[comando]))
+
+            def terminar_detalle(detalle, salida):
+                comando = detalles[detalle]
+                salidas[comando].append(salida if isinstance(salida, str) else str(salida))
+                terminar(comando, "\n".join(salidas[comando]))
+
+            def llave_fragmento(parte):
+                comando, _, indice = fragmentos[parte]
+                host = comandos[comando].subdomain_id
+                if indice is None:
+                    return (host, Core.herramienta(parte))
+                return FragmentadorNmap.llave(host, indice, Core.herramienta(parte))
+
+            def terminar(comando, salida):
+                fila = comandos[comando]
+                TaskController._observar(fila, salida)
+                error = Checkpoint.confirmar(fila.output)
+                # Cada tarea se confirma al terminar (es el punto de reanudación), solo si sigue tomada
+                ScanTask.finish(fila.id, owner, dict(
+                    status='done' if error is None else 'failed', error=error and error[:255],
+                    finished_at=extensiones.datetime.now()))
+                if on_result is not None:
+                    on_result(comando, salida)
+
+            Core.escaneoConcurrente(list(fragmentos), on_line=on_line, on_result=terminar_fragmento, control=extensiones.concurrencia,
+                                    llave=llave_fragmento)
+            if detalles:
+                Core.escaneoConcurrente(list(detalles), on_line=on_line, on_result=terminar_detalle, control=extensiones.concurrencia,
+                                        llave=lambda detalle: (comandos[detalles[detalle]].subdomain_id, Core.herramienta(detalle)))
+            ejecutadas += len(comandos)
+
+        return {
+            'done': [f for f in filas if f.status == 'done'],
+            'executed': ejecutadas,
+            'resumed': reanudadas,
+            'failed': {f.output: f.error for f in filas if f.status != 'done'},
+        }
+
+    @staticmethod
+    def encolar(dominio, etapa, tareas):
+        """
+        Registra las tareas de una etapa de un dominio sin ejecutarlas.
+
+        Las tareas ya registradas conservan su estado (para reanudarlas); si todas habían
+        terminado (bien o agotando sus reintentos), se reinician para un escaneo nuevo.
+        Los workers de ``flask scan_worker`` toman las ``pending`` de la cola.
+
+        Args:
+            dominio (Domain): El dominio escaneado.
+            etapa (str): La etapa (``services``, ``vuln``).
+            tareas (list): Diccionarios con ``subdomain_id``, ``tool``, ``output``, ``command`` y,
+                opcionalmente, ``requires`` (la capacidad que necesita el worker).
+
+        Returns:
+            list: Las ``ScanTask`` de las tareas indicadas (sin confirmar).
+        """
+        ahora = extensiones.datetime.now()
+        Bulk.insertar(ScanTask, [
+            dict(domain_id=dominio.id, subdomain_id=t['subdomain_id'], stage=etapa, tool=t['tool'], command=t['command'],
+                 output=t['output'], requires=t.get('requires'), status='pending', attempts=0, created_at=ahora)
+            for t in tareas
+        ], conflicto=['subdomain_id', 'stage', 'tool'])
+        extensiones.db.session.flush()
+        especificaciones = {(t['subdomain_id'], t['tool']): t for t in tareas}
+        filas = [f for f in ScanTask.lookup(dominio.id, etapa) if (f.subdomain_id, f.tool) in especificaciones]
+
+        # Un escaneo terminado (sin tareas por correr ni reintentos) no se reanuda: esta llamada empieza uno nuevo
+        maximo = current_app.config.get('SCAN_TASK_MAX_ATTEMPTS', 3)
+        if filas and all(f.status == 'done' or (f.status == 'failed' and f.attempts >= maximo) for f in filas):
+            for fila in filas:
+                fila.status, fila.attempts, fila.error = 'pending', 0, None
+        for fila in filas:
+            if fila.status != 'done':
+                especificacion = especificaciones[(fila.subdomain_id, fila.tool)]
+                fila.command, fila.output = especificacion['command'], especificacion['output']
+                fila.requires = especificacion.get('requires')
+        return filas
+
+    @staticmethod
+    def trabajar(etiquetas=(), concurrencia=4, directorio=None, lease=300, espera=5, ingerir=None,
+                 salir_sin_tareas=False, on_event=None):
+        """
+        Bucle de un worker de la cola distribuida de tareas nmap.
+
+        Toma tareas ``pending`` (o cuyo lease venció) que su capacidad le permite, las
+        corre en un pool de ``concurrencia`` hilos y renueva su lease con un latido cada
+        ``lease / 3`` segundos mientras corren. Al terminar confirma el reporte (con
+        ``Checkpoint``) y cierra la tarea solo si conserva el lease; las tareas cerradas
+        en cada vuelta se entregan juntas a ``ingerir`` para guardarlas en lote. Al
+        detenerse devuelve a la cola las tareas que tenía en curso.
+
+        Args:
+            etiquetas (list): Las capacidades del worker (por ejemplo ``sudo-nmap``).
+            concurrencia (int): Cuántas tareas corre a la vez.
+            directorio (str, optional): Dónde escribir los reportes; por defecto ``./result``.
+            lease (int): Segundos de lease sin latido antes de que otro worker pueda tomar la tarea.
+            espera (int): Segundos entre consultas a la cola cuando está vacía.
+            ingerir (callable, optional): Recibe la lista de ``ScanTask`` terminadas en cada vuelta.
+            salir_sin_tareas (bool): Termina cuando la cola queda vacía en lugar de esperar.
+            on_event (callable, optional): Callback ``on_event(tarea, estado)`` por cada tarea tomada o cerrada.
+
+        Returns:
+            int: La cantidad de tareas cerradas.
+        """
+        owner = f"{socket.gethostname()}:{os.getpid()}"
+        duracion = timedelta(seconds=lease)
+        directorio = directorio or os.path.join(os.getcwd(), 'result')
+        maximo = current_app.config.get('SCAN_TASK_MAX_ATTEMPTS', 3)
+        fragmentador = FragmentadorNmap(current_app.config.get('NMAP_SHARDS', 1))
+        en_curso, cerradas, ultimo_latido = {}, 0, time.monotonic()
+        pool = concurrent.futures.ThreadPoolExecutor(concurrencia)
+        try:
+            while True:
+                # El pool es el tope; el control adaptativo decide cuántas tareas tener en vuelo
+                libres = min(concurrencia, extensiones.concurrencia.limite(('*', 'nmap'))) - len(en_curso)
+                if libres > 0:
+                    try:
+                        tomadas = ScanTask.claim(owner, etiquetas, libres, duracion, extensiones.datetime.now())
+                    except OperationalError:
+                        # Base ocupada por otro worker (SQLite): se reintenta en la próxima vuelta
+                        extensiones.db.session.rollback()
+                        tomadas = []
+                    for tarea in tomadas:
+                        ruta = os.path.join(directorio, tarea.stage, os.path.basename(tarea.output))
+                        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+                        Checkpoint.descartar(ruta, reporte=True)
+                        en_curso[pool.submit(
+                            fragmentador.ejecutar, TaskController._comando(tarea, ruta), control=extensiones.concurrencia,
+                            llave=(tarea.subdomain_id, 'nmap'))] = (tarea.id, tarea.attempts, ruta)
+                        if on_event is not None:
+                            on_event(tarea, 'running')
+                if not en_curso:
+                    if salir_sin_tareas:
+                        return cerradas
+                    time.sleep(espera)
+                    continue
+
+                listos, _ = concurrent.futures.wait(en_curso, timeout=espera, return_when=concurrent.futures.FIRST_COMPLETED)
+                if time.monotonic() - ultimo_latido >= lease / 3:
+                    try:
+                        ScanTask.renew(owner, duracion, extensiones.datetime.now())
+                        ultimo_latido = time.monotonic()
+                    except OperationalError:
+                        extensiones.db.session.rollback()
+
+                terminadas = []
+                for futuro in listos:
+                    id, intentos, ruta = en_curso.pop(futuro)
+                    # El total ('*', 'nmap') ya lo ajustó el fragmentador al terminar el comando
+                    salida = futuro.result()
+                    error = Checkpoint.confirmar(ruta)
+                    # Un reporte incompleto vuelve a la cola hasta agotar los intentos
+                    estado = 'done' if error is None else ('failed' if intentos >= maximo else 'pending')
+                    cerrada = ScanTask.finish(id, owner, dict(
+                        status=estado, error=error and error[:255], output=ruta,
+                        finished_at=extensiones.datetime.now(), lease_owner=None if estado == 'pending' else owner))
+                    if not cerrada:
+                        continue
+                    cerradas += 1
+                    tarea = ScanTask.query.get(id)
+                    TaskController._observar(tarea, salida)
+                    if estado == 'done':
+                        terminadas.append(tarea)
+                    if on_event is not None:
+                        on_event(tarea, estado)
+                if terminadas and ingerir is not None:
+                    try:
+                        ingerir(terminadas)
+                    except Exception as e:
+                        # Los reportes quedan confirmados en disco: una falla de ingesta no detiene al worker
+                        extensiones.db.session.rollback()
+                        for tarea in terminadas:
+                            if on_event is not None:
+                                on_event(tarea, f'error de ingesta: {e}')
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+            if en_curso:
+                extensiones.db.session.rollback()
+                ScanTask.release(owner)
+
+    @staticmethod
+    def _comando(tarea, ruta):
+        """
+        Arma el comando de una tarea con la ruta del reporte parcial y la tasa adaptativa de su host.
+
+        ``{max_rate}`` y ``{min_rate}`` se completan con el límite AIMD de paquetes por segundo
+        del host; los comandos que no los usan solo reciben la ruta.
+        """
+        maximo = extensiones.tasas.limite((tarea.subdomain_id, 'nmap'))
+        return tarea.command.format(salida=Checkpoint.parcial(ruta), max_rate=maximo, min_rate=max(1, int(maximo * 0.4)))
+
+    @staticmethod
+    def _observar(tarea, salida):
+        """Ajusta la tasa de nmap del host de una tarea según las señales de congestión de su salida."""
+        llave = (tarea.subdomain_id, 'nmap')
+        if not isinstance(salida, str) or congestion(salida):
+            extensiones.tasas.congestion(llave)
+        else:
+            extensiones.tasas.exito(llave)
+
+    @staticmethod
+    def listar(domain_name):
+        """
+        Devuelve el estado de las tareas de escaneo de un dominio.
+
+        Returns:
+            Response: Un objeto JSON con las tareas (etapa, herramienta, estado, intentos y error) o un mensaje de error.
+        """
+        dominio = Domain.lookup(domain_name)
+        if not dominio:
+            return jsonify({'error': 'Dominio no encontrado.'}), 404
+        return jsonify(ScanTask.serialize(ScanTask.lookup(dominio.id))), 200
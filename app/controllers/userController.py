@@ -1,8 +1,10 @@
 from flask import session, jsonify, request
 from sqlalchemy.exc import IntegrityError
+from concurrent.futures import TimeoutError as HashTimeoutError
 from app.models.userModel import User
 from app.extensions import extensiones
 from app.utils.core import Core
+from app.utils.hashPool import PoolSaturadoError
 
 class UserController():
     """
@@ -41,6 +43,11 @@ class UserController():
         """
         
         data = request.get_json()
+
+        try:
+            hashed_password = extensiones.hash_pool.hash_password(extensiones.guard, data.get('hashed_password', None))
+        except (PoolSaturadoError, HashTimeoutError):
+            return jsonify({'error': 'Servidor ocupado, intente nuevamente.'}), 429, {'Retry-After': '1'}
     
         user_data = dict(
             name = Core.validar(data.get('name', None)),
@@ -50,7 +57,7 @@ class UserController():
             email = data.get('email', None) if extensiones.validators.email(data.get('email', None)) else None,
             username = data.get('username', None),
             profile_picture = data.get('profile_picture', None) if extensiones.validators.url(data.get('profile_picture', None)) else None,
-            hashed_password = extensiones.guard.hash_password(data.get('hashed_password', None)),
+            hashed_password = hashed_password,
             roles = data.get('roles', None),
             created_at = extensiones.datetime.now()
         )
@@ -2,8 +2,11 @@ from flask import session, jsonify, request
 from app.models.subdomainModel import Subdomain
 from app.models.domainModel import Domain
 from app.models.vulnModel import Vuln
+from app.models.httpprobeModel import HttpProbe
 from app.extensions import extensiones
 from app.utils.core import Core
+from app.controllers.taskController import TaskController
+from app.controllers.reconController import ReconController
 import os 
 
 #from app.utils import 
@@ -12,21 +15,62 @@ class VulnController():
 
     @staticmethod
     def search():
-        xml_output_path = f"{os.getcwd()}/result"
-        #xml_output_file = os.path.join(xml_output_path, f"scan_vuln_{target.replace('/', '_')}.xml")
+        """
+        Ejecuta la batería de scripts NSE de nmap sobre los subdominios de un dominio.
+
+        Son cientos de escaneos largos, así que cada uno es una tarea reanudable de
+        ``TaskController``: si el proceso muere, la siguiente llamada retoma solo las
+        tareas pendientes y descarta los reportes XML truncados. Con ``"queue": true``
+        las tareas solo se encolan para los workers de ``flask scan_worker``. Los hosts
+        muertos según ``ReconController.liveness`` no se escanean. La batería corre solo
+        en el representante de cada grupo de respuestas HTTP equivalentes y sus hallazgos
+        se copian a los miembros con ``source="cluster:<representante>"``.
+        El formato esperado es el siguiente:
+        {
+            "domain": "dominio.com",
+            "queue": false
+        }
+
+        Returns:
+            Response: Un objeto JSON con el resumen de las tareas o un mensaje de error con el código de estado correspondiente.
+        """
+        # Directorio propio: los nombres scan_default_* y scan_vuln_* coinciden con los de la etapa de servicios
+        xml_output_path = os.path.join(os.getcwd(), "result", "vuln")
         data = request.get_json(force=True)
         domain_name = data.get('domain')
         dominio = Domain.lookup(domain_name)
-        subdomains = Subdomain.lookup(dominio.id)
+        if not dominio:
+            return jsonify({'error': 'Dominio no encontrado.'}), 404
+        os.makedirs(xml_output_path, exist_ok=True)
+        candidatos = Subdomain.lookup(dominio.id)
+        subdomains = ReconController.vivos(dominio, candidatos)
+        representantes = HttpProbe.representatives([s.id for s in subdomains], programados=True)
+        agrupados = sum(representantes[s.id] != s.id for s in subdomains)
         vuln = ['--script auth','--script brute','--script default','--script exploit','--script fuzzer','--script intrusive','--script vuln']
         #services = [f"sudo nmap -Pn -f --mtu 24 -D RND:10 --min-rate 2000 --max-rate 5000 --max-retries 2 --defeat-rst-ratelimit --randomize-hosts -sV -p- {vuln} {s.subdomain}" for s in subdomains ]
-        services = [
-            f"sudo nmap -Pn -f --mtu 24 -D RND:10 --min-rate 2000 --max-rate 5000 "
-            f"--max-retries 2 --defeat-rst-ratelimit --randomize-hosts -sV -p- {script} {s.subdomain} -oX {os.path.join(xml_output_path, f"scan_{script.split(" ")[-1]}_{s.subdomain.replace('/', '_')}.xml")} 2>/dev/null"
-            for s in subdomains for script in vuln
+        tareas = [
+            dict(subdomain_id=s.id, tool=script.split(" ")[-1],
+                 command=f"sudo nmap -Pn -f --mtu 24 -D RND:10 --min-rate {{min_rate}} --max-rate {{max_rate}} "
+                         f"--max-retries 2 --defeat-rst-ratelimit --randomize-hosts -sV -p- {script} {s.subdomain} -oX {{salida}} 2>/dev/null",
+                 output=os.path.join(xml_output_path, f"scan_{script.split(" ")[-1]}_{s.subdomain.replace('/', '_')}.xml"),
+                 requires='sudo-nmap')
+            for s in subdomains if representantes[s.id] == s.id for script in vuln
         ]
-        print(len(services))
-        return services
+        if data.get('queue'):
+            TaskController.encolar(dominio, 'vuln', tareas)
+            extensiones.db.session.commit()
+            return jsonify({'queued': len(tareas), 'dead': len(candidatos) - len(subdomains), 'clustered': agrupados}), 202
+        resumen = TaskController.ejecutar(dominio, 'vuln', tareas)
+        ReconController.ingerirTareas(resumen['done'])
+        return jsonify({
+            'tasks': len(tareas),
+            'done': len(resumen['done']),
+            'executed': resumen['executed'],
+            'resumed': resumen['resumed'],
+            'failed': resumen['failed'],
+            'dead': len(candidatos) - len(subdomains),
+            'clustered': agrupados,
+        }), 200
     
     '''
     def create():
@@ -0,0 +1,107 @@
+from flask import session, jsonify, request, current_app
+from app.models.domainModel import Domain
+from app.models.whoisModel import Whois
+from app.extensions import extensiones
+from app.utils.whois import WhoisParser
+from app.utils.whoisBatch import WhoisBatch
+
+class WhoisController():
+    """
+    Controlador para las consultas whois masivas.
+
+    Refresca el whois de muchos dominios registrados con el cliente nativo de
+    ``WhoisBatch``, que respeta el límite de consultas de cada servidor.
+    """
+
+    @staticmethod
+    def batch():
+        """
+        Refresca el whois de varios dominios registrados.
+
+        Este método espera recibir un JSON en el cuerpo de la solicitud con la lista de dominios.
+        Si no se envía la lista se refrescan todos los dominios registrados.
+        El formato esperado es el siguiente:
+        {
+            "domains": ["dominio.com", "otro.pe"]
+        }
+
+        Returns:
+            Response: Un objeto JSON con el resumen de la actualización o un mensaje de error con el código de estado correspondiente.
+        """
+        data = request.get_json(force=True, silent=True) or {}
+        nombres = data.get('domains')
+        if nombres is not None and not isinstance(nombres, list):
+            return jsonify({'error': 'El campo domains debe ser una lista.'}), 400
+
+        dominios = Domain.query.filter(Domain.domain.in_(nombres)).all() if nombres else Domain.readAll()
+        if not dominios:
+            return jsonify({'error': 'Dominios no encontrados'}), 404
+
+        try:
+            return jsonify(WhoisController.refrescar(dominios)), 200
+        except Exception as e:
+            extensiones.db.session.rollback()
+            return jsonify({'error': f'Error inesperado al consultar whois.{e}'}), 500
+
+    @staticmethod
+    def refrescar(dominios):
+        """
+        Consulta el whois de los dominios y crea o actualiza sus registros ``Whois``.
+
+        Args:
+            dominios (list): Instancias de ``Domain``.
+
+        Returns:
+            dict: Un resumen con los dominios actualizados y los que fallaron.
+        """
+        resultados = WhoisBatch(limites=current_app.config.get('WHOIS_RATE_LIMITS')).ejecutar([d.domain for d in dominios])
+        existentes = {w.domain: w for w in Whois.query.filter(Whois.domain.in_([d.domain for d in dominios])).all()}
+        actualizados, fallidos = [], {}
+
+        for dominio in dominios:
+            resultado = resultados.get(dominio.domain.lower().rstrip('.'))
+            if not isinstance(resultado, dict):
+                fallidos[dominio.domain] = str(resultado)
+                continue
+            columnas = WhoisController.columnas(dominio, resultado)
+            whois = existentes.get(dominio.domain)
+            if whois:
+                columnas.pop('created_at')
+                for key, value in columnas.items():
+                    setattr(whois, key, value)
+                whois.update_at = extensiones.datetime.now()
+            else:
+                extensiones.db.session.add(Whois(**columnas))
+            actualizados.append(dominio.domain)
+
+        extensiones.db.session.commit()
+        return {'updated': actualizados, 'failed': fallidos}
+
+    @staticmethod
+    def columnas(dominio, whois):
+        """Convierte el resultado de ``WhoisParser.parsear`` en las columnas del modelo ``Whois``."""
+        fechas = WhoisParser.fechas(whois, dominio.domain)
+        return dict(
+            domain_id=dominio.id, 
+            domain=dominio.domain,
+            domain_name = whois['Domain Name'],
+            sponsoring_registrar = whois['Sponsoring Registrar'],
+            registry_domain_id = whois['Registry Domain ID'],
+            registrar_whois_server = whois['Registrar WHOIS Server'],
+            registrar_url = whois['Registrar URL'],
+            updated_date = fechas['Updated Date'],
+            creation_date = fechas['Creation Date'],
+            registry_expiry_date = fechas['Registry Expiry Date'],
+            registrar = whois['Registrar'],
+            registrar_iana_id = whois['Registrar IANA ID'],
+            registrar_abuse_contact_email = whois['Registrar Abuse Contact Email'],
+            registrar_abuse_contact_phone = whois['Registrar Abuse Contact Phone'],
+            domain_status = whois['Domain Status'],
+            registrant_name = whois['Registrant Name'],
+            admin_name = whois['Admin Name'],
+            admin_email = whois['Admin Email'],
+            name_server = whois['Name Server'],
+            dnssec = whois['DNSSEC'],
+            url_ofthe_icann_whois_inaccuracy_complaint_form = whois['URL of the ICANN Whois Inaccuracy Complaint Form'],
+            created_at = extensiones.datetime.now()
+            )
\ No newline at end of file
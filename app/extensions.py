@@ -9,6 +9,12 @@ from datetime import datetime
 from dateutil import parser
 from html import unescape
 
+from app.utils.hashPool import HashPool
+from app.utils.scanEvents import ScanEvents
+from app.utils.httpPool import CacheRespuestas
+from app.utils.dnsResolver import CacheDns
+from app.utils.aimd import ControlAimd
+
 import validators
 import re
 import bleach
@@ -24,6 +30,14 @@ class Extensions():
         self.datetime = datetime
         self.validators = validators
         self.praetorian = flask_praetorian
+        self.hash_pool = HashPool()
+        self.scan_events = ScanEvents()
+        self.http_cache = CacheRespuestas()
+        self.dns_cache = CacheDns()
+        # Escaneos en vuelo por host y herramienta (y en total), y paquetes por segundo de nmap por host.
+        # La duración de un escaneo completo varía con lo que encuentra: no se usa como señal de congestión
+        self.concurrencia = ControlAimd(inicial=4, minimo=1, maximo=64, tolerancia=None)
+        self.tasas = ControlAimd(inicial=2000, minimo=100, maximo=10000, aumento=250, tolerancia=None, por_ventana=False)
 
     
 
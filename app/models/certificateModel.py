@@ -1,6 +1,7 @@
 from app.extensions import extensiones
 from datetime import datetime
 from app.models.subdomainModel import Subdomain
+from app.models.certificateblobModel import CertificateBlob
 """
 Requisitos de la user_class
 El argumento user_class suministrado durante la inicialización representa la clase que debe utilizarse para comprobar la autorización de las rutas decoradas. 
@@ -20,10 +21,16 @@ La clase en sí puede implementarse de la forma que se considere oportuna. No ob
 """
 
 class Certificate(extensiones.db.Model):
+    __table_args__ = (
+        extensiones.db.UniqueConstraint('subdomain_id', 'certificate_data', name='uq_certificate_subdomain_data'),
+    )
     id = extensiones.db.Column(extensiones.db.Integer, primary_key=True)
-    subdomain_id = extensiones.db.Column(extensiones.db.Integer, extensiones.db.ForeignKey('subdomain.id'), nullable=False)
-    certificate_data = extensiones.db.Column(extensiones.db.String(64), nullable=True)
+    subdomain_id = extensiones.db.Column(extensiones.db.Integer, extensiones.db.ForeignKey('subdomain.id'), nullable=False, index=True)
+    # Huella SHA-256 del certificado presentado; el contenido se guarda una sola vez en CertificateBlob
+    certificate_data = extensiones.db.Column(extensiones.db.String(64), extensiones.db.ForeignKey('certificate_blob.fingerprint'), nullable=True, index=True)
     created_at = extensiones.db.Column(extensiones.db.DateTime, nullable=False, default=extensiones.datetime.utcnow)
+    # Última recolección en la que el host presentó este certificado; el más reciente es el vigente
+    last_seen = extensiones.db.Column(extensiones.db.DateTime, nullable=True)
     update_at = extensiones.db.Column(extensiones.db.DateTime)
     deleted_at = extensiones.db.Column(extensiones.db.DateTime)
     
@@ -69,7 +76,7 @@ class Certificate(extensiones.db.Model):
         que tome un único argumento ``username`` y devuelva una instancia de usuario si hay alguna que coincida o ``None`` 
         si no la hay.
         """
-        return cls.query.filter_by(certificate_data=certificate_data).one_or_none()
+        return cls.query.filter_by(certificate_data=certificate_data).all()
 
     @classmethod
     def identify(cls, id):
@@ -89,6 +96,41 @@ class Certificate(extensiones.db.Model):
     def readAll(cls):
         return cls.query.all()
 
+    @classmethod
+    def current(cls, subdomain_ids):
+        """Devuelve un diccionario subdomain_id -> huella del certificado vigente (el visto por última vez)."""
+        visto = extensiones.db.func.coalesce(cls.last_seen, cls.created_at)
+        filas = cls.query.with_entities(cls.subdomain_id, cls.certificate_data).filter(
+            cls.subdomain_id.in_(list(subdomain_ids))).order_by(visto, cls.id).all()
+        return dict(filas)
+
+    @classmethod
+    def latest(cls):
+        """Devuelve una subconsulta con el certificado vigente de cada host (``subdomain_id``, ``certificate_data``)."""
+        db = extensiones.db
+        visto = db.func.coalesce(cls.last_seen, cls.created_at)
+        orden = db.func.row_number().over(partition_by=cls.subdomain_id, order_by=(visto.desc(), cls.id.desc()))
+        filas = db.session.query(cls.subdomain_id, cls.certificate_data, orden.label('orden')).subquery()
+        return db.session.query(filas.c.subdomain_id, filas.c.certificate_data).filter(filas.c.orden == 1).subquery()
+
+    @classmethod
+    def seen(cls, huellas, fecha):
+        """
+        Marca como vistos en ``fecha`` los certificados presentados por cada host.
+
+        Args:
+            huellas (dict): Un diccionario subdomain_id -> huella presentada.
+            fecha (datetime): El momento de la recolección.
+        """
+        if not huellas:
+            return
+        db = extensiones.db
+        db.session.execute(
+            cls.__table__.update().where(
+                cls.subdomain_id == db.bindparam('_subdomain_id'), cls.certificate_data == db.bindparam('_huella')
+            ).values(last_seen=fecha),
+            [{'_subdomain_id': subdomain_id, '_huella': huella} for subdomain_id, huella in huellas.items()])
+
     @classmethod
     def serialize(cls, certificates):
         if isinstance(certificates, list):
@@ -108,6 +150,7 @@ class Certificate(extensiones.db.Model):
             'subdomain_id': certificate.subdomain_id,
             'certificate_data': certificate.certificate_data,
             'created_at': certificate.created_at.isoformat() if certificate.created_at else None,
+            'last_seen': certificate.last_seen.isoformat() if certificate.last_seen else None,
             #'update_at': certificate.update_at.isoformat() if certificate.update_at else None,
             #'deleted_at': certificate.deleted_at.isoformat() if certificate.deleted_at else None,
         }
\ No newline at end of file
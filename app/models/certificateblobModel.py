@@ -0,0 +1,103 @@
+from app.extensions import extensiones
+from datetime import datetime
+"""
+Requisitos de la user_class
+El argumento user_class suministrado durante la inicialización representa la clase que debe utilizarse para comprobar la autorización de las rutas decoradas. 
+La clase en sí puede implementarse de la forma que se considere oportuna. No obstante, debe cumplir los siguientes requisitos:
+- Proporcionar un método de clase lookup que:
+    - debe tomar como único argumento el nombre del usuario
+    - devuelva una instancia de user_class o None
+- Proporcionar un método de clase identify:
+    - tome como único argumento el identificador único del usuario
+    - debe devolver una instancia de user_class o None
+- Proporcionar un atributo de instancia rolenames:
+    - debe devolver una lista de roles de cadena asignados al usuario
+- Proporcionar un atributo de instancia password:
+    - debe devolver la contraseña hash asignada al usuario
+- Proporcionar un atributo de instancia identity:
+    - debe devolver el id único del usuario
+"""
+
+class CertificateBlob(extensiones.db.Model):
+    """Un certificado TLS distinto, identificado por su huella SHA-256 y compartido por todos los hosts que lo presentan."""
+    id = extensiones.db.Column(extensiones.db.Integer, primary_key=True)
+    fingerprint = extensiones.db.Column(extensiones.db.String(64), unique=True, nullable=False)
+    serial = extensiones.db.Column(extensiones.db.String(64), nullable=True)
+    subject = extensiones.db.Column(extensiones.db.String(255), nullable=True)
+    issuer = extensiones.db.Column(extensiones.db.String(255), nullable=True, index=True)
+    not_before = extensiones.db.Column(extensiones.db.DateTime, nullable=True)
+    not_after = extensiones.db.Column(extensiones.db.DateTime, nullable=True, index=True)
+    san = extensiones.db.Column(extensiones.db.Text, nullable=True)
+    der = extensiones.db.Column(extensiones.db.LargeBinary, nullable=False)
+    created_at = extensiones.db.Column(extensiones.db.DateTime, nullable=False, default=extensiones.datetime.utcnow)
+    update_at = extensiones.db.Column(extensiones.db.DateTime)
+    deleted_at = extensiones.db.Column(extensiones.db.DateTime)
+    
+
+    @property
+    def identity(self):
+        """
+        *Atributo o propiedad requerida*
+        flask-praetorian requiere que la clase user tenga un atributo o propiedad de instancia ``identity`` 
+        que proporcione el id único de la instancia user
+        """
+        return self.id
+
+    @classmethod
+    def lookup(cls, fingerprint):
+        """
+        *Método requerido*
+
+        flask-praetorian requiere que la clase user implemente un método de clase ``lookup()`` 
+        que tome un único argumento ``username`` y devuelva una instancia de usuario si hay alguna que coincida o ``None`` 
+        si no la hay.
+        """
+        return cls.query.filter_by(fingerprint=fingerprint).one_or_none()
+
+    @classmethod
+    def identify(cls, id):
+        """
+        *Método requerido*
+
+        flask-praetorian requiere que la clase user implemente un método de clase ``identify()`` 
+        que tome un único argumento ``id`` y devuelva la instancia de usuario si hay una que coincida o ``None`` 
+        si no la hay.
+        """
+        return cls.query.get(id)
+
+    @classmethod
+    def readAll(cls):
+        return cls.query.all()
+
+    @classmethod
+    def expiringBefore(cls, fecha):
+        """Devuelve los certificados que vencen antes de ``fecha`` (usa el índice de ``not_after``)."""
+        return cls.query.filter(cls.not_after < fecha).order_by(cls.not_after).all()
+
+    @classmethod
+    def serialize(cls, blobs):
+        if isinstance(blobs, list):
+            serialized_list = []
+            for blob in blobs:
+                serialized_list.append(cls._serialize_blob(blob))
+            return serialized_list
+        elif isinstance(blobs, cls):
+            return cls._serialize_blob(blobs)
+        else:
+            raise TypeError("Instancia de certificate_blob esperada o lista de instancias de certificate_blob")
+
+    @classmethod
+    def _serialize_blob(cls, blob):
+        return {
+            'id': blob.id,
+            'fingerprint': blob.fingerprint,
+            'serial': blob.serial,
+            'subject': blob.subject,
+            'issuer': blob.issuer,
+            'not_before': blob.not_before.isoformat() if blob.not_before else None,
+            'not_after': blob.not_after.isoformat() if blob.not_after else None,
+            'san': blob.san.split(',') if blob.san else [],
+            'created_at': blob.created_at.isoformat() if blob.created_at else None,
+            #'update_at': blob.update_at.isoformat() if blob.update_at else None,
+            #'deleted_at': blob.deleted_at.isoformat() if blob.deleted_at else None,
+        }
\ No newline at end of file
@@ -0,0 +1,103 @@
+from app.extensions import extensiones
+from datetime import datetime
+from app.models.subdomainModel import Subdomain
+"""
+Requisitos de la user_class
+El argumento user_class suministrado durante la inicialización representa la clase que debe utilizarse para comprobar la autorización de las rutas decoradas. 
+La clase en sí puede implementarse de la forma que se considere oportuna. No obstante, debe cumplir los siguientes requisitos:
+- Proporcionar un método de clase lookup que:
+    - debe tomar como único argumento el nombre del usuario
+    - devuelva una instancia de user_class o None
+- Proporcionar un método de clase identify:
+    - tome como único argumento el identificador único del usuario
+    - debe devolver una instancia de user_class o None
+- Proporcionar un atributo de instancia rolenames:
+    - debe devolver una lista de roles de cadena asignados al usuario
+- Proporcionar un atributo de instancia password:
+    - debe devolver la contraseña hash asignada al usuario
+- Proporcionar un atributo de instancia identity:
+    - debe devolver el id único del usuario
+"""
+
+class DnsRecord(extensiones.db.Model):
+    __table_args__ = (
+        extensiones.db.UniqueConstraint('subdomain_id', 'type', 'value', name='uq_dns_record_subdomain_type_value'),
+    )
+    id = extensiones.db.Column(extensiones.db.Integer, primary_key=True)
+    subdomain_id = extensiones.db.Column(extensiones.db.Integer, extensiones.db.ForeignKey('subdomain.id'), nullable=False, index=True)
+    type = extensiones.db.Column(extensiones.db.String(16), nullable=False)
+    value = extensiones.db.Column(extensiones.db.String(512), nullable=False)
+    ttl = extensiones.db.Column(extensiones.db.Integer, nullable=True)
+    source = extensiones.db.Column(extensiones.db.String(32), nullable=True)
+    # Enriquecimiento offline de registros A/AAAA (ver IndiceAsn)
+    asn = extensiones.db.Column(extensiones.db.Integer, nullable=True, index=True)
+    as_org = extensiones.db.Column(extensiones.db.String(255), nullable=True)
+    country = extensiones.db.Column(extensiones.db.String(2), nullable=True)
+    created_at = extensiones.db.Column(extensiones.db.DateTime, nullable=False, default=extensiones.datetime.utcnow)
+    update_at = extensiones.db.Column(extensiones.db.DateTime)
+    deleted_at = extensiones.db.Column(extensiones.db.DateTime)
+    
+
+    @property
+    def identity(self):
+        """
+        *Atributo o propiedad requerida*
+        flask-praetorian requiere que la clase user tenga un atributo o propiedad de instancia ``identity`` 
+        que proporcione el id único de la instancia user
+        """
+        return self.id
+
+    @classmethod
+    def lookup(cls, subdomain_id):
+        """
+        *Método requerido*
+
+        flask-praetorian requiere que la clase user implemente un método de clase ``lookup()`` 
+        que tome un único argumento ``username`` y devuelva una instancia de usuario si hay alguna que coincida o ``None`` 
+        si no la hay.
+        """
+        return cls.query.filter_by(subdomain_id=subdomain_id).all()
+
+    @classmethod
+    def identify(cls, id):
+        """
+        *Método requerido*
+
+        flask-praetorian requiere que la clase user implemente un método de clase ``identify()`` 
+        que tome un único argumento ``id`` y devuelva la instancia de usuario si hay una que coincida o ``None`` 
+        si no la hay.
+        """
+        return cls.query.get(id)
+
+    @classmethod
+    def readAll(cls):
+        return cls.query.all()
+
+    @classmethod
+    def serialize(cls, records):
+        if isinstance(records, list):
+            serialized_list = []
+            for record in records:
+                serialized_list.append(cls._serialize_record(record))
+            return serialized_list
+        elif isinstance(records, cls):
+            return cls._serialize_record(records)
+        else:
+            raise TypeError("Instancia de dns_record esperada o lista de instancias de dns_record")
+
+    @classmethod
+    def _serialize_record(cls, record):
+        return {
+            'id': record.id,
+            'subdomain_id': record.subdomain_id,
+            'type': record.type,
+            'value': record.value,
+            'ttl': record.ttl,
+            'source': record.source,
+            'asn': record.asn,
+            'as_org': record.as_org,
+            'country': record.country,
+            'created_at': record.created_at.isoformat() if record.created_at else None,
+            #'update_at': record.update_at.isoformat() if record.update_at else None,
+            #'deleted_at': record.deleted_at.isoformat() if record.deleted_at else None,
+        }
\ No newline at end of file
@@ -0,0 +1,144 @@
+from app.extensions import extensiones
+from datetime import datetime
+import json
+from app.models.subdomainModel import Subdomain
+"""
+Requisitos de la user_class
+El argumento user_class suministrado durante la inicialización representa la clase que debe utilizarse para comprobar la autorización de las rutas decoradas. 
+La clase en sí puede implementarse de la forma que se considere oportuna. No obstante, debe cumplir los siguientes requisitos:
+- Proporcionar un método de clase lookup que:
+    - debe tomar como único argumento el nombre del usuario
+    - devuelva una instancia de user_class o None
+- Proporcionar un método de clase identify:
+    - tome como único argumento el identificador único del usuario
+    - debe devolver una instancia de user_class o None
+- Proporcionar un atributo de instancia rolenames:
+    - debe devolver una lista de roles de cadena asignados al usuario
+- Proporcionar un atributo de instancia password:
+    - debe devolver la contraseña hash asignada al usuario
+- Proporcionar un atributo de instancia identity:
+    - debe devolver el id único del usuario
+"""
+
+class HttpProbe(extensiones.db.Model):
+    id = extensiones.db.Column(extensiones.db.Integer, primary_key=True)
+    subdomain_id = extensiones.db.Column(extensiones.db.Integer, extensiones.db.ForeignKey('subdomain.id'), nullable=False, unique=True)
+    url = extensiones.db.Column(extensiones.db.String(512), nullable=False)
+    status = extensiones.db.Column(extensiones.db.Integer, nullable=True)
+    title = extensiones.db.Column(extensiones.db.String(255), nullable=True)
+    headers = extensiones.db.Column(extensiones.db.Text, nullable=True)
+    body_hash = extensiones.db.Column(extensiones.db.String(64), nullable=True, index=True)
+    simhash = extensiones.db.Column(extensiones.db.String(16), nullable=True)
+    # Subdominio representante del grupo de respuestas equivalentes (None si es su propio representante)
+    cluster_id = extensiones.db.Column(extensiones.db.Integer, extensiones.db.ForeignKey('subdomain.id'), nullable=True, index=True)
+    content_length = extensiones.db.Column(extensiones.db.Integer, nullable=True)
+    elapsed_ms = extensiones.db.Column(extensiones.db.Float, nullable=True)
+    redirects = extensiones.db.Column(extensiones.db.Integer, nullable=True)
+    created_at = extensiones.db.Column(extensiones.db.DateTime, nullable=False, default=extensiones.datetime.utcnow)
+    update_at = extensiones.db.Column(extensiones.db.DateTime)
+    deleted_at = extensiones.db.Column(extensiones.db.DateTime)
+    
+
+    @property
+    def identity(self):
+        """
+        *Atributo o propiedad requerida*
+        flask-praetorian requiere que la clase user tenga un atributo o propiedad de instancia ``identity`` 
+        que proporcione el id único de la instancia user
+        """
+        return self.id
+
+    @classmethod
+    def lookup(cls, subdomain_id):
+        """
+        *Método requerido*
+
+        flask-praetorian requiere que la clase user implemente un método de clase ``lookup()`` 
+        que tome un único argumento ``username`` y devuelva una instancia de usuario si hay alguna que coincida o ``None`` 
+        si no la hay.
+        """
+        return cls.query.filter_by(subdomain_id=subdomain_id).one_or_none()
+
+    @classmethod
+    def identify(cls, id):
+        """
+        *Método requerido*
+
+        flask-praetorian requiere que la clase user implemente un método de clase ``identify()`` 
+        que tome un único argumento ``id`` y devuelva la instancia de usuario si hay una que coincida o ``None`` 
+        si no la hay.
+        """
+        return cls.query.get(id)
+
+    @classmethod
+    def readAll(cls):
+        return cls.query.all()
+
+    @classmethod
+    def representatives(cls, subdomain_ids, programados=False):
+        """
+        Devuelve un diccionario subdomain_id -> id del representante de su grupo (él mismo si no tiene).
+
+        Con ``programados=True`` el representante de cada grupo se elige entre ``subdomain_ids``:
+        si el representante del grupo no está entre ellos lo reemplaza el primer miembro que sí
+        está, para que ningún grupo quede sin analizar en una ejecución parcial.
+        """
+        subdomain_ids = list(subdomain_ids)
+        filas = cls.query.with_entities(cls.subdomain_id, cls.cluster_id).filter(cls.subdomain_id.in_(subdomain_ids)).all()
+        representantes = {subdomain_id: subdomain_id for subdomain_id in subdomain_ids}
+        representantes.update({subdomain_id: cluster_id for subdomain_id, cluster_id in filas if cluster_id})
+        if programados:
+            reemplazos = {}
+            for subdomain_id in sorted(subdomain_ids):
+                grupo = representantes[subdomain_id]
+                reemplazos.setdefault(grupo, grupo if grupo in representantes else subdomain_id)
+            representantes = {subdomain_id: reemplazos[grupo] for subdomain_id, grupo in representantes.items()}
+        return representantes
+
+    @classmethod
+    def members(cls, subdomain_ids):
+        """
+        Devuelve un diccionario subdomain_id -> ids de los demás miembros de su grupo de respuestas equivalentes.
+
+        Los hosts sin grupo reciben una lista vacía.
+        """
+        subdomain_ids = list(subdomain_ids)
+        raices = cls.representatives(subdomain_ids)
+        filas = cls.query.with_entities(cls.subdomain_id, cls.cluster_id).filter(
+            cls.cluster_id.in_(set(raices.values()))).all()
+        grupos = {raiz: {raiz} for raiz in raices.values()}
+        for subdomain_id, cluster_id in filas:
+            grupos[cluster_id].add(subdomain_id)
+        return {subdomain_id: sorted(grupos[raiz] - {subdomain_id}) for subdomain_id, raiz in raices.items()}
+
+    @classmethod
+    def serialize(cls, probes):
+        if isinstance(probes, list):
+            serialized_list = []
+            for probe in probes:
+                serialized_list.append(cls._serialize_probe(probe))
+            return serialized_list
+        elif isinstance(probes, cls):
+            return cls._serialize_probe(probes)
+        else:
+            raise TypeError("Instancia de http_probe esperada o lista de instancias de http_probe")
+
+    @classmethod
+    def _serialize_probe(cls, probe):
+        return {
+            'id': probe.id,
+            'subdomain_id': probe.subdomain_id,
+            'url': probe.url,
+            'status': probe.status,
+            'title': probe.title,
+            'headers': json.loads(probe.headers) if probe.headers else {},
+            'body_hash': probe.body_hash,
+            'simhash': probe.simhash,
+            'cluster_id': probe.cluster_id,
+            'content_length': probe.content_length,
+            'elapsed_ms': probe.elapsed_ms,
+            'redirects': probe.redirects,
+            'created_at': probe.created_at.isoformat() if probe.created_at else None,
+            #'update_at': probe.update_at.isoformat() if probe.update_at else None,
+            #'deleted_at': probe.deleted_at.isoformat() if probe.deleted_at else None,
+        }
\ No newline at end of file
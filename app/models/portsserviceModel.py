@@ -22,9 +22,9 @@ La clase en sí puede implementarse de la forma que se considere oportuna. No ob
 class PortsService(extensiones.db.Model):
     id = extensiones.db.Column(extensiones.db.Integer, primary_key=True)
     subdomain_id = extensiones.db.Column(extensiones.db.Integer, extensiones.db.ForeignKey('subdomain.id'), nullable=False)
-    services_open = extensiones.db.Column(extensiones.db.String(64), nullable=True)
-    services_close = extensiones.db.Column(extensiones.db.String(64), nullable=True)
-    services_filtered = extensiones.db.Column(extensiones.db.String(64), nullable=True)
+    services_open = extensiones.db.Column(extensiones.db.Text, nullable=True)
+    services_close = extensiones.db.Column(extensiones.db.Text, nullable=True)
+    services_filtered = extensiones.db.Column(extensiones.db.Text, nullable=True)
     created_at = extensiones.db.Column(extensiones.db.DateTime, nullable=False, default=extensiones.datetime.utcnow)
     update_at = extensiones.db.Column(extensiones.db.DateTime)
     deleted_at = extensiones.db.Column(extensiones.db.DateTime)
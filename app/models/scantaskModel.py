@@ -0,0 +1,207 @@
+from app.extensions import extensiones
+from datetime import datetime
+from app.models.subdomainModel import Subdomain
+"""
+Requisitos de la user_class
+El argumento user_class suministrado durante la inicialización representa la clase que debe utilizarse para comprobar la autorización de las rutas decoradas. 
+La clase en sí puede implementarse de la forma que se considere oportuna. No obstante, debe cumplir los siguientes requisitos:
+- Proporcionar un método de clase lookup que:
+    - debe tomar como único argumento el nombre del usuario
+    - devuelva una instancia de user_class o None
+- Proporcionar un método de clase identify:
+    - tome como único argumento el identificador único del usuario
+    - debe devolver una instancia de user_class o None
+- Proporcionar un atributo de instancia rolenames:
+    - debe devolver una lista de roles de cadena asignados al usuario
+- Proporcionar un atributo de instancia password:
+    - debe devolver la contraseña hash asignada al usuario
+- Proporcionar un atributo de instancia identity:
+    - debe devolver el id único del usuario
+"""
+
+class ScanTask(extensiones.db.Model):
+    """
+    El estado de una tarea de escaneo (un host, una etapa y una herramienta) para poder reanudarlo.
+
+    ``status`` pasa de ``pending`` a ``running`` y termina en ``done`` o ``failed``;
+    ``done`` solo se marca después de confirmar el reporte en ``output``.
+    """
+    __table_args__ = (
+        extensiones.db.UniqueConstraint('subdomain_id', 'stage', 'tool', name='uq_scan_task_subdomain_stage_tool'),
+    )
+    id = extensiones.db.Column(extensiones.db.Integer, primary_key=True)
+    domain_id = extensiones.db.Column(extensiones.db.Integer, extensiones.db.ForeignKey('domain.id'), nullable=False, index=True)
+    subdomain_id = extensiones.db.Column(extensiones.db.Integer, extensiones.db.ForeignKey('subdomain.id'), nullable=False)
+    stage = extensiones.db.Column(extensiones.db.String(32), nullable=False)
+    tool = extensiones.db.Column(extensiones.db.String(64), nullable=False)
+    command = extensiones.db.Column(extensiones.db.Text, nullable=False)
+    output = extensiones.db.Column(extensiones.db.String(512), nullable=False)
+    status = extensiones.db.Column(extensiones.db.String(16), nullable=False, default='pending', index=True)
+    # Cola distribuida: capacidad que necesita el worker, dueño del lease y vencimiento del lease
+    requires = extensiones.db.Column(extensiones.db.String(64), nullable=True)
+    lease_owner = extensiones.db.Column(extensiones.db.String(128), nullable=True)
+    lease_expires = extensiones.db.Column(extensiones.db.DateTime, nullable=True)
+    heartbeat_at = extensiones.db.Column(extensiones.db.DateTime, nullable=True)
+    attempts = extensiones.db.Column(extensiones.db.Integer, nullable=False, default=0)
+    error = extensiones.db.Column(extensiones.db.String(255), nullable=True)
+    started_at = extensiones.db.Column(extensiones.db.DateTime, nullable=True)
+    finished_at = extensiones.db.Column(extensiones.db.DateTime, nullable=True)
+    created_at = extensiones.db.Column(extensiones.db.DateTime, nullable=False, default=extensiones.datetime.utcnow)
+    update_at = extensiones.db.Column(extensiones.db.DateTime)
+    deleted_at = extensiones.db.Column(extensiones.db.DateTime)
+    
+
+    @property
+    def identity(self):
+        """
+        *Atributo o propiedad requerida*
+        flask-praetorian requiere que la clase user tenga un atributo o propiedad de instancia ``identity`` 
+        que proporcione el id único de la instancia user
+        """
+        return self.id
+
+    @classmethod
+    def lookup(cls, domain_id, stage=None):
+        """Devuelve las tareas de un dominio, opcionalmente de una sola etapa."""
+        consulta = cls.query.filter_by(domain_id=domain_id)
+        if stage is not None:
+            consulta = consulta.filter_by(stage=stage)
+        return consulta.order_by(cls.id).all()
+
+    @classmethod
+    def identify(cls, id):
+        """
+        *Método requerido*
+
+        flask-praetorian requiere que la clase user implemente un método de clase ``identify()`` 
+        que tome un único argumento ``id`` y devuelva la instancia de usuario si hay una que coincida o ``None`` 
+        si no la hay.
+        """
+        return cls.query.get(id)
+
+    @classmethod
+    def claim(cls, owner, etiquetas, limite, lease, ahora):
+        """
+        Toma hasta ``limite`` tareas de la cola para un worker.
+
+        Una tarea se puede tomar si está ``pending`` o si es un ``running`` de la cola
+        cuyo lease venció (su worker murió). Cada toma es un UPDATE condicional sobre
+        la misma condición, así que dos workers nunca se quedan con la misma tarea,
+        tanto en SQLite como en PostgreSQL.
+
+        Args:
+            owner (str): El identificador del worker.
+            etiquetas (list): Las capacidades del worker; las tareas sin ``requires`` las toma cualquiera.
+            limite (int): Cuántas tareas tomar como mucho.
+            lease (timedelta): La duración del lease (se renueva con los latidos).
+            ahora (datetime): El instante actual.
+
+        Returns:
+            list: Las tareas tomadas.
+        """
+        disponible = (cls.status == 'pending') | (
+            (cls.status == 'running') & cls.lease_expires.isnot(None) & (cls.lease_expires < ahora))
+        capacidad = cls.requires.is_(None) | cls.requires.in_(list(etiquetas))
+        candidatas = [
+            id for id, in extensiones.db.session.query(cls.id).filter(disponible, capacidad)
+            .order_by(cls.id).limit(limite * 2).all()
+        ]
+        tomadas = []
+        for id in candidatas:
+            if len(tomadas) >= limite:
+                break
+            resultado = cls.query.filter(cls.id == id, disponible).update({
+                'status': 'running', 'lease_owner': owner, 'lease_expires': ahora + lease, 'heartbeat_at': ahora,
+                'started_at': ahora, 'finished_at': None, 'error': None, 'attempts': cls.attempts + 1,
+            }, synchronize_session=False)
+            extensiones.db.session.commit()
+            if resultado == 1:
+                tomadas.append(id)
+        return cls.query.filter(cls.id.in_(tomadas)).all() if tomadas else []
+
+    @classmethod
+    def acquire(cls, tarea, owner, ahora):
+        """
+        Toma una tarea ya leída para una ejecución local, sin lease.
+
+        El UPDATE es condicional sobre el estado y los intentos leídos: si un worker de
+        la cola (u otro proceso) la tomó desde entonces, los intentos ya no coinciden y
+        la tarea no se toma. Tampoco se toma una tarea con un lease vigente.
+
+        Args:
+            tarea (ScanTask): La tarea, tal como se leyó.
+            owner (str): El identificador del proceso.
+            ahora (datetime): El instante actual.
+
+        Returns:
+            bool: True si la tarea quedó tomada por ``owner``.
+        """
+        resultado = cls.query.filter(
+            cls.id == tarea.id, cls.status == tarea.status, cls.attempts == tarea.attempts,
+            ~((cls.status == 'running') & cls.lease_expires.isnot(None) & (cls.lease_expires > ahora)),
+        ).update({
+            'status': 'running', 'lease_owner': owner, 'lease_expires': None, 'heartbeat_at': ahora,
+            'started_at': ahora, 'finished_at': None, 'error': None, 'attempts': cls.attempts + 1,
+        }, synchronize_session=False)
+        return resultado == 1
+
+    @classmethod
+    def renew(cls, owner, lease, ahora):
+        """Extiende el lease de las tareas en curso de un worker (latido)."""
+        actualizadas = cls.query.filter(cls.lease_owner == owner, cls.status == 'running').update(
+            {'lease_expires': ahora + lease, 'heartbeat_at': ahora}, synchronize_session=False)
+        extensiones.db.session.commit()
+        return actualizadas
+
+    @classmethod
+    def finish(cls, id, owner, valores):
+        """
+        Cierra una tarea solo si el worker (o la ejecución local) aún la tiene tomada.
+
+        Returns:
+            bool: False si el lease venció y otro worker tomó la tarea (el resultado se descarta).
+        """
+        resultado = cls.query.filter(cls.id == id, cls.lease_owner == owner, cls.status == 'running').update(
+            dict(valores, lease_expires=None), synchronize_session=False)
+        extensiones.db.session.commit()
+        return resultado == 1
+
+    @classmethod
+    def release(cls, owner):
+        """Devuelve a la cola las tareas en curso de un worker que se detiene."""
+        liberadas = cls.query.filter(cls.lease_owner == owner, cls.status == 'running').update(
+            {'status': 'pending', 'lease_owner': None, 'lease_expires': None}, synchronize_session=False)
+        extensiones.db.session.commit()
+        return liberadas
+
+    @classmethod
+    def serialize(cls, tasks):
+        if isinstance(tasks, list):
+            serialized_list = []
+            for task in tasks:
+                serialized_list.append(cls._serialize_task(task))
+            return serialized_list
+        elif isinstance(tasks, cls):
+            return cls._serialize_task(tasks)
+        else:
+            raise TypeError("Instancia de scan_task esperada o lista de instancias de scan_task")
+
+    @classmethod
+    def _serialize_task(cls, task):
+        return {
+            'id': task.id,
+            'subdomain_id': task.subdomain_id,
+            'stage': task.stage,
+            'tool': task.tool,
+            'status': task.status,
+            'attempts': task.attempts,
+            'error': task.error,
+            'requires': task.requires,
+            'lease_owner': task.lease_owner,
+            'heartbeat_at': task.heartbeat_at.isoformat() if task.heartbeat_at else None,
+            'started_at': task.started_at.isoformat() if task.started_at else None,
+            'finished_at': task.finished_at.isoformat() if task.finished_at else None,
+            'created_at': task.created_at.isoformat() if task.created_at else None,
+            #'update_at': task.update_at.isoformat() if task.update_at else None,
+            #'deleted_at': task.deleted_at.isoformat() if task.deleted_at else None,
+        }
@@ -0,0 +1,104 @@
+from app.extensions import extensiones
+from datetime import datetime
+from app.models.domainModel import Domain
+"""
+Requisitos de la user_class
+El argumento user_class suministrado durante la inicialización representa la clase que debe utilizarse para comprobar la autorización de las rutas decoradas. 
+La clase en sí puede implementarse de la forma que se considere oportuna. No obstante, debe cumplir los siguientes requisitos:
+- Proporcionar un método de clase lookup que:
+    - debe tomar como único argumento el nombre del usuario
+    - devuelva una instancia de user_class o None
+- Proporcionar un método de clase identify:
+    - tome como único argumento el identificador único del usuario
+    - debe devolver una instancia de user_class o None
+- Proporcionar un atributo de instancia rolenames:
+    - debe devolver una lista de roles de cadena asignados al usuario
+- Proporcionar un atributo de instancia password:
+    - debe devolver la contraseña hash asignada al usuario
+- Proporcionar un atributo de instancia identity:
+    - debe devolver el id único del usuario
+"""
+
+class Schedule(extensiones.db.Model):
+    """
+    La planificación de una etapa del reconocimiento sobre un dominio para el monitoreo continuo.
+
+    ``next_run`` se alinea a una fase propia de cada dominio y etapa, de modo que los
+    escaneos del parque se reparten a lo largo del intervalo en vez de coincidir;
+    ``signal`` guarda el último valor de la señal barata (DNS, whois) que la adelanta.
+    """
+    __table_args__ = (
+        extensiones.db.UniqueConstraint('domain_id', 'stage', name='uq_schedule_domain_stage'),
+    )
+    id = extensiones.db.Column(extensiones.db.Integer, primary_key=True)
+    domain_id = extensiones.db.Column(extensiones.db.Integer, extensiones.db.ForeignKey('domain.id'), nullable=False)
+    stage = extensiones.db.Column(extensiones.db.String(32), nullable=False)
+    interval = extensiones.db.Column(extensiones.db.Integer, nullable=False)
+    next_run = extensiones.db.Column(extensiones.db.DateTime, nullable=False, index=True)
+    last_run = extensiones.db.Column(extensiones.db.DateTime, nullable=True)
+    checked_at = extensiones.db.Column(extensiones.db.DateTime, nullable=True)
+    signal = extensiones.db.Column(extensiones.db.String(64), nullable=True)
+    reason = extensiones.db.Column(extensiones.db.String(32), nullable=True)
+    status = extensiones.db.Column(extensiones.db.String(255), nullable=True)
+    created_at = extensiones.db.Column(extensiones.db.DateTime, nullable=False, default=extensiones.datetime.utcnow)
+    update_at = extensiones.db.Column(extensiones.db.DateTime)
+    deleted_at = extensiones.db.Column(extensiones.db.DateTime)
+    
+
+    @property
+    def identity(self):
+        """
+        *Atributo o propiedad requerida*
+        flask-praetorian requiere que la clase user tenga un atributo o propiedad de instancia ``identity`` 
+        que proporcione el id único de la instancia user
+        """
+        return self.id
+
+    @classmethod
+    def lookup(cls, domain_id):
+        """Devuelve la planificación de las etapas de un dominio."""
+        return cls.query.filter_by(domain_id=domain_id).order_by(cls.next_run).all()
+
+    @classmethod
+    def identify(cls, id):
+        """
+        *Método requerido*
+
+        flask-praetorian requiere que la clase user implemente un método de clase ``identify()`` 
+        que tome un único argumento ``id`` y devuelva la instancia de usuario si hay una que coincida o ``None`` 
+        si no la hay.
+        """
+        return cls.query.get(id)
+
+    @classmethod
+    def due(cls, ahora, limite):
+        """Devuelve las etapas vencidas, de la más atrasada a la menos (usa el índice de ``next_run``)."""
+        return cls.query.filter(cls.next_run <= ahora, cls.deleted_at.is_(None)).order_by(cls.next_run).limit(limite).all()
+
+    @classmethod
+    def serialize(cls, schedules):
+        if isinstance(schedules, list):
+            serialized_list = []
+            for schedule in schedules:
+                serialized_list.append(cls._serialize_schedule(schedule))
+            return serialized_list
+        elif isinstance(schedules, cls):
+            return cls._serialize_schedule(schedules)
+        else:
+            raise TypeError("Instancia de schedule esperada o lista de instancias de schedule")
+
+    @classmethod
+    def _serialize_schedule(cls, schedule):
+        return {
+            'id': schedule.id,
+            'domain_id': schedule.domain_id,
+            'stage': schedule.stage,
+            'interval': schedule.interval,
+            'next_run': schedule.next_run.isoformat() if schedule.next_run else None,
+            'last_run': schedule.last_run.isoformat() if schedule.last_run else None,
+            'reason': schedule.reason,
+            'status': schedule.status,
+            'created_at': schedule.created_at.isoformat() if schedule.created_at else None,
+            #'update_at': schedule.update_at.isoformat() if schedule.update_at else None,
+            #'deleted_at': schedule.deleted_at.isoformat() if schedule.deleted_at else None,
+        }
@@ -0,0 +1,167 @@
+from app.extensions import extensiones
+from datetime import datetime
+from app.models.domainModel import Domain
+from app.models.snapshotchangeModel import SnapshotChange
+from app.utils.bulk import Bulk
+"""
+Requisitos de la user_class
+El argumento user_class suministrado durante la inicialización representa la clase que debe utilizarse para comprobar la autorización de las rutas decoradas. 
+La clase en sí puede implementarse de la forma que se considere oportuna. No obstante, debe cumplir los siguientes requisitos:
+- Proporcionar un método de clase lookup que:
+    - debe tomar como único argumento el nombre del usuario
+    - devuelva una instancia de user_class o None
+- Proporcionar un método de clase identify:
+    - tome como único argumento el identificador único del usuario
+    - debe devolver una instancia de user_class o None
+- Proporcionar un atributo de instancia rolenames:
+    - debe devolver una lista de roles de cadena asignados al usuario
+- Proporcionar un atributo de instancia password:
+    - debe devolver la contraseña hash asignada al usuario
+- Proporcionar un atributo de instancia identity:
+    - debe devolver el id único del usuario
+"""
+
+class Snapshot(extensiones.db.Model):
+    """
+    Una ejecución de una etapa del reconocimiento sobre un dominio.
+
+    La instantánea no copia el estado: guarda en ``SnapshotChange`` solo lo que
+    cambió respecto de la anterior, así que el historial crece con los cambios y
+    no con el tamaño del dominio.
+    """
+    id = extensiones.db.Column(extensiones.db.Integer, primary_key=True)
+    domain_id = extensiones.db.Column(extensiones.db.Integer, extensiones.db.ForeignKey('domain.id'), nullable=False, index=True)
+    stage = extensiones.db.Column(extensiones.db.String(32), nullable=False)
+    changes = extensiones.db.Column(extensiones.db.Integer, nullable=False, default=0)
+    created_at = extensiones.db.Column(extensiones.db.DateTime, nullable=False, default=extensiones.datetime.utcnow)
+    update_at = extensiones.db.Column(extensiones.db.DateTime)
+    deleted_at = extensiones.db.Column(extensiones.db.DateTime)
+    
+
+    @property
+    def identity(self):
+        """
+        *Atributo o propiedad requerida*
+        flask-praetorian requiere que la clase user tenga un atributo o propiedad de instancia ``identity`` 
+        que proporcione el id único de la instancia user
+        """
+        return self.id
+
+    @classmethod
+    def lookup(cls, domain_id):
+        """Devuelve las instantáneas de un dominio, de la más antigua a la más reciente."""
+        return cls.query.filter_by(domain_id=domain_id).order_by(cls.id).all()
+
+    @classmethod
+    def identify(cls, id):
+        """
+        *Método requerido*
+
+        flask-praetorian requiere que la clase user implemente un método de clase ``identify()`` 
+        que tome un único argumento ``id`` y devuelva la instancia de usuario si hay una que coincida o ``None`` 
+        si no la hay.
+        """
+        return cls.query.get(id)
+
+    @staticmethod
+    def delta(antes, despues):
+        """
+        Compara dos estados ``clave -> valor`` de un mismo ámbito.
+
+        Returns:
+            list: Las tuplas ``(clave, antes, después)`` de las altas, bajas y modificaciones.
+        """
+        cambios = [(clave, valor, despues.get(clave)) for clave, valor in antes.items() if despues.get(clave) != valor]
+        cambios.extend((clave, None, valor) for clave, valor in despues.items() if clave not in antes)
+        return sorted(cambios)
+
+    @classmethod
+    def record(cls, domain_id, stage, estados):
+        """
+        Registra una instantánea con los cambios de cada tipo de dato.
+
+        Args:
+            domain_id (int): El dominio escaneado.
+            stage (str): La etapa que se ejecutó (``subdomains``, ``tech``, ``services``, ``certificates``).
+            estados (dict): ``tipo -> (antes, después)``, con el estado ``clave -> valor`` de lo que
+                la etapa analizó antes y después de ejecutarse. Solo se comparan esas claves.
+
+        Returns:
+            Snapshot: La instantánea, agregada a la sesión (sin confirmar).
+        """
+        cambios = {tipo: cls.delta(antes, despues) for tipo, (antes, despues) in estados.items()}
+        ahora = extensiones.datetime.now()
+        snapshot = cls(domain_id=domain_id, stage=stage, changes=sum(map(len, cambios.values())), created_at=ahora)
+        extensiones.db.session.add(snapshot)
+        extensiones.db.session.flush()
+        Bulk.insertar(SnapshotChange, [
+            dict(snapshot_id=snapshot.id, domain_id=domain_id, kind=tipo, key=clave[:320], before=antes, after=despues, created_at=ahora)
+            for tipo, lista in cambios.items() for clave, antes, despues in lista
+        ])
+        return snapshot
+
+    @classmethod
+    def diff(cls, domain_id, desde, hasta):
+        """
+        Calcula los cambios entre dos instantáneas de un dominio a partir de los deltas guardados.
+
+        Solo se leen los cambios registrados entre ambas, así que el costo es proporcional
+        al tamaño del cambio y no al del dominio. Si ``desde`` es posterior a ``hasta`` el
+        resultado es el cambio inverso; con ``desde`` 0 se obtiene el estado completo en ``hasta``.
+
+        Args:
+            domain_id (int): El dominio.
+            desde (int): La instantánea de partida (0 para el estado vacío).
+            hasta (int): La instantánea de llegada.
+
+        Returns:
+            dict: ``tipo -> {'added': {clave: valor}, 'removed': {clave: valor}, 'changed': {clave: {'before', 'after'}}}``.
+        """
+        invertido = desde > hasta
+        if invertido:
+            desde, hasta = hasta, desde
+        # Por cada clave cuenta el valor previo al primer cambio y el posterior al último
+        netos = {}
+        for cambio in SnapshotChange.between(domain_id, desde, hasta):
+            identificador = (cambio.kind, cambio.key)
+            inicial = netos[identificador][0] if identificador in netos else cambio.before
+            netos[identificador] = (inicial, cambio.after)
+
+        resultado = {}
+        for (tipo, clave), (antes, despues) in sorted(netos.items()):
+            if invertido:
+                antes, despues = despues, antes
+            if antes == despues:
+                continue
+            grupo = resultado.setdefault(tipo, {'added': {}, 'removed': {}, 'changed': {}})
+            if antes is None:
+                grupo['added'][clave] = despues
+            elif despues is None:
+                grupo['removed'][clave] = antes
+            else:
+                grupo['changed'][clave] = {'before': antes, 'after': despues}
+        return resultado
+
+    @classmethod
+    def serialize(cls, snapshots):
+        if isinstance(snapshots, list):
+            serialized_list = []
+            for snapshot in snapshots:
+                serialized_list.append(cls._serialize_snapshot(snapshot))
+            return serialized_list
+        elif isinstance(snapshots, cls):
+            return cls._serialize_snapshot(snapshots)
+        else:
+            raise TypeError("Instancia de snapshot esperada o lista de instancias de snapshot")
+
+    @classmethod
+    def _serialize_snapshot(cls, snapshot):
+        return {
+            'id': snapshot.id,
+            'domain_id': snapshot.domain_id,
+            'stage': snapshot.stage,
+            'changes': snapshot.changes,
+            'created_at': snapshot.created_at.isoformat() if snapshot.created_at else None,
+            #'update_at': snapshot.update_at.isoformat() if snapshot.update_at else None,
+            #'deleted_at': snapshot.deleted_at.isoformat() if snapshot.deleted_at else None,
+        }
@@ -0,0 +1,74 @@
+from app.extensions import extensiones
+from datetime import datetime
+from app.models.domainModel import Domain
+"""
+Requisitos de la user_class
+El argumento user_class suministrado durante la inicialización representa la clase que debe utilizarse para comprobar la autorización de las rutas decoradas. 
+La clase en sí puede implementarse de la forma que se considere oportuna. No obstante, debe cumplir los siguientes requisitos:
+- Proporcionar un método de clase lookup que:
+    - debe tomar como único argumento el nombre del usuario
+    - devuelva una instancia de user_class o None
+- Proporcionar un método de clase identify:
+    - tome como único argumento el identificador único del usuario
+    - debe devolver una instancia de user_class o None
+- Proporcionar un atributo de instancia rolenames:
+    - debe devolver una lista de roles de cadena asignados al usuario
+- Proporcionar un atributo de instancia password:
+    - debe devolver la contraseña hash asignada al usuario
+- Proporcionar un atributo de instancia identity:
+    - debe devolver el id único del usuario
+"""
+
+class SnapshotChange(extensiones.db.Model):
+    """
+    Un cambio de una instantánea respecto de su predecesora.
+
+    ``kind`` es lo que cambió (``subdomain``, ``tech``, ``port`` o ``certificate``) y
+    ``key`` lo identifica dentro del dominio; ``before`` es None en un alta y
+    ``after`` es None en una baja.
+    """
+    __table_args__ = (
+        extensiones.db.Index('ix_snapshot_change_domain_snapshot', 'domain_id', 'snapshot_id'),
+    )
+    id = extensiones.db.Column(extensiones.db.Integer, primary_key=True)
+    snapshot_id = extensiones.db.Column(extensiones.db.Integer, extensiones.db.ForeignKey('snapshot.id'), nullable=False)
+    domain_id = extensiones.db.Column(extensiones.db.Integer, extensiones.db.ForeignKey('domain.id'), nullable=False)
+    kind = extensiones.db.Column(extensiones.db.String(16), nullable=False)
+    key = extensiones.db.Column(extensiones.db.String(320), nullable=False)
+    before = extensiones.db.Column(extensiones.db.Text, nullable=True)
+    after = extensiones.db.Column(extensiones.db.Text, nullable=True)
+    created_at = extensiones.db.Column(extensiones.db.DateTime, nullable=False, default=extensiones.datetime.utcnow)
+    update_at = extensiones.db.Column(extensiones.db.DateTime)
+    deleted_at = extensiones.db.Column(extensiones.db.DateTime)
+    
+
+    @property
+    def identity(self):
+        """
+        *Atributo o propiedad requerida*
+        flask-praetorian requiere que la clase user tenga un atributo o propiedad de instancia ``identity`` 
+        que proporcione el id único de la instancia user
+        """
+        return self.id
+
+    @classmethod
+    def identify(cls, id):
+        """
+        *Método requerido*
+
+        flask-praetorian requiere que la clase user implemente un método de clase ``identify()`` 
+        que tome un único argumento ``id`` y devuelva la instancia de usuario si hay una que coincida o ``None`` 
+        si no la hay.
+        """
+        return cls.query.get(id)
+
+    @classmethod
+    def between(cls, domain_id, desde, hasta):
+        """
+        Devuelve los cambios de las instantáneas ``(desde, hasta]`` de un dominio, en orden.
+
+        Usa el índice ``(domain_id, snapshot_id)``: solo se leen los cambios del rango.
+        """
+        return cls.query.filter(
+            cls.domain_id == domain_id, cls.snapshot_id > desde, cls.snapshot_id <= hasta,
+        ).order_by(cls.snapshot_id, cls.id).all()
@@ -1,5 +1,7 @@
 from app.extensions import extensiones
 from datetime import datetime
+from sqlalchemy import DDL, event, inspect, text, column
+from sqlalchemy.orm import validates
 from app.models.domainModel import Domain
 from app.models.wafModel import Waf
 """
@@ -20,16 +22,58 @@ La clase en sí puede implementarse de la forma que se considere oportuna. No ob
     - debe devolver el id único del usuario
 """
 
+def _invertir(contexto):
+    """Valor por defecto de ``subdomain_rev``; también se aplica en las inserciones masivas de ``Bulk``."""
+    return contexto.get_current_parameters()['subdomain'][::-1]
+
+
+# Índice trigram de SQLite para buscar subcadenas, sincronizado con la tabla por triggers
+FTS_SQLITE = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS subdomain_fts USING fts5(subdomain, content='subdomain', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER IF NOT EXISTS subdomain_fts_ai AFTER INSERT ON subdomain BEGIN "
+    "INSERT INTO subdomain_fts(rowid, subdomain) VALUES (new.id, new.subdomain); END",
+    "CREATE TRIGGER IF NOT EXISTS subdomain_fts_ad AFTER DELETE ON subdomain BEGIN "
+    "INSERT INTO subdomain_fts(subdomain_fts, rowid, subdomain) VALUES ('delete', old.id, old.subdomain); END",
+    "CREATE TRIGGER IF NOT EXISTS subdomain_fts_au AFTER UPDATE OF subdomain ON subdomain BEGIN "
+    "INSERT INTO subdomain_fts(subdomain_fts, rowid, subdomain) VALUES ('delete', old.id, old.subdomain); "
+    "INSERT INTO subdomain_fts(rowid, subdomain) VALUES (new.id, new.subdomain); END",
+]
+
+
 class Subdomain(extensiones.db.Model):
+    # El mismo nombre puede registrarse bajo dominios distintos (p. ej. un dominio y uno de sus subdominios)
+    __table_args__ = (
+        extensiones.db.UniqueConstraint('domain_id', 'subdomain', name='uq_subdomain_domain_subdomain'),
+    )
     id = extensiones.db.Column(extensiones.db.Integer, primary_key=True)
     domain_id = extensiones.db.Column(extensiones.db.Integer, extensiones.db.ForeignKey('domain.id'), nullable=False)
-    subdomain = extensiones.db.Column(extensiones.db.String(64), unique=True, nullable=False)
+    subdomain = extensiones.db.Column(extensiones.db.String(64), nullable=False)
+    # Nombre invertido ("moc.elpmaxe.ved"): las búsquedas por sufijo son rangos sobre este índice
+    subdomain_rev = extensiones.db.Column(extensiones.db.String(64), index=True, default=_invertir)
     waf = extensiones.db.Column(extensiones.db.String(64), nullable=False)
+    # Origen del WAF: "http" si se detectó en el propio host, "cluster:<representante>" si se propagó
+    waf_source = extensiones.db.Column(extensiones.db.String(128), nullable=True)
+    # Origen del nombre: enum (herramientas), passive, certificate o axfr; None en filas anteriores (herramientas)
+    source = extensiones.db.Column(extensiones.db.String(16), nullable=True)
+    # Huella de la vista DNS/HTTP del host; update_at marca cuándo cambió por última vez
+    fingerprint = extensiones.db.Column(extensiones.db.String(40), nullable=True)
+    # Última vez que cada etapa costosa analizó el host (ver Subdomain.pending)
+    tech_at = extensiones.db.Column(extensiones.db.DateTime, nullable=True)
+    ports_at = extensiones.db.Column(extensiones.db.DateTime, nullable=True)
+    # Comprobación de vida (alive, dead, unknown): las etapas costosas saltean los hosts muertos
+    liveness = extensiones.db.Column(extensiones.db.String(8), nullable=True, index=True)
+    liveness_at = extensiones.db.Column(extensiones.db.DateTime, nullable=True)
     created_at = extensiones.db.Column(extensiones.db.DateTime, nullable=False, default=extensiones.datetime.utcnow)
     update_at = extensiones.db.Column(extensiones.db.DateTime)
     deleted_at = extensiones.db.Column(extensiones.db.DateTime)
     
 
+    @validates('subdomain')
+    def _invertirNombre(self, _, valor):
+        # Mantiene subdomain_rev al crear o renombrar por el ORM
+        self.subdomain_rev = valor[::-1] if valor else None
+        return valor
+
     @property
     def identity(self):
         """
@@ -71,7 +115,7 @@ class Subdomain(extensiones.db.Model):
         que tome un único argumento ``username`` y devuelva una instancia de usuario si hay alguna que coincida o ``None`` 
         si no la hay.
         """
-        return cls.query.filter_by(domain_id=domain_id).all()
+        return cls.query.filter_by(domain_id=domain_id, deleted_at=None).all()
 
     @classmethod
     def identify(cls, id):
@@ -91,6 +135,111 @@ class Subdomain(extensiones.db.Model):
     def readAll(cls):
         return cls.query.all()
 
+    @classmethod
+    def pending(cls, domain_id, etapa):
+        """
+        Devuelve los subdominios vigentes que una etapa aún no analizó desde su último cambio.
+
+        Args:
+            domain_id (int): El dominio.
+            etapa (str): La columna de la etapa (``tech_at`` o ``ports_at``).
+        """
+        analizado = getattr(cls, etapa)
+        return cls.query.filter(
+            cls.domain_id == domain_id, cls.deleted_at.is_(None),
+            analizado.is_(None) | (cls.update_at.isnot(None) & (analizado < cls.update_at)),
+        ).all()
+
+    @classmethod
+    def stale_liveness(cls, domain_id, vivos_desde, muertos_desde):
+        """
+        Devuelve los subdominios vigentes cuya comprobación de vida venció.
+
+        Los hosts muertos se vuelven a comprobar con menos frecuencia que el resto.
+
+        Args:
+            domain_id (int): El dominio.
+            vivos_desde (datetime): Vencen los vivos o desconocidos comprobados antes de este instante.
+            muertos_desde (datetime): Vencen los muertos comprobados antes de este instante.
+        """
+        return cls.query.filter(
+            cls.domain_id == domain_id, cls.deleted_at.is_(None),
+            cls.liveness_at.is_(None)
+            | ((cls.liveness == 'dead') & (cls.liveness_at < muertos_desde))
+            | ((cls.liveness != 'dead') & (cls.liveness_at < vivos_desde)),
+        ).all()
+
+    @classmethod
+    def search(cls, sufijo=None, texto=None, waf=None, domain_id=None):
+        """
+        Construye la consulta de búsqueda de subdominios vigentes.
+
+        Args:
+            sufijo (str, optional): Devuelve el nombre y todo lo que está bajo él (``dev.example.com``
+                o ``*.dev.example.com`` para excluir el propio nombre). Usa el índice de ``subdomain_rev``.
+            texto (str, optional): Una subcadena del nombre. Usa el índice trigram en SQLite.
+            waf (str, optional): El WAF detectado.
+            domain_id (int, optional): El dominio al que pertenecen.
+
+        Returns:
+            Query: La consulta, ordenada por id, para seguir filtrando o paginar.
+        """
+        consulta = cls.query.filter(cls.deleted_at.is_(None))
+        if sufijo:
+            sufijo = sufijo.strip().lower().rstrip('.')
+            comodin = sufijo.startswith('*.')
+            invertido = sufijo.lstrip('*.')[::-1]
+            # "moc.elpmaxe." <= rev < "moc.elpmaxe/": el carácter siguiente a "." cierra el rango
+            bajo = cls.subdomain_rev.between(f"{invertido}.", f"{invertido}/")
+            consulta = consulta.filter(bajo if comodin else (bajo | (cls.subdomain_rev == invertido)))
+        if texto:
+            texto = texto.strip().lower()
+            if len(texto) >= 3 and cls.indiceTexto():
+                coincidencias = text("SELECT rowid FROM subdomain_fts WHERE subdomain_fts MATCH :patron").bindparams(
+                    patron='"' + texto.replace('"', '""') + '"').columns(column('rowid'))
+                consulta = consulta.filter(cls.id.in_(coincidencias))
+            else:
+                consulta = consulta.filter(cls.subdomain.contains(texto, autoescape=True))
+        if waf:
+            consulta = consulta.filter(cls.waf == waf)
+        if domain_id:
+            consulta = consulta.filter(cls.domain_id == domain_id)
+        return consulta.order_by(cls.id)
+
+    @classmethod
+    def indiceTexto(cls):
+        """Indica si existe el índice trigram (solo en SQLite; ver ``Subdomain.reindexar``)."""
+        motor = extensiones.db.engine
+        return motor.dialect.name == 'sqlite' and inspect(motor).has_table('subdomain_fts')
+
+    @classmethod
+    def reindexar(cls):
+        """
+        Prepara los índices de búsqueda en una base de datos creada antes de que existieran.
+
+        Agrega y completa ``subdomain_rev``, y en SQLite crea y reconstruye el índice trigram.
+
+        Returns:
+            int: La cantidad de nombres cuyo ``subdomain_rev`` se completó.
+        """
+        sesion = extensiones.db.session
+        columnas = {c['name'] for c in inspect(extensiones.db.engine).get_columns(cls.__tablename__)}
+        if 'subdomain_rev' not in columnas:
+            sesion.execute(text(f"ALTER TABLE {cls.__tablename__} ADD COLUMN subdomain_rev VARCHAR(64)"))
+            sesion.execute(text(f"CREATE INDEX IF NOT EXISTS ix_{cls.__tablename__}_subdomain_rev "
+                                f"ON {cls.__tablename__} (subdomain_rev)"))
+        pendientes = sesion.query(cls.id, cls.subdomain).filter(cls.subdomain_rev.is_(None)).all()
+        if pendientes:
+            sesion.execute(cls.__table__.update().where(cls.id == extensiones.db.bindparam('_id')).values(
+                subdomain_rev=extensiones.db.bindparam('_rev')),
+                [{'_id': id, '_rev': nombre[::-1]} for id, nombre in pendientes])
+        if extensiones.db.engine.dialect.name == 'sqlite':
+            for sentencia in FTS_SQLITE:
+                sesion.execute(text(sentencia))
+            sesion.execute(text("INSERT INTO subdomain_fts(subdomain_fts) VALUES ('rebuild')"))
+        sesion.commit()
+        return len(pendientes)
+
     @classmethod
     def serialize(cls, subdomains):
         if isinstance(subdomains, list):
@@ -110,7 +259,13 @@ class Subdomain(extensiones.db.Model):
             'domain_id': subdomain.domain_id,
             'subdomain': subdomain.subdomain,
             'waf': subdomain.waf,
+            'waf_source': subdomain.waf_source,
+            'liveness': subdomain.liveness,
             'created_at': subdomain.created_at.isoformat() if subdomain.created_at else None,
             #'update_at': subdomain.update_at.isoformat() if subdomain.update_at else None,
             #'deleted_at': subdomain.deleted_at.isoformat() if subdomain.deleted_at else None,
-        }
\ No newline at end of file
+        }
+
+
+for _sentencia in FTS_SQLITE:
+    event.listen(Subdomain.__table__, 'after_create', DDL(_sentencia).execute_if(dialect='sqlite'))
@@ -20,9 +20,16 @@ La clase en sí puede implementarse de la forma que se considere oportuna. No ob
 """
 
 class Tech(extensiones.db.Model):
+    __table_args__ = (
+        extensiones.db.UniqueConstraint('subdomain_id', 'tech_data', name='uq_tech_subdomain_tech_data'),
+    )
+
     id = extensiones.db.Column(extensiones.db.Integer, primary_key=True)
-    subdomain_id = extensiones.db.Column(extensiones.db.Integer, extensiones.db.ForeignKey('subdomain.id'), nullable=False)
+    subdomain_id = extensiones.db.Column(extensiones.db.Integer, extensiones.db.ForeignKey('subdomain.id'), nullable=False, index=True)
     tech_data = extensiones.db.Column(extensiones.db.String(64), nullable=True)
+    version = extensiones.db.Column(extensiones.db.String(32), nullable=True)
+    # Origen del hallazgo: "http" si se detectó en el propio host, "cluster:<representante>" si se propagó
+    source = extensiones.db.Column(extensiones.db.String(128), nullable=True)
     created_at = extensiones.db.Column(extensiones.db.DateTime, nullable=False, default=extensiones.datetime.utcnow)
     update_at = extensiones.db.Column(extensiones.db.DateTime)
     deleted_at = extensiones.db.Column(extensiones.db.DateTime)
@@ -69,7 +76,7 @@ class Tech(extensiones.db.Model):
         que tome un único argumento ``username`` y devuelva una instancia de usuario si hay alguna que coincida o ``None`` 
         si no la hay.
         """
-        return cls.query.filter_by(subdomain_id=subdomain_id).one_or_none()
+        return cls.query.filter_by(subdomain_id=subdomain_id).all()
 
     @classmethod
     def identify(cls, id):
@@ -107,6 +114,8 @@ class Tech(extensiones.db.Model):
             'id': tech.id,
             'subdomain_id': tech.subdomain_id,
             'tech_data': tech.tech_data,
+            'version': tech.version,
+            'source': tech.source,
             'created_at': tech.created_at.isoformat() if tech.created_at else None,
             #'update_at': tech.update_at.isoformat() if tech.update_at else None,
             #'deleted_at': tech.deleted_at.isoformat() if tech.deleted_at else None,
@@ -21,8 +21,15 @@ La clase en sí puede implementarse de la forma que se considere oportuna. No ob
 
 class Vuln(extensiones.db.Model):
     id = extensiones.db.Column(extensiones.db.Integer, primary_key=True)
-    subdomain_id = extensiones.db.Column(extensiones.db.Integer, extensiones.db.ForeignKey('subdomain.id'), nullable=False)
+    subdomain_id = extensiones.db.Column(extensiones.db.Integer, extensiones.db.ForeignKey('subdomain.id'), nullable=False, index=True)
+    # El script NSE que reportó el hallazgo
     vulnerability_data = extensiones.db.Column(extensiones.db.String(64), nullable=True)
+    # La tarea que lo produjo (vuln, auth, exploit...) y el puerto ("443/tcp"; None en los scripts de host)
+    tool = extensiones.db.Column(extensiones.db.String(32), nullable=True)
+    port = extensiones.db.Column(extensiones.db.String(16), nullable=True)
+    output = extensiones.db.Column(extensiones.db.Text, nullable=True)
+    # Origen del hallazgo: "nmap" si se escaneó el propio host, "cluster:<representante>" si se propagó
+    source = extensiones.db.Column(extensiones.db.String(128), nullable=True)
     created_at = extensiones.db.Column(extensiones.db.DateTime, nullable=False, default=extensiones.datetime.utcnow)
     update_at = extensiones.db.Column(extensiones.db.DateTime)
     deleted_at = extensiones.db.Column(extensiones.db.DateTime)
@@ -94,7 +101,7 @@ class Vuln(extensiones.db.Model):
         if isinstance(vulns, list):
             serialized_list = []
             for vuln in vulns:
-                serialized_list.append(cls._serialize_tech(vuln))
+                serialized_list.append(cls._serialize_vuln(vuln))
             return serialized_list
         elif isinstance(vulns, cls):
             return cls._serialize_vuln(vulns)
@@ -107,6 +114,10 @@ class Vuln(extensiones.db.Model):
             'id': vuln.id,
             'subdomain_id': vuln.subdomain_id,
             'vulnerability_data': vuln.vulnerability_data,
+            'tool': vuln.tool,
+            'port': vuln.port,
+            'output': vuln.output,
+            'source': vuln.source,
             'created_at': vuln.created_at.isoformat() if vuln.created_at else None,
             #'update_at': vuln.update_at.isoformat() if vuln.update_at else None,
             #'deleted_at': vuln.deleted_at.isoformat() if vuln.deleted_at else None,
@@ -28,9 +28,9 @@ class Whois(extensiones.db.Model):
     registry_domain_id = extensiones.db.Column(extensiones.db.String(256), nullable=True)
     registrar_whois_server = extensiones.db.Column(extensiones.db.String(256), nullable=True)
     registrar_url = extensiones.db.Column(extensiones.db.String(256), nullable=True)
-    updated_date = extensiones.db.Column(extensiones.db.String(256), nullable=True)
-    creation_date = extensiones.db.Column(extensiones.db.String(256), nullable=True)
-    registry_expiry_date = extensiones.db.Column(extensiones.db.String(256), nullable=True)
+    updated_date = extensiones.db.Column(extensiones.db.DateTime, nullable=True)
+    creation_date = extensiones.db.Column(extensiones.db.DateTime, nullable=True)
+    registry_expiry_date = extensiones.db.Column(extensiones.db.DateTime, nullable=True, index=True)
     registrar = extensiones.db.Column(extensiones.db.String(256), nullable=True)
     registrar_iana_id = extensiones.db.Column(extensiones.db.String(256), nullable=True)
     registrar_abuse_contact_email = extensiones.db.Column(extensiones.db.String(256), nullable=True)
@@ -108,6 +108,18 @@ class Whois(extensiones.db.Model):
     def readAll(cls):
         return cls.query.all()
 
+    @classmethod
+    def expiringBefore(cls, fecha):
+        """
+        Devuelve los whois vigentes cuyo dominio expira antes de ``fecha``.
+
+        La consulta usa el índice de ``registry_expiry_date`` y ordena por la expiración más próxima.
+        """
+        return (cls.query
+                .filter(cls.registry_expiry_date.isnot(None), cls.registry_expiry_date < fecha, cls.deleted_at.is_(None))
+                .order_by(cls.registry_expiry_date)
+                .all())
+
     @classmethod
     def serialize(cls, whois):
         if isinstance(whois, list):
@@ -131,9 +143,9 @@ class Whois(extensiones.db.Model):
             'registry_domain_id': whois.registry_domain_id,
             'registrar_whois_server': whois.registrar_whois_server,
             'registrar_url': whois.registrar_url,
-            'updated_date': whois.updated_date,
-            'creation_date': whois.creation_date,
-            'registry_expiry_date': whois.registry_expiry_date,
+            'updated_date': whois.updated_date.isoformat() if whois.updated_date else None,
+            'creation_date': whois.creation_date.isoformat() if whois.creation_date else None,
+            'registry_expiry_date': whois.registry_expiry_date.isoformat() if whois.registry_expiry_date else None,
             'registrar': whois.registrar,
             'registrar_iana_id': whois.registrar_iana_id,
             'registrar_abuse_contact_email': whois.registrar_abuse_contact_email,
@@ -0,0 +1,121 @@
+import re
+import time
+import threading
+
+# Avisos con los que nmap informa congestión de su propio envío: sondas descartadas, aumento
+# del retardo entre sondas y puertos abandonados al agotar las retransmisiones. El contenido del
+# objetivo (un banner con "503" o "timed out", un título con "429") no cuenta
+PATRON_CONGESTION = re.compile(
+    r'Increasing send delay for|out of \d+ dropped probes|retransmission cap hit',
+    re.IGNORECASE,
+)
+
+
+def congestion(salida):
+    """Indica si la salida de nmap muestra sus avisos de congestión (sondas descartadas, retransmisiones agotadas)."""
+    return bool(salida) and isinstance(salida, str) and PATRON_CONGESTION.search(salida) is not None
+
+
+class _Estado():
+    __slots__ = ('limite', 'en_vuelo', 'rtt_minimo', 'rtt', 'recorte')
+
+    def __init__(self, inicial):
+        self.limite = float(inicial)
+        self.en_vuelo = 0
+        self.rtt_minimo = None
+        self.rtt = None
+        self.recorte = 0.0
+
+
+class ControlAimd():
+    """
+    Control AIMD (aumento aditivo, reducción multiplicativa) de un límite por llave.
+
+    Cada llave (un host y una herramienta, o ``('*', herramienta)`` para el total
+    del enlace propio) tiene un límite que crece en ``aumento`` por ventana de
+    resultados sanos y se multiplica por ``reduccion`` ante una señal de
+    congestión (los avisos de nmap, o con ``tolerancia`` una latencia por encima
+    de ``tolerancia`` veces la mínima observada). Como mucho se reduce una vez por
+    latencia observada, para no castigar varias veces la misma ráfaga.
+
+    Sirve para limitar tareas en vuelo (``intentar`` / ``liberar``) y también para
+    ajustar una tasa, como los paquetes por segundo de nmap (``exito`` / ``congestion``
+    y ``limite``). Es seguro entre hilos y local a cada proceso.
+    """
+
+    def __init__(self, inicial=4, minimo=1, maximo=64, aumento=1, reduccion=0.5, tolerancia=2.0, por_ventana=True):
+        self.inicial = inicial
+        self.minimo = minimo
+        self.maximo = maximo
+        self.aumento = aumento
+        self.reduccion = reduccion
+        self.tolerancia = tolerancia
+        # Con ``por_ventana`` el límite crece ``aumento`` por cada ``limite`` éxitos (como TCP);
+        # sin él crece ``aumento`` por cada éxito (para tasas)
+        self.por_ventana = por_ventana
+        self._estados = {}
+        self._lock = threading.Lock()
+
+    def _estado(self, llave):
+        estado = self._estados.get(llave)
+        if estado is None:
+            estado = self._estados[llave] = _Estado(self.inicial)
+        return estado
+
+    def limite(self, llave):
+        """Devuelve el límite actual de una llave (entero, al menos ``minimo``)."""
+        with self._lock:
+            return max(self.minimo, int(self._estado(llave).limite))
+
+    def intentar(self, *llaves):
+        """
+        Reserva un cupo en todas las llaves si ninguna alcanzó su límite.
+
+        Returns:
+            bool: True si se reservó el cupo (hay que devolverlo con ``liberar``).
+        """
+        with self._lock:
+            estados = [self._estado(llave) for llave in llaves]
+            if any(e.en_vuelo >= max(self.minimo, int(e.limite)) for e in estados):
+                return False
+            for estado in estados:
+                estado.en_vuelo += 1
+            return True
+
+    def liberar(self, llaves, latencia=None, congestionado=False):
+        """Devuelve el cupo de ``intentar`` y ajusta el límite de cada llave con el resultado."""
+        with self._lock:
+            for llave in llaves:
+                estado = self._estado(llave)
+                estado.en_vuelo = max(0, estado.en_vuelo - 1)
+                self._ajustar(estado, latencia, congestionado)
+
+    def exito(self, llave, latencia=None):
+        """Registra un resultado sano (sin cupo en vuelo)."""
+        with self._lock:
+            self._ajustar(self._estado(llave), latencia, False)
+
+    def congestion(self, llave, latencia=None):
+        """Registra una señal de congestión (sin cupo en vuelo)."""
+        with self._lock:
+            self._ajustar(self._estado(llave), latencia, True)
+
+    def _ajustar(self, estado, latencia, congestionado):
+        if latencia is not None:
+            estado.rtt_minimo = latencia if estado.rtt_minimo is None else min(estado.rtt_minimo, latencia)
+            estado.rtt = latencia if estado.rtt is None else 0.8 * estado.rtt + 0.2 * latencia
+            if self.tolerancia and estado.rtt > estado.rtt_minimo * self.tolerancia:
+                congestionado = True
+        ahora = time.monotonic()
+        if congestionado:
+            if ahora - estado.recorte >= (estado.rtt or 0):
+                estado.limite = max(self.minimo, estado.limite * self.reduccion)
+                estado.recorte = ahora
+            return
+        aumento = self.aumento / max(estado.limite, 1) if self.por_ventana else self.aumento
+        estado.limite = min(self.maximo, estado.limite + aumento)
+
+    def estado(self):
+        """Devuelve un resumen ``llave -> (límite, en vuelo)`` para diagnóstico."""
+        with self._lock:
+            return {llave: (int(e.limite), e.en_vuelo) for llave, e in self._estados.items()}
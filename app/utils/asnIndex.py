@@ -0,0 +1,221 @@
+import io
+import os
+import sys
+import mmap
+import gzip
+import array
+import socket
+import struct
+from bisect import bisect_right
+from functools import lru_cache, partial
+from itertools import repeat
+from collections import namedtuple
+
+Asn = namedtuple('Asn', 'asn pais organizacion')
+Asn.__doc__ = """Sistema autónomo de una dirección: número, código de país y organización."""
+
+MAGIA = b'AIRANASN'
+VERSION = 1
+# magia, versión, orden de bytes, rangos IPv4, rangos IPv6, registros, tamaño del bloque de texto
+CABECERA = struct.Struct('<8sHBxIIII')
+ORDEN = 0 if sys.byteorder == 'little' else 1
+
+
+class ErrorIndiceAsn(ValueError):
+    """El archivo no es un índice ASN válido para esta plataforma."""
+
+
+class _Claves6():
+    """Secuencia de enteros de 128 bits sobre un bloque big-endian, para usar con ``bisect``."""
+
+    __slots__ = ('_datos', '_largo')
+
+    def __init__(self, datos):
+        self._datos = datos
+        self._largo = len(datos) // 16
+
+    def __len__(self):
+        return self._largo
+
+    def __getitem__(self, i):
+        return int.from_bytes(self._datos[i * 16:i * 16 + 16], 'big')
+
+
+def _abrirTexto(ruta):
+    if ruta.endswith('.gz'):
+        return io.TextIOWrapper(gzip.open(ruta, 'rb'), encoding='utf-8', errors='replace')
+    return open(ruta, encoding='utf-8', errors='replace')
+
+
+class IndiceAsn():
+    """
+    Índice de intervalos de direcciones IP a ASN, país y organización.
+
+    Se compila una vez desde un TSV tipo ip2asn
+    (``inicio  fin  asn  país  descripción``) a un archivo binario con arreglos
+    ordenados de inicios y fines de rango, un arreglo con el registro de cada
+    rango y una tabla de textos deduplicada. El archivo se abre con ``mmap``:
+    abrirlo no lee ni parsea nada y las búsquedas son ``bisect`` sobre
+    ``memoryview``, sin acceso a la red.
+    """
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        with open(ruta, 'rb') as archivo:
+            self._mapa = mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ)
+        vista = memoryview(self._mapa)
+        magia, version, orden, n4, n6, registros, texto = CABECERA.unpack_from(vista, 0)
+        if magia != MAGIA or version != VERSION:
+            raise ErrorIndiceAsn(f"{ruta} no es un índice ASN")
+        if orden != ORDEN:
+            raise ErrorIndiceAsn(f"{ruta} se compiló en una plataforma con otro orden de bytes")
+
+        pos = CABECERA.size
+        self._inicios4 = vista[pos:pos + n4 * 4].cast('I')
+        pos += n4 * 4
+        self._fines4 = vista[pos:pos + n4 * 4].cast('I')
+        pos += n4 * 4
+        self._datos4 = vista[pos:pos + n4 * 4].cast('I')
+        pos += n4 * 4
+        self._inicios6 = _Claves6(vista[pos:pos + n6 * 16])
+        pos += n6 * 16
+        self._fines6 = _Claves6(vista[pos:pos + n6 * 16])
+        pos += n6 * 16
+        self._datos6 = vista[pos:pos + n6 * 4].cast('I')
+        pos += n6 * 4
+        self._desplazamientos = vista[pos:pos + (registros + 1) * 4].cast('I')
+        pos += (registros + 1) * 4
+        self._texto = vista[pos:pos + texto]
+        self.rangos = n4 + n6
+        self._registro = lru_cache(maxsize=65536)(self._leerRegistro)
+
+    def _leerRegistro(self, indice):
+        inicio, fin = self._desplazamientos[indice], self._desplazamientos[indice + 1]
+        asn, pais, organizacion = bytes(self._texto[inicio:fin]).decode('utf-8').split('\t', 2)
+        return Asn(int(asn), pais or None, organizacion or None)
+
+    @staticmethod
+    @lru_cache(maxsize=4)
+    def abrir(ruta):
+        """Abre (una sola vez por ruta) un índice compilado con ``IndiceAsn.compilar``."""
+        return IndiceAsn(ruta)
+
+    @staticmethod
+    def compilar(origen, destino):
+        """
+        Compila un TSV tipo ip2asn (puede estar en gzip) a un índice binario.
+
+        Los rangos sin ASN (``0`` / ``Not routed``) se omiten y los rangos
+        solapados se recortan para que los inicios queden estrictamente ordenados.
+
+        Args:
+            origen (str): La ruta del TSV.
+            destino (str): La ruta del índice a escribir.
+
+        Returns:
+            int: La cantidad de rangos indexados.
+        """
+        rangos4, rangos6 = [], []
+        registros, textos = {}, []
+        with _abrirTexto(origen) as archivo:
+            for linea in archivo:
+                partes = linea.rstrip('\n').split('\t')
+                if len(partes) < 5 or partes[2] in ('0', ''):
+                    continue
+                try:
+                    familia = socket.AF_INET6 if ':' in partes[0] else socket.AF_INET
+                    inicio = int.from_bytes(socket.inet_pton(familia, partes[0]), 'big')
+                    fin = int.from_bytes(socket.inet_pton(familia, partes[1]), 'big')
+                    asn = int(partes[2])
+                except (OSError, ValueError):
+                    continue
+                clave = f"{asn}\t{partes[3] if partes[3] not in ('None', '') else ''}\t{partes[4].strip()}"
+                if clave not in registros:
+                    registros[clave] = len(textos)
+                    textos.append(clave.encode('utf-8'))
+                (rangos6 if familia == socket.AF_INET6 else rangos4).append((inicio, fin, registros[clave]))
+
+        def ordenar(rangos):
+            rangos.sort()
+            limpios, ultimo_fin = [], -1
+            for inicio, fin, registro in rangos:
+                inicio = max(inicio, ultimo_fin + 1)
+                if inicio <= fin:
+                    limpios.append((inicio, fin, registro))
+                    ultimo_fin = fin
+            return limpios
+        rangos4, rangos6 = ordenar(rangos4), ordenar(rangos6)
+
+        desplazamientos, total = array.array('I', [0]), 0
+        for texto in textos:
+            total += len(texto)
+            desplazamientos.append(total)
+
+        temporal = f"{destino}.tmp"
+        with open(temporal, 'wb') as salida:
+            salida.write(CABECERA.pack(MAGIA, VERSION, ORDEN, len(rangos4), len(rangos6), len(textos), total))
+            for columna in range(3):
+                salida.write(array.array('I', (r[columna] for r in rangos4)).tobytes())
+            for columna in range(2):
+                salida.write(b''.join(r[columna].to_bytes(16, 'big') for r in rangos6))
+            salida.write(array.array('I', (r[2] for r in rangos6)).tobytes())
+            salida.write(desplazamientos.tobytes())
+            for texto in textos:
+                salida.write(texto)
+        os.replace(temporal, destino)
+        return len(rangos4) + len(rangos6)
+
+    def _buscar(self, clave, inicios, fines, datos):
+        i = bisect_right(inicios, clave) - 1
+        if i < 0 or clave > fines[i]:
+            return None
+        return self._registro(datos[i])
+
+    @staticmethod
+    def _clave4(ip):
+        # -1 queda antes de todo rango: las direcciones inválidas no encuentran ASN
+        try:
+            return int.from_bytes(socket.inet_pton(socket.AF_INET, ip), 'big')
+        except OSError:
+            return -1
+
+    def buscar(self, ip):
+        """
+        Busca el ASN de una dirección IPv4 o IPv6.
+
+        Returns:
+            Asn | None: El ASN, o None si la dirección no está en ningún rango (o no es válida).
+        """
+        try:
+            if ':' in ip:
+                return self._buscar(int.from_bytes(socket.inet_pton(socket.AF_INET6, ip), 'big'),
+                                    self._inicios6, self._fines6, self._datos6)
+            return self._buscar(int.from_bytes(socket.inet_pton(socket.AF_INET, ip), 'big'), self._inicios4, self._fines4, self._datos4)
+        except OSError:
+            return None
+
+    def buscarMuchos(self, ips):
+        """
+        Busca el ASN de muchas direcciones a la vez.
+
+        Args:
+            ips (iterable): Las direcciones (pueden repetirse).
+
+        Returns:
+            dict: Un diccionario dirección -> ``Asn`` o None.
+        """
+        unicas = list(dict.fromkeys(ips))
+        ip4 = [ip for ip in unicas if ':' not in ip]
+        resultados = {ip: self.buscar(ip) for ip in unicas if ':' in ip}
+
+        # El bucle caliente corre en C: map sobre inet_pton, from_bytes y bisect
+        pton, desde_bytes = partial(socket.inet_pton, socket.AF_INET), partial(int.from_bytes, byteorder='big')
+        try:
+            claves = list(map(desde_bytes, map(pton, ip4)))
+        except OSError:
+            claves = [self._clave4(ip) for ip in ip4]
+        fines, datos, registro = self._fines4, self._datos4, self._registro
+        posiciones = map(bisect_right, repeat(self._inicios4), claves)
+        for ip, clave, i in zip(ip4, claves, posiciones):
+            resultados[ip] = registro(datos[i - 1]) if i and clave <= fines[i - 1] else None
+        return resultados
@@ -0,0 +1,237 @@
+import random
+import struct
+import socket
+import asyncio
+import concurrent.futures
+from collections import namedtuple
+
+Registro = namedtuple('Registro', ['nombre', 'tipo', 'ttl', 'valor'])
+
+TIPOS = {1: 'A', 2: 'NS', 5: 'CNAME', 6: 'SOA', 12: 'PTR', 15: 'MX', 16: 'TXT', 28: 'AAAA', 33: 'SRV'}
+QTYPE_AXFR = 252
+
+TRANSFERENCIA_EXITOSA = "Transferencia de zona exitosa"
+TRANSFERENCIA_FALLIDA = "Falló la transferencia de zona"
+SIN_ACCESO = "Sin acceso"
+INGESTA_FALLIDA = "Transferencia exitosa, falló la ingesta"
+
+
+class TransferenciaRechazada(Exception):
+    """El servidor respondió pero no permite la transferencia de zona."""
+
+
+def codificarNombre(nombre):
+    salida = bytearray()
+    for etiqueta in nombre.strip('.').split('.'):
+        if etiqueta:
+            datos = etiqueta.encode('idna')
+            salida.append(len(datos))
+            salida += datos
+    salida.append(0)
+    return bytes(salida)
+
+
+def construirConsulta(dominio, qtype=QTYPE_AXFR, qid=None):
+    """
+    Construye una consulta DNS sobre TCP (con el prefijo de longitud de 2 bytes).
+
+    Args:
+        dominio (str): La zona a consultar.
+        qtype (int): El tipo de consulta, AXFR por defecto.
+        qid (int, optional): El identificador del mensaje.
+
+    Returns:
+        bytes: El mensaje listo para escribir en el socket.
+    """
+    qid = random.getrandbits(16) if qid is None else qid
+    mensaje = struct.pack('!HHHHHH', qid, 0, 1, 0, 0, 0) + codificarNombre(dominio) + struct.pack('!HH', qtype, 1)
+    return struct.pack('!H', len(mensaje)) + mensaje
+
+
+def leerNombre(mensaje, posicion):
+    """Lee un nombre (con compresión) y devuelve ``(nombre, posicion_siguiente)``."""
+    etiquetas = []
+    siguiente = None
+    saltos = 0
+    while True:
+        largo = mensaje[posicion]
+        if largo & 0xC0 == 0xC0:
+            if siguiente is None:
+                siguiente = posicion + 2
+            saltos += 1
+            if saltos > 64:
+                raise ValueError("Compresión de nombres en bucle.")
+            posicion = ((largo & 0x3F) << 8) | mensaje[posicion + 1]
+            continue
+        posicion += 1
+        if largo == 0:
+            break
+        etiquetas.append(mensaje[posicion:posicion + largo].decode('ascii', 'replace'))
+        posicion += largo
+    return '.'.join(etiquetas).lower(), (siguiente if siguiente is not None else posicion)
+
+
+def _rdata(mensaje, tipo, inicio, largo):
+    if tipo == 1 and largo == 4:
+        return socket.inet_ntop(socket.AF_INET, mensaje[inicio:inicio + 4])
+    if tipo == 28 and largo == 16:
+        return socket.inet_ntop(socket.AF_INET6, mensaje[inicio:inicio + 16])
+    if tipo in (2, 5, 12):
+        return leerNombre(mensaje, inicio)[0]
+    if tipo == 15:
+        return f"{struct.unpack_from('!H', mensaje, inicio)[0]} {leerNombre(mensaje, inicio + 2)[0]}"
+    if tipo == 33:
+        prioridad, peso, puerto = struct.unpack_from('!HHH', mensaje, inicio)
+        return f"{prioridad} {peso} {puerto} {leerNombre(mensaje, inicio + 6)[0]}"
+    if tipo == 6:
+        mname, posicion = leerNombre(mensaje, inicio)
+        rname, posicion = leerNombre(mensaje, posicion)
+        return f"{mname} {rname} {struct.unpack_from('!I', mensaje, posicion)[0]}"
+    if tipo == 16:
+        partes, posicion = [], inicio
+        while posicion < inicio + largo:
+            n = mensaje[posicion]
+            partes.append(mensaje[posicion + 1:posicion + 1 + n].decode('utf-8', 'replace'))
+            posicion += 1 + n
+        return ''.join(partes)
+    return mensaje[inicio:inicio + largo].hex()
+
+
+def decodificarMensaje(mensaje, autoridad=False):
+    """
+    Decodifica un mensaje DNS de respuesta.
+
+    Args:
+        mensaje (bytes): El mensaje sin el prefijo de longitud.
+        autoridad (bool): Incluye también la sección de autoridad (el SOA de las respuestas negativas).
+
+    Returns:
+        tuple: ``(rcode, registros)`` donde registros es una lista de ``Registro`` de la sección de respuesta.
+    """
+    _, banderas, qdcount, ancount, nscount, _ = struct.unpack_from('!HHHHHH', mensaje, 0)
+    posicion = 12
+    for _ in range(qdcount):
+        posicion = leerNombre(mensaje, posicion)[1] + 4
+    registros = []
+    for _ in range(ancount + (nscount if autoridad else 0)):
+        nombre, posicion = leerNombre(mensaje, posicion)
+        tipo, _, ttl, largo = struct.unpack_from('!HHIH', mensaje, posicion)
+        posicion += 10
+        registros.append(Registro(nombre, TIPOS.get(tipo, str(tipo)), ttl, _rdata(mensaje, tipo, posicion, largo)))
+        posicion += largo
+    return banderas & 0x000F, registros
+
+
+class Axfr():
+    """
+    Cliente AXFR asíncrono en proceso.
+
+    Prueba cada nameserver de forma independiente y con timeouts propios. Los
+    mensajes TCP se leen y decodifican de uno en uno (máximo 64 KB cada uno), así
+    que la memoria no depende del tamaño de la zona. Solo la primera transferencia
+    exitosa se entrega al consumidor; el resto de servidores se cierran en cuanto
+    confirman que permiten la transferencia. El consumidor (sincrónico, por ejemplo
+    escrituras en la base) corre en un hilo aparte para no frenar los timeouts de
+    los demás servidores, y sus errores solo afectan al veredicto de su servidor.
+    """
+
+    @staticmethod
+    async def registros(servidor, dominio, timeout=10, puerto=53):
+        """
+        Genera los registros de la zona transferida por un servidor.
+
+        Args:
+            servidor (str): El nameserver (nombre o IP).
+            dominio (str): La zona a transferir.
+            timeout (float): Segundos máximos para conectar y para cada mensaje.
+            puerto (int): El puerto TCP del servidor.
+
+        Yields:
+            Registro: Cada registro de la zona, terminando en el SOA final.
+
+        Raises:
+            TransferenciaRechazada: Si el servidor rechaza o no completa la transferencia.
+        """
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(servidor, puerto), timeout)
+        try:
+            writer.write(construirConsulta(dominio))
+            await writer.drain()
+            soas = 0
+            primero = True
+            while True:
+                try:
+                    longitud = struct.unpack('!H', await asyncio.wait_for(reader.readexactly(2), timeout))[0]
+                    mensaje = await asyncio.wait_for(reader.readexactly(longitud), timeout)
+                except asyncio.IncompleteReadError:
+                    raise TransferenciaRechazada("Conexión cerrada antes de terminar la transferencia.")
+                rcode, registros = decodificarMensaje(mensaje)
+                if rcode:
+                    raise TransferenciaRechazada(f"RCODE {rcode}")
+                if primero and (not registros or registros[0].tipo != 'SOA'):
+                    raise TransferenciaRechazada("Respuesta sin SOA inicial.")
+                primero = False
+                for registro in registros:
+                    yield registro
+                    if registro.tipo == 'SOA':
+                        soas += 1
+                        if soas == 2:
+                            return
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _probar(servidor, dominio, timeout, puerto, turno, consumidor, lote, ejecutor):
+        loop = asyncio.get_running_loop()
+        try:
+            pendientes = []
+            ingesta = False
+            async for registro in Axfr.registros(servidor, dominio, timeout, puerto):
+                if not ingesta:
+                    # El SOA inicial confirma la transferencia; solo un servidor ingiere la zona
+                    if consumidor is None or turno.locked():
+                        return servidor, TRANSFERENCIA_EXITOSA
+                    await turno.acquire()
+                    ingesta = True
+                pendientes.append(registro)
+                if len(pendientes) >= lote:
+                    # Se espera cada lote: la memoria sigue acotada si la base es más lenta que la red
+                    await loop.run_in_executor(ejecutor, consumidor, pendientes)
+                    pendientes = []
+            if pendientes:
+                await loop.run_in_executor(ejecutor, consumidor, pendientes)
+            return servidor, TRANSFERENCIA_EXITOSA
+        except TransferenciaRechazada:
+            return servidor, TRANSFERENCIA_FALLIDA
+        except (OSError, asyncio.TimeoutError, ValueError, IndexError, struct.error):
+            return servidor, SIN_ACCESO
+        except Exception:
+            # Solo el consumidor puede fallar de otra forma: la transferencia se logró pero no se guardó
+            return servidor, INGESTA_FALLIDA
+
+    @staticmethod
+    async def probarTodos(nameservers, dominio, consumidor=None, timeout=10, puerto=53, lote=500):
+        """Versión asíncrona de ``Axfr.probar``."""
+        turno = asyncio.Lock()
+        with concurrent.futures.ThreadPoolExecutor(1) as ejecutor:
+            tareas = [Axfr._probar(ns.strip().rstrip('.'), dominio, timeout, puerto, turno, consumidor, lote, ejecutor)
+                      for ns in dict.fromkeys(nameservers) if ns and ns.strip()]
+            return dict(await asyncio.gather(*tareas))
+
+    @staticmethod
+    def probar(nameservers, dominio, consumidor=None, timeout=10, puerto=53, lote=500):
+        """
+        Prueba la transferencia de zona en cada nameserver de forma concurrente.
+
+        Args:
+            nameservers (list): Los nameservers del dominio.
+            dominio (str): La zona a transferir.
+            consumidor (callable, optional): Recibe lotes de ``Registro`` de la primera transferencia exitosa;
+                corre en un hilo aparte, así que no debe depender del contexto del hilo que llama.
+            timeout (float): Segundos máximos para conectar y para cada mensaje.
+            puerto (int): El puerto TCP de los servidores.
+            lote (int): Cantidad de registros por lote entregado al consumidor.
+
+        Returns:
+            dict: Un diccionario nameserver -> veredicto de la transferencia.
+        """
+        return asyncio.run(Axfr.probarTodos(nameservers, dominio, consumidor, timeout, puerto, lote))
@@ -0,0 +1,58 @@
+from sqlalchemy.dialects import sqlite, postgresql
+from app.extensions import extensiones
+
+
+class Bulk():
+    """
+    Inserciones masivas que ignoran las filas que ya existen.
+
+    Se usa desde las etapas que ingieren grandes volúmenes (zonas AXFR, importaciones,
+    resultados de workers) para escribir por lotes sin cargar en memoria lo que ya
+    está en la base de datos.
+    """
+
+    @staticmethod
+    def insertar(modelo, filas, conflicto=None):
+        """
+        Inserta un lote de filas ignorando los conflictos de unicidad.
+
+        Args:
+            modelo (db.Model): El modelo destino.
+            filas (list): Una lista de diccionarios columna -> valor.
+            conflicto (list, optional): Columnas del índice único (requerido en PostgreSQL si hay varios).
+
+        Returns:
+            int: La cantidad de filas insertadas (según informe el motor).
+        """
+        if not filas:
+            return 0
+        dialecto = extensiones.db.engine.dialect.name
+        if dialecto == 'sqlite':
+            sentencia = sqlite.insert(modelo).on_conflict_do_nothing(index_elements=conflicto)
+        elif dialecto == 'postgresql':
+            sentencia = postgresql.insert(modelo).on_conflict_do_nothing(index_elements=conflicto)
+        else:
+            sentencia = modelo.__table__.insert().prefix_with('IGNORE')
+        resultado = extensiones.db.session.connection().execute(sentencia, filas)
+        return resultado.rowcount
+
+    @staticmethod
+    def ids(modelo, columna, valores, **filtros):
+        """
+        Devuelve un diccionario valor -> id para los valores indicados.
+
+        Args:
+            modelo (db.Model): El modelo a consultar.
+            columna (str): La columna por la que se busca.
+            valores (iterable): Los valores a buscar.
+            **filtros: Filtros de igualdad adicionales.
+
+        Returns:
+            dict: Un diccionario valor -> id.
+        """
+        valores = list(set(valores))
+        if not valores:
+            return {}
+        campo = getattr(modelo, columna)
+        consulta = extensiones.db.session.query(campo, modelo.id).filter(campo.in_(valores)).filter_by(**filtros)
+        return dict(consulta.all())
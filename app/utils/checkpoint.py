@@ -0,0 +1,85 @@
+import os
+import xml.etree.ElementTree as ET
+
+SUFIJO_PARCIAL = '.part'
+
+
+class Checkpoint():
+    """
+    Reportes XML de nmap con confirmación atómica.
+
+    nmap escribe en ``<reporte>.part``; solo cuando el XML está completo (raíz
+    ``nmaprun`` bien cerrada y ``<finished exit="success">``) se sincroniza a disco
+    y se renombra al nombre final con ``os.replace``. Un reporte con su nombre
+    final está, por lo tanto, siempre completo; uno truncado por la caída del
+    proceso queda como ``.part`` y se descarta.
+    """
+
+    @staticmethod
+    def parcial(ruta):
+        """Devuelve la ruta donde nmap escribe el reporte mientras corre."""
+        return f"{ruta}{SUFIJO_PARCIAL}"
+
+    @staticmethod
+    def validar(ruta):
+        """
+        Comprueba que un reporte XML de nmap esté completo.
+
+        Returns:
+            str | None: None si el reporte está completo, o el motivo por el que no lo está.
+        """
+        raiz, terminado = None, None
+        try:
+            for evento, elemento in ET.iterparse(ruta, events=('start', 'end')):
+                if raiz is None:
+                    raiz = elemento.tag
+                if evento != 'end':
+                    continue
+                if elemento.tag == 'finished':
+                    terminado = elemento.get('exit', 'success')
+                elif elemento.tag == 'host':
+                    elemento.clear()
+        except FileNotFoundError:
+            return 'Sin reporte'
+        except (ET.ParseError, OSError) as e:
+            return f'Reporte truncado: {e}'
+        if raiz != 'nmaprun':
+            return 'No es un reporte de nmap'
+        if terminado is None:
+            return 'Reporte sin fin de escaneo'
+        if terminado != 'success':
+            return f'nmap terminó con {terminado}'
+        return None
+
+    @staticmethod
+    def confirmar(ruta):
+        """
+        Valida el reporte parcial y, si está completo, lo publica con su nombre final.
+
+        Returns:
+            str | None: None si se confirmó, o el motivo por el que se descartó.
+        """
+        parcial = Checkpoint.parcial(ruta)
+        error = Checkpoint.validar(parcial)
+        if error is not None:
+            Checkpoint.descartar(ruta)
+            return error
+        with open(parcial, 'rb') as archivo:
+            os.fsync(archivo.fileno())
+        os.replace(parcial, ruta)
+        # El renombre es durable solo cuando el directorio también llega a disco
+        directorio = os.open(os.path.dirname(ruta) or '.', os.O_RDONLY)
+        try:
+            os.fsync(directorio)
+        finally:
+            os.close(directorio)
+        return None
+
+    @staticmethod
+    def descartar(ruta, reporte=False):
+        """Elimina el reporte parcial de una ejecución interrumpida y, con ``reporte``, también el confirmado."""
+        for archivo in (Checkpoint.parcial(ruta), ruta) if reporte else (Checkpoint.parcial(ruta),):
+            try:
+                os.remove(archivo)
+            except FileNotFoundError:
+                pass
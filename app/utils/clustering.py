@@ -0,0 +1,114 @@
+import re
+import hashlib
+from collections import Counter
+
+_PALABRAS = re.compile(rb'[a-z0-9]{2,}')
+_ETIQUETAS = re.compile(rb'<[^>]*>')
+
+BITS = 64
+# Con 8 bandas de 8 bits, dos simhash a distancia <= 7 comparten al menos una banda
+BANDAS = 8
+ANCHO_BANDA = BITS // BANDAS
+MAX_TEXTO = 64 * 1024
+MIN_CUERPO_SIMHASH = 256
+
+
+def simhash(cuerpo):
+    """
+    Calcula el simhash de 64 bits de un cuerpo HTML sobre tripletas de palabras.
+
+    Args:
+        cuerpo (bytes): El cuerpo de la respuesta.
+
+    Returns:
+        int | None: El simhash, o None si el cuerpo es demasiado corto para compararlo.
+    """
+    if not cuerpo or len(cuerpo) < MIN_CUERPO_SIMHASH:
+        return None
+    palabras = _PALABRAS.findall(_ETIQUETAS.sub(b' ', cuerpo[:MAX_TEXTO].lower()))
+    if len(palabras) < 3:
+        return None
+    tripletas = Counter(b' '.join(palabras[i:i + 3]) for i in range(len(palabras) - 2))
+    pesos = [0] * BITS
+    for tripleta, cantidad in tripletas.items():
+        valor = int.from_bytes(hashlib.blake2b(tripleta, digest_size=8).digest(), 'big')
+        for bit in range(BITS):
+            pesos[bit] += cantidad if valor >> bit & 1 else -cantidad
+    return sum(1 << bit for bit, peso in enumerate(pesos) if peso > 0)
+
+
+def hamming(a, b):
+    return (a ^ b).bit_count()
+
+
+class Agrupador():
+    """
+    Agrupa respuestas HTTP idénticas o casi idénticas.
+
+    Las respuestas con el mismo estado y el mismo hash de cuerpo se agrupan
+    directamente; las demás se comparan por simhash con un índice LSH por
+    bandas, de modo que solo se calcula la distancia de Hamming entre
+    candidatos que comparten una banda. Los grupos se unen con union-find y el
+    representante de cada grupo es su primer miembro (en orden de llegada).
+    """
+
+    def __init__(self, umbral=6):
+        self.umbral = umbral
+        self._padre = {}
+        self._orden = {}
+        self._exactos = {}
+        self._bandas = [{} for _ in range(BANDAS)]
+        self._simhash = {}
+
+    def _raiz(self, miembro):
+        while self._padre[miembro] != miembro:
+            self._padre[miembro] = self._padre[self._padre[miembro]]
+            miembro = self._padre[miembro]
+        return miembro
+
+    def _unir(self, a, b):
+        a, b = self._raiz(a), self._raiz(b)
+        if a != b:
+            # El representante es el miembro más antiguo
+            if self._orden[b] < self._orden[a]:
+                a, b = b, a
+            self._padre[b] = a
+
+    def agregar(self, miembro, estado=None, hash_cuerpo=None, huella=None):
+        """
+        Agrega una respuesta al índice.
+
+        Args:
+            miembro: Identificador del host (nombre o id).
+            estado (int, optional): El estado HTTP.
+            hash_cuerpo (str, optional): El hash exacto del cuerpo.
+            huella (int, optional): El simhash del cuerpo.
+        """
+        self._padre[miembro] = miembro
+        self._orden[miembro] = len(self._orden)
+        if hash_cuerpo:
+            llave = (estado, hash_cuerpo)
+            if llave in self._exactos:
+                self._unir(self._exactos[llave], miembro)
+                return
+            self._exactos[llave] = miembro
+        if huella is None:
+            return
+        self._simhash[miembro] = huella
+        for i, banda in enumerate(self._bandas):
+            clave = (estado, huella >> (i * ANCHO_BANDA) & ((1 << ANCHO_BANDA) - 1))
+            for candidato in banda.get(clave, ()):
+                if hamming(self._simhash[candidato], huella) <= self.umbral:
+                    self._unir(candidato, miembro)
+            banda.setdefault(clave, []).append(miembro)
+
+    def representantes(self):
+        """Devuelve un diccionario miembro -> representante de su grupo."""
+        return {miembro: self._raiz(miembro) for miembro in self._padre}
+
+    def grupos(self):
+        """Devuelve un diccionario representante -> lista de miembros (incluido él)."""
+        grupos = {}
+        for miembro, representante in self.representantes().items():
+            grupos.setdefault(representante, []).append(miembro)
+        return grupos
@@ -1,22 +1,29 @@
 import re
 import os
 import bleach
+import time
 import subprocess
 import concurrent.futures
+import xml.etree.ElementTree as ET
 from html import unescape
-from dateutil import parser
 from datetime import datetime
-from bs4 import BeautifulSoup
+from collections import deque
+from app.utils.extractor import extractor
+from app.utils.fechas import Fechas
+from app.utils.whois import WhoisParser
+from app.utils.aimd import congestion
+
+PATRON_PUERTO_ABIERTO = re.compile(r'^(\d+)/(tcp|udp)\s+open\s+(\S+)?')
 
 class Core():
 
     @staticmethod
     def convertir_fecha(fecha_str):
-        try:
-            fecha_obj = parser.parse(fecha_str, dayfirst=True)  # dayfirst=True para manejar formatos con día primero
-            return datetime.strptime(fecha_obj.strftime('%d-%m-%Y'), '%d-%m-%Y').date()
-        except ValueError as e:
-            raise ValueError("Formato de fecha no válido") from e
+        # dayfirst=True para manejar formatos con día primero; el formato detectado queda en caché
+        fecha_obj = Fechas.normalizar(fecha_str, dayfirst=True)
+        if fecha_obj is None:
+            raise ValueError("Formato de fecha no válido")
+        return fecha_obj.date()
 
     @staticmethod
     def validar(data):
@@ -69,57 +76,137 @@ class Core():
         return eliminar_codigos_escape(data.strip()) if isinstance(data, str) else [eliminar_codigos_escape(item) for item in data if isinstance(item, str)]
 
     @staticmethod
-    def ejecutar(command):
+    def ejecutar(command, on_line=None):
         """
         Ejecuta un comando en el sistema operativo y devuelve su salida.
 
+        Si se indica ``on_line``, la salida se lee línea a línea a medida que el
+        comando la produce y cada línea limpia se entrega al callback.
+
         Args:
             command (str): El comando a ejecutar en el sistema.
+            on_line (callable, optional): Función ``on_line(command, linea)`` invocada por cada línea.
 
         Returns:
             str: La salida estándar del comando sin códigos de escape ANSI.
             str: La salida de error del comando, si ocurre algún error.
         """
         try:
-            process = subprocess.Popen(command, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-            stdout, stderr = process.communicate()
-            return Core.parsear(stdout.decode('utf-8'))
+            if on_line is None:
+                process = subprocess.Popen(command, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+                stdout, stderr = process.communicate()
+                return Core.parsear(stdout.decode('utf-8'))
+
+            lineas = []
+            process = subprocess.Popen(command, shell=True, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+            with process.stdout:
+                for linea in iter(process.stdout.readline, b''):
+                    texto = Core.parsear(linea.decode('utf-8', errors='replace'))
+                    lineas.append(texto)
+                    if texto:
+                        on_line(command, texto)
+            process.wait()
+            return "\n".join(lineas).strip()
         except Exception as e:
             return "", f"Error al ejecutar el comando: {str(e)}"
 
     @staticmethod
-    def escaneoConcurrente(commands):
+    def escaneoConcurrente(commands, on_line=None, on_result=None, control=None, llave=None):
         """
         Ejecuta una lista de comandos en paralelo.
 
+        Con ``control`` (un ``ControlAimd``) la concurrencia no es fija: cada comando
+        se lanza solo si su host y el total de su herramienta tienen cupo, y al terminar
+        el límite de ambos crece si el comando terminó sano o se reduce si su salida
+        muestra los avisos de congestión de nmap.
+
         Args:
             commands (list): Una lista de comandos a ejecutar.
+            on_line (callable, optional): Callback ``on_line(command, linea)`` por cada línea producida.
+            on_result (callable, optional): Callback ``on_result(command, output)`` al terminar cada comando.
+            control (ControlAimd, optional): El control adaptativo de concurrencia.
+            llave (callable, optional): ``llave(command) -> (host, herramienta)``; por defecto el comando
+                completo y ``'cmd'``.
 
         Returns:
             list: Una lista con los resultados de cada comando o mensajes de error.
         """
         results = []
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            futures = {executor.submit(Core.ejecutar, cmd): cmd for cmd in commands}
-            for future in concurrent.futures.as_completed(futures):
-                command = futures[future]
-                try:
-                    output = future.result()
-                    results.append(output if output else f"{command} failed with error: {error}")
-                except Exception as exc:
-                    results.append(f"{command} generated an exception: {exc}")        
+        llave = llave or (lambda command: (command, Core.herramienta(command)))
+        pendientes = deque(commands)
+        with concurrent.futures.ThreadPoolExecutor(max(1, len(commands)) if control is not None else None) as executor:
+            futures = {}
+            while pendientes or futures:
+                # Sin control se lanzan todos; con control, los que tienen cupo
+                for _ in range(len(pendientes)):
+                    cmd = pendientes.popleft()
+                    host, herramienta = llave(cmd)
+                    if control is not None and not control.intentar((host, herramienta), ('*', herramienta)):
+                        pendientes.append(cmd)
+                        continue
+                    futures[executor.submit(Core.ejecutar, cmd, on_line)] = (cmd, time.monotonic())
+                if not futures:
+                    # Todos los cupos ocupados por otros escaneos del proceso: se espera a que se liberen
+                    time.sleep(0.05)
+                    continue
+                listos, _ = concurrent.futures.wait(futures, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in listos:
+                    command, inicio = futures.pop(future)
+                    try:
+                        output = future.result()
+                        results.append(output if output else f"{command} failed with error: {error}")
+                    except Exception as exc:
+                        output = f"{command} generated an exception: {exc}"
+                        results.append(output)
+                    if control is not None:
+                        host, herramienta = llave(command)
+                        congestionado = not isinstance(output, str) or congestion(output)
+                        # La latencia solo se compara dentro de un mismo host y herramienta
+                        control.liberar([(host, herramienta)], time.monotonic() - inicio, congestionado)
+                        control.liberar([('*', herramienta)], None, congestionado)
+                    if on_result is not None:
+                        on_result(command, output)
         return results
 
     @staticmethod
-    def parsearWhois(data):
+    def herramienta(command):
+        """Devuelve el nombre de la herramienta de un comando (``nmap`` para ``sudo nmap -sV ...``)."""
+        for token in command.split():
+            if token != 'sudo' and '=' not in token:
+                return os.path.basename(token)
+        return command
+
+    @staticmethod
+    def parsearPuerto(linea):
+        """
+        Extrae un puerto abierto de una línea de la salida normal de nmap.
+
+        Args:
+            linea (str): Una línea como ``443/tcp open  https``.
+
+        Returns:
+            dict | None: Un diccionario con puerto, protocolo y servicio, o None si la línea no describe un puerto abierto.
+        """
+        coincidencia = PATRON_PUERTO_ABIERTO.match(linea)
+        if not coincidencia:
+            return None
+        return {
+            'portid': coincidencia.group(1),
+            'protocol': coincidencia.group(2),
+            'servicio': coincidencia.group(3) or 'Desconocido'
+        }
+
+    @staticmethod
+    def parsearWhois(data, tld=None):
         """
         Parsea la información WHOIS de un conjunto de datos.
 
         Este método toma una lista de líneas de texto que representan la salida del comando WHOIS
-        y extrae información relevante según las etiquetas predefinidas.
+        y extrae información relevante con el parser dirigido por tablas de ``WhoisParser``.
 
         Args:
             data (list): Una lista de cadenas que representan la salida del comando WHOIS.
+            tld (str, optional): El TLD (o el dominio) consultado, para usar los alias de su registro.
 
         Returns:
             dict: Un diccionario con las etiquetas y sus valores correspondientes.
@@ -129,47 +216,29 @@ class Core():
         """
         if not isinstance(data, list):
             raise ValueError("El dato de entrada debe ser una lista.")
+        return WhoisParser.parsear(data, tld)
+
+    @staticmethod
+    def consultarWhois(dominio, seguir_referencia=True):
+        """
+        Consulta el whois de un dominio siguiendo la referencia al servidor del registrador.
+
+        Args:
+            dominio (str): El dominio a consultar.
+            seguir_referencia (bool): Si se consulta también el ``Registrar WHOIS Server``.
+
+        Returns:
+            dict: El resultado combinado del registro y del registrador.
+        """
+        salida = Core.ejecutar(f"whois {dominio}")
+        registro = Core.parsearWhois(salida.split("\n") if isinstance(salida, str) else [], dominio)
+        servidor = WhoisParser.referencia(registro) if seguir_referencia else None
+        if servidor:
+            salida = Core.ejecutar(f"whois -h {servidor} {dominio}")
+            if isinstance(salida, str) and salida:
+                registro = WhoisParser.fusionar(registro, Core.parsearWhois(salida.split("\n"), dominio))
+        return registro
 
-        etiquetas = [
-                    "Domain Name",
-                    "Sponsoring Registrar",
-                    "Registry Domain ID",
-                    "Registrar WHOIS Server",
-                    "Registrar URL",
-                    "Updated Date",
-                    "Creation Date",
-                    "Registry Expiry Date",
-                    "Registrar",
-                    "Registrar IANA ID",
-                    "Registrar Abuse Contact Email",
-                    "Registrar Abuse Contact Phone",
-                    "Domain Status",
-                    "Registrant Name",
-                    "Admin Name",
-                    "Admin Email",
-                    "Name Server",
-                    "DNSSEC",
-                    "URL of the ICANN Whois Inaccuracy Complaint Form"
-                ]
-        # Inicializar diccionarios y listas
-        r = {etiqueta: None for etiqueta in etiquetas}
-        name_servers = []
-        for texto in data:
-            partes = texto.split(":", 1)
-            if len(partes) == 2:
-                llave, valor = partes[0].strip(), partes[1].strip()
-                if llave in etiquetas:
-                    r[llave] = valor
-                    if llave == "Name Server":
-                        name_servers.append(valor)
-
-        # Asignar la lista de name_servers al diccionario r si existen elementos
-        if name_servers:
-            # Filtrar valores no vacíos y eliminar duplicados
-            r["Name Server"] = ', '.join(set(filter(None, name_servers)))
-
-        return r
-    
     @staticmethod
     def parsearWaf(data):
         """
@@ -265,10 +334,12 @@ class Core():
         """
         Parsea subdominios a partir de una lista de cadenas de texto.
 
-        Este método busca subdominios que pertenecen al dominio especificado en los datos proporcionados.
+        Este método busca subdominios que pertenecen al dominio (o dominios) especificado
+        en una sola pasada sobre todos los datos, con un extractor compilado que captura
+        todas las etiquetas y normaliza a minúsculas.
 
         Args:
-            dominio (str): El dominio principal para el cual se buscan subdominios.
+            dominio (str | list): El dominio principal, o varios, para los cuales se buscan subdominios.
             data (list): Una lista de cadenas que representan la salida del escaneo.
 
         Returns:
@@ -277,17 +348,16 @@ class Core():
         Raises:
             ValueError: Si el dominio no es una cadena o si los datos no son una lista.
         """
-        if not isinstance(dominio, str) or not isinstance(data, list):
+        if isinstance(dominio, (list, tuple)) and all(isinstance(d, str) for d in dominio):
+            dominios = tuple(dominio)
+        elif isinstance(dominio, str):
+            dominios = (dominio,)
+        else:
+            dominios = None
+        if dominios is None or not isinstance(data, list):
             raise ValueError("El dominio debe ser una cadena y los datos deben ser una lista.")
 
-        subdominios_set = set()  # Usar un conjunto para almacenar subdominios únicos
-
-        for d in data:            
-            # Expresión regular para encontrar subdominios con el dominio especificado
-            pattern = rf'([a-zA-Z0-9-]+)\.{re.escape(dominio)}'            
-            subdominios_set.update(f'{sub}.{dominio}' for sub in re.findall(pattern, d))
-
-        return list(subdominios_set)  # Convertir el conjunto a lista antes de devolver
+        return list(extractor(*dominios).extraer(data))
     
     @staticmethod
     def manipularXML(directorio_xml):
@@ -309,33 +379,68 @@ class Core():
         for nombre_archivo in os.listdir(directorio_xml):
             if nombre_archivo.endswith('.xml') and nombre_archivo.startswith('scan_'):
                 ruta_archivo = os.path.join(directorio_xml, nombre_archivo)
-
-                # Abrir y leer el archivo XML
-                with open(ruta_archivo, 'r', encoding='utf-8') as file:
-                    soup = BeautifulSoup(file.read(), 'xml')
-
-                # Extraer información de puertos
-                puertos = soup.find_all('port')
                 dominio = nombre_archivo[5:-4]  # Quitar 'scan_' y '.xml'
 
                 print(f"Contenido de {nombre_archivo}: {dominio}\n")
 
-                # Inicializar listas para cada archivo
-                portid = [puerto['portid'] for puerto in puertos]
-                protocol = [puerto['protocol'] for puerto in puertos]
-                estado = [puerto.find('state')['state'] for puerto in puertos]
-                servicio = [puerto.find('service')['name'] if puerto.find('service') else 'Desconocido' for puerto in puertos]
-
                 # Agregar resultados a la lista
-                resultados.append({
-                    'dominio': dominio,
-                    'portid': portid,
-                    'protocol': protocol,
-                    'estado': estado,
-                    'servicio': servicio
-                })
+                resultados.append({'dominio': dominio, **Core.parsearPuertosXML(ruta_archivo)})
         return resultados
 
+    @staticmethod
+    def parsearPuertosXML(archivo):
+        """
+        Extrae los puertos de un reporte XML de nmap (``-oX``) en una sola pasada.
+
+        Args:
+            archivo (str | file): La ruta o el archivo abierto con el XML.
+
+        Returns:
+            dict: Un diccionario con las listas portid, protocol, estado y servicio.
+        """
+        resultado = {'portid': [], 'protocol': [], 'estado': [], 'servicio': []}
+        try:
+            for _, elemento in ET.iterparse(archivo, events=('end',)):
+                if elemento.tag != 'port':
+                    continue
+                estado = elemento.find('state')
+                servicio = elemento.find('service')
+                resultado['portid'].append(elemento.get('portid'))
+                resultado['protocol'].append(elemento.get('protocol'))
+                resultado['estado'].append(estado.get('state') if estado is not None else None)
+                resultado['servicio'].append(servicio.get('name') if servicio is not None else 'Desconocido')
+                elemento.clear()
+        except (ET.ParseError, OSError):
+            pass
+        return resultado
+
+    @staticmethod
+    def parsearScriptsXML(archivo):
+        """
+        Extrae los resultados de los scripts NSE de un reporte XML de nmap (``-oX``).
+
+        Args:
+            archivo (str | file): La ruta o el archivo abierto con el XML.
+
+        Returns:
+            list: Diccionarios con script, port (``"443/tcp"``, o None en los scripts de host) y output.
+        """
+        resultado = []
+        try:
+            for _, elemento in ET.iterparse(archivo, events=('end',)):
+                if elemento.tag != 'host':
+                    continue
+                for script in elemento.findall('hostscript/script'):
+                    resultado.append({'script': script.get('id'), 'port': None, 'output': script.get('output')})
+                for puerto in elemento.findall('ports/port'):
+                    for script in puerto.findall('script'):
+                        resultado.append({'script': script.get('id'), 'port': f"{puerto.get('portid')}/{puerto.get('protocol')}",
+                                          'output': script.get('output')})
+                elemento.clear()
+        except (ET.ParseError, OSError):
+            pass
+        return resultado
+
     @staticmethod
     def validarEscaneos(ruta):
         if not os.path.isdir(ruta):
@@ -0,0 +1,192 @@
+import json
+import xml.etree.ElementTree as ET
+from urllib.parse import urlsplit
+from app.utils.core import Core
+
+
+class Decodificador():
+    """
+    Decodificadores de las salidas estructuradas (JSON / XML) de las herramientas.
+
+    Cada herramienta que ofrece un modo legible por máquina se ejecuta en ese modo
+    y su salida se decodifica directamente, sin expresiones regulares sobre el
+    texto de consola. Las herramientas sin modo estructurado (sublist3r, fierce,
+    dnsmap, dnsenum) siguen pasando por ``Core.parsearSubDomain``.
+    """
+
+    @staticmethod
+    def comandosSubdominios(dominio):
+        """
+        Devuelve los comandos de enumeración de subdominios y su decodificador.
+
+        Args:
+            dominio (str): El dominio a enumerar.
+
+        Returns:
+            dict: Un diccionario comando -> decodificador (o None si la salida es texto libre).
+        """
+        return {
+            f"sublist3r -d {dominio}": None,
+            f"knockpy -d {dominio} --json": Decodificador.knockpy,
+            f"nmap --script dns-brute {dominio} -oX -": Decodificador.nmapDnsBrute,
+            f"fierce --domain {dominio}": None,
+            f"dnsmap {dominio}": None,
+            f"dnsenum --enum --threads 10 --dnsserver 1.1.1.1 --fqdns --noreverse {dominio}": None,
+            f"subfinder -d {dominio} -silent -oJ": Decodificador.subfinder,
+        }
+
+    @staticmethod
+    def comandoWaf(objetivo):
+        """Comando de wafw00f con salida JSON por la salida estándar."""
+        return f"wafw00f {objetivo} -f json -o -"
+
+    @staticmethod
+    def subdominios(dominio, salidas, comandos):
+        """
+        Extrae los subdominios únicos de las salidas de la enumeración.
+
+        Args:
+            dominio (str): El dominio principal.
+            salidas (dict): Un diccionario comando -> salida.
+            comandos (dict): El resultado de ``comandosSubdominios``.
+
+        Returns:
+            list: Una lista de subdominios únicos encontrados.
+        """
+        sufijo = f".{dominio.lower()}"
+        encontrados = set()
+        texto_libre = []
+        for comando, salida in salidas.items():
+            decodificador = comandos.get(comando)
+            if decodificador is None or not isinstance(salida, str):
+                texto_libre.append(salida if isinstance(salida, str) else "")
+                continue
+            hosts = [h for h in decodificador(salida) if h.endswith(sufijo)]
+            if not hosts:
+                # Versión de la herramienta sin modo estructurado: se trata como texto
+                texto_libre.append(salida)
+            encontrados.update(hosts)
+        encontrados.update(Core.parsearSubDomain(dominio, texto_libre))
+        return list(encontrados)
+
+    @staticmethod
+    def _objetos_json(texto):
+        """Decodifica los valores JSON de un texto, tolerando banners previos."""
+        if texto[:1] in ('[', '{'):
+            # Caso común: la herramienta escribió solo el JSON
+            try:
+                yield json.loads(texto)
+                return
+            except ValueError:
+                pass
+        decoder = json.JSONDecoder()
+        posicion = 0
+        largo = len(texto)
+        while posicion < largo:
+            inicio = min((i for i in (texto.find('{', posicion), texto.find('[', posicion)) if i != -1), default=-1)
+            if inicio == -1:
+                return
+            try:
+                valor, posicion = decoder.raw_decode(texto, inicio)
+                yield valor
+            except ValueError:
+                posicion = inicio + 1
+
+    @staticmethod
+    def subfinder(texto):
+        """
+        Decodifica la salida JSON lines de ``subfinder -oJ``.
+
+        Returns:
+            list: Los hosts reportados, en minúsculas.
+        """
+        hosts = []
+        for linea in texto.splitlines():
+            if not linea.startswith('{'):
+                continue
+            try:
+                host = json.loads(linea).get('host')
+            except ValueError:
+                continue
+            if host:
+                hosts.append(host.strip().lower().rstrip('.'))
+        return hosts
+
+    @staticmethod
+    def knockpy(texto):
+        """
+        Decodifica el reporte JSON de knockpy (lista de objetos o diccionario por host).
+
+        Returns:
+            list: Los hosts reportados, en minúsculas.
+        """
+        hosts = []
+        for valor in Decodificador._objetos_json(texto):
+            if isinstance(valor, dict):
+                valor = [dict(v, domain=k) if isinstance(v, dict) else {'domain': k} for k, v in valor.items()] \
+                    if not any(k in valor for k in ('domain', 'host')) else [valor]
+            for item in valor if isinstance(valor, list) else []:
+                if isinstance(item, dict):
+                    host = item.get('domain') or item.get('host')
+                    if isinstance(host, str):
+                        hosts.append(host.strip().lower().rstrip('.'))
+        return hosts
+
+    @staticmethod
+    def _xml(texto):
+        inicio = texto.find('<?xml')
+        if inicio == -1:
+            inicio = texto.find('<nmaprun')
+        if inicio == -1:
+            return None
+        try:
+            return ET.fromstring(texto[inicio:])
+        except ET.ParseError:
+            return None
+
+    @staticmethod
+    def nmapDnsBrute(texto):
+        """
+        Decodifica la salida ``-oX`` del script ``dns-brute`` de nmap.
+
+        Returns:
+            list: Los hostnames encontrados por fuerza bruta, en minúsculas.
+        """
+        raiz = Decodificador._xml(texto)
+        if raiz is None:
+            return []
+        return [
+            elem.text.strip().lower().rstrip('.')
+            for script in raiz.iter('script') if script.get('id') == 'dns-brute'
+            for elem in script.iter('elem') if elem.get('key') == 'hostname' and elem.text
+        ]
+
+    @staticmethod
+    def wafw00f(texto, objetivo=None):
+        """
+        Decodifica la salida JSON de ``wafw00f -f json -o -``.
+
+        Conserva el vocabulario de ``Core.parsearWaf``; si la salida no contiene
+        JSON (versiones antiguas de wafw00f) se recurre a ese parser de texto.
+
+        Args:
+            texto (str): La salida de wafw00f.
+            objetivo (str, optional): El host analizado; wafw00f omite del reporte los hosts caídos.
+
+        Returns:
+            dict: Un diccionario subdominio -> WAF detectado o mensaje.
+        """
+        resultados = {}
+        hay_json = False
+        for valor in Decodificador._objetos_json(texto):
+            hay_json = True
+            for item in valor if isinstance(valor, list) else [valor]:
+                if not isinstance(item, dict) or 'url' not in item:
+                    continue
+                host = urlsplit(item['url']).hostname or item['url']
+                resultados[host] = (item.get('firewall') or 'Generic') if item.get('detected') else "No contiene WAF"
+        if not hay_json:
+            return Core.parsearWaf(texto)
+        if objetivo and objetivo not in resultados:
+            resultados[objetivo] = "Falló al conectar"
+        return resultados
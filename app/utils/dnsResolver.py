@@ -0,0 +1,320 @@
+import time
+import random
+import struct
+import asyncio
+import threading
+from collections import OrderedDict
+from app.utils.axfr import codificarNombre, decodificarMensaje
+
+TIPOS_CONSULTA = {'A': 1, 'NS': 2, 'CNAME': 5, 'SOA': 6, 'AAAA': 28}
+NXDOMAIN = 3
+RECURSION = 0x0100
+TRUNCADO = 0x0200
+RUTA_RESOLV = '/etc/resolv.conf'
+
+
+def servidoresSistema(ruta=RUTA_RESOLV):
+    """Devuelve los nameservers de ``resolv.conf`` (``127.0.0.1`` si no hay ninguno, como glibc)."""
+    servidores = []
+    try:
+        with open(ruta) as archivo:
+            for linea in archivo:
+                partes = linea.split()
+                if len(partes) >= 2 and partes[0] == 'nameserver':
+                    servidores.append(partes[1].split('%')[0])
+    except OSError:
+        pass
+    return servidores or ['127.0.0.1']
+
+
+def normalizar(nombre):
+    return nombre.lower().rstrip('.')
+
+
+class ErrorDns(Exception):
+    """El nombre no pudo resolverse (timeout, SERVFAIL, respuesta malformada o nombre no codificable)."""
+
+
+class RespuestaDns(list):
+    """
+    Los ``Registro`` de un nombre para varios tipos de consulta.
+
+    ``fallidos`` son los tipos que ningún servidor respondió: con alguno la vista del
+    nombre está incompleta y la ausencia de un registro no dice nada.
+    """
+
+    def __init__(self, registros=(), fallidos=()):
+        super().__init__(registros)
+        self.fallidos = tuple(fallidos)
+
+    @property
+    def completa(self):
+        return not self.fallidos
+
+
+class CacheDns():
+    """
+    Caché de respuestas DNS que respeta el TTL de cada respuesta, segura entre hilos.
+
+    Guarda por ``(nombre, tipo)`` los registros de la respuesta (con la cadena de
+    CNAME) hasta que vence su TTL. Las respuestas negativas (NXDOMAIN o sin
+    registros del tipo) también se guardan, con el TTL del SOA de la autoridad.
+    La llena ``ResolvedorDns`` y la leen ``HttpPool`` y ``RecolectorTls`` para
+    conectar a la dirección ya resuelta sin volver a resolver.
+    """
+
+    def __init__(self, maximo=65536, ttl_maximo=86400):
+        self.maximo = maximo
+        self.ttl_maximo = ttl_maximo
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._datos)
+
+    def obtener(self, nombre, tipo):
+        """
+        Devuelve los registros vigentes de una consulta.
+
+        Returns:
+            list | None: Los registros (sin ninguno del tipo si la respuesta fue negativa),
+                o None si la consulta no está en la caché o ya venció.
+        """
+        llave = (normalizar(nombre), tipo)
+        with self._lock:
+            entrada = self._datos.get(llave)
+            if entrada is None:
+                return None
+            if entrada[0] <= time.monotonic():
+                del self._datos[llave]
+                return None
+            self._datos.move_to_end(llave)
+            return entrada[1]
+
+    def guardar(self, nombre, tipo, registros, ttl):
+        """Guarda los registros de una consulta durante ``ttl`` segundos (con TTL 0 no se guardan)."""
+        ttl = min(ttl, self.ttl_maximo)
+        if ttl <= 0:
+            return
+        llave = (normalizar(nombre), tipo)
+        with self._lock:
+            self._datos[llave] = (time.monotonic() + ttl, list(registros))
+            self._datos.move_to_end(llave)
+            while len(self._datos) > self.maximo:
+                self._datos.popitem(last=False)
+
+    def direcciones(self, nombre):
+        """Devuelve las direcciones vigentes de un nombre (IPv4 primero) sin ir a la red."""
+        return [r.valor for tipo in ('A', 'AAAA') for r in (self.obtener(nombre, tipo) or ()) if r.tipo == tipo]
+
+    def inexistente(self, nombre):
+        """Indica si la caché sabe que el nombre no tiene direcciones (ambas respuestas negativas vigentes)."""
+        respuestas = [self.obtener(nombre, tipo) for tipo in ('A', 'AAAA')]
+        return all(r is not None and not any(x.tipo == tipo for x in r) for r, tipo in zip(respuestas, ('A', 'AAAA')))
+
+
+class _ProtocoloDns(asyncio.DatagramProtocol):
+    """Socket UDP de un servidor: reparte cada respuesta a la consulta en vuelo con su id y pregunta."""
+
+    def __init__(self):
+        self.transporte = None
+        self.pendientes = {}
+
+    def connection_made(self, transporte):
+        self.transporte = transporte
+
+    def datagram_received(self, datos, _):
+        if len(datos) < 12:
+            return
+        pendiente = self.pendientes.get(struct.unpack_from('!H', datos)[0])
+        # Se exige la misma pregunta que la consulta para descartar respuestas ajenas
+        if pendiente is not None and not pendiente[0].done() and datos[12:12 + len(pendiente[1])] == pendiente[1]:
+            pendiente[0].set_result(datos)
+
+    def error_received(self, _):
+        # ICMP inalcanzable: las consultas en vuelo expiran por timeout y se prueba otro servidor
+        pass
+
+    def connection_lost(self, _):
+        for futuro, _ in self.pendientes.values():
+            if not futuro.done():
+                futuro.set_exception(ConnectionError("socket DNS cerrado"))
+
+
+class ResolvedorDns():
+    """
+    Resolvedor DNS asíncrono en proceso con caché compartida.
+
+    Usa un socket UDP por servidor para todas las consultas (se reparten por id),
+    repite la consulta por TCP si la respuesta viene truncada y prueba el
+    siguiente servidor ante timeouts o SERVFAIL. Las consultas idénticas en vuelo
+    se resuelven una sola vez y cada respuesta, positiva o negativa, queda en la
+    ``CacheDns`` hasta que vence su TTL.
+
+    El resolvedor pertenece al event loop en el que se usa; se abre con ``async with``.
+    """
+
+    def __init__(self, cache=None, servidores=None, timeout=2, intentos=2, concurrencia=256, ttl_negativo=60, puerto=53):
+        self.cache = cache if cache is not None else CacheDns()
+        self.servidores = list(servidores or servidoresSistema())
+        self.timeout = timeout
+        self.intentos = intentos
+        self.concurrencia = concurrencia
+        self.ttl_negativo = ttl_negativo
+        self.puerto = puerto
+        self._protocolos = {}
+        self._en_vuelo = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *_):
+        self.cerrar()
+
+    def cerrar(self):
+        """Cierra los sockets UDP abiertos."""
+        for protocolo in self._protocolos.values():
+            protocolo.transporte.close()
+        self._protocolos.clear()
+
+    async def _protocolo(self, servidor):
+        if servidor not in self._protocolos:
+            _, protocolo = await asyncio.get_running_loop().create_datagram_endpoint(
+                _ProtocoloDns, remote_addr=(servidor, self.puerto))
+            if servidor in self._protocolos:
+                protocolo.transporte.close()
+            else:
+                self._protocolos[servidor] = protocolo
+        return self._protocolos[servidor]
+
+    async def _udp(self, servidor, pregunta):
+        protocolo = await self._protocolo(servidor)
+        qid = random.getrandbits(16)
+        while qid in protocolo.pendientes:
+            qid = random.getrandbits(16)
+        futuro = asyncio.get_running_loop().create_future()
+        protocolo.pendientes[qid] = (futuro, pregunta)
+        try:
+            protocolo.transporte.sendto(struct.pack('!HHHHHH', qid, RECURSION, 1, 0, 0, 0) + pregunta)
+            return await asyncio.wait_for(futuro, self.timeout)
+        finally:
+            protocolo.pendientes.pop(qid, None)
+
+    async def _tcp(self, servidor, pregunta):
+        consulta = struct.pack('!HHHHHH', random.getrandbits(16), RECURSION, 1, 0, 0, 0) + pregunta
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(servidor, self.puerto), self.timeout)
+        try:
+            writer.write(struct.pack('!H', len(consulta)) + consulta)
+            await writer.drain()
+            largo = struct.unpack('!H', await asyncio.wait_for(reader.readexactly(2), self.timeout))[0]
+            return await asyncio.wait_for(reader.readexactly(largo), self.timeout)
+        finally:
+            writer.close()
+
+    async def _resolver(self, nombre, tipo):
+        try:
+            pregunta = codificarNombre(nombre) + struct.pack('!HH', TIPOS_CONSULTA[tipo], 1)
+        except UnicodeError as e:
+            # Una etiqueta de más de 63 bytes o un nombre que IDNA rechaza: falla solo ese nombre
+            raise ErrorDns(f"{nombre}: nombre no codificable ({e})") from e
+        ultimo = None
+        for _ in range(self.intentos):
+            for servidor in self.servidores:
+                try:
+                    mensaje = await self._udp(servidor, pregunta)
+                    if struct.unpack_from('!H', mensaje, 2)[0] & TRUNCADO:
+                        mensaje = await self._tcp(servidor, pregunta)
+                    rcode, registros = decodificarMensaje(mensaje, autoridad=True)
+                except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError, IndexError, struct.error) as e:
+                    ultimo = e
+                    continue
+                if rcode not in (0, NXDOMAIN):
+                    ultimo = f"RCODE {rcode}"
+                    continue
+                respuesta = [r for r in registros if r.tipo in (tipo, 'CNAME')]
+                if any(r.tipo == tipo for r in respuesta):
+                    ttl = min(r.ttl for r in respuesta)
+                else:
+                    # Caché negativa (RFC 2308): el TTL lo fija el SOA de la sección de autoridad
+                    ttl = min((r.ttl for r in registros if r.tipo == 'SOA'), default=self.ttl_negativo)
+                self.cache.guardar(nombre, tipo, respuesta, ttl)
+                return respuesta
+        raise ErrorDns(f"{nombre} {tipo}: {ultimo!r}")
+
+    async def consultar(self, nombre, tipo='A'):
+        """
+        Resuelve un tipo de registro de un nombre, desde la caché si sigue vigente.
+
+        Args:
+            nombre (str): El nombre a resolver.
+            tipo (str): ``A``, ``AAAA``, ``CNAME``, ``NS`` o ``SOA``.
+
+        Returns:
+            list: Los ``Registro`` de la respuesta, con la cadena de CNAME; sin ninguno del
+                tipo si el nombre no existe o no tiene registros de ese tipo.
+
+        Raises:
+            ErrorDns: Si ningún servidor respondió.
+        """
+        nombre = normalizar(nombre)
+        registros = self.cache.obtener(nombre, tipo)
+        if registros is not None:
+            return registros
+        llave = (nombre, tipo)
+        if llave not in self._en_vuelo:
+            self._en_vuelo[llave] = asyncio.ensure_future(self._resolver(nombre, tipo))
+            self._en_vuelo[llave].add_done_callback(lambda _: self._en_vuelo.pop(llave, None))
+        return await asyncio.shield(self._en_vuelo[llave])
+
+    async def resolver(self, nombre, tipos=('A', 'AAAA')):
+        """
+        Resuelve varios tipos de un nombre de forma concurrente.
+
+        Returns:
+            RespuestaDns: Los ``Registro`` de todas las respuestas, sin repetir los CNAME
+                compartidos, y los tipos que no se pudieron resolver.
+
+        Raises:
+            ErrorDns: Si no pudo resolverse ninguno de los tipos.
+        """
+        respuestas = await asyncio.gather(*(self.consultar(nombre, tipo) for tipo in tipos), return_exceptions=True)
+        validas = [r for r in respuestas if not isinstance(r, BaseException)]
+        if not validas:
+            raise respuestas[0]
+        return RespuestaDns(dict.fromkeys(registro for registros in validas for registro in registros),
+                            [tipo for tipo, r in zip(tipos, respuestas) if isinstance(r, BaseException)])
+
+    async def ejecutarAsync(self, hosts, on_result=None, tipos=('A', 'AAAA')):
+        """Versión asíncrona de ``ResolvedorDns.ejecutar``."""
+        cupos = asyncio.Semaphore(self.concurrencia)
+        resultados = {}
+
+        async def uno(host):
+            async with cupos:
+                try:
+                    resultados[host] = await self.resolver(host, tipos)
+                except ErrorDns:
+                    resultados[host] = None
+            if on_result is not None:
+                on_result(host, resultados[host])
+
+        try:
+            await asyncio.gather(*(uno(host) for host in hosts))
+        finally:
+            self.cerrar()
+        return resultados
+
+    def ejecutar(self, hosts, on_result=None, tipos=('A', 'AAAA')):
+        """
+        Resuelve los registros A y AAAA (con su cadena de CNAME) de varios hosts.
+
+        Args:
+            hosts (list): Los hosts (subdominios) a resolver.
+            on_result (callable, optional): Se llama con ``(host, registros)`` al terminar cada host.
+            tipos (tuple): Los tipos a consultar por host.
+
+        Returns:
+            dict: Un diccionario host -> ``RespuestaDns`` (vacía si no existe) o None si no pudo resolverse
+                (tampoco si el nombre no es codificable).
+        """
+        return asyncio.run(self.ejecutarAsync(list(dict.fromkeys(hosts)), on_result, tipos))
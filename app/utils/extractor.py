@@ -0,0 +1,97 @@
+import re
+from functools import lru_cache
+
+# Caracteres que pueden formar parte de una etiqueta DNS (en minúsculas)
+_ETIQUETA = frozenset(b'abcdefghijklmnopqrstuvwxyz0123456789-')
+_PUNTO = ord('.')
+_BLOQUE = 1 << 22
+
+
+class ExtractorSubdominios():
+    """
+    Extractor de subdominios compilado, de una sola pasada y para varios dominios.
+
+    Busca sobre el buffer invertido y en minúsculas: así el patrón empieza por el
+    literal del dominio (``moc.elpmaxe``), que el motor de ``re`` localiza mucho
+    más rápido que un patrón que empieza por una clase de caracteres, y captura
+    todas las etiquetas (``a.b.example.com`` y no solo ``b.example.com``).
+    """
+
+    def __init__(self, dominios):
+        if isinstance(dominios, str):
+            dominios = [dominios]
+        self.dominios = tuple(sorted({d.strip().strip('.').lower() for d in dominios if d}, key=len, reverse=True))
+        if not self.dominios:
+            raise ValueError("Se requiere al menos un dominio.")
+        alternativas = b'|'.join(re.escape(d[::-1].encode('ascii', 'ignore')) for d in self.dominios)
+        self._patron = re.compile(rb'(?:' + alternativas + rb')(?:\.[a-z0-9-]+)+')
+
+    def _buffer(self, datos, encontrados):
+        invertido = datos.lower()[::-1]
+        for coincidencia in self._patron.finditer(invertido):
+            inicio = coincidencia.start()
+            # Límite derecho en el texto original: rechaza "example.comx" y "example.com.evil.net"
+            if inicio:
+                previo = invertido[inicio - 1]
+                if previo in _ETIQUETA:
+                    continue
+                if previo == _PUNTO and inicio > 1 and invertido[inicio - 2] in _ETIQUETA:
+                    continue
+            encontrados.add(coincidencia.group()[::-1].decode('ascii'))
+
+    def extraer(self, fuente):
+        """
+        Extrae los subdominios únicos de un buffer o de un flujo.
+
+        Args:
+            fuente (str | bytes | list | file | iterable): El texto completo, una lista de
+                salidas, un archivo abierto (texto o binario) o un iterable de líneas.
+
+        Returns:
+            set: Los subdominios encontrados, normalizados a minúsculas.
+        """
+        encontrados = set()
+        if isinstance(fuente, str):
+            self._buffer(fuente.encode('utf-8', 'ignore'), encontrados)
+        elif isinstance(fuente, (bytes, bytearray)):
+            self._buffer(bytes(fuente), encontrados)
+        elif hasattr(fuente, 'read'):
+            self._flujo(iter(lambda: fuente.read(_BLOQUE), fuente.read(0)), encontrados)
+        else:
+            self._lineas(fuente, encontrados)
+        return encontrados
+
+    def _flujo(self, bloques, encontrados):
+        # Los bloques se cortan en el último salto de línea para no partir un nombre
+        resto = b''
+        for bloque in bloques:
+            if isinstance(bloque, str):
+                bloque = bloque.encode('utf-8', 'ignore')
+            bloque = resto + bloque
+            corte = bloque.rfind(b'\n') + 1
+            if not corte:
+                resto = bloque
+                continue
+            self._buffer(bloque[:corte], encontrados)
+            resto = bloque[corte:]
+        if resto:
+            self._buffer(resto, encontrados)
+
+    def _lineas(self, lineas, encontrados):
+        lote, tamano = [], 0
+        for linea in lineas:
+            if not isinstance(linea, str):
+                continue
+            lote.append(linea)
+            tamano += len(linea)
+            if tamano >= _BLOQUE:
+                self._buffer("\n".join(lote).encode('utf-8', 'ignore'), encontrados)
+                lote, tamano = [], 0
+        if lote:
+            self._buffer("\n".join(lote).encode('utf-8', 'ignore'), encontrados)
+
+
+@lru_cache(maxsize=64)
+def extractor(*dominios):
+    """Devuelve (y reutiliza) el extractor compilado para los dominios indicados."""
+    return ExtractorSubdominios(dominios)
@@ -0,0 +1,107 @@
+import re
+import threading
+from datetime import datetime, timezone
+from dateutil import parser
+
+# Formatos conocidos, probados en orden la primera vez que aparece una "forma" de fecha
+FORMATOS = (
+    '%Y-%m-%dT%H:%M:%SZ', '%Y-%m-%dT%H:%M:%S.%fZ', '%Y-%m-%dT%H:%M:%S%z', '%Y-%m-%dT%H:%M:%S.%f%z',
+    '%Y-%m-%dT%H:%M:%S', '%Y-%m-%d %H:%M:%S%z', '%Y-%m-%d %H:%M:%S', '%Y-%m-%d',
+    '%Y.%m.%d %H:%M:%S', '%Y.%m.%d', '%Y/%m/%d %H:%M:%S', '%Y/%m/%d', '%Y%m%d',
+    '%d-%b-%Y %H:%M:%S', '%d-%b-%Y', '%d %b %Y', '%d-%B-%Y', '%d %B %Y', '%a %b %d %H:%M:%S %Y',
+)
+FORMATOS_DIA = ('%d-%m-%Y', '%d/%m/%Y', '%d.%m.%Y', '%d-%m-%Y %H:%M:%S', '%d/%m/%Y %H:%M:%S', '%d.%m.%Y %H:%M:%S')
+FORMATOS_MES = ('%m-%d-%Y', '%m/%d/%Y', '%m.%d.%Y', '%m/%d/%Y %H:%M:%S')
+
+_DIGITOS = re.compile(r'\d')
+_ZONA_TEXTO = re.compile(r'\s*(\(?(UTC|GMT|[A-Z]{3,4})\)?)$')
+
+
+class Fechas():
+    """
+    Normalización de fechas con caché de detección de formato.
+
+    La primera vez que se ve una forma de fecha (los dígitos se reemplazan por 9,
+    p. ej. ``9999-99-99T99:99:99Z``) se buscan los formatos ``strptime`` que la
+    aceptan y se guarda el resultado; las siguientes fechas con la misma forma se
+    convierten con un único ``strptime``. Si ningún formato aplica se recurre a
+    ``dateutil`` y la forma queda marcada para ir directo a él.
+
+    Las formas día/mes (``99/99/9999``) guardan los dos órdenes, el de ``dayfirst``
+    primero: cada fecha se interpreta por sí misma y no según la primera de su forma
+    que se vio en el proceso.
+    """
+
+    _cache = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _utc(fecha):
+        if fecha.tzinfo is not None:
+            fecha = fecha.astimezone(timezone.utc).replace(tzinfo=None)
+        return fecha
+
+    @staticmethod
+    def normalizar(texto, dayfirst=False):
+        """
+        Convierte un texto de fecha en ``datetime`` UTC sin zona horaria.
+
+        Args:
+            texto (str): La fecha tal como aparece en la fuente.
+            dayfirst (bool): Interpreta las fechas ambiguas como día/mes.
+
+        Returns:
+            datetime | None: La fecha normalizada, o None si el texto está vacío.
+
+        Raises:
+            ValueError: Si el texto no es una fecha reconocible.
+        """
+        if texto is None:
+            return None
+        if isinstance(texto, datetime):
+            return Fechas._utc(texto)
+        texto = _ZONA_TEXTO.sub('', str(texto).strip())
+        if not texto:
+            return None
+
+        llave = (_DIGITOS.sub('9', texto), dayfirst)
+        formatos = Fechas._cache.get(llave)
+        if formatos is None:
+            formatos = Fechas._detectar(texto, dayfirst)
+            with Fechas._lock:
+                if len(Fechas._cache) >= 4096:
+                    Fechas._cache.clear()
+                Fechas._cache[llave] = formatos
+        for formato in formatos:
+            try:
+                return Fechas._utc(datetime.strptime(texto, formato))
+            except ValueError:
+                continue
+        try:
+            return Fechas._utc(parser.parse(texto, dayfirst=dayfirst))
+        except (ValueError, OverflowError) as e:
+            raise ValueError("Formato de fecha no válido") from e
+
+    @staticmethod
+    def _detectar(texto, dayfirst):
+        """Devuelve los formatos a probar, en orden, para las fechas con la forma de ``texto`` (vacío: ``dateutil``)."""
+        for formato in FORMATOS + (FORMATOS_DIA + FORMATOS_MES if dayfirst else FORMATOS_MES + FORMATOS_DIA):
+            try:
+                datetime.strptime(texto, formato)
+            except ValueError:
+                continue
+            if formato not in FORMATOS_DIA + FORMATOS_MES:
+                return (formato,)
+            # Con día y mes hasta 12 la forma no decide el orden: se prueban ambos, primero el de ``dayfirst``
+            invertido = formato.replace('%d', '%_').replace('%m', '%d').replace('%_', '%m')
+            dia, mes = (formato, invertido) if formato in FORMATOS_DIA else (invertido, formato)
+            return (dia, mes) if dayfirst else (mes, dia)
+        return ()
+
+    @staticmethod
+    def intentar(texto, dayfirst=False):
+        """Como ``normalizar`` pero devuelve None en lugar de lanzar ValueError."""
+        try:
+            return Fechas.normalizar(texto, dayfirst)
+        except ValueError:
+            return None
@@ -0,0 +1,114 @@
+import os
+import threading
+import concurrent.futures
+from functools import lru_cache
+from flask import current_app, has_app_context
+from passlib.context import CryptContext
+
+
+class PoolSaturadoError(RuntimeError):
+    """Se lanza cuando el pool de hashing no admite más trabajos en cola."""
+
+
+@lru_cache(maxsize=8)
+def _contexto(configuracion):
+    """Reconstruye (una sola vez por proceso) el CryptContext serializado."""
+    return CryptContext.from_string(configuracion)
+
+
+def _hashear(configuracion, password):
+    return _contexto(configuracion).hash(password)
+
+
+def _verificar(configuracion, password, hashed_password):
+    if not password or not hashed_password:
+        return False
+    return _contexto(configuracion).verify(password, hashed_password)
+
+
+class HashPool():
+    """
+    Pool de procesos acotado para el hashing y la verificación de contraseñas.
+
+    Las operaciones de passlib son intensivas en CPU; ejecutarlas en los hilos de
+    petición bloquea a todos los workers ante una ráfaga de logins. Este pool las
+    delega a un número fijo de procesos y limita los trabajos pendientes: cuando
+    el límite se alcanza se lanza ``PoolSaturadoError`` de inmediato para que el
+    controlador responda 429 en lugar de encolar indefinidamente.
+    """
+
+    def __init__(self, max_workers=None, max_pendientes=None, timeout=None):
+        self._max_workers = max_workers
+        self._max_pendientes = max_pendientes
+        self._timeout = timeout
+        self._executor = None
+        self._cupos = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """Lee la configuración del pool desde la aplicación Flask."""
+        self._max_workers = app.config.get('HASH_POOL_WORKERS', self._max_workers)
+        self._max_pendientes = app.config.get('HASH_POOL_MAX_PENDING', self._max_pendientes)
+        self._timeout = app.config.get('HASH_POOL_TIMEOUT', self._timeout)
+
+    def _obtener_executor(self):
+        # El pool se crea de forma perezosa para no heredar procesos en un fork del servidor
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    if has_app_context() and self._max_workers is None:
+                        self.init_app(current_app)
+                    workers = self._max_workers or max(1, (os.cpu_count() or 2) // 2)
+                    self._cupos = threading.BoundedSemaphore(self._max_pendientes or workers * 4)
+                    self._executor = concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+        return self._executor
+
+    def _ejecutar(self, funcion, *args):
+        executor = self._obtener_executor()
+        if not self._cupos.acquire(blocking=False):
+            raise PoolSaturadoError("El pool de hashing está saturado.")
+        try:
+            future = executor.submit(funcion, *args)
+        except Exception:
+            self._cupos.release()
+            raise
+        future.add_done_callback(lambda _: self._cupos.release())
+        return future.result(timeout=self._timeout)
+
+    def hash_password(self, guard, password):
+        """
+        Genera el hash de una contraseña fuera del hilo de la petición.
+
+        Args:
+            guard (Praetorian): La instancia de Praetorian con el contexto de passlib configurado.
+            password (str): La contraseña en texto plano.
+
+        Returns:
+            str: El hash de la contraseña.
+
+        Raises:
+            PoolSaturadoError: Si se alcanzó el límite de trabajos pendientes.
+        """
+        return self._ejecutar(_hashear, guard.pwd_ctx.to_string(), password)
+
+    def verify_password(self, guard, password, hashed_password):
+        """
+        Verifica una contraseña contra su hash fuera del hilo de la petición.
+
+        Args:
+            guard (Praetorian): La instancia de Praetorian con el contexto de passlib configurado.
+            password (str): La contraseña en texto plano.
+            hashed_password (str): El hash almacenado del usuario.
+
+        Returns:
+            bool: True si la contraseña coincide.
+
+        Raises:
+            PoolSaturadoError: Si se alcanzó el límite de trabajos pendientes.
+        """
+        return self._ejecutar(_verificar, guard.pwd_ctx.to_string(), password, hashed_password)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,276 @@
+import ssl
+import time
+import asyncio
+import threading
+from collections import OrderedDict, namedtuple
+from urllib.parse import urlsplit
+
+Respuesta = namedtuple('Respuesta', 'url estado cabeceras cookies cuerpo')
+Respuesta.__doc__ = """Respuesta HTTP: cabeceras en minúsculas, ``cookies`` con cada Set-Cookie y el cuerpo truncado."""
+
+AGENTE = "Mozilla/5.0 (X11; Linux x86_64) AIRAN/1.0"
+SIN_CUERPO = frozenset((204, 304))
+
+_contextos = {}
+
+
+def contextoTls(verificar=False):
+    """Devuelve el ``SSLContext`` compartido; crearlo carga los certificados raíz y es costoso."""
+    if verificar not in _contextos:
+        contexto = ssl.create_default_context()
+        if not verificar:
+            # Se escanean hosts con certificados inválidos; interesa la respuesta, no la cadena
+            contexto.check_hostname = False
+            contexto.verify_mode = ssl.CERT_NONE
+        _contextos[verificar] = contexto
+    return _contextos[verificar]
+
+
+class CacheRespuestas():
+    """
+    Caché LRU de respuestas con vencimiento, segura entre hilos.
+
+    Las respuestas son datos planos, así que una misma caché puede compartirse
+    entre pools de distintos event loops (p. ej. entre solicitudes a la API). Está
+    acotada por cantidad de entradas y por ``max_bytes`` de cuerpos y cabeceras, y
+    cada entrada vence a los ``ttl`` segundos (``ttl_negativo`` para los ``False``
+    con que se marcan los hosts que no respondieron), de modo que un proceso largo
+    como ``flask monitor`` no reutiliza respuestas de otro ciclo.
+    """
+
+    def __init__(self, maximo=4096, max_bytes=64 << 20, ttl=900, ttl_negativo=300):
+        self.maximo = maximo
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.ttl_negativo = ttl_negativo
+        self.bytes = 0
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._datos)
+
+    def __contains__(self, llave):
+        return self.obtener(llave) is not None
+
+    @staticmethod
+    def _tamano(respuesta):
+        if not isinstance(respuesta, Respuesta):
+            return 64
+        return len(respuesta.cuerpo) + sum(len(k) + len(v) for k, v in respuesta.cabeceras.items()) + len(respuesta.url) + 64
+
+    def _quitar(self, llave):
+        _, tamano, _ = self._datos.pop(llave)
+        self.bytes -= tamano
+
+    def obtener(self, llave):
+        with self._lock:
+            entrada = self._datos.get(llave)
+            if entrada is None:
+                return None
+            if entrada[0] <= time.monotonic():
+                self._quitar(llave)
+                return None
+            self._datos.move_to_end(llave)
+            return entrada[2]
+
+    def guardar(self, llave, respuesta):
+        tamano = self._tamano(respuesta)
+        if tamano > self.max_bytes:
+            return
+        vence = time.monotonic() + (self.ttl if respuesta is not False else self.ttl_negativo)
+        with self._lock:
+            if llave in self._datos:
+                self._quitar(llave)
+            self._datos[llave] = (vence, tamano, respuesta)
+            self.bytes += tamano
+            while len(self._datos) > self.maximo or self.bytes > self.max_bytes:
+                self._quitar(next(iter(self._datos)))
+
+
+class ErrorHttp(Exception):
+    """La solicitud no pudo completarse (conexión, TLS, timeout o respuesta malformada)."""
+
+
+class HttpPool():
+    """
+    Cliente HTTP/1.1 asíncrono con conexiones keep-alive compartidas.
+
+    Las conexiones abiertas se guardan por ``(esquema, host, puerto)`` y se
+    reutilizan entre solicitudes, por lo que varias pruebas al mismo host pagan
+    un solo handshake TCP/TLS, y todos los pools comparten un único
+    ``SSLContext``. Las respuestas GET quedan en una ``CacheRespuestas`` (que
+    puede compartirse entre pools) para que otras etapas del escaneo (WAF,
+    tecnologías, probe HTTP) no repitan la solicitud. Con una ``CacheDns`` se
+    conecta a la dirección ya resuelta por la etapa DNS en lugar de resolver
+    otra vez, y los nombres que no existen fallan sin ir a la red.
+
+    El pool pertenece al event loop en el que se usa; se abre con ``async with``.
+    """
+
+    def __init__(self, max_por_host=4, timeout=10, max_cuerpo=256 * 1024, cache=None, verificar_tls=False, dns=None):
+        self.max_por_host = max_por_host
+        self.timeout = timeout
+        self.max_cuerpo = max_cuerpo
+        self.cache = cache if cache is not None else CacheRespuestas()
+        self._libres = {}
+        self._cupos = {}
+        self._ssl = contextoTls(verificar_tls)
+        self.dns = dns
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *_):
+        await self.cerrar()
+
+    async def cerrar(self):
+        """Cierra todas las conexiones libres."""
+        for conexiones in self._libres.values():
+            for _, writer in conexiones:
+                writer.close()
+        self._libres.clear()
+
+    def cacheada(self, url, metodo='GET'):
+        """Devuelve la respuesta ya obtenida para ``url`` o None."""
+        return self.cache.obtener((metodo, url))
+
+    async def _abrir(self, esquema, host, puerto):
+        contexto = self._ssl if esquema == 'https' else None
+        destino = host
+        if self.dns is not None:
+            if self.dns.inexistente(host):
+                raise ErrorHttp(f"{host} no resuelve")
+            destino = next(iter(self.dns.direcciones(host)), host)
+        return await asyncio.wait_for(
+            asyncio.open_connection(destino, puerto, ssl=contexto, server_hostname=host if contexto else None), self.timeout)
+
+    async def _leer_hasta(self, reader, limite):
+        """Lee hasta el cierre de la conexión o hasta ``limite`` bytes, lo que ocurra primero."""
+        partes, total = [], 0
+        while total < limite:
+            trozo = await reader.read(limite - total)
+            if not trozo:
+                break
+            partes.append(trozo)
+            total += len(trozo)
+        return b''.join(partes)
+
+    async def _leer_cuerpo(self, reader, cabeceras, metodo, estado):
+        """Lee el cuerpo y devuelve ``(cuerpo, reutilizable)``."""
+        if metodo == 'HEAD' or estado in SIN_CUERPO or 100 <= estado < 200:
+            return b'', True
+        if 'chunked' in cabeceras.get('transfer-encoding', '').lower():
+            partes, total = [], 0
+            while True:
+                tamano = int((await reader.readline()).split(b';')[0].strip() or b'0', 16)
+                if tamano == 0:
+                    while (await reader.readline()).strip():
+                        pass
+                    return b''.join(partes), True
+                restante = self.max_cuerpo - total
+                if tamano > restante:
+                    # Se conserva el comienzo del trozo hasta el tope; el resto no se lee y la conexión se cierra
+                    if restante > 0:
+                        partes.append(await reader.readexactly(restante))
+                    return b''.join(partes), False
+                partes.append((await reader.readexactly(tamano + 2))[:-2])
+                total += tamano
+        try:
+            largo = int(cabeceras['content-length'])
+        except (KeyError, ValueError):
+            largo = -1
+        if largo >= 0:
+            if largo > self.max_cuerpo:
+                # El resto del cuerpo no se lee: la conexión no es reutilizable y se cierra
+                return await self._leer_hasta(reader, self.max_cuerpo), False
+            return await reader.readexactly(largo), True
+        # Sin longitud: el cuerpo termina al cerrar la conexión
+        return await self._leer_hasta(reader, self.max_cuerpo), False
+
+    async def _intercambio(self, reader, writer, metodo, url, destino, host):
+        writer.write((f"{metodo} {destino} HTTP/1.1\r\nHost: {host}\r\nUser-Agent: {AGENTE}\r\n"
+                      f"Accept: */*\r\nConnection: keep-alive\r\n\r\n").encode('latin-1'))
+        await writer.drain()
+        linea = await reader.readline()
+        if not linea:
+            raise ConnectionResetError("conexión cerrada por el servidor")
+        partes = linea.decode('latin-1').split(None, 2)
+        if len(partes) < 2 or not partes[0].startswith('HTTP/'):
+            raise ErrorHttp(f"respuesta HTTP inválida de {host}")
+        estado = int(partes[1])
+
+        cabeceras, cookies = {}, []
+        while True:
+            linea = (await reader.readline()).decode('latin-1').rstrip('\r\n')
+            if not linea:
+                break
+            llave, _, valor = linea.partition(':')
+            llave, valor = llave.strip().lower(), valor.strip()
+            if llave == 'set-cookie':
+                cookies.append(valor)
+            cabeceras[llave] = f"{cabeceras[llave]}, {valor}" if llave in cabeceras else valor
+
+        cuerpo, reutilizable = await self._leer_cuerpo(reader, cabeceras, metodo, estado)
+        reutilizable = reutilizable and cabeceras.get('connection', '').lower() != 'close' and partes[0] != 'HTTP/1.0'
+        return Respuesta(url, estado, cabeceras, cookies, cuerpo), reutilizable
+
+    async def solicitar(self, url, metodo='GET', usar_cache=True, guardar=True):
+        """
+        Realiza una solicitud reutilizando una conexión libre del host si la hay.
+
+        Args:
+            url (str): La URL absoluta (http o https).
+            metodo (str): El método HTTP.
+            usar_cache (bool): Devuelve la respuesta cacheada si la URL ya se pidió.
+            guardar (bool): Guarda la respuesta GET en la caché para otras etapas.
+
+        Returns:
+            Respuesta: La respuesta del servidor.
+
+        Raises:
+            ErrorHttp: Si la solicitud no pudo completarse.
+        """
+        llave = (metodo, url)
+        if usar_cache:
+            respuesta = self.cache.obtener(llave)
+            if respuesta is not None:
+                return respuesta
+
+        partes = urlsplit(url)
+        esquema, host = partes.scheme.lower(), partes.hostname
+        if esquema not in ('http', 'https') or not host:
+            raise ErrorHttp(f"URL no soportada: {url}")
+        puerto = partes.port or (443 if esquema == 'https' else 80)
+        destino = (partes.path or '/') + (f"?{partes.query}" if partes.query else '')
+        cabecera_host = host if partes.port is None else f"{host}:{puerto}"
+        origen = (esquema, host, puerto)
+
+        cupos = self._cupos.setdefault(origen, asyncio.Semaphore(self.max_por_host))
+        async with cupos:
+            libres = self._libres.setdefault(origen, [])
+            # Una conexión reutilizada puede haber sido cerrada por el servidor: se reintenta una vez con una nueva
+            for reutilizada in (True, False):
+                conexion = libres.pop() if reutilizada and libres else None
+                if reutilizada and conexion is None:
+                    continue
+                try:
+                    if conexion is None:
+                        conexion = await self._abrir(esquema, host, puerto)
+                    respuesta, reutilizable = await asyncio.wait_for(
+                        self._intercambio(*conexion, metodo, url, destino, cabecera_host), self.timeout)
+                except (OSError, EOFError, asyncio.IncompleteReadError, asyncio.TimeoutError, ValueError, ErrorHttp) as e:
+                    if conexion is not None:
+                        conexion[1].close()
+                    if reutilizada:
+                        continue
+                    raise e if isinstance(e, ErrorHttp) else ErrorHttp(f"{url}: {e!r}") from e
+                if reutilizable:
+                    libres.append(conexion)
+                else:
+                    conexion[1].close()
+                break
+
+        if metodo == 'GET' and guardar:
+            self.cache.guardar(llave, respuesta)
+        return respuesta
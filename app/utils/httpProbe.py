@@ -0,0 +1,127 @@
+import re
+import time
+import asyncio
+import hashlib
+from html import unescape
+from collections import namedtuple
+from urllib.parse import urljoin
+from app.utils.httpPool import HttpPool, ErrorHttp
+from app.utils.clustering import simhash
+
+ResultadoSonda = namedtuple('ResultadoSonda', 'host url estado titulo cabeceras hash_cuerpo simhash largo tiempo redirecciones')
+ResultadoSonda.__doc__ = """Resultado del sondeo HTTP de un host: la respuesta final tras seguir las redirecciones."""
+
+_TITULO = re.compile(rb'<title[^>]*>(.*?)</title>', re.I | re.S)
+_ESPACIOS = re.compile(r'\s+')
+REDIRECCIONES = frozenset((301, 302, 303, 307, 308))
+
+
+def titulo(cuerpo):
+    """Extrae el ``<title>`` de un cuerpo HTML, o None si no lo tiene."""
+    coincidencia = _TITULO.search(cuerpo or b'')
+    if coincidencia is None:
+        return None
+    texto = _ESPACIOS.sub(' ', unescape(coincidencia.group(1).decode('utf-8', 'replace'))).strip()
+    return texto[:255] or None
+
+
+def largo(respuesta):
+    """Largo del cuerpo según ``Content-Length``, o el leído si la cabecera falta o no es un número."""
+    try:
+        return max(int(respuesta.cabeceras['content-length']), 0)
+    except (KeyError, ValueError):
+        return len(respuesta.cuerpo)
+
+
+def llaveSonda(host):
+    """Llave con la que se guarda en la caché la respuesta final del sondeo de un host."""
+    return ('SONDA', host)
+
+
+class SondaHttp():
+    """
+    Etapa de sondeo HTTP compartida por los analizadores.
+
+    Cada host se pide una sola vez (https y, si falla, http) sobre el pool
+    compartido, siguiendo como máximo ``max_redirecciones`` redirecciones y
+    truncando el cuerpo en ``max_cuerpo`` bytes. La respuesta final queda en la
+    caché bajo ``llaveSonda(host)`` (``False`` si no respondió), de donde la
+    leen el detector de WAF, el de tecnologías y el clustering sin volver a la red.
+    Con una ``CacheDns`` las conexiones usan las direcciones de la etapa DNS.
+    """
+
+    def __init__(self, cache=None, concurrencia=64, timeout=10, max_redirecciones=3, max_cuerpo=256 * 1024,
+                 esquemas=('https', 'http'), dns=None):
+        self.cache = cache
+        self.dns = dns
+        self.concurrencia = concurrencia
+        self.timeout = timeout
+        self.max_redirecciones = max_redirecciones
+        self.max_cuerpo = max_cuerpo
+        self.esquemas = esquemas
+
+    async def sondear(self, host, pool):
+        """
+        Sondea un host y guarda la respuesta final en la caché del pool.
+
+        Returns:
+            ResultadoSonda | None: El resultado, o None si el host no respondió en ningún esquema.
+        """
+        for esquema in self.esquemas:
+            url = f"{esquema}://{host}/"
+            inicio = time.perf_counter()
+            try:
+                respuesta = await pool.solicitar(url, usar_cache=False)
+                redirecciones = 0
+                while respuesta.estado in REDIRECCIONES and redirecciones < self.max_redirecciones:
+                    destino = respuesta.cabeceras.get('location')
+                    if not destino:
+                        break
+                    redirecciones += 1
+                    respuesta = await pool.solicitar(urljoin(respuesta.url, destino.split(',')[0].strip()), usar_cache=False)
+            except ErrorHttp:
+                continue
+            pool.cache.guardar(llaveSonda(host), respuesta)
+            return ResultadoSonda(
+                host=host,
+                url=respuesta.url,
+                estado=respuesta.estado,
+                titulo=titulo(respuesta.cuerpo),
+                cabeceras=respuesta.cabeceras,
+                hash_cuerpo=hashlib.sha256(respuesta.cuerpo).hexdigest(),
+                simhash=simhash(respuesta.cuerpo),
+                largo=largo(respuesta),
+                tiempo=round((time.perf_counter() - inicio) * 1000, 1),
+                redirecciones=redirecciones,
+            )
+        # Caché negativa: los analizadores no reintentan un host que no respondió
+        pool.cache.guardar(llaveSonda(host), False)
+        return None
+
+    async def ejecutarAsync(self, hosts, on_result=None):
+        """Versión asíncrona de ``SondaHttp.ejecutar``."""
+        cupos = asyncio.Semaphore(self.concurrencia)
+        resultados = {}
+
+        async def uno(pool, host):
+            async with cupos:
+                resultados[host] = await self.sondear(host, pool)
+            if on_result is not None:
+                on_result(host, resultados[host])
+
+        async with HttpPool(timeout=self.timeout, max_cuerpo=self.max_cuerpo, cache=self.cache, dns=self.dns) as pool:
+            await asyncio.gather(*(uno(pool, host) for host in hosts))
+        return resultados
+
+    def ejecutar(self, hosts, on_result=None):
+        """
+        Sondea varios hosts de forma concurrente.
+
+        Args:
+            hosts (list): Los hosts (subdominios) a sondear.
+            on_result (callable, optional): Se llama con ``(host, resultado)`` al terminar cada host.
+
+        Returns:
+            dict: Un diccionario host -> ``ResultadoSonda`` o None si el host no respondió.
+        """
+        return asyncio.run(self.ejecutarAsync(list(dict.fromkeys(hosts)), on_result))
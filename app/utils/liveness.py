@@ -0,0 +1,116 @@
+import errno
+import asyncio
+from collections import namedtuple
+from app.utils.dnsResolver import ErrorDns
+
+VIVO, MUERTO, DESCONOCIDO = 'alive', 'dead', 'unknown'
+# Puertos TCP más comunes en la superficie expuesta: basta que uno conteste para dar el host por vivo
+PUERTOS_TOP = (80, 443, 22, 8080, 8443, 21, 25, 53, 3389, 110, 143, 445, 993, 995, 587, 3306, 5432, 8000, 8888, 23)
+# Fallas del propio equipo (descriptores, puertos efímeros, sin ruta IPv6): no dicen nada del host
+ERRORES_LOCALES = frozenset((errno.EMFILE, errno.ENFILE, errno.ENOBUFS, errno.EADDRNOTAVAIL, errno.ENETUNREACH))
+
+ResultadoVida = namedtuple('ResultadoVida', 'host estado puerto motivo')
+ResultadoVida.__doc__ = """Resultado de la comprobación de un host: ``alive``, ``dead`` o ``unknown``, el puerto que contestó y el motivo."""
+
+
+class SondaVida():
+    """
+    Comprobación rápida de vida de los hosts antes de las etapas costosas.
+
+    Un host está vivo si resuelve y contesta en alguno de los ``puertos`` por TCP,
+    aunque sea con un RST (el puerto está cerrado pero el host responde). Está
+    muerto si ya no resuelve o si ninguna conexión contestó dentro del
+    ``timeout``, y su estado es desconocido si el DNS falló o las conexiones
+    fallaron por causas locales. Todas las conexiones de todos los hosts
+    comparten ``concurrencia`` cupos y las de un host se cancelan con la primera
+    respuesta, así que un host vivo cuesta un par de RTT y uno muerto un ``timeout``.
+    """
+
+    def __init__(self, resolvedor, puertos=PUERTOS_TOP, timeout=1.5, concurrencia=512, max_direcciones=2):
+        self.resolvedor = resolvedor
+        self.puertos = tuple(puertos)
+        self.timeout = timeout
+        self.concurrencia = concurrencia
+        self.max_direcciones = max_direcciones
+
+    async def _conectar(self, direccion, puerto, cupos):
+        """
+        Intenta una conexión TCP.
+
+        Returns:
+            bool | None: True si el host contestó (SYN-ACK o RST), False si no, None si falló por una causa local.
+        """
+        async with cupos:
+            try:
+                _, escritor = await asyncio.wait_for(asyncio.open_connection(direccion, puerto), self.timeout)
+            except ConnectionRefusedError:
+                return True
+            except asyncio.TimeoutError:
+                return False
+            except OSError as e:
+                return None if e.errno in ERRORES_LOCALES else False
+            escritor.close()
+            return True
+
+    async def sondear(self, host, cupos):
+        """
+        Comprueba si un host está vivo.
+
+        Returns:
+            ResultadoVida: El estado del host.
+        """
+        try:
+            registros = await self.resolvedor.resolver(host)
+        except ErrorDns:
+            return ResultadoVida(host, DESCONOCIDO, None, 'dns')
+        direcciones = sorted({r.valor: r.tipo for r in registros if r.tipo in ('A', 'AAAA')}.items(), key=lambda d: d[1])
+        if not direcciones:
+            # Sin A ni AAAA el host no existe, salvo que alguno de los dos no haya respondido
+            return ResultadoVida(host, MUERTO, None, 'nxdomain') if registros.completa else ResultadoVida(host, DESCONOCIDO, None, 'dns')
+
+        intentos = {
+            asyncio.ensure_future(self._conectar(direccion, puerto, cupos)): puerto
+            for direccion, _ in direcciones[:self.max_direcciones] for puerto in self.puertos
+        }
+        pendientes, local = set(intentos), False
+        try:
+            while pendientes:
+                listos, pendientes = await asyncio.wait(pendientes, return_when=asyncio.FIRST_COMPLETED)
+                for intento in listos:
+                    contesto = intento.result()
+                    if contesto:
+                        return ResultadoVida(host, VIVO, intentos[intento], None)
+                    local = local or contesto is None
+        finally:
+            for intento in pendientes:
+                intento.cancel()
+        return ResultadoVida(host, DESCONOCIDO, None, 'local') if local else ResultadoVida(host, MUERTO, None, 'timeout')
+
+    async def ejecutarAsync(self, hosts, on_result=None):
+        """Versión asíncrona de ``SondaVida.ejecutar``."""
+        cupos = asyncio.Semaphore(self.concurrencia)
+        resultados = {}
+
+        async def uno(host):
+            resultados[host] = await self.sondear(host, cupos)
+            if on_result is not None:
+                on_result(host, resultados[host])
+
+        try:
+            await asyncio.gather(*(uno(host) for host in hosts))
+        finally:
+            self.resolvedor.cerrar()
+        return resultados
+
+    def ejecutar(self, hosts, on_result=None):
+        """
+        Comprueba la vida de varios hosts.
+
+        Args:
+            hosts (list): Los hosts (subdominios) a comprobar.
+            on_result (callable, optional): Se llama con ``(host, resultado)`` al terminar cada host.
+
+        Returns:
+            dict: Un diccionario host -> ``ResultadoVida``.
+        """
+        return asyncio.run(self.ejecutarAsync(list(dict.fromkeys(hosts)), on_result))
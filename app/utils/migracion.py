@@ -0,0 +1,177 @@
+import pkgutil
+import importlib
+from sqlalchemy import MetaData, UniqueConstraint, inspect, text
+from sqlalchemy.schema import CreateTable
+from app.extensions import extensiones
+
+
+def _modelos():
+    """Importa todos los modelos para que ``db.metadata`` tenga todas las tablas."""
+    import app.models as paquete
+    for modulo in pkgutil.iter_modules(paquete.__path__):
+        if modulo.name.endswith('Model'):
+            importlib.import_module(f"{paquete.__name__}.{modulo.name}")
+
+
+def _literal(valor):
+    if isinstance(valor, bool):
+        return '1' if valor else '0'
+    if isinstance(valor, (int, float)):
+        return str(valor)
+    return "'" + str(valor).replace("'", "''") + "'"
+
+
+def _certificadosLegados(sesion):
+    """
+    Elimina los certificados guardados antes de ``CertificateBlob``.
+
+    Esas filas tienen el contenido en ``certificate_data`` en lugar de la huella de
+    un blob, así que no cumplen la llave foránea; la próxima recolección los vuelve
+    a registrar con su huella.
+    """
+    borradas = sesion.execute(text(
+        "DELETE FROM certificate WHERE certificate_data IS NOT NULL AND certificate_data NOT IN "
+        "(SELECT fingerprint FROM certificate_blob)")).rowcount
+    return [f"{borradas} certificados sin huella eliminados"] if borradas else []
+
+
+class Migracion():
+    """
+    Lleva en el lugar una base de datos existente al esquema actual de los modelos.
+
+    Es idempotente: cada paso revisa el esquema real antes de cambiarlo, así que se
+    puede correr tras cada actualización (``flask migrate_database``). Los pasos son:
+
+    1. Crear las tablas nuevas.
+    2. Correr las preparaciones de datos propias de cada tabla (``PREPARACIONES``).
+    3. Agregar las columnas que faltan (``ALTER TABLE ... ADD COLUMN``).
+    4. Eliminar las filas duplicadas y crear los índices únicos de los modelos. Si
+       la base tiene una restricción única que el modelo ya no declara, en SQLite la
+       tabla se reconstruye (otros motores la eliminan por nombre).
+    5. Crear los índices comunes que falten.
+    """
+
+    # tabla -> funciones ``f(sesion)`` que adaptan los datos antes de crear sus índices únicos
+    PREPARACIONES = {
+        'certificate': (_certificadosLegados,),
+    }
+
+    @staticmethod
+    def ejecutar():
+        """
+        Migra la base de datos de la aplicación.
+
+        Returns:
+            list: La descripción de cada cambio aplicado (vacía si la base ya estaba al día).
+        """
+        _modelos()
+        db = extensiones.db
+        cambios = []
+        existentes = set(inspect(db.engine).get_table_names())
+        for tabla in db.metadata.sorted_tables:
+            if tabla.name not in existentes:
+                tabla.create(db.engine)
+                cambios.append(f"tabla {tabla.name}")
+
+        sesion = db.session
+        for tabla in db.metadata.sorted_tables:
+            if tabla.name in existentes:
+                cambios.extend(Migracion._columnas(sesion, tabla))
+                for preparar in Migracion.PREPARACIONES.get(tabla.name, ()):
+                    cambios.extend(preparar(sesion) or ())
+                cambios.extend(Migracion._unicos(sesion, tabla))
+            sesion.commit()
+            for indice in tabla.indexes:
+                if indice.name not in {i['name'] for i in inspect(db.engine).get_indexes(tabla.name)}:
+                    indice.create(db.engine, checkfirst=True)
+                    cambios.append(f"índice {indice.name}")
+        return cambios
+
+    @staticmethod
+    def _columnas(sesion, tabla):
+        dialecto = extensiones.db.engine.dialect
+        actuales = {c['name'] for c in inspect(sesion.connection()).get_columns(tabla.name)}
+        cambios = []
+        for columna in tabla.columns:
+            if columna.name in actuales:
+                continue
+            definicion = f"{columna.name} {columna.type.compile(dialect=dialecto)}"
+            valor = columna.default.arg if columna.default is not None and columna.default.is_scalar else None
+            if valor is not None:
+                definicion += f" DEFAULT {_literal(valor)}"
+                if not columna.nullable:
+                    definicion += " NOT NULL"
+            sesion.execute(text(f"ALTER TABLE {tabla.name} ADD COLUMN {definicion}"))
+            cambios.append(f"columna {tabla.name}.{columna.name}")
+        return cambios
+
+    @staticmethod
+    def _unicos(sesion, tabla):
+        conexion = sesion.connection()
+        inspector = inspect(conexion)
+        declarados = {
+            tuple(sorted(c.name for c in restriccion.columns)): restriccion.name
+            for restriccion in tabla.constraints if isinstance(restriccion, UniqueConstraint)
+        }
+        declarados.update({tuple(sorted(c.name for c in i.columns)): i.name for i in tabla.indexes if i.unique})
+        restricciones = {tuple(sorted(u['column_names'])): u.get('name') for u in inspector.get_unique_constraints(tabla.name)}
+        if conexion.dialect.name == 'sqlite':
+            # La reflexión omite los UNIQUE de columna (sqlite_autoindex_*), que SQLite registra con origen 'u'
+            for _, nombre, unico, origen, *_ in conexion.execute(text(f"PRAGMA index_list({tabla.name})")):
+                if unico and origen == 'u':
+                    columnas = conexion.execute(text(f"PRAGMA index_info({nombre})")).all()
+                    restricciones.setdefault(tuple(sorted(c[2] for c in columnas)), nombre)
+        indices = {tuple(sorted(i['column_names'])): i['name'] for i in inspector.get_indexes(tabla.name) if i['unique']}
+        reales = {**restricciones, **indices}
+
+        cambios = []
+        # Los índices únicos que el modelo ya no declara se eliminan; las restricciones de la tabla requieren más
+        for columnas, nombre in indices.items():
+            if columnas not in declarados:
+                sesion.execute(text(f"DROP INDEX {nombre}"))
+                cambios.append(f"índice único {nombre} eliminado")
+        obsoletos = [(columnas, nombre) for columnas, nombre in restricciones.items()
+                     if columnas not in declarados and columnas not in indices]
+        if obsoletos:
+            cambios.extend(Migracion._quitarUnicos(sesion, tabla, obsoletos))
+        for columnas, nombre in declarados.items():
+            if columnas in reales:
+                continue
+            no_nulas = ' AND '.join(f"{c} IS NOT NULL" for c in columnas)
+            grupo = ', '.join(columnas)
+            # Se conserva la fila más reciente de cada grupo repetido
+            borradas = sesion.execute(text(
+                f"DELETE FROM {tabla.name} WHERE {no_nulas} AND id NOT IN "
+                f"(SELECT MAX(id) FROM {tabla.name} WHERE {no_nulas} GROUP BY {grupo})")).rowcount
+            nombre = nombre or f"uq_{tabla.name}_{'_'.join(columnas)}"
+            sesion.execute(text(f"CREATE UNIQUE INDEX IF NOT EXISTS {nombre} ON {tabla.name} ({grupo})"))
+            cambios.append(f"índice único {nombre}" + (f" ({borradas} duplicados eliminados)" if borradas else ""))
+        return cambios
+
+    @staticmethod
+    def _quitarUnicos(sesion, tabla, obsoletos):
+        """Elimina restricciones únicas que el modelo ya no declara."""
+        if extensiones.db.engine.dialect.name != 'sqlite':
+            for _, nombre in obsoletos:
+                sesion.execute(text(f"ALTER TABLE {tabla.name} DROP CONSTRAINT {nombre}"))
+            return [f"restricción {nombre} eliminada" for _, nombre in obsoletos]
+
+        # SQLite no elimina restricciones: se copia la tabla a una nueva con el esquema del modelo
+        reales = [c['name'] for c in inspect(sesion.connection()).get_columns(tabla.name)]
+        columnas = ', '.join(c.name for c in tabla.columns if c.name in reales)
+        # La copia necesita las tablas referenciadas por sus llaves foráneas
+        copia = MetaData()
+        for otra in tabla.metadata.sorted_tables:
+            otra.to_metadata(copia)
+        temporal = tabla.to_metadata(copia, name=f"{tabla.name}_migracion")
+        # Las únicas del modelo se crean después, tras eliminar los duplicados
+        for restriccion in [r for r in temporal.constraints if isinstance(r, UniqueConstraint)]:
+            temporal.constraints.discard(restriccion)
+        sesion.execute(text("PRAGMA foreign_keys=OFF"))
+        sesion.execute(text(f"DROP TABLE IF EXISTS {temporal.name}"))
+        sesion.execute(CreateTable(temporal))
+        sesion.execute(text(f"INSERT INTO {temporal.name} ({columnas}) SELECT {columnas} FROM {tabla.name}"))
+        sesion.execute(text(f"DROP TABLE {tabla.name}"))
+        sesion.execute(text(f"ALTER TABLE {temporal.name} RENAME TO {tabla.name}"))
+        sesion.execute(text("PRAGMA foreign_keys=ON"))
+        return [f"tabla {tabla.name} reconstruida sin la restricción única ({', '.join(c)})" for c, _ in obsoletos]
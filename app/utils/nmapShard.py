@@ -0,0 +1,279 @@
+import os
+import xml.etree.ElementTree as ET
+
+from app.utils.core import Core
+from app.utils.aimd import congestion
+from app.utils.checkpoint import Checkpoint
+
+TOTAL_PUERTOS = 65535
+# Bloques repartidos por turnos: los puertos abiertos se concentran en los bajos y cada
+# fragmento recibe una parte pareja de ellos
+TAMANO_BLOQUE = 1024
+# Opciones de detección (servicios, sistema operativo, traceroute y scripts): no corren en los
+# fragmentos, sino una sola vez en la pasada de detalle sobre los puertos abiertos
+DETECCION = frozenset((
+    '-A', '-O', '-sV', '-sC', '-sVC', '-sCV', '--traceroute', '--osscan-guess', '--osscan-limit',
+    '--version-all', '--version-light', '--version-trace', '--script-trace',
+))
+DETECCION_CON_VALOR = frozenset((
+    '--script', '--script-args', '--script-args-file', '--version-intensity', '--max-os-tries',
+))
+PROTOCOLOS = {'tcp': 'T', 'udp': 'U', 'sctp': 'S'}
+
+
+class FragmentadorNmap():
+    """
+    Divide el descubrimiento de puertos de un escaneo ``nmap -p-`` en fragmentos paralelos.
+
+    Un solo proceso nmap usa un núcleo y un único bucle de ritmo; con ``fragmentos``
+    procesos sobre rangos disjuntos el barrido de puertos de un host aprovecha varios
+    núcleos. Los fragmentos solo descubren puertos: la detección de servicios, de
+    sistema operativo y los scripts corren una sola vez, en una pasada de detalle con
+    el comando original limitado a los puertos abiertos. Las tasas
+    ``--min-rate``/``--max-rate`` se reparten entre los fragmentos para no superar la
+    del host.
+    """
+
+    def __init__(self, fragmentos):
+        self.fragmentos = max(1, fragmentos)
+
+    def rangos(self):
+        """Devuelve la lista de puertos (en formato ``-p``) de cada fragmento."""
+        bloques = [
+            f"{inicio}-{min(inicio + TAMANO_BLOQUE - 1, TOTAL_PUERTOS)}"
+            for inicio in range(1, TOTAL_PUERTOS + 1, TAMANO_BLOQUE)
+        ]
+        return [','.join(bloques[i::self.fragmentos]) for i in range(self.fragmentos)]
+
+    @staticmethod
+    def descubrimiento(tokens):
+        """Devuelve los tokens de un comando nmap sin sus opciones de detección."""
+        resultado, saltar = [], False
+        for token in tokens:
+            if saltar:
+                saltar = False
+                continue
+            if token in DETECCION or token.split('=', 1)[0] in DETECCION_CON_VALOR:
+                # ``--script vuln`` lleva el valor en el token siguiente; ``--script=vuln`` no
+                saltar = token in DETECCION_CON_VALOR
+                continue
+            resultado.append(token)
+        return resultado
+
+    @staticmethod
+    def llave(host, indice, herramienta='nmap'):
+        """
+        Devuelve la llave de admisión de un fragmento.
+
+        Cada fragmento tiene su propio límite por host: juntos equivalen a un solo
+        escaneo (con la tasa repartida), y compartir el límite del host los pondría en
+        fila. Todos cuentan, en cambio, en el total de la herramienta.
+        """
+        return (f"{host}#{indice}", herramienta)
+
+    def dividir(self, comando):
+        """
+        Divide un comando nmap de rango completo en los comandos de descubrimiento de sus fragmentos.
+
+        Args:
+            comando (str): Un comando nmap con ``-p-`` y ``-oX <reporte>``.
+
+        Returns:
+            list: Las tuplas ``(comando, reporte)`` de cada fragmento, o una lista vacía si el
+                comando no es fragmentable (otro rango de puertos, sin ``-oX`` o un solo fragmento).
+        """
+        if self.fragmentos < 2 or Core.herramienta(comando) != 'nmap':
+            return []
+        tokens = FragmentadorNmap.descubrimiento(comando.split(' '))
+        if '-p-' not in tokens or '-oX' not in tokens:
+            return []
+        indice_salida = tokens.index('-oX') + 1
+        if indice_salida >= len(tokens):
+            return []
+        reporte = tokens[indice_salida]
+        fragmentos = []
+        for i, puertos in enumerate(self.rangos()):
+            partes = list(tokens)
+            partes[partes.index('-p-')] = f"-p {puertos}"
+            partes[indice_salida] = f"{reporte}.{i}"
+            for opcion in ('--min-rate', '--max-rate'):
+                if opcion in partes and partes.index(opcion) + 1 < len(partes):
+                    posicion = partes.index(opcion) + 1
+                    try:
+                        partes[posicion] = str(max(1, int(float(partes[posicion]) / self.fragmentos)))
+                    except ValueError:
+                        pass
+            fragmentos.append((' '.join(partes), f"{reporte}.{i}"))
+        return fragmentos
+
+    @staticmethod
+    def completar(comando, reportes):
+        """
+        Cierra el descubrimiento de un comando fragmentado.
+
+        Si el comando pide detección, devuelve el de la pasada de detalle: el comando
+        original con ``-p-`` reemplazado por los puertos abiertos de los fragmentos (por
+        protocolo). Si no la pide, o no hay puertos abiertos, los reportes de los
+        fragmentos se fusionan en el ``-oX`` del comando. En ambos casos los reportes de
+        los fragmentos se eliminan.
+
+        Args:
+            comando (str): El comando original, sin fragmentar.
+            reportes (list): Las rutas de los reportes de sus fragmentos.
+
+        Returns:
+            tuple: ``(detalle, error)``: el comando de la pasada de detalle o None, y el
+                motivo por el que algún fragmento no sirve o None.
+        """
+        tokens = comando.split(' ')
+        destino = tokens[tokens.index('-oX') + 1]
+        if len(FragmentadorNmap.descubrimiento(tokens)) == len(tokens):
+            return None, FragmentadorNmap.fusionar(reportes, destino)
+        error = FragmentadorNmap._invalido(reportes)
+        if error is not None:
+            return None, error
+        abiertos = {}
+        for reporte in reportes:
+            puertos = Core.parsearPuertosXML(reporte)
+            for puerto, protocolo, estado in zip(puertos['portid'], puertos['protocol'], puertos['estado']):
+                if estado == 'open':
+                    abiertos.setdefault(protocolo, set()).add(int(puerto))
+        if not abiertos:
+            return None, FragmentadorNmap.fusionar(reportes, destino)
+        FragmentadorNmap.descartar(reportes)
+        tokens[tokens.index('-p-')] = "-p " + ','.join(
+            f"{PROTOCOLOS.get(protocolo, 'T')}:{','.join(str(p) for p in sorted(puertos))}"
+            for protocolo, puertos in sorted(abiertos.items()))
+        return ' '.join(tokens), None
+
+    @staticmethod
+    def _invalido(reportes):
+        """Devuelve el motivo por el que algún reporte de fragmento no sirve (y los descarta todos), o None."""
+        for reporte in reportes:
+            error = Checkpoint.validar(reporte)
+            if error is not None:
+                FragmentadorNmap.descartar(reportes)
+                return f"Fragmento {os.path.basename(reporte)}: {error}"
+        return None
+
+    @staticmethod
+    def _direccion(host):
+        direccion = host.find('address')
+        return direccion.get('addr') if direccion is not None else None
+
+    @staticmethod
+    def fusionar(reportes, destino):
+        """
+        Fusiona los reportes XML de los fragmentos de un escaneo en uno solo.
+
+        Los fragmentos solo descubren puertos, así que de cada host se juntan los puertos
+        y los ``extraports`` (ordenados por protocolo y puerto); ``runstats`` refleja el
+        fragmento que terminó último. Los reportes de los fragmentos se eliminan al terminar.
+
+        Args:
+            reportes (list): Las rutas de los reportes de los fragmentos.
+            destino (str): La ruta del reporte fusionado.
+
+        Returns:
+            str | None: None si se fusionó, o el motivo por el que algún fragmento no sirve.
+        """
+        error = FragmentadorNmap._invalido(reportes)
+        if error is not None:
+            return error
+        arboles = [ET.parse(reporte) for reporte in reportes]
+        raiz = arboles[0].getroot()
+        hosts = {FragmentadorNmap._direccion(h): h for h in raiz.findall('host')}
+        runstats = raiz.find('runstats')
+        for arbol in arboles[1:]:
+            for host in arbol.getroot().findall('host'):
+                clave = FragmentadorNmap._direccion(host)
+                base = hosts.get(clave)
+                if base is None:
+                    hosts[clave] = host
+                    raiz.insert(list(raiz).index(runstats) if runstats is not None else len(raiz), host)
+                    continue
+                puertos = host.find('ports')
+                if puertos is not None:
+                    destino_puertos = base.find('ports')
+                    if destino_puertos is None:
+                        destino_puertos = ET.SubElement(base, 'ports')
+                    destino_puertos.extend(list(puertos))
+            # El reporte fusionado termina cuando termina el último fragmento
+            otro = arbol.getroot().find('runstats/finished')
+            finalizado = raiz.find('runstats/finished')
+            if otro is not None and finalizado is not None:
+                if float(otro.get('time', 0)) > float(finalizado.get('time', 0)):
+                    for atributo in ('time', 'timestr', 'elapsed', 'summary'):
+                        if otro.get(atributo) is not None:
+                            finalizado.set(atributo, otro.get(atributo))
+                if otro.get('exit', 'success') != 'success':
+                    finalizado.set('exit', otro.get('exit'))
+
+        for host in hosts.values():
+            puertos = host.find('ports')
+            if puertos is None:
+                continue
+            extras, lista = {}, []
+            for elemento in list(puertos):
+                if elemento.tag == 'extraports':
+                    estado = elemento.get('state')
+                    if estado in extras:
+                        extras[estado].set('count', str(int(extras[estado].get('count', 0)) + int(elemento.get('count', 0))))
+                    else:
+                        extras[estado] = elemento
+                elif elemento.tag == 'port':
+                    lista.append(elemento)
+            puertos[:] = list(extras.values()) + sorted(lista, key=lambda p: (p.get('protocol', ''), int(p.get('portid', 0))))
+        for scaninfo in raiz.findall('scaninfo'):
+            scaninfo.set('numservices', str(TOTAL_PUERTOS))
+            scaninfo.set('services', f"1-{TOTAL_PUERTOS}")
+
+        temporal = f"{destino}.{os.getpid()}.tmp"
+        arboles[0].write(temporal, encoding='utf-8', xml_declaration=True)
+        os.replace(temporal, destino)
+        FragmentadorNmap.descartar(reportes)
+        return None
+
+    @staticmethod
+    def descartar(reportes):
+        """Elimina los reportes de los fragmentos."""
+        for reporte in reportes:
+            try:
+                os.remove(reporte)
+            except FileNotFoundError:
+                pass
+
+    def ejecutar(self, comando, on_line=None, control=None, llave=None):
+        """
+        Ejecuta un comando nmap, fragmentado si es de rango completo, y deja su reporte en su ``-oX``.
+
+        Los fragmentos pasan por ``Core.escaneoConcurrente`` con el mismo control de
+        admisión que el resto de los escaneos (cada uno con su ``llave`` de fragmento),
+        que ajusta el total de la herramienta con cada uno; un comando sin fragmentar lo
+        ajusta una vez al terminar. La pasada de detalle, si la hay, usa la ``llave``
+        del host.
+
+        Returns:
+            str: La salida de los fragmentos y de la pasada de detalle (o del comando), con el
+                error de fusión si lo hubo.
+        """
+        fragmentos = self.dividir(comando)
+        if not fragmentos:
+            salida = Core.ejecutar(comando, on_line)
+            if control is not None:
+                total = ('*', Core.herramienta(comando))
+                if not isinstance(salida, str) or congestion(salida):
+                    control.congestion(total)
+                else:
+                    control.exito(total)
+            return salida
+        indices = {c: i for i, (c, _) in enumerate(fragmentos)}
+        salidas = Core.escaneoConcurrente(
+            list(indices), on_line=on_line, control=control,
+            llave=(lambda c: FragmentadorNmap.llave(llave[0], indices[c], llave[1])) if llave is not None else None)
+        detalle, error = FragmentadorNmap.completar(comando, [r for _, r in fragmentos])
+        if detalle is not None:
+            salidas += Core.escaneoConcurrente([detalle], on_line=on_line, control=control,
+                                               llave=(lambda _: llave) if llave is not None else None)
+        salida = "\n".join(s for s in salidas if isinstance(s, str))
+        return salida if error is None else f"{salida}\n{error}"
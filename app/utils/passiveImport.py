@@ -0,0 +1,226 @@
+import os
+import re
+import gzip
+import json
+import concurrent.futures
+
+_BLOQUE = 1 << 22
+TAMANO_TROZO = 64 << 20
+_SEPARADORES = re.compile(r'[\s,;]+')
+_NOMBRE = re.compile(r'[a-z0-9_-]+(?:\.[a-z0-9_-]+)+\Z')
+_FIN = ''
+
+
+class TrieSufijos():
+    """
+    Trie de etiquetas invertidas (``com -> example -> corp``) de los dominios registrados.
+
+    Buscar un nombre recorre sus etiquetas desde la derecha, una consulta a un
+    diccionario por etiqueta, sin importar cuántos dominios haya registrados.
+    """
+
+    def __init__(self, dominios):
+        self.raiz = {}
+        for dominio in dominios:
+            dominio = dominio.strip().strip('.').lower()
+            if not dominio:
+                continue
+            nodo = self.raiz
+            for etiqueta in reversed(dominio.split('.')):
+                nodo = nodo.setdefault(etiqueta, {})
+            nodo[_FIN] = dominio
+
+    def buscar(self, nombre):
+        """
+        Devuelve el dominio registrado más específico del que ``nombre`` es subdominio.
+
+        Args:
+            nombre (str): Un nombre normalizado (minúsculas, sin punto final).
+
+        Returns:
+            str | None: El dominio, o None si el nombre no pertenece a ninguno (o es el propio dominio).
+        """
+        nodo, encontrado = self.raiz, None
+        etiquetas = nombre.split('.')
+        # La etiqueta 0 no se recorre: el propio dominio no es un subdominio
+        for i in range(len(etiquetas) - 1, 0, -1):
+            nodo = nodo.get(etiquetas[i])
+            if nodo is None:
+                break
+            encontrado = nodo.get(_FIN, encontrado)
+        return encontrado
+
+
+def _cadenas(dato):
+    """Recorre un objeto JSON y genera todas sus cadenas (nombres en cualquier campo y anidamiento)."""
+    if isinstance(dato, str):
+        yield dato
+    elif isinstance(dato, dict):
+        for valor in dato.values():
+            yield from _cadenas(valor)
+    elif isinstance(dato, list):
+        for valor in dato:
+            yield from _cadenas(valor)
+
+
+# Estado de cada proceso: el trie y el prefiltro se reciben una sola vez al iniciar el worker
+_trie = None
+_prefiltro = None
+
+
+def _iniciar(dominios):
+    global _trie, _prefiltro
+    _trie = TrieSufijos(dominios)
+    literales = sorted({d.strip().strip('.').lower().encode('ascii', 'ignore') for d in dominios if d.strip('. ')},
+                       key=len, reverse=True)
+    _prefiltro = re.compile(b'|'.join(re.escape(literal) for literal in literales)) if literales else None
+
+
+def _linea(linea, encontrados):
+    texto = linea.decode('utf-8', 'replace').strip()
+    if texto.startswith('{'):
+        try:
+            cadenas = _cadenas(json.loads(texto))
+        except ValueError:
+            return
+    else:
+        # Texto plano o CSV/TSV (nombre, tipo, valor)
+        cadenas = (texto,)
+    for cadena in cadenas:
+        for nombre in _SEPARADORES.split(cadena):
+            nombre = nombre.strip('.')
+            if nombre.startswith('*.'):
+                nombre = nombre[2:]
+            if len(nombre) <= 253 and _NOMBRE.match(nombre):
+                dominio = _trie.buscar(nombre)
+                if dominio is not None:
+                    encontrados.add((dominio, nombre))
+
+
+def _procesarBloque(bloque, encontrados=None):
+    """Devuelve los pares ``(dominio, subdominio)`` de un bloque de líneas completas."""
+    encontrados = set() if encontrados is None else encontrados
+    if _prefiltro is None:
+        return encontrados
+    bloque = bloque.lower()
+    posicion = 0
+    # Solo se decodifican las líneas donde aparece algún dominio registrado
+    while True:
+        coincidencia = _prefiltro.search(bloque, posicion)
+        if coincidencia is None:
+            return encontrados
+        inicio = bloque.rfind(b'\n', 0, coincidencia.start()) + 1
+        fin = bloque.find(b'\n', coincidencia.end())
+        fin = len(bloque) if fin < 0 else fin
+        _linea(bloque[inicio:fin], encontrados)
+        posicion = fin + 1
+
+
+def _procesarRango(ruta, inicio, fin):
+    """Procesa las líneas que empiezan en ``[inicio, fin)`` de un archivo sin comprimir."""
+    encontrados = set()
+    with open(ruta, 'rb') as archivo:
+        if inicio:
+            # Se descarta la línea que empezó en el trozo anterior
+            archivo.seek(inicio - 1)
+            archivo.readline()
+        posicion, resto = archivo.tell(), b''
+        while posicion < fin:
+            datos = archivo.read(min(_BLOQUE, fin - posicion))
+            if not datos:
+                break
+            posicion += len(datos)
+            bloque = resto + datos
+            corte = bloque.rfind(b'\n') + 1
+            _procesarBloque(bloque[:corte], encontrados)
+            resto = bloque[corte:]
+        if resto:
+            # La última línea del trozo puede terminar en el siguiente
+            _procesarBloque(resto + archivo.readline(), encontrados)
+    return encontrados
+
+
+def _bloquesGzip(ruta):
+    resto = b''
+    with gzip.open(ruta, 'rb') as archivo:
+        for datos in iter(lambda: archivo.read(_BLOQUE), b''):
+            bloque = resto + datos
+            corte = bloque.rfind(b'\n') + 1
+            if corte:
+                yield bloque[:corte]
+            resto = bloque[corte:]
+    if resto:
+        yield resto
+
+
+class ImportadorPasivo():
+    """
+    Importación masiva de nombres desde volcados de Certificate Transparency y DNS pasivo.
+
+    Lee archivos NDJSON, CSV o de un nombre por línea (opcionalmente en gzip) en
+    bloques, sin cargarlos en memoria. Un prefiltro con los literales de los
+    dominios registrados descarta casi todas las líneas sin decodificarlas; en las
+    restantes se extraen los nombres de cualquier campo y se filtran con un
+    ``TrieSufijos``. Los archivos sin comprimir se reparten entre procesos por
+    rangos de bytes alineados a líneas; los gzip se descomprimen en el proceso
+    principal y sus bloques se reparten entre los workers. Como mucho hay dos
+    trabajos por proceso en vuelo, así que la memoria es constante.
+    """
+
+    def __init__(self, dominios, procesos=None, tamano_trozo=TAMANO_TROZO):
+        self.dominios = sorted({d.strip().strip('.').lower() for d in dominios if d and d.strip('. ')})
+        self.procesos = procesos or os.cpu_count() or 1
+        self.tamano_trozo = tamano_trozo
+
+    def trabajos(self, ruta):
+        """Genera los trabajos ``(función, argumentos)`` en que se divide un archivo."""
+        if ruta.endswith('.gz'):
+            for bloque in _bloquesGzip(ruta):
+                yield _procesarBloque, (bloque,)
+            return
+        tamano = os.path.getsize(ruta)
+        for inicio in range(0, tamano, self.tamano_trozo):
+            yield _procesarRango, (ruta, inicio, min(inicio + self.tamano_trozo, tamano))
+
+    def ejecutar(self, rutas, consumidor):
+        """
+        Importa los nombres de varios archivos.
+
+        Args:
+            rutas (list): Los archivos a leer (``.gz`` para gzip).
+            consumidor (callable): Recibe cada lote de pares ``(dominio, subdominio)`` encontrados.
+
+        Returns:
+            int: La cantidad de pares entregados al consumidor (puede haber repetidos entre lotes).
+        """
+        if not self.dominios:
+            return 0
+        trabajos = (trabajo for ruta in rutas for trabajo in self.trabajos(ruta))
+        total = 0
+        if self.procesos == 1:
+            _iniciar(self.dominios)
+            for funcion, argumentos in trabajos:
+                encontrados = funcion(*argumentos)
+                if encontrados:
+                    consumidor(sorted(encontrados))
+                    total += len(encontrados)
+            return total
+
+        with concurrent.futures.ProcessPoolExecutor(self.procesos, initializer=_iniciar, initargs=(self.dominios,)) as pool:
+            pendientes = set()
+            for funcion, argumentos in trabajos:
+                pendientes.add(pool.submit(funcion, *argumentos))
+                if len(pendientes) < 2 * self.procesos:
+                    continue
+                listos, pendientes = concurrent.futures.wait(pendientes, return_when=concurrent.futures.FIRST_COMPLETED)
+                for futuro in listos:
+                    encontrados = futuro.result()
+                    if encontrados:
+                        consumidor(sorted(encontrados))
+                        total += len(encontrados)
+            for futuro in concurrent.futures.as_completed(pendientes):
+                encontrados = futuro.result()
+                if encontrados:
+                    consumidor(sorted(encontrados))
+                    total += len(encontrados)
+        return total
@@ -0,0 +1,78 @@
+import time
+import threading
+from collections import deque, OrderedDict
+
+
+class SlidingWindowLimiter():
+    """
+    Limitador en memoria por ventana deslizante.
+
+    Registra las marcas de tiempo de los intentos de cada llave (por ejemplo
+    usuario + IP) y rechaza nuevos intentos cuando dentro de la ventana ya se
+    alcanzó el máximo permitido. Es local a cada proceso.
+
+    La memoria está acotada: una vez por ventana se eliminan las llaves cuyos
+    intentos ya vencieron, y si aun así hay más de ``max_llaves`` se olvidan las
+    que registraron su último intento hace más tiempo.
+    """
+
+    def __init__(self, max_intentos, ventana, max_llaves=100000):
+        self.max_intentos = max_intentos
+        self.ventana = ventana
+        self.max_llaves = max_llaves
+        self._intentos = OrderedDict()
+        self._ultima_purga = time.monotonic()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._intentos)
+
+    def _purgar(self, marcas, ahora):
+        limite = ahora - self.ventana
+        while marcas and marcas[0] <= limite:
+            marcas.popleft()
+
+    def permitido(self, llave):
+        """
+        Indica si la llave todavía puede realizar un intento.
+
+        Args:
+            llave (str): Identificador del cliente a limitar.
+
+        Returns:
+            float: 0 si está permitido, o los segundos que faltan para liberar un cupo.
+        """
+        ahora = time.monotonic()
+        with self._lock:
+            marcas = self._intentos.get(llave)
+            if not marcas:
+                return 0
+            self._purgar(marcas, ahora)
+            if not marcas:
+                del self._intentos[llave]
+                return 0
+            if len(marcas) < self.max_intentos:
+                return 0
+            return marcas[0] + self.ventana - ahora
+
+    def registrar(self, llave):
+        """Registra un intento (fallido) para la llave."""
+        ahora = time.monotonic()
+        with self._lock:
+            marcas = self._intentos.setdefault(llave, deque())
+            self._intentos.move_to_end(llave)
+            self._purgar(marcas, ahora)
+            marcas.append(ahora)
+            if ahora - self._ultima_purga >= self.ventana:
+                self._ultima_purga = ahora
+                limite = ahora - self.ventana
+                for vencida in [k for k, m in self._intentos.items() if not m or m[-1] <= limite]:
+                    del self._intentos[vencida]
+            # Las llaves quedan ordenadas por su último intento: se olvidan las más antiguas
+            while len(self._intentos) > self.max_llaves:
+                self._intentos.popitem(last=False)
+
+    def reiniciar(self, llave):
+        """Olvida los intentos de la llave, por ejemplo tras un login exitoso."""
+        with self._lock:
+            self._intentos.pop(llave, None)
@@ -0,0 +1,156 @@
+import json
+import time
+import threading
+from collections import deque
+
+
+class _Canal():
+    def __init__(self, max_eventos):
+        self.eventos = deque(maxlen=max_eventos)
+        self.secuencia = 0
+        self.vistos = set()
+        self.finalizado = False
+        self.actualizado = time.monotonic()
+        self.condicion = threading.Condition()
+
+
+class ScanEvents():
+    """
+    Bus de eventos en memoria para el progreso de los escaneos.
+
+    Cada canal (normalmente el dominio escaneado) guarda sus últimos eventos en un
+    buffer circular con un número de secuencia creciente. Los productores son los
+    callbacks de ``Core.escaneoConcurrente`` y los consumidores las conexiones SSE,
+    que pueden reanudar desde la última secuencia recibida (``Last-Event-ID``).
+    """
+
+    def __init__(self, max_eventos=2000, retencion=3600):
+        self.max_eventos = max_eventos
+        self.retencion = retencion
+        self._canales = {}
+        self._lock = threading.Lock()
+
+    def _canal(self, nombre):
+        with self._lock:
+            canal = self._canales.get(nombre)
+            if canal is None:
+                self._purgar()
+                canal = self._canales[nombre] = _Canal(self.max_eventos)
+            return canal
+
+    def _purgar(self):
+        # Libera canales finalizados que nadie consulta desde hace tiempo
+        limite = time.monotonic() - self.retencion
+        for nombre in [n for n, c in self._canales.items() if c.finalizado and c.actualizado < limite]:
+            del self._canales[nombre]
+
+    def iniciar(self, nombre):
+        """Reabre un canal para un nuevo escaneo, conservando la secuencia."""
+        canal = self._canal(nombre)
+        with canal.condicion:
+            canal.finalizado = False
+            canal.vistos.clear()
+
+    def publicar(self, nombre, tipo, datos, unico=None):
+        """
+        Publica un evento en el canal y despierta a los consumidores.
+
+        Args:
+            nombre (str): El canal del escaneo.
+            tipo (str): El tipo de evento SSE (progreso, subdominio, waf, puerto, error, fin).
+            datos (dict): El contenido serializable del evento.
+            unico (str, optional): Llave para descartar eventos repetidos dentro del canal.
+
+        Returns:
+            int | None: La secuencia asignada, o None si el evento estaba repetido.
+        """
+        canal = self._canal(nombre)
+        with canal.condicion:
+            if unico is not None:
+                if unico in canal.vistos:
+                    return None
+                canal.vistos.add(unico)
+            canal.secuencia += 1
+            canal.eventos.append((canal.secuencia, tipo, datos))
+            canal.actualizado = time.monotonic()
+            canal.condicion.notify_all()
+            return canal.secuencia
+
+    def finalizar(self, nombre, datos=None):
+        """Publica el evento ``fin`` y marca el canal como terminado."""
+        self.publicar(nombre, 'fin', datos or {})
+        canal = self._canal(nombre)
+        with canal.condicion:
+            canal.finalizado = True
+            canal.condicion.notify_all()
+
+    def cerrar(self, nombre, error='El escaneo terminó con un error.'):
+        """
+        Asegura que el canal termine: si el escaneo salió sin ``finalizar`` publica ``error`` y ``fin``.
+
+        Se llama en el ``finally`` de cada etapa, de modo que los consumidores SSE no queden
+        esperando keep-alives cuando la etapa falla o retorna antes de tiempo.
+        """
+        if nombre is None:
+            return
+        canal = self._canal(nombre)
+        with canal.condicion:
+            if canal.finalizado:
+                return
+        self.publicar(nombre, 'error', {'error': error})
+        self.finalizar(nombre, {'error': error})
+
+    def escuchar(self, nombre, desde=0, espera=15):
+        """
+        Genera los eventos del canal posteriores a ``desde``.
+
+        Produce ``None`` cada ``espera`` segundos sin actividad para que la vista
+        envíe un keep-alive. Termina cuando el canal finaliza y no quedan eventos.
+        Si los eventos siguientes a ``desde`` ya salieron del buffer (o la secuencia no
+        existe, por ejemplo tras reiniciar el servidor) produce un evento ``reset`` con
+        la primera secuencia disponible, para que el cliente recargue el estado completo.
+
+        Args:
+            nombre (str): El canal del escaneo.
+            desde (int): La última secuencia recibida por el cliente.
+            espera (float): Segundos máximos de espera entre eventos.
+
+        Yields:
+            tuple | None: Tuplas ``(secuencia, tipo, datos)`` o None como keep-alive.
+        """
+        canal = self._canal(nombre)
+        ultimo = desde
+        while True:
+            with canal.condicion:
+                if ultimo > canal.secuencia:
+                    ultimo = 0
+                    primero = canal.eventos[0][0] if canal.eventos else canal.secuencia + 1
+                    pendientes = None
+                else:
+                    pendientes = [e for e in canal.eventos if e[0] > ultimo]
+                    if not pendientes:
+                        if canal.finalizado:
+                            return
+                        canal.condicion.wait(espera)
+                        pendientes = [e for e in canal.eventos if e[0] > ultimo]
+                    primero = pendientes[0][0] if pendientes else None
+            if pendientes is None or (primero is not None and primero > ultimo + 1):
+                # Se perdieron eventos: el cliente debe recargar en lugar de seguir con un estado incompleto
+                yield (primero - 1, 'reset', {'desde': desde, 'primero': primero})
+                ultimo = primero - 1
+                if pendientes is None:
+                    continue
+            if not pendientes:
+                yield None
+                continue
+            for evento in pendientes:
+                ultimo = evento[0]
+                yield evento
+
+    @staticmethod
+    def formatear(evento):
+        """Convierte un evento (o un keep-alive) al formato de texto SSE."""
+        if evento is None:
+            return ": keep-alive\n\n"
+        secuencia, tipo, datos = evento
+        return f"id: {secuencia}\nevent: {tipo}\ndata: {json.dumps(datos)}\n\n"
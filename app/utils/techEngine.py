@@ -0,0 +1,242 @@
+import os
+import re
+import json
+import asyncio
+from functools import lru_cache
+from app.utils.httpPool import HttpPool, ErrorHttp
+from app.utils.httpProbe import llaveSonda
+
+RUTA_REGLAS = os.path.join(os.path.dirname(__file__), "tecnologias.json")
+
+# Patrones agrupados por alternancia: si el grupo completo no coincide se descartan todos sus patrones
+TAMANO_GRUPO = 48
+
+_META = re.compile(r'<meta\s[^>]*>', re.I)
+_ATRIBUTO = re.compile(r'''([\w:-]+)\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+))''')
+_SCRIPT = re.compile(r'''<script[^>]+src\s*=\s*["']?([^"'\s>]+)''', re.I)
+_REFERENCIA = re.compile(r'\\[1-9]')
+
+
+class Patron():
+    """Un patrón de Wappalyzer (``regex\\;version:\\1\\;confidence:50``) ya compilado."""
+
+    __slots__ = ('tecnologia', 'texto', 'regex', 'version')
+
+    def __init__(self, tecnologia, texto):
+        partes = texto.split('\\;')
+        self.tecnologia = tecnologia
+        self.texto = partes[0]
+        self.regex = re.compile(partes[0], re.I)
+        self.version = next((p[8:] for p in partes[1:] if p.startswith('version:')), None)
+
+    def evaluar(self, valor):
+        """Devuelve la versión (``''`` si no la hay) o None si el patrón no coincide."""
+        coincidencia = self.regex.search(valor)
+        if coincidencia is None:
+            return None
+        if not self.version:
+            return ''
+        grupos = coincidencia.groups()
+
+        def grupo(m):
+            i = int(m.group(0)[1:]) - 1
+            return (grupos[i] or '') if i < len(grupos) else ''
+        version = self.version
+        if '?' in version and ':' in version:
+            # Ternario de Wappalyzer: "\1?si:no"
+            condicion, _, opciones = version.partition('?')
+            si, _, no = opciones.partition(':')
+            version = si if _REFERENCIA.sub(grupo, condicion) else no
+        return _REFERENCIA.sub(grupo, version).strip()
+
+
+class Grupo():
+    """Patrones de una misma fuente evaluados tras un filtro con su alternancia combinada."""
+
+    __slots__ = ('patrones', 'filtro')
+
+    def __init__(self, patrones):
+        self.patrones = patrones
+        # Las referencias hacia atrás cambian de número al combinar; esos patrones no se agrupan
+        try:
+            self.filtro = re.compile('|'.join(f'(?:{p.texto})' for p in patrones), re.I)
+        except re.error:
+            self.filtro = None
+
+    def evaluar(self, valor, encontrados):
+        if self.filtro is not None and self.filtro.search(valor) is None:
+            return
+        for patron in self.patrones:
+            version = patron.evaluar(valor)
+            if version is not None and (version or patron.tecnologia not in encontrados):
+                encontrados[patron.tecnologia] = version
+
+
+def _agrupar(patrones):
+    sueltos = [p for p in patrones if _REFERENCIA.search(p.texto)]
+    agrupables = [p for p in patrones if not _REFERENCIA.search(p.texto)]
+    grupos = [Grupo(agrupables[i:i + TAMANO_GRUPO]) for i in range(0, len(agrupables), TAMANO_GRUPO)]
+    grupos.extend(Grupo([p]) for p in sueltos)
+    return grupos
+
+
+class MotorTecnologias():
+    """
+    Motor de fingerprinting de tecnologías con reglas en formato Wappalyzer.
+
+    Las reglas se cargan y compilan una sola vez. Los patrones de cada fuente
+    (cabeceras, cookies, meta, scripts y HTML) se agrupan en alternancias
+    combinadas que actúan como filtro: la mayoría de las páginas descartan un
+    grupo entero con una sola búsqueda. Las respuestas se leen de la caché que
+    llena ``SondaHttp``, por lo que la página de cada host no se vuelve a pedir.
+    """
+
+    def __init__(self, reglas):
+        self.implica = {}
+        self.cabeceras, self.cookies, self.meta = {}, {}, {}
+        scripts, html = [], []
+
+        for nombre, regla in reglas.items():
+            implica = regla.get('implies') or []
+            self.implica[nombre] = [i.split('\\;')[0] for i in ([implica] if isinstance(implica, str) else implica)]
+            for fuente, destino in (('headers', self.cabeceras), ('cookies', self.cookies), ('meta', self.meta)):
+                for llave, textos in (regla.get(fuente) or {}).items():
+                    destino.setdefault(llave.lower(), []).extend(self._patrones(nombre, textos))
+            scripts.extend(self._patrones(nombre, regla.get('scriptSrc') or regla.get('scripts')))
+            html.extend(self._patrones(nombre, regla.get('html')))
+
+        self.cabeceras = {llave: _agrupar(p) for llave, p in self.cabeceras.items()}
+        self.cookies = {llave: _agrupar(p) for llave, p in self.cookies.items()}
+        self.meta = {llave: _agrupar(p) for llave, p in self.meta.items()}
+        self.scripts = _agrupar(scripts)
+        self.html = _agrupar(html)
+
+    @staticmethod
+    def _patrones(nombre, textos):
+        if textos is None:
+            return []
+        patrones = []
+        for texto in [textos] if isinstance(textos, str) else textos:
+            try:
+                patrones.append(Patron(nombre, texto))
+            except re.error:
+                # Sintaxis propia de JavaScript que ``re`` no admite
+                continue
+        return patrones
+
+    @staticmethod
+    @lru_cache(maxsize=4)
+    def cargar(ruta=None):
+        """
+        Carga y compila las reglas una sola vez por ruta.
+
+        Args:
+            ruta (str, optional): Un JSON de tecnologías o un directorio con los JSON de Wappalyzer
+                (``src/technologies``). Por defecto se usan las reglas incluidas.
+
+        Returns:
+            MotorTecnologias: El motor compilado.
+        """
+        ruta = ruta or RUTA_REGLAS
+        archivos = sorted(os.path.join(ruta, f) for f in os.listdir(ruta) if f.endswith('.json')) if os.path.isdir(ruta) else [ruta]
+        reglas = {}
+        for archivo in archivos:
+            with open(archivo, encoding='utf-8') as contenido:
+                datos = json.load(contenido)
+            reglas.update(datos.get('technologies', datos))
+        return MotorTecnologias(reglas)
+
+    def analizar(self, respuesta):
+        """
+        Evalúa las reglas sobre una respuesta HTTP.
+
+        Args:
+            respuesta (Respuesta): La respuesta de ``HttpPool``.
+
+        Returns:
+            dict: Un diccionario tecnología -> versión (cadena vacía si no se conoce).
+        """
+        encontrados = {}
+        for llave, valor in respuesta.cabeceras.items():
+            for grupo in self.cabeceras.get(llave, ()):
+                grupo.evaluar(valor, encontrados)
+        for cookie in respuesta.cookies:
+            llave, _, valor = cookie.split(';', 1)[0].partition('=')
+            for grupo in self.cookies.get(llave.strip().lower(), ()):
+                grupo.evaluar(valor.strip(), encontrados)
+
+        html = respuesta.cuerpo.decode('utf-8', 'replace') if respuesta.cuerpo else ''
+        if html:
+            for etiqueta in _META.findall(html):
+                atributos = {m[0].lower(): m[1] or m[2] or m[3] for m in _ATRIBUTO.findall(etiqueta)}
+                llave = (atributos.get('name') or atributos.get('property') or '').lower()
+                if llave in self.meta and 'content' in atributos:
+                    for grupo in self.meta[llave]:
+                        grupo.evaluar(atributos['content'], encontrados)
+            for src in _SCRIPT.findall(html):
+                for grupo in self.scripts:
+                    grupo.evaluar(src, encontrados)
+            for grupo in self.html:
+                grupo.evaluar(html, encontrados)
+
+        pendientes = list(encontrados)
+        while pendientes:
+            for implicada in self.implica.get(pendientes.pop(), ()):
+                if implicada not in encontrados:
+                    encontrados[implicada] = ''
+                    pendientes.append(implicada)
+        return encontrados
+
+    async def detectar(self, host, pool, esquemas=('https', 'http')):
+        """
+        Detecta las tecnologías de un host a partir de su página principal.
+
+        Usa la respuesta de la etapa de sondeo si está en la caché; solo sin ella va a la red.
+
+        Returns:
+            dict | None: Las tecnologías encontradas, o None si el host no respondió.
+        """
+        sondeada = pool.cache.obtener(llaveSonda(host))
+        if sondeada is not None:
+            return self.analizar(sondeada) if sondeada else None
+        for esquema in esquemas:
+            try:
+                return self.analizar(await pool.solicitar(f"{esquema}://{host}/"))
+            except ErrorHttp:
+                continue
+        return None
+
+    async def ejecutarAsync(self, hosts, pool=None, concurrencia=64, on_result=None, esquemas=('https', 'http')):
+        """Versión asíncrona de ``MotorTecnologias.ejecutar``."""
+        cupos = asyncio.Semaphore(concurrencia)
+        resultados = {}
+
+        async def uno(pool, host):
+            async with cupos:
+                resultados[host] = await self.detectar(host, pool, esquemas)
+            if on_result is not None:
+                on_result(host, resultados[host])
+
+        if pool is not None:
+            await asyncio.gather(*(uno(pool, host) for host in hosts))
+        else:
+            async with HttpPool() as propio:
+                await asyncio.gather(*(uno(propio, host) for host in hosts))
+        return resultados
+
+    def ejecutar(self, hosts, cache=None, on_result=None):
+        """
+        Detecta las tecnologías de varios hosts de forma concurrente.
+
+        Args:
+            hosts (list): Los hosts (subdominios) a analizar.
+            cache (CacheRespuestas, optional): Caché de respuestas compartida con otras etapas.
+            on_result (callable, optional): Se llama con ``(host, tecnologias)`` al terminar cada host.
+
+        Returns:
+            dict: Un diccionario host -> {tecnología: versión} o None si el host no respondió.
+        """
+        async def correr():
+            async with HttpPool(cache=cache) as pool:
+                return await self.ejecutarAsync(list(dict.fromkeys(hosts)), pool, on_result=on_result)
+        return asyncio.run(correr())
@@ -0,0 +1,78 @@
+import hashlib
+import asyncio
+from app.utils.httpPool import contextoTls
+from app.utils.x509 import decodificar, ErrorX509
+
+
+class RecolectorTls():
+    """
+    Recolector asíncrono de certificados TLS.
+
+    Hace un handshake por host (con SNI = el nombre del host), guarda el
+    certificado presentado y cierra la conexión sin enviar datos. La
+    concurrencia está acotada por un semáforo. Los certificados se deduplican
+    por huella SHA-256: miles de hosts detrás del certificado de un CDN se
+    decodifican y se guardan una sola vez. Con una ``CacheDns`` se conecta a la
+    dirección ya resuelta por la etapa DNS.
+    """
+
+    def __init__(self, concurrencia=100, timeout=8, puerto=443, dns=None):
+        self.concurrencia = concurrencia
+        self.timeout = timeout
+        self.puerto = puerto
+        self.dns = dns
+
+    async def der(self, host):
+        """
+        Obtiene el certificado (DER) que presenta un host.
+
+        Args:
+            host (str): El host, opcionalmente con ``:puerto``.
+
+        Returns:
+            bytes: El certificado en DER.
+        """
+        nombre, _, puerto = host.rpartition(':') if host.count(':') == 1 else (host, '', '')
+        nombre, puerto = (nombre, int(puerto)) if puerto.isdigit() else (host, self.puerto)
+        destino = next(iter(self.dns.direcciones(nombre)), nombre) if self.dns is not None else nombre
+        _, writer = await asyncio.wait_for(
+            asyncio.open_connection(destino, puerto, ssl=contextoTls(), server_hostname=nombre), self.timeout)
+        try:
+            der = writer.get_extra_info('ssl_object').getpeercert(binary_form=True)
+        finally:
+            writer.close()
+        if not der:
+            raise ErrorX509(f"{host} no presentó certificado")
+        return der
+
+    async def ejecutarAsync(self, hosts):
+        """Versión asíncrona de ``RecolectorTls.ejecutar``."""
+        cupos = asyncio.Semaphore(self.concurrencia)
+        certificados, por_host = {}, {}
+
+        async def uno(host):
+            try:
+                async with cupos:
+                    der = await self.der(host)
+                huella = hashlib.sha256(der).hexdigest()
+                if huella not in certificados:
+                    certificados[huella] = decodificar(der)
+                por_host[host] = huella
+            except (OSError, asyncio.TimeoutError, ErrorX509) as e:
+                por_host[host] = e
+
+        await asyncio.gather(*(uno(host) for host in hosts))
+        return certificados, por_host
+
+    def ejecutar(self, hosts):
+        """
+        Recolecta los certificados de varios hosts.
+
+        Args:
+            hosts (list): Los hosts a consultar.
+
+        Returns:
+            tuple: ``(certificados, por_host)``: un diccionario huella -> ``Certificado`` con
+                cada certificado distinto, y otro host -> huella (o la excepción si falló).
+        """
+        return asyncio.run(self.ejecutarAsync(list(dict.fromkeys(hosts))))
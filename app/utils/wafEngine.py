@@ -0,0 +1,230 @@
+import re
+import asyncio
+from urllib.parse import quote, urlsplit
+from app.utils.httpPool import HttpPool, ErrorHttp
+from app.utils.httpProbe import llaveSonda
+
+NO_WAF = "No contiene WAF"
+SIN_CONEXION = "Falló al conectar"
+GENERICO = "Generic"
+# La solicitud de ataque no obtuvo respuesta: puede ser un WAF que corta la conexión o una falla de red
+DESCONOCIDO = "Desconocido"
+
+# Solicitud con cargas típicas de XSS, LFI y SQLi; un WAF suele bloquearla aunque la página normal responda
+ATAQUE = "/?" + "&".join(f"{llave}={quote(valor)}" for llave, valor in (
+    ("id", "1' OR '1'='1' --"),
+    ("q", "<script>alert(document.cookie)</script>"),
+    ("file", "../../../../etc/passwd"),
+))
+
+# Estados con los que un WAF genérico rechaza la solicitud de ataque. No se incluyen 400, 405 ni
+# 501: muchas aplicaciones sin WAF los devuelven ante parámetros que no esperan
+ESTADOS_BLOQUEO = frozenset((403, 406, 429, 999))
+
+# Firmas: cada regla es un patrón (sin distinguir mayúsculas) sobre una cabecera, las cookies o el cuerpo.
+# Basta con que una regla coincida. Los nombres siguen los que reporta wafw00f.
+FIRMAS = (
+    ("Cloudflare", {
+        "cabeceras": {"server": r"cloudflare", "cf-ray": r".", "cf-cache-status": r"."},
+        "cookies": r"__cfduid|__cf_bm|cf_clearance",
+        "cuerpo": r"attention required! \| cloudflare|cloudflare ray id",
+    }),
+    ("Cloudfront (Amazon)", {
+        "cabeceras": {"x-amz-cf-id": r".", "via": r"cloudfront", "x-cache": r"cloudfront"},
+        "cuerpo": r"generated by cloudfront \(cloudfront\)",
+    }),
+    ("AWS Elastic Load Balancer (Amazon)", {
+        "cabeceras": {"server": r"awselb", "x-amzn-requestid": r".", "x-amz-id-2": r"."},
+        "cookies": r"awsalbcors?=|awselb",
+    }),
+    ("Akamai (Akamai Technologies)", {
+        "cabeceras": {"server": r"akamaighost|akamainetstorage", "x-akamai-transformed": r"."},
+        "cookies": r"^ak_bmsc=|^bm_sz=",
+        "cuerpo": r"reference #\d+\.[0-9a-f]+\.\d+\.[0-9a-f]+",
+    }),
+    ("Incapsula (Imperva Inc.)", {
+        "cabeceras": {"x-iinfo": r".", "x-cdn": r"incapsula"},
+        "cookies": r"incap_ses_|visid_incap_",
+        "cuerpo": r"incapsula incident id|powered by incapsula",
+    }),
+    ("Sucuri CloudProxy (Sucuri Inc.)", {
+        "cabeceras": {"server": r"sucuri|cloudproxy", "x-sucuri-id": r".", "x-sucuri-cache": r"."},
+        "cuerpo": r"access denied - sucuri website firewall|sucuri\.net/privacy-policy",
+    }),
+    ("BIG-IP Application Security Manager (F5 Networks)", {
+        "cabeceras": {"server": r"big-?ip", "x-wa-info": r"."},
+        "cookies": r"^ts[0-9a-f]{6,}=|bigipserver",
+        "cuerpo": r"the requested url was rejected\. please consult with your administrator",
+    }),
+    ("FortiWeb (Fortinet)", {
+        "cookies": r"fortiwafsid=",
+        "cuerpo": r"\.fgd_icon|fortigate application control|server unavailable!.*fortiweb",
+    }),
+    ("Barracuda (Barracuda Networks)", {
+        "cookies": r"barra_counter_session=|bni__barracuda_lb_cookie=|bni_persistence=",
+        "cuerpo": r"you have been blocked.*barracuda",
+    }),
+    ("Azure Front Door (Microsoft)", {
+        "cabeceras": {"x-azure-ref": r".", "x-fd-healthprobe": r"."},
+    }),
+    ("Fastly (Fastly CDN)", {
+        "cabeceras": {"x-fastly-request-id": r".", "fastly-debug-digest": r"."},
+    }),
+    ("Wordfence (Defiant)", {
+        "cabeceras": {"server": r"wf_?waf"},
+        "cuerpo": r"generated by wordfence|a potentially unsafe operation has been detected|wfcredentials",
+    }),
+    ("ModSecurity (SpiderLabs)", {
+        "cabeceras": {"server": r"mod_security|nyob"},
+        "cuerpo": r"this error was generated by mod_security|rules of the mod_security module|mod_security rules triggered",
+    }),
+    ("DDoS-GUARD (DDOS-GUARD CORP.)", {
+        "cabeceras": {"server": r"ddos-guard"},
+        "cookies": r"__ddg\d?_",
+    }),
+    ("Varnish (OWASP)", {
+        "cuerpo": r"request rejected by xvarnish-waf",
+    }),
+)
+
+
+class Firma():
+    """Una firma de WAF con sus patrones ya compilados."""
+
+    __slots__ = ('nombre', 'cabeceras', 'cookies', 'cuerpo')
+
+    def __init__(self, nombre, reglas):
+        self.nombre = nombre
+        self.cabeceras = tuple((llave, re.compile(patron, re.I)) for llave, patron in reglas.get("cabeceras", {}).items())
+        self.cookies = re.compile(reglas["cookies"], re.I | re.M) if "cookies" in reglas else None
+        self.cuerpo = re.compile(reglas["cuerpo"].encode(), re.I | re.S) if "cuerpo" in reglas else None
+
+    def coincide(self, respuesta):
+        for llave, patron in self.cabeceras:
+            valor = respuesta.cabeceras.get(llave)
+            if valor is not None and patron.search(valor):
+                return True
+        if self.cookies is not None and respuesta.cookies and self.cookies.search("\n".join(respuesta.cookies)):
+            return True
+        return self.cuerpo is not None and bool(respuesta.cuerpo) and self.cuerpo.search(respuesta.cuerpo) is not None
+
+
+FIRMAS_COMPILADAS = tuple(Firma(nombre, reglas) for nombre, reglas in FIRMAS)
+
+
+class DetectorWaf():
+    """
+    Detector de WAF en proceso sobre el pool HTTP compartido.
+
+    Por host se hacen como máximo dos solicitudes sobre la misma conexión
+    keep-alive: la página principal (que puede venir ya cacheada por otra etapa)
+    y, si ninguna firma coincide, una solicitud con cargas de ataque, siempre al
+    host analizado y sin pasar por la caché. Si la
+    solicitud de ataque se bloquea (403, 406, 429) mientras la normal responde,
+    el WAF se reporta como ``Generic``; si la de ataque no obtiene respuesta se
+    reporta ``Desconocido``. Los resultados usan el vocabulario de
+    ``Decodificador.wafw00f``.
+    """
+
+    def __init__(self, pool=None, concurrencia=64, esquemas=('https', 'http'), firmas=FIRMAS_COMPILADAS, cache=None):
+        self.pool = pool
+        self.cache = cache
+        self.concurrencia = concurrencia
+        self.esquemas = esquemas
+        self.firmas = firmas
+
+    def analizar(self, respuestas):
+        """
+        Aplica las firmas a respuestas ya obtenidas.
+
+        Args:
+            respuestas (list): Instancias de ``Respuesta`` (normal primero, luego la de ataque).
+
+        Returns:
+            str | None: El nombre del WAF, ``Generic``, o None si no hay evidencia.
+        """
+        for respuesta in respuestas:
+            if respuesta is None:
+                continue
+            for firma in self.firmas:
+                if firma.coincide(respuesta):
+                    return firma.nombre
+        return None
+
+    async def _obtener(self, pool, url, cache=True):
+        try:
+            return await pool.solicitar(url, usar_cache=cache, guardar=cache)
+        except ErrorHttp:
+            return None
+
+    async def detectar(self, host, pool=None):
+        """
+        Detecta el WAF de un host.
+
+        Si la etapa de sondeo ya obtuvo la página del host se usa esa respuesta y
+        solo se hace la solicitud de ataque cuando ninguna firma coincide.
+
+        Returns:
+            str: El WAF detectado, ``Generic``, ``Desconocido``, ``No contiene WAF`` o ``Falló al conectar``.
+        """
+        pool = pool or self.pool
+        sondeada = pool.cache.obtener(llaveSonda(host))
+        if sondeada is False:
+            return SIN_CONEXION
+        if sondeada:
+            partes = urlsplit(sondeada.url)
+            # Si el sondeo terminó en otro host tras redirecciones, el ataque va igual al host analizado
+            destino = partes.netloc if partes.hostname == host.lower() else host
+            return await self._clasificar(pool, sondeada, f"{partes.scheme}://{destino}")
+        for esquema in self.esquemas:
+            base = f"{esquema}://{host}"
+            normal = await self._obtener(pool, base + "/")
+            if normal is not None:
+                return await self._clasificar(pool, normal, base)
+        return SIN_CONEXION
+
+    async def _clasificar(self, pool, normal, base):
+        nombre = self.analizar([normal])
+        if nombre:
+            return nombre
+        # El ataque siempre va a la red: una respuesta vieja no dice nada del WAF actual
+        ataque = await self._obtener(pool, base + ATAQUE, cache=False)
+        nombre = self.analizar([ataque])
+        if nombre:
+            return nombre
+        if ataque is None:
+            return DESCONOCIDO
+        if normal.estado < 400 and ataque.estado in ESTADOS_BLOQUEO:
+            return GENERICO
+        return NO_WAF
+
+    async def ejecutarAsync(self, hosts, on_result=None):
+        """Versión asíncrona de ``DetectorWaf.ejecutar``."""
+        cupos = asyncio.Semaphore(self.concurrencia)
+        resultados = {}
+
+        async def uno(pool, host):
+            async with cupos:
+                resultados[host] = await self.detectar(host, pool)
+            if on_result is not None:
+                on_result(host, resultados[host])
+
+        if self.pool is not None:
+            await asyncio.gather(*(uno(self.pool, host) for host in hosts))
+        else:
+            async with HttpPool(cache=self.cache) as pool:
+                await asyncio.gather(*(uno(pool, host) for host in hosts))
+        return resultados
+
+    def ejecutar(self, hosts, on_result=None):
+        """
+        Detecta el WAF de varios hosts de forma concurrente.
+
+        Args:
+            hosts (list): Los hosts (subdominios) a analizar.
+            on_result (callable, optional): Se llama con ``(host, waf)`` al terminar cada host.
+
+        Returns:
+            dict: Un diccionario host -> WAF detectado o mensaje.
+        """
+        return asyncio.run(self.ejecutarAsync(list(dict.fromkeys(hosts)), on_result))
@@ -0,0 +1,243 @@
+from app.utils.fechas import Fechas
+
+ETIQUETAS = (
+    "Domain Name",
+    "Sponsoring Registrar",
+    "Registry Domain ID",
+    "Registrar WHOIS Server",
+    "Registrar URL",
+    "Updated Date",
+    "Creation Date",
+    "Registry Expiry Date",
+    "Registrar",
+    "Registrar IANA ID",
+    "Registrar Abuse Contact Email",
+    "Registrar Abuse Contact Phone",
+    "Domain Status",
+    "Registrant Name",
+    "Admin Name",
+    "Admin Email",
+    "Name Server",
+    "DNSSEC",
+    "URL of the ICANN Whois Inaccuracy Complaint Form",
+)
+
+ETIQUETAS_FECHA = ("Updated Date", "Creation Date", "Registry Expiry Date")
+
+# Alias comunes a la mayoría de registros (llaves en minúsculas)
+ALIAS_GENERICOS = {
+    **{etiqueta.lower(): etiqueta for etiqueta in ETIQUETAS},
+    "domain": "Domain Name",
+    "domain name servers": "Name Server",
+    "name servers": "Name Server",
+    "nameservers": "Name Server",
+    "nameserver": "Name Server",
+    "nserver": "Name Server",
+    "whois server": "Registrar WHOIS Server",
+    "registrar whois": "Registrar WHOIS Server",
+    "refer": "Registrar WHOIS Server",
+    "registrar name": "Registrar",
+    "sponsoring registrar iana id": "Registrar IANA ID",
+    "status": "Domain Status",
+    "state": "Domain Status",
+    "registrar registration expiration date": "Registry Expiry Date",
+    "expiration date": "Registry Expiry Date",
+    "expiry date": "Registry Expiry Date",
+    "expires on": "Registry Expiry Date",
+    "expires": "Registry Expiry Date",
+    "expire": "Registry Expiry Date",
+    "paid-till": "Registry Expiry Date",
+    "creation date": "Creation Date",
+    "created": "Creation Date",
+    "created on": "Creation Date",
+    "registered": "Creation Date",
+    "registered on": "Creation Date",
+    "registration time": "Creation Date",
+    "domain registration date": "Creation Date",
+    "updated date": "Updated Date",
+    "last updated": "Updated Date",
+    "last modified": "Updated Date",
+    "last-update": "Updated Date",
+    "changed": "Updated Date",
+    "modified": "Updated Date",
+    "registrant": "Registrant Name",
+    "registrant contact name": "Registrant Name",
+    "admin contact name": "Admin Name",
+    "admin contact email": "Admin Email",
+}
+
+# Alias propios de cada registro, aplicados sobre los genéricos según el TLD
+ALIAS_REGISTROS = {
+    "pe": {
+        "registrar": "Sponsoring Registrar",
+        "registrant name": "Registrant Name",
+        "admin email": "Admin Email",
+    },
+    "uk": {
+        "registrar": "Registrar",
+        "registered on": "Creation Date",
+        "expiry date": "Registry Expiry Date",
+        "last updated": "Updated Date",
+        "name servers": "Name Server",
+        "dnssec": "DNSSEC",
+    },
+    "br": {
+        "owner": "Registrant Name",
+        "responsible": "Admin Name",
+        "e-mail": "Admin Email",
+        "created": "Creation Date",
+        "expires": "Registry Expiry Date",
+        "changed": "Updated Date",
+    },
+    "de": {
+        "changed": "Updated Date",
+        "nserver": "Name Server",
+    },
+    "fr": {
+        "registrar": "Registrar",
+        "expiry date": "Registry Expiry Date",
+        "last-update": "Updated Date",
+        "created": "Creation Date",
+        "nserver": "Name Server",
+    },
+    "jp": {
+        "[domain name]": "Domain Name",
+        "[name server]": "Name Server",
+        "[created on]": "Creation Date",
+        "[expires on]": "Registry Expiry Date",
+        "[last updated]": "Updated Date",
+        "[status]": "Domain Status",
+        "[registrant]": "Registrant Name",
+    },
+}
+
+# Tablas ya combinadas por TLD para que el parseo haga una sola búsqueda por línea
+_TABLAS = {tld: {**ALIAS_GENERICOS, **alias} for tld, alias in ALIAS_REGISTROS.items()}
+
+# Las fechas de estos registros vienen como día/mes/año
+_DIA_PRIMERO = frozenset(("br", "pe", "uk", "fr", "de"))
+
+
+class WhoisParser():
+    """
+    Parser de whois dirigido por tablas.
+
+    Cada línea se resuelve con una búsqueda en diccionario (``llave -> etiqueta``)
+    usando la tabla de alias del registro (TLD) combinada con la genérica. Soporta
+    el formato ``llave: valor`` y los bloques en los que la llave va sola y los
+    valores en las líneas indentadas siguientes (Nominet, JPRS).
+    """
+
+    @staticmethod
+    def tabla(tld=None):
+        """Devuelve la tabla de alias del TLD, o la genérica si no tiene una propia."""
+        return _TABLAS.get((tld or "").lower().rsplit(".", 1)[-1], ALIAS_GENERICOS)
+
+    @staticmethod
+    def parsear(data, tld=None):
+        """
+        Parsea la información WHOIS de un conjunto de líneas.
+
+        Args:
+            data (list): Una lista de cadenas que representan la salida del comando WHOIS.
+            tld (str, optional): El TLD (o el dominio) consultado, para usar los alias de su registro.
+
+        Returns:
+            dict: Un diccionario con las etiquetas y sus valores correspondientes.
+        """
+        tabla = WhoisParser.tabla(tld)
+        r = dict.fromkeys(ETIQUETAS)
+        name_servers = []
+        bloque = None
+        for texto in data:
+            if not texto.strip() or texto.lstrip().startswith(('%', '#', '>>>')):
+                bloque = None
+                continue
+
+            if texto.lstrip().startswith('['):
+                # Formato JPRS: "[Name Server]   ns1.example.jp"
+                cierre = texto.find(']')
+                llave, valor = texto[:cierre + 1].strip().lower(), texto[cierre + 1:].strip()
+            else:
+                llave, separador, valor = texto.partition(":")
+                llave, valor = (llave.strip().lower(), valor.strip()) if separador else ("", "")
+            etiqueta = tabla.get(llave)
+
+            if etiqueta is None:
+                if bloque is not None and texto[:1].isspace():
+                    # Valor en línea indentada bajo una llave sin valor (Nominet)
+                    valor = texto.strip()
+                    if bloque == "Name Server":
+                        name_servers.append(valor.split()[0])
+                    elif r[bloque] is None:
+                        r[bloque] = valor
+                else:
+                    bloque = None
+                continue
+
+            bloque = None if valor else etiqueta
+            if not valor:
+                continue
+            if etiqueta == "Name Server":
+                name_servers.append(valor.split()[0])
+            elif etiqueta in ETIQUETAS_FECHA or etiqueta == "Registrar WHOIS Server":
+                # La primera aparición es la del registro; no la pisan los alias secundarios
+                if r[etiqueta] is None:
+                    r[etiqueta] = valor
+            else:
+                r[etiqueta] = valor
+
+        if name_servers:
+            # Filtrar valores no vacíos y eliminar duplicados conservando el orden
+            r["Name Server"] = ', '.join(dict.fromkeys(ns.lower().rstrip('.') for ns in name_servers if ns))
+        return r
+
+    @staticmethod
+    def referencia(resultado, servidor_actual=None):
+        """
+        Devuelve el servidor whois del registrador al que hay que seguir la referencia.
+
+        Args:
+            resultado (dict): El resultado de ``parsear`` de la respuesta del registro.
+            servidor_actual (str, optional): El servidor ya consultado, para no repetirlo.
+
+        Returns:
+            str | None: El host del servidor whois del registrador.
+        """
+        servidor = (resultado.get("Registrar WHOIS Server") or "").strip().lower()
+        for prefijo in ("whois://", "rwhois://", "http://", "https://"):
+            if servidor.startswith(prefijo):
+                servidor = servidor[len(prefijo):]
+        servidor = servidor.split("/")[0].split(":")[0]
+        if not servidor or servidor == (servidor_actual or "").lower():
+            return None
+        return servidor
+
+    @staticmethod
+    def fusionar(registro, registrador):
+        """
+        Combina la respuesta del registro con la del registrador.
+
+        Los datos del registro (fechas, estado, nameservers) tienen prioridad; el
+        registrador completa lo que falte (contactos, abuse, URL).
+        """
+        resultado = dict(registro)
+        for etiqueta, valor in registrador.items():
+            if valor and not resultado.get(etiqueta):
+                resultado[etiqueta] = valor
+        return resultado
+
+    @staticmethod
+    def fechas(resultado, tld=None):
+        """
+        Normaliza las fechas del resultado a ``datetime``.
+
+        Args:
+            resultado (dict): El resultado de ``parsear``.
+            tld (str, optional): El TLD consultado, para decidir si las fechas van día/mes.
+
+        Returns:
+            dict: Un diccionario etiqueta -> datetime (o None) para las etiquetas de fecha.
+        """
+        dayfirst = (tld or "").lower().rsplit(".", 1)[-1] in _DIA_PRIMERO
+        return {etiqueta: Fechas.intentar(resultado.get(etiqueta), dayfirst) for etiqueta in ETIQUETAS_FECHA}
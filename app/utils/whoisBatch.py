@@ -0,0 +1,234 @@
+import time
+import asyncio
+from app.utils.whois import WhoisParser
+from app.utils.publicSuffix import ListaSufijos
+
+SERVIDOR_IANA = "whois.iana.org"
+
+# Servidores de los TLD más comunes; el resto se descubre con una consulta a IANA
+SERVIDORES_TLD = {
+    "com": "whois.verisign-grs.com",
+    "net": "whois.verisign-grs.com",
+    "org": "whois.publicinterestregistry.org",
+    "info": "whois.nic.info",
+    "io": "whois.nic.io",
+    "pe": "kero.yachay.pe",
+    "uk": "whois.nic.uk",
+    "de": "whois.denic.de",
+    "br": "whois.registro.br",
+    "fr": "whois.nic.fr",
+    "jp": "whois.jprs.jp",
+    "es": "whois.nic.es",
+    "mx": "whois.mx",
+}
+
+# Formato de la consulta para los servidores que no aceptan solo el nombre
+FORMATOS_CONSULTA = {
+    "whois.denic.de": "-T dn,ace {}",
+    "whois.verisign-grs.com": "domain {}",
+}
+
+# Límites por servidor: (consultas por segundo, ráfaga)
+LIMITES_POR_DEFECTO = {
+    "whois.verisign-grs.com": (10.0, 20),
+    "whois.iana.org": (2.0, 4),
+    "whois.nic.uk": (0.5, 2),
+    "whois.denic.de": (0.5, 2),
+    "whois.registro.br": (0.2, 1),
+}
+LIMITE_GENERICO = (1.0, 2)
+
+FRASES_LIMITE = ("limit exceeded", "rate limit", "quota exceeded", "too many", "try again later",
+                 "exceeded the maximum", "query rate", "temporarily blocked")
+
+
+class TokenBucket():
+    """Token bucket asíncrono: ``tasa`` fichas por segundo con una ráfaga de ``capacidad``."""
+
+    def __init__(self, tasa, capacidad):
+        self.tasa = tasa
+        self.tasa_maxima = tasa
+        self.capacidad = capacidad
+        self.respondio = False
+        self._fichas = float(capacidad)
+        self._ultimo = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def adquirir(self):
+        async with self._lock:
+            while True:
+                ahora = time.monotonic()
+                self._fichas = min(self.capacidad, self._fichas + (ahora - self._ultimo) * self.tasa)
+                self._ultimo = ahora
+                if self._fichas >= 1:
+                    self._fichas -= 1
+                    return
+                await asyncio.sleep((1 - self._fichas) / self.tasa)
+
+    def reducir(self):
+        """Reduce la tasa a la mitad tras una señal de throttling del servidor."""
+        self.tasa = max(self.tasa / 2, 0.05)
+        self._fichas = 0
+
+    def recuperar(self):
+        """Tras una respuesta sana recupera la tasa de forma aditiva, hasta la configurada."""
+        self.respondio = True
+        self.tasa = min(self.tasa_maxima, self.tasa + self.tasa_maxima / 10)
+
+
+class WhoisLimitadoError(Exception):
+    """El servidor whois indicó que se superó su límite de consultas, o no respondió tras los reintentos."""
+
+
+class WhoisBatch():
+    """
+    Consultas whois masivas con un cliente nativo (TCP 43) y límites por servidor.
+
+    Cada servidor whois tiene su propio token bucket, de modo que las consultas a
+    registros distintos avanzan en paralelo y cada uno recibe como máximo la tasa
+    que admite. Las direcciones de los servidores se resuelven una sola vez; el
+    protocolo whois cierra la conexión tras cada respuesta, así que no hay
+    conexiones que reutilizar más allá de eso. Ante una respuesta de throttling (o
+    una conexión rechazada de un servidor que ya venía respondiendo, como hacen los
+    que bloquean por cuota) se reduce la tasa del servidor a la mitad; cada respuesta
+    sana la recupera de forma aditiva. Las fallas de red y los timeouts solo se
+    reintentan con espera exponencial, sin tocar la tasa.
+    """
+
+    def __init__(self, limites=None, concurrencia=4, timeout=15, reintentos=3, puerto=43):
+        self.limites = {**LIMITES_POR_DEFECTO, **(limites or {})}
+        self.concurrencia = concurrencia
+        self.timeout = timeout
+        self.reintentos = reintentos
+        self.puerto = puerto
+        self._buckets = {}
+        self._direcciones = {}
+        self._servidores_tld = dict(SERVIDORES_TLD)
+        self._descubrimientos = {}
+
+    def _bucket(self, servidor):
+        if servidor not in self._buckets:
+            self._buckets[servidor] = TokenBucket(*self.limites.get(servidor, LIMITE_GENERICO))
+        return self._buckets[servidor]
+
+    async def _direccion(self, servidor):
+        if servidor not in self._direcciones:
+            infos = await asyncio.get_running_loop().getaddrinfo(servidor, self.puerto, type=1)
+            self._direcciones[servidor] = infos[0][4][0]
+        return self._direcciones[servidor]
+
+    async def _consultar(self, servidor, consulta):
+        direccion = await self._direccion(servidor)
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(direccion, self.puerto), self.timeout)
+        try:
+            writer.write(f"{consulta}\r\n".encode('utf-8'))
+            await writer.drain()
+            datos = await asyncio.wait_for(reader.read(1 << 20), self.timeout)
+            partes = [datos]
+            while datos:
+                datos = await asyncio.wait_for(reader.read(1 << 20), self.timeout)
+                partes.append(datos)
+            return b''.join(partes).decode('utf-8', 'replace')
+        finally:
+            writer.close()
+
+    async def consultar(self, servidor, dominio):
+        """
+        Consulta un dominio en un servidor respetando su límite y reintentando si hay throttling.
+
+        Returns:
+            str: La respuesta en texto del servidor.
+
+        Raises:
+            WhoisLimitadoError: Si el servidor sigue limitando tras los reintentos.
+        """
+        consulta = FORMATOS_CONSULTA.get(servidor, "{}").format(dominio)
+        bucket = self._bucket(servidor)
+        limitado = False
+        for intento in range(self.reintentos + 1):
+            await bucket.adquirir()
+            try:
+                respuesta = await self._consultar(servidor, consulta)
+                limitado = any(frase in respuesta[:2000].lower() for frase in FRASES_LIMITE)
+            except ConnectionRefusedError:
+                # Un servidor que ya respondió y ahora rechaza conexiones está aplicando su cuota
+                respuesta, limitado = "", bucket.respondio
+            except (OSError, asyncio.TimeoutError):
+                respuesta, limitado = "", False
+            if respuesta.strip() and not limitado:
+                bucket.recuperar()
+                return respuesta
+            if limitado:
+                bucket.reducir()
+            await asyncio.sleep(min(2 ** intento, 30))
+        if limitado:
+            raise WhoisLimitadoError(f"{servidor} limitó las consultas de {dominio}")
+        raise WhoisLimitadoError(f"{servidor} no respondió a la consulta de {dominio}")
+
+    async def servidor(self, dominio):
+        """Devuelve el servidor whois del TLD del dominio, descubriéndolo en IANA si hace falta."""
+        tld = dominio.lower().rstrip('.').rsplit('.', 1)[-1]
+        if tld in self._servidores_tld:
+            return self._servidores_tld[tld]
+        if tld not in self._descubrimientos:
+            self._descubrimientos[tld] = asyncio.ensure_future(self.consultar(SERVIDOR_IANA, tld))
+        try:
+            respuesta = await self._descubrimientos[tld]
+        except WhoisLimitadoError:
+            respuesta = ""
+        servidor = SERVIDOR_IANA
+        for linea in respuesta.split("\n"):
+            llave, _, valor = linea.partition(":")
+            if llave.strip().lower() in ("whois", "refer") and valor.strip():
+                servidor = valor.strip().lower()
+                break
+        self._servidores_tld[tld] = servidor
+        return servidor
+
+    async def _dominio(self, servidor, dominio, cupos):
+        async with cupos:
+            try:
+                registro = WhoisParser.parsear((await self.consultar(servidor, dominio)).split("\n"), dominio)
+                referencia = WhoisParser.referencia(registro, servidor)
+                if referencia:
+                    try:
+                        registrador = WhoisParser.parsear((await self.consultar(referencia, dominio)).split("\n"), dominio)
+                        registro = WhoisParser.fusionar(registro, registrador)
+                    except WhoisLimitadoError:
+                        pass
+                return dominio, registro
+            except WhoisLimitadoError as e:
+                return dominio, e
+
+    async def ejecutarAsync(self, dominios):
+        """Versión asíncrona de ``WhoisBatch.ejecutar``."""
+        # El registro whois es del dominio registrable: a.b.co.uk y c.b.co.uk se consultan una vez como b.co.uk
+        registrables = ListaSufijos.cargar().registrables(d.lower().rstrip('.') for d in dominios if d)
+        registrables = {nombre: registrable or nombre for nombre, registrable in registrables.items()}
+        unicos = list(dict.fromkeys(registrables.values()))
+        servidores = await asyncio.gather(*(self.servidor(d) for d in unicos))
+        grupos = {}
+        for dominio, servidor in zip(unicos, servidores):
+            grupos.setdefault(servidor, []).append(dominio)
+
+        # Cada grupo tiene sus propios cupos: un servidor lento no bloquea a los demás
+        tareas = []
+        for servidor, grupo in grupos.items():
+            cupos = asyncio.Semaphore(self.concurrencia)
+            tareas.extend(self._dominio(servidor, dominio, cupos) for dominio in grupo)
+        resultados = dict(await asyncio.gather(*tareas))
+        return {nombre: resultados[registrable] for nombre, registrable in registrables.items()}
+
+    def ejecutar(self, dominios):
+        """
+        Consulta el whois de muchos dominios, en paralelo entre servidores y limitado por servidor.
+
+        Los subdominios se consultan por su dominio registrable, una sola vez por registrable.
+
+        Args:
+            dominios (list): Los dominios a consultar.
+
+        Returns:
+            dict: Un diccionario dominio -> resultado de ``WhoisParser.parsear`` o la excepción si falló.
+        """
+        return asyncio.run(self.ejecutarAsync(dominios))
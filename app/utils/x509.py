@@ -0,0 +1,133 @@
+import hashlib
+from collections import namedtuple
+from datetime import datetime
+
+Certificado = namedtuple('Certificado', 'huella serial sujeto emisor desde hasta nombres der')
+Certificado.__doc__ = """Datos de un certificado X.509: huella SHA-256, sujeto/emisor (CN u O), validez y nombres SAN."""
+
+# Etiquetas DER usadas
+SECUENCIA, CONJUNTO, ENTERO, OID, OCTETOS, BOOLEANO = 0x30, 0x31, 0x02, 0x06, 0x04, 0x01
+UTCTIME, GENERALIZEDTIME = 0x17, 0x18
+EXTENSIONES = 0xa3
+SAN_DNS, SAN_IP = 0x82, 0x87
+
+OID_CN = bytes((0x55, 0x04, 0x03))
+OID_O = bytes((0x55, 0x04, 0x0a))
+OID_SAN = bytes((0x55, 0x1d, 0x11))
+
+
+class ErrorX509(ValueError):
+    """El certificado no es DER válido."""
+
+
+def leerTlv(datos, pos):
+    """
+    Lee un elemento DER.
+
+    Returns:
+        tuple: ``(etiqueta, inicio_del_contenido, fin_del_contenido)``.
+    """
+    if pos + 2 > len(datos):
+        raise ErrorX509("certificado truncado")
+    etiqueta, largo = datos[pos], datos[pos + 1]
+    pos += 2
+    if largo & 0x80:
+        cantidad = largo & 0x7f
+        if cantidad == 0 or cantidad > 4 or pos + cantidad > len(datos):
+            raise ErrorX509("longitud DER inválida")
+        largo = int.from_bytes(datos[pos:pos + cantidad], 'big')
+        pos += cantidad
+    if pos + largo > len(datos):
+        raise ErrorX509("certificado truncado")
+    return etiqueta, pos, pos + largo
+
+
+def hijos(datos, inicio, fin):
+    """Itera los elementos contenidos entre ``inicio`` y ``fin``."""
+    while inicio < fin:
+        etiqueta, desde, hasta = leerTlv(datos, inicio)
+        yield etiqueta, desde, hasta
+        inicio = hasta
+
+
+def _texto(valor):
+    try:
+        return valor.decode('utf-8')
+    except UnicodeDecodeError:
+        return valor.decode('latin-1')
+
+
+def _nombre(datos, inicio, fin):
+    """Devuelve el CN del Name, o la O si no tiene CN."""
+    atributos = {}
+    for _, desde_set, hasta_set in hijos(datos, inicio, fin):
+        for _, desde, hasta in hijos(datos, desde_set, hasta_set):
+            (_, oid_desde, oid_hasta), (_, valor_desde, valor_hasta) = list(hijos(datos, desde, hasta))[:2]
+            atributos.setdefault(datos[oid_desde:oid_hasta], _texto(datos[valor_desde:valor_hasta]))
+    return atributos.get(OID_CN) or atributos.get(OID_O)
+
+
+def _fecha(datos, etiqueta, inicio, fin):
+    texto = datos[inicio:fin].decode('ascii').rstrip('Z')
+    if etiqueta == UTCTIME:
+        # RFC 5280: los años 50-99 son 19xx
+        texto = ('19' if int(texto[:2]) >= 50 else '20') + texto
+    return datetime.strptime(texto[:14], '%Y%m%d%H%M%S')
+
+
+def _san(datos, inicio, fin):
+    nombres = []
+    _, desde, hasta = leerTlv(datos, inicio)
+    for etiqueta, valor_desde, valor_hasta in hijos(datos, desde, hasta):
+        if etiqueta == SAN_DNS:
+            nombres.append(datos[valor_desde:valor_hasta].decode('ascii', 'replace').lower())
+        elif etiqueta == SAN_IP and valor_hasta - valor_desde == 4:
+            nombres.append('.'.join(str(b) for b in datos[valor_desde:valor_hasta]))
+    return nombres
+
+
+def decodificar(der):
+    """
+    Decodifica los campos de interés de un certificado X.509 en DER.
+
+    Args:
+        der (bytes): El certificado tal como lo devuelve ``getpeercert(binary_form=True)``.
+
+    Returns:
+        Certificado: Los datos del certificado.
+
+    Raises:
+        ErrorX509: Si el certificado está malformado.
+    """
+    try:
+        _, desde, hasta = leerTlv(der, 0)
+        _, desde, hasta = leerTlv(der, desde)  # tbsCertificate
+        campos = list(hijos(der, desde, hasta))
+        if campos and campos[0][0] == 0xa0:
+            campos = campos[1:]  # versión explícita
+        (_, serial_desde, serial_hasta), _, emisor, validez, sujeto = campos[:5]
+
+        fechas = list(hijos(der, validez[1], validez[2]))
+        nombres = []
+        for etiqueta, ext_desde, ext_hasta in campos[5:]:
+            if etiqueta != EXTENSIONES:
+                continue
+            _, lista_desde, lista_hasta = leerTlv(der, ext_desde)
+            for _, item_desde, item_hasta in hijos(der, lista_desde, lista_hasta):
+                partes = list(hijos(der, item_desde, item_hasta))
+                if der[partes[0][1]:partes[0][2]] == OID_SAN:
+                    _, valor_desde, valor_hasta = partes[-1]
+                    nombres = _san(der, valor_desde, valor_hasta)
+
+        return Certificado(
+            huella=hashlib.sha256(der).hexdigest(),
+            serial=der[serial_desde:serial_hasta].hex(),
+            sujeto=_nombre(der, sujeto[1], sujeto[2]),
+            emisor=_nombre(der, emisor[1], emisor[2]),
+            desde=_fecha(der, *fechas[0]),
+            hasta=_fecha(der, *fechas[1]),
+            nombres=list(dict.fromkeys(nombres)),
+            der=bytes(der),
+        )
+    except (ValueError, IndexError, UnicodeDecodeError) as e:
+        raise e if isinstance(e, ErrorX509) else ErrorX509(f"certificado malformado: {e}") from e
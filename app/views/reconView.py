@@ -0,0 +1,103 @@
+from app.controllers.reconController import ReconController
+from app.controllers.whoisController import WhoisController
+from app.controllers.monitorController import MonitorController
+from app.controllers.taskController import TaskController
+from flask import Blueprint
+from app.extensions import extensiones
+
+recon_blueprint = Blueprint("recon",__name__)
+
+@recon_blueprint.route("/search", methods=["POST"])
+@extensiones.praetorian.auth_required
+def search():
+    return ReconController.search()
+
+@recon_blueprint.route("/subdomains", methods=["POST"])
+@extensiones.praetorian.auth_required
+def searchSubdomains():
+    return ReconController.searchSubdomains()
+
+# Búsqueda en el inventario por sufijo, subcadena, WAF, tecnología y puerto
+@recon_blueprint.route("/subdomains/search", methods=["GET"])
+@extensiones.praetorian.auth_required
+def inventory():
+    return ReconController.inventory()
+
+@recon_blueprint.route("/resolve", methods=["POST"])
+@extensiones.praetorian.auth_required
+def resolve():
+    return ReconController.resolve()
+
+@recon_blueprint.route("/probe", methods=["POST"])
+@extensiones.praetorian.auth_required
+def probe():
+    return ReconController.probe()
+
+# Comprobación de vida de los subdominios (alive, dead, unknown)
+@recon_blueprint.route("/liveness", methods=["POST"])
+@extensiones.praetorian.auth_required
+def liveness():
+    return ReconController.liveness()
+
+@recon_blueprint.route("/tech", methods=["POST"])
+@extensiones.praetorian.auth_required
+def tech():
+    return ReconController.tech()
+
+@recon_blueprint.route("/services", methods=["POST"])
+@extensiones.praetorian.auth_required
+def services():
+    return ReconController.services()
+
+@recon_blueprint.route("/certificates", methods=["POST"])
+@extensiones.praetorian.auth_required
+def certificate():
+    return ReconController.certificate()
+
+# ASN, organización y país de los registros A/AAAA (índice local)
+@recon_blueprint.route("/enrich", methods=["POST"])
+@extensiones.praetorian.auth_required
+def enrich():
+    return ReconController.enrich()
+
+# Dominios que expiran antes de una fecha (?before=YYYY-MM-DD)
+@recon_blueprint.route("/whois/expiring", methods=["GET"])
+@extensiones.praetorian.auth_required
+def expiring():
+    return ReconController.expiring()
+
+# Historial de escaneos del dominio
+@recon_blueprint.route("/snapshots/<string:domain_name>", methods=["GET"])
+@extensiones.praetorian.auth_required
+def snapshots(domain_name):
+    return ReconController.snapshots(domain_name)
+
+# Cambios entre dos escaneos (?from=<id>&to=<id>)
+@recon_blueprint.route("/snapshots/<string:domain_name>/diff", methods=["GET"])
+@extensiones.praetorian.auth_required
+def diff(domain_name):
+    return ReconController.diff(domain_name)
+
+# Planificación del monitoreo continuo del dominio
+@recon_blueprint.route("/schedule/<string:domain_name>", methods=["GET"])
+@extensiones.praetorian.auth_required
+def schedule(domain_name):
+    return MonitorController.listar(domain_name)
+
+# Estado de las tareas de escaneo reanudables (nmap)
+@recon_blueprint.route("/tasks/<string:domain_name>", methods=["GET"])
+@extensiones.praetorian.auth_required
+def tasks(domain_name):
+    return TaskController.listar(domain_name)
+
+# Refresco masivo de whois, limitado por servidor
+@recon_blueprint.route("/whois/batch", methods=["POST"])
+@extensiones.praetorian.auth_required
+def whoisBatch():
+    return WhoisController.batch()
+
+# Progreso del escaneo en vivo (Server-Sent Events)
+@recon_blueprint.route("/stream/<string:domain_name>", methods=["GET"])
+@extensiones.praetorian.auth_required
+def stream(domain_name):
+    return ReconController.stream(domain_name)
@@ -0,0 +1,77 @@
+"""
+Benchmark del índice ASN sobre un TSV ip2asn sintético.
+
+Genera ``--rangos`` rangos IPv4 contiguos (más algunos IPv6), los compila al
+índice binario y mide el tiempo de apertura (mmap) y las búsquedas por segundo
+de ``buscarMuchos`` sobre direcciones aleatorias.
+
+Uso:
+    python -m benchmarks.asn [--rangos 500000] [--busquedas 2000000] [--ruta /tmp/ip2asn.tsv]
+"""
+import os
+import time
+import random
+import socket
+import argparse
+import tempfile
+
+from app.utils.asnIndex import IndiceAsn
+
+
+def _ip4(valor):
+    return socket.inet_ntoa(valor.to_bytes(4, 'big'))
+
+
+def generar_tsv(ruta, rangos, semilla=1):
+    """Escribe ``rangos`` rangos IPv4 que cubren el espacio con huecos no ruteados, y 1000 IPv6."""
+    rng = random.Random(semilla)
+    paso = (1 << 32) // rangos
+    with open(ruta, 'w') as archivo:
+        for i in range(rangos):
+            inicio = i * paso
+            fin = inicio + paso - 1
+            if rng.random() < 0.1:
+                archivo.write(f"{_ip4(inicio)}\t{_ip4(fin)}\t0\tNone\tNot routed\n")
+                continue
+            asn = rng.randint(1, 70000)
+            archivo.write(f"{_ip4(inicio)}\t{_ip4(fin)}\t{asn}\t{rng.choice(['US', 'PE', 'DE', 'BR', 'JP'])}\tORG-{asn % 5000} Networks\n")
+        for i in range(1000):
+            base = (0x2001 << 112) | (i << 80)
+            inicio = socket.inet_ntop(socket.AF_INET6, base.to_bytes(16, 'big'))
+            fin = socket.inet_ntop(socket.AF_INET6, (base | ((1 << 80) - 1)).to_bytes(16, 'big'))
+            archivo.write(f"{inicio}\t{fin}\t{64500 + i % 10}\tUS\tV6-ORG\n")
+
+
+def main():
+    argumentos = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    argumentos.add_argument('--rangos', type=int, default=500000)
+    argumentos.add_argument('--busquedas', type=int, default=2000000)
+    argumentos.add_argument('--ruta', default=None)
+    opciones = argumentos.parse_args()
+
+    ruta = opciones.ruta or os.path.join(tempfile.gettempdir(), f"airan_ip2asn_{opciones.rangos}.tsv")
+    if not os.path.exists(ruta):
+        generar_tsv(ruta, opciones.rangos)
+    indice = f"{ruta}.idx"
+
+    inicio = time.perf_counter()
+    total = IndiceAsn.compilar(ruta, indice)
+    print(f"compilación: {total} rangos en {time.perf_counter() - inicio:.2f} s ({os.path.getsize(indice) / (1 << 20):.1f} MB)")
+
+    inicio = time.perf_counter()
+    asn = IndiceAsn(indice)
+    print(f"apertura (mmap): {(time.perf_counter() - inicio) * 1000:.2f} ms")
+
+    rng = random.Random(2)
+    # Direcciones resueltas de un escaneo: muchas repetidas (CDN) y el resto dispersas
+    direcciones = [_ip4(rng.getrandbits(32)) for _ in range(opciones.busquedas)]
+    inicio = time.perf_counter()
+    resultado = asn.buscarMuchos(direcciones)
+    duracion = time.perf_counter() - inicio
+    encontradas = sum(r is not None for r in resultado.values())
+    print(f"buscarMuchos: {len(direcciones)} direcciones en {duracion:.2f} s -> {len(direcciones) / duracion / 1e6:.2f} M/s ({encontradas} con ASN)")
+    print(f"IPv6: {asn.buscar('2001:0:5::1')}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+Benchmark de la búsqueda en el inventario de subdominios.
+
+Llena una base SQLite con ``--nombres`` subdominios sintéticos (con inserciones
+masivas, como las etapas de ingesta) y mide la latencia de las búsquedas por
+sufijo (índice de ``subdomain_rev``) y por subcadena (índice trigram) frente al
+recorrido completo con ``LIKE``.
+
+Uso:
+    python -m benchmarks.inventory [--nombres 1000000] [--ruta /tmp/inventario.db]
+"""
+import os
+import time
+import random
+import string
+import argparse
+import tempfile
+
+from flask import Flask
+from sqlalchemy import text
+
+from app.extensions import extensiones
+from app.models.domainModel import Domain
+from app.models.subdomainModel import Subdomain
+from app.utils.bulk import Bulk
+
+ENTORNOS = ["dev", "staging", "prod", "qa", "corp", "internal"]
+SERVICIOS = ["api", "www", "mail", "vpn", "git", "jira", "cdn", "auth", "admin", "static"]
+
+
+def _nombre(rng, i):
+    servicio = rng.choice(SERVICIOS)
+    aleatorio = ''.join(rng.choices(string.ascii_lowercase, k=6))
+    return f"{servicio}{i}-{aleatorio}.{rng.choice(ENTORNOS)}.example{i % 50}.com"
+
+
+def llenar(nombres, lote=20000):
+    rng = random.Random(1)
+    dominios = [Domain(user_id=1, domain=f"example{i}.com", logo='') for i in range(50)]
+    extensiones.db.session.add_all(dominios)
+    extensiones.db.session.commit()
+    ahora = extensiones.datetime.now()
+    for inicio in range(0, nombres, lote):
+        Bulk.insertar(Subdomain, [
+            dict(domain_id=dominios[i % 50].id, subdomain=_nombre(rng, i), waf='Pendiente', created_at=ahora)
+            for i in range(inicio, min(inicio + lote, nombres))
+        ], conflicto=['subdomain'])
+        extensiones.db.session.commit()
+
+
+def medir(descripcion, funcion, repeticiones=20):
+    funcion()
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        resultado = funcion()
+    duracion = (time.perf_counter() - inicio) / repeticiones * 1000
+    print(f"{descripcion}: {duracion:.2f} ms ({len(resultado)} resultados)")
+
+
+def main():
+    argumentos = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    argumentos.add_argument('--nombres', type=int, default=1000000)
+    argumentos.add_argument('--ruta', default=None)
+    opciones = argumentos.parse_args()
+
+    ruta = opciones.ruta or os.path.join(tempfile.gettempdir(), f"airan_inventario_{opciones.nombres}.db")
+    app = Flask(__name__)
+    app.config.update(SQLALCHEMY_DATABASE_URI=f"sqlite:///{ruta}", SQLALCHEMY_TRACK_MODIFICATIONS=False)
+    extensiones.db.init_app(app)
+    with app.app_context():
+        if not os.path.exists(ruta):
+            extensiones.db.create_all()
+            inicio = time.perf_counter()
+            llenar(opciones.nombres)
+            print(f"llenado: {opciones.nombres} nombres en {time.perf_counter() - inicio:.1f} s")
+
+        def todo(consulta):
+            return lambda: consulta.limit(100).all()
+        medir("sufijo *.dev.example7.com", todo(Subdomain.search(sufijo='*.dev.example7.com')))
+        medir("subcadena 'vpn1999'", todo(Subdomain.search(texto='vpn1999')))
+        medir("subcadena 'vpn1' + sufijo", todo(Subdomain.search(sufijo='example3.com', texto='vpn1')))
+        medir("LIKE '%vpn1999%' sin índice", lambda: extensiones.db.session.execute(
+            text("SELECT id FROM subdomain WHERE subdomain LIKE '%vpn1999%' ORDER BY id LIMIT 100")).all())
+        medir("LIKE '%.dev.example7.com' sin índice", lambda: extensiones.db.session.execute(
+            text("SELECT id FROM subdomain WHERE subdomain LIKE '%.dev.example7.com' ORDER BY id LIMIT 100")).all())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark de los parsers de salida de herramientas: texto de consola vs. modo estructurado.
+
+Genera un corpus sintético equivalente en ambos formatos (subfinder, wafw00f y el
+script dns-brute de nmap) y mide el tiempo de ``Core`` frente a ``Decodificador``.
+
+Uso:
+    python -m benchmarks.parsers [--hosts 50000] [--repeticiones 3]
+"""
+import json
+import time
+import random
+import string
+import argparse
+
+from app.utils.core import Core
+from app.utils.decoders import Decodificador
+
+DOMINIO = "example.com"
+ANSI = "\x1b[32m{}\x1b[0m"
+
+
+def _etiqueta(rng):
+    return ''.join(rng.choices(string.ascii_lowercase + string.digits, k=rng.randint(3, 12)))
+
+
+def generar_corpus(hosts, semilla=1):
+    """Devuelve un diccionario formato -> (texto, estructurado) para cada herramienta."""
+    rng = random.Random(semilla)
+    nombres = [f"{_etiqueta(rng)}.{DOMINIO}" for _ in range(hosts)]
+
+    subfinder_texto = "\n".join(ANSI.format(f"[INF] Found {n}") if i % 7 == 0 else n for i, n in enumerate(nombres))
+    subfinder_json = "\n".join(json.dumps({"host": n, "input": DOMINIO, "source": "crtsh"}) for n in nombres)
+
+    muestra = nombres[:min(hosts, 2000)]
+    waf_texto = [f"{ANSI.format('[*]')} Checking https://{n}\n[+] The site https://{n} is behind Cloudflare (Cloudflare Inc.) WAF." for n in muestra]
+    waf_json = [json.dumps([{"url": f"https://{n}", "detected": True, "firewall": "Cloudflare", "manufacturer": "Cloudflare Inc."}]) for n in muestra]
+
+    brute_texto = "\n".join(f"|   {n} - 10.0.{i % 255}.{i % 200}" for i, n in enumerate(nombres))
+    brute_xml = ('<?xml version="1.0"?><nmaprun><host><hostscript><script id="dns-brute" output="">'
+                 + "".join(f'<table><elem key="hostname">{n}</elem><elem key="address">10.0.0.1</elem></table>' for n in nombres)
+                 + '</script></hostscript></host></nmaprun>')
+
+    return {
+        'subfinder': (lambda: Core.parsearSubDomain(DOMINIO, Core.parsear(subfinder_texto.split("\n"))),
+                      lambda: Decodificador.subfinder(subfinder_json)),
+        'wafw00f': (lambda: [Core.parsearWaf(Core.parsear(t)) for t in waf_texto],
+                    lambda: [Decodificador.wafw00f(t) for t in waf_json]),
+        'dns-brute': (lambda: Core.parsearSubDomain(DOMINIO, Core.parsear(brute_texto.split("\n"))),
+                      lambda: Decodificador.nmapDnsBrute(brute_xml)),
+    }
+
+
+def medir(funcion, repeticiones):
+    mejor = float('inf')
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor
+
+
+def main():
+    argumentos = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    argumentos.add_argument('--hosts', type=int, default=50000)
+    argumentos.add_argument('--repeticiones', type=int, default=3)
+    opciones = argumentos.parse_args()
+
+    print(f"{'herramienta':<12}{'texto (s)':>12}{'estructurado (s)':>18}{'aceleración':>14}")
+    for herramienta, (texto, estructurado) in generar_corpus(opciones.hosts).items():
+        t_texto = medir(texto, opciones.repeticiones)
+        t_estructurado = medir(estructurado, opciones.repeticiones)
+        print(f"{herramienta:<12}{t_texto:>12.4f}{t_estructurado:>18.4f}{t_texto / t_estructurado:>13.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Benchmark de la importación de volcados CT / DNS pasivo.
+
+Genera un NDJSON sintético estilo FDNS (``{"name", "type", "value"}``) donde
+solo una fracción de las líneas pertenece a los dominios registrados, y mide el
+throughput en MB/s de ``ImportadorPasivo`` sobre el archivo plano y en gzip con
+uno y con todos los procesos.
+
+Uso:
+    python -m benchmarks.passive [--mb 256] [--coincidencias 0.01] [--ruta /tmp/fdns.json]
+"""
+import os
+import json
+import time
+import gzip
+import shutil
+import random
+import argparse
+import tempfile
+
+from app.utils.passiveImport import ImportadorPasivo
+
+DOMINIOS = ["example.com", "example.org", "corp.example.net"]
+TLDS = ["com", "net", "org", "io", "de", "pe"]
+
+
+def generar(ruta, mb, coincidencias, semilla=1):
+    """Escribe ``mb`` megabytes de registros, con ``coincidencias`` de ellos bajo los dominios registrados."""
+    rng = random.Random(semilla)
+    objetivo, total, i = mb << 20, 0, 0
+    with open(ruta, 'w') as archivo:
+        while total < objetivo:
+            lineas = []
+            for _ in range(10000):
+                i += 1
+                if rng.random() < coincidencias:
+                    nombre = f"h{i}.{rng.choice(DOMINIOS)}"
+                else:
+                    nombre = f"h{i}.site{rng.randint(0, 10 ** 6)}.{rng.choice(TLDS)}"
+                lineas.append(json.dumps({"timestamp": "1700000000", "name": nombre, "type": "a",
+                                          "value": f"10.{i % 256}.{i // 256 % 256}.{rng.randint(0, 255)}"}))
+            bloque = "\n".join(lineas) + "\n"
+            archivo.write(bloque)
+            total += len(bloque)
+
+
+def medir(ruta, procesos, tamano):
+    encontrados = [0]
+    inicio = time.perf_counter()
+    ImportadorPasivo(DOMINIOS, procesos).ejecutar([ruta], lambda pares: encontrados.__setitem__(0, encontrados[0] + len(pares)))
+    duracion = time.perf_counter() - inicio
+    print(f"{os.path.basename(ruta)} con {procesos} proceso(s): {duracion:.2f} s -> {tamano / (1 << 20) / duracion:.1f} MB/s "
+          f"({encontrados[0]} nombres)")
+
+
+def main():
+    argumentos = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    argumentos.add_argument('--mb', type=int, default=256)
+    argumentos.add_argument('--coincidencias', type=float, default=0.01)
+    argumentos.add_argument('--ruta', default=None)
+    opciones = argumentos.parse_args()
+
+    ruta = opciones.ruta or os.path.join(tempfile.gettempdir(), f"airan_fdns_{opciones.mb}.json")
+    if not os.path.exists(ruta):
+        generar(ruta, opciones.mb, opciones.coincidencias)
+    comprimido = f"{ruta}.gz"
+    if not os.path.exists(comprimido):
+        with open(ruta, 'rb') as origen, gzip.open(comprimido, 'wb', compresslevel=1) as destino:
+            shutil.copyfileobj(origen, destino, 1 << 22)
+
+    tamano = os.path.getsize(ruta)
+    for procesos in sorted({1, os.cpu_count() or 1}):
+        medir(ruta, procesos, tamano)
+        medir(comprimido, procesos, tamano)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+Benchmark del diff entre instantáneas de escaneo.
+
+Registra una instantánea inicial con ``--nombres`` subdominios y luego
+``--escaneos`` instantáneas con ``--cambios`` altas, bajas y modificaciones
+cada una, y mide el diff entre escaneos consecutivos, entre el primero y el
+último, y la reconstrucción del estado completo (desde 0).
+
+Uso:
+    python -m benchmarks.snapshots [--nombres 200000] [--escaneos 50] [--cambios 100]
+"""
+import time
+import random
+import argparse
+
+from flask import Flask
+
+from app.extensions import extensiones
+from app.models.domainModel import Domain
+from app.models.snapshotModel import Snapshot
+
+
+def medir(descripcion, funcion, repeticiones=5):
+    funcion()
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        resultado = funcion()
+    duracion = (time.perf_counter() - inicio) / repeticiones * 1000
+    cambios = sum(len(grupo[accion]) for grupo in resultado.values() for accion in grupo)
+    print(f"{descripcion}: {duracion:.2f} ms ({cambios} cambios)")
+
+
+def main():
+    argumentos = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    argumentos.add_argument('--nombres', type=int, default=200000)
+    argumentos.add_argument('--escaneos', type=int, default=50)
+    argumentos.add_argument('--cambios', type=int, default=100)
+    opciones = argumentos.parse_args()
+
+    app = Flask(__name__)
+    app.config.update(SQLALCHEMY_DATABASE_URI="sqlite://", SQLALCHEMY_TRACK_MODIFICATIONS=False)
+    extensiones.db.init_app(app)
+    with app.app_context():
+        extensiones.db.create_all()
+        dominio = Domain(user_id=1, domain="example.com", logo='')
+        extensiones.db.session.add(dominio)
+        extensiones.db.session.commit()
+
+        rng = random.Random(1)
+        estado = {f"h{i}.example.com": '0' for i in range(opciones.nombres)}
+        siguiente = opciones.nombres
+        inicio = time.perf_counter()
+        ids = [Snapshot.record(dominio.id, 'subdomains', {'subdomain': ({}, estado)}).id]
+        for escaneo in range(1, opciones.escaneos + 1):
+            nuevo = dict(estado)
+            for nombre in rng.sample(sorted(nuevo), opciones.cambios):
+                if rng.random() < 0.5:
+                    del nuevo[nombre]
+                else:
+                    nuevo[nombre] = str(escaneo)
+            for _ in range(opciones.cambios // 2):
+                nuevo[f"h{siguiente}.example.com"] = str(escaneo)
+                siguiente += 1
+            ids.append(Snapshot.record(dominio.id, 'subdomains', {'subdomain': (estado, nuevo)}).id)
+            estado = nuevo
+        extensiones.db.session.commit()
+        print(f"registro: {len(ids)} instantáneas en {time.perf_counter() - inicio:.1f} s")
+
+        medir("diff entre escaneos consecutivos", lambda: Snapshot.diff(dominio.id, ids[-2], ids[-1]))
+        medir("diff primero -> último", lambda: Snapshot.diff(dominio.id, ids[1], ids[-1]))
+        medir("estado completo (desde 0)", lambda: Snapshot.diff(dominio.id, 0, ids[-1]), repeticiones=1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+Benchmark del extractor de subdominios sobre un log de enumeración sintético.
+
+Escribe un log con la mezcla típica de salidas de herramientas (banners, líneas
+con ruido, nombres en mayúsculas, varias etiquetas) y mide el throughput en MB/s
+del extractor compilado en modo flujo frente al parser por línea anterior.
+
+Uso:
+    python -m benchmarks.subdomains [--mb 1024] [--legacy-mb 64] [--ruta /tmp/enum.log]
+"""
+import os
+import re
+import time
+import random
+import string
+import argparse
+import tempfile
+
+from app.utils.extractor import ExtractorSubdominios
+
+DOMINIOS = ["example.com", "example.org", "corp.example.net"]
+
+
+def _nombre(rng):
+    etiquetas = ['.'.join(''.join(rng.choices(string.ascii_lowercase + string.digits, k=rng.randint(2, 10)))
+                          for _ in range(rng.randint(1, 3)))]
+    nombre = f"{etiquetas[0]}.{rng.choice(DOMINIOS)}"
+    return nombre.upper() if rng.random() < 0.05 else nombre
+
+
+def _bloque(rng, nombres, tamano):
+    lineas, total = [], 0
+    while total < tamano:
+        r = rng.random()
+        if r < 0.25:
+            linea = f"[INF] Found {rng.choice(nombres)} via crtsh"
+        elif r < 0.5:
+            linea = rng.choice(nombres)
+        elif r < 0.6:
+            linea = f"Found: {rng.choice(nombres)}. (10.0.{rng.randint(0, 255)}.{rng.randint(0, 255)})"
+        else:
+            linea = f"{'-' * rng.randint(5, 40)} trying {rng.randint(0, 99999)} records on 1.1.1.1 [{rng.random():.4f}]"
+        lineas.append(linea)
+        total += len(linea) + 1
+    return ("\n".join(lineas) + "\n").encode()
+
+
+def generar_log(ruta, megas, semilla=1):
+    """Escribe ``megas`` MB de log sintético en ``ruta`` reutilizando bloques de 8 MB."""
+    rng = random.Random(semilla)
+    nombres = [_nombre(rng) for _ in range(200000)]
+    bloques = [_bloque(rng, nombres, 8 << 20) for _ in range(4)]
+    escrito, i = 0, 0
+    with open(ruta, 'wb') as archivo:
+        while escrito < megas << 20:
+            escrito += archivo.write(bloques[i % len(bloques)])
+            i += 1
+    return escrito
+
+
+def legacy(dominio, lineas):
+    """El parser anterior: un f-string regex reconstruido por línea y una sola etiqueta."""
+    encontrados = set()
+    for d in lineas:
+        pattern = rf'([a-zA-Z0-9-]+)\.{re.escape(dominio)}'
+        encontrados.update(f'{sub}.{dominio}' for sub in re.findall(pattern, d))
+    return encontrados
+
+
+def main():
+    argumentos = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    argumentos.add_argument('--mb', type=int, default=1024)
+    argumentos.add_argument('--legacy-mb', type=int, default=64)
+    argumentos.add_argument('--ruta', default=None)
+    opciones = argumentos.parse_args()
+
+    ruta = opciones.ruta or os.path.join(tempfile.gettempdir(), f"airan_enum_{opciones.mb}mb.log")
+    if not os.path.exists(ruta) or os.path.getsize(ruta) < opciones.mb << 20:
+        print(f"Generando {opciones.mb} MB en {ruta}...")
+        generar_log(ruta, opciones.mb)
+    tamano = os.path.getsize(ruta) / (1 << 20)
+
+    extractor = ExtractorSubdominios(DOMINIOS)
+    inicio = time.perf_counter()
+    with open(ruta, 'rb') as archivo:
+        encontrados = extractor.extraer(archivo)
+    duracion = time.perf_counter() - inicio
+    print(f"extractor compilado: {tamano:.0f} MB en {duracion:.2f} s -> {tamano / duracion:.1f} MB/s ({len(encontrados)} nombres, {len(DOMINIOS)} dominios)")
+
+    with open(ruta, 'r', errors='ignore') as archivo:
+        muestra = archivo.read(opciones.legacy_mb << 20).splitlines()
+    inicio = time.perf_counter()
+    for dominio in DOMINIOS:
+        legacy(dominio, muestra)
+    duracion = time.perf_counter() - inicio
+    print(f"parser anterior:     {opciones.legacy_mb} MB en {duracion:.2f} s -> {opciones.legacy_mb / duracion:.1f} MB/s (una pasada por dominio)")
+
+
+if __name__ == '__main__':
+    main()
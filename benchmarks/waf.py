@@ -0,0 +1,117 @@
+"""
+Benchmark del detector de WAF contra servidores HTTP locales.
+
+Levanta ``--hosts`` servidores HTTP/1.1 keep-alive en 127.0.0.1 (uno por puerto,
+cada uno es un "host"): una parte responde con cabeceras de Cloudflare, otra
+bloquea la solicitud de ataque con 403 y el resto no tiene WAF. Mide los hosts
+por segundo del detector sobre el pool compartido y, como referencia, con un
+pool nuevo por host (una conexión por host, como un proceso de wafw00f sin su
+arranque de intérprete). Si ``wafw00f`` está en el PATH también mide unos
+pocos hosts con el comando.
+
+Uso:
+    python -m benchmarks.waf [--hosts 500] [--latencia 0.005] [--wafw00f 10]
+"""
+import time
+import shutil
+import asyncio
+import argparse
+import subprocess
+
+from app.utils.httpPool import HttpPool
+from app.utils.wafEngine import DetectorWaf
+
+CUERPO = b"<html><head><title>ok</title></head><body>" + b"x" * 4096 + b"</body></html>"
+
+
+def _manejador(tipo, latencia):
+    async def manejar(reader, writer):
+        try:
+            while True:
+                linea = await reader.readline()
+                if not linea:
+                    break
+                while (await reader.readline()).strip():
+                    pass
+                await asyncio.sleep(latencia)
+                ataque = b"script" in linea
+                estado, extra = b"200 OK", b""
+                if tipo == "cloudflare":
+                    extra = b"Server: cloudflare\r\nCF-RAY: 1234abcd-LIM\r\n"
+                elif tipo == "bloqueo" and ataque:
+                    estado = b"403 Forbidden"
+                writer.write(b"HTTP/1.1 " + estado + b"\r\n" + extra +
+                             b"Content-Type: text/html\r\nContent-Length: " + str(len(CUERPO)).encode() + b"\r\n\r\n" + CUERPO)
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+    return manejar
+
+
+async def _servidores(cantidad, latencia):
+    servidores, hosts, esperado = [], [], {}
+    for i in range(cantidad):
+        tipo = ("cloudflare", "bloqueo", "ninguno")[i % 3]
+        servidor = await asyncio.start_server(_manejador(tipo, latencia), "127.0.0.1", 0)
+        host = f"127.0.0.1:{servidor.sockets[0].getsockname()[1]}"
+        servidores.append(servidor)
+        hosts.append(host)
+        esperado[host] = {"cloudflare": "Cloudflare", "bloqueo": "Generic", "ninguno": "No contiene WAF"}[tipo]
+    return servidores, hosts, esperado
+
+
+async def _medir(hosts, latencia, wafw00f):
+    detector = DetectorWaf(esquemas=("http",))
+
+    async with HttpPool(max_por_host=2) as pool:
+        detector.pool = pool
+        inicio = time.perf_counter()
+        resultados = await detector.ejecutarAsync(hosts)
+        compartido = time.perf_counter() - inicio
+
+    cupos = asyncio.Semaphore(detector.concurrencia)
+
+    async def aislado(host):
+        async with cupos, HttpPool(max_por_host=1) as pool:
+            return await detector.detectar(host, pool)
+    inicio = time.perf_counter()
+    await asyncio.gather(*(aislado(h) for h in hosts))
+    aislados = time.perf_counter() - inicio
+
+    comando = None
+    if wafw00f and shutil.which("wafw00f"):
+        muestra = hosts[:wafw00f]
+        inicio = time.perf_counter()
+        for host in muestra:
+            await asyncio.to_thread(subprocess.run, ["wafw00f", f"http://{host}"], capture_output=True)
+        comando = (len(muestra), time.perf_counter() - inicio)
+    return resultados, compartido, aislados, comando
+
+
+def main():
+    argumentos = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    argumentos.add_argument('--hosts', type=int, default=500)
+    argumentos.add_argument('--latencia', type=float, default=0.005)
+    argumentos.add_argument('--wafw00f', type=int, default=10)
+    opciones = argumentos.parse_args()
+
+    async def correr():
+        servidores, hosts, esperado = await _servidores(opciones.hosts, opciones.latencia)
+        try:
+            return esperado, await _medir(hosts, opciones.latencia, opciones.wafw00f)
+        finally:
+            for servidor in servidores:
+                servidor.close()
+
+    esperado, (resultados, compartido, aislados, comando) = asyncio.run(correr())
+    aciertos = sum(resultados.get(h) == w for h, w in esperado.items())
+    print(f"detector, pool compartido: {len(esperado)} hosts en {compartido:.2f} s -> {len(esperado) / compartido:.0f} hosts/s ({aciertos}/{len(esperado)} correctos)")
+    print(f"detector, pool por host:   {len(esperado)} hosts en {aislados:.2f} s -> {len(esperado) / aislados:.0f} hosts/s")
+    if comando:
+        print(f"wafw00f (subproceso):      {comando[0]} hosts en {comando[1]:.2f} s -> {comando[0] / comando[1]:.1f} hosts/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -6,6 +6,61 @@ class Config():
     SECRET_KEY = environ.get("SECRET_KEY")
     JWT_ACCESS_LIFESPAN = {"hours": 12}
     JWT_REFRESH_LIFESPAN = {"days": 30}
+    # EventSource no puede enviar la cabecera Authorization: /stream acepta también el token
+    # en la cookie que deja el login (HttpOnly, SameSite=Strict y limitada a la ruta del stream)
+    JWT_PLACES = ["header", "cookie"]
+    JWT_COOKIE_NAME = "access_token"
+    # Pool de procesos para hashing de contraseñas
+    HASH_POOL_WORKERS = int(environ.get("HASH_POOL_WORKERS", 2))
+    HASH_POOL_MAX_PENDING = int(environ.get("HASH_POOL_MAX_PENDING", 16))
+    HASH_POOL_TIMEOUT = 10
+    # Límites de consultas whois por servidor: {"servidor": (consultas_por_segundo, rafaga)}
+    WHOIS_RATE_LIMITS = {}
+    # Reglas de tecnologías en formato Wappalyzer (un JSON o el directorio src/technologies); None usa las incluidas
+    TECH_RULES_PATH = None
+    # Etapa de sondeo HTTP compartida: redirecciones a seguir y tamaño máximo del cuerpo
+    HTTP_PROBE_MAX_REDIRECTS = 3
+    HTTP_PROBE_MAX_BODY = 256 * 1024
+    # Distancia de Hamming máxima entre simhash para considerar dos respuestas casi idénticas
+    HTTP_CLUSTER_MAX_DISTANCE = 6
+    # Etapa DNS: resolvedores (por defecto los de /etc/resolv.conf) y TTL de la caché negativa sin SOA
+    DNS_RESOLVERS = [s.strip() for s in environ.get("DNS_RESOLVERS", "").split(",") if s.strip()]
+    DNS_NEGATIVE_TTL = 60
+    # Índice ASN/país local compilado con ``flask asn_index`` desde un TSV tipo ip2asn
+    ASN_INDEX_PATH = environ.get("ASN_INDEX_PATH", "asn.idx")
+    # Monitoreo continuo (``flask monitor``): intervalo en segundos de cada etapa (None la desactiva)
+    MONITOR_INTERVALS = {
+        "whois": 7 * 86400,
+        "subdomains": 86400,
+        "certificates": 86400,
+        "liveness": 6 * 3600,
+        "tech": 3 * 86400,
+        "services": 7 * 86400,
+    }
+    MONITOR_TICK = int(environ.get("MONITOR_TICK", 60))
+    # Etapas lanzadas como mucho por vuelta, para no saturar el host de escaneo
+    MONITOR_MAX_PER_TICK = int(environ.get("MONITOR_MAX_PER_TICK", 2))
+    # Señales baratas: cada cuánto se consulta el DNS de un dominio, cuántos por vuelta, y con
+    # cuánta anticipación al vencimiento de un certificado se vuelve a revisar
+    MONITOR_SIGNAL_INTERVAL = 3600
+    MONITOR_SIGNAL_BATCH = 256
+    MONITOR_CERT_WINDOW = 14 * 86400
+    # Comprobación de vida previa a los escaneos costosos: puertos TCP (None usa los más comunes),
+    # timeout de cada conexión, conexiones a la vez, y cada cuánto se vuelven a comprobar los
+    # hosts vivos y los muertos
+    LIVENESS_PORTS = None
+    LIVENESS_TIMEOUT = 1.5
+    LIVENESS_CONCURRENCY = int(environ.get("LIVENESS_CONCURRENCY", 512))
+    LIVENESS_TTL = 3600
+    LIVENESS_DEAD_TTL = 86400
+    # Reintentos de una tarea nmap cuyo reporte XML quedó incompleto
+    SCAN_TASK_MAX_ATTEMPTS = 3
+    # Workers de la cola distribuida (``flask scan_worker``): capacidades, tareas a la vez y lease en segundos
+    SCAN_WORKER_TAGS = [t.strip() for t in environ.get("SCAN_WORKER_TAGS", "").split(",") if t.strip()]
+    SCAN_WORKER_CONCURRENCY = int(environ.get("SCAN_WORKER_CONCURRENCY", 4))
+    SCAN_WORKER_LEASE = 300
+    # Fragmentos de descubrimiento de puertos en paralelo de cada escaneo nmap -p- (1, por defecto, no fragmenta)
+    NMAP_SHARDS = int(environ.get("NMAP_SHARDS", 1))
     # Configuración de base de datos
     #local_database = tempfile.NamedTemporaryFile(prefix="local", suffix=".db")
     local_database = "airan.db"
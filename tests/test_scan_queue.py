@@ -0,0 +1,150 @@
+"""
+Pruebas de la cola de tareas de escaneo (``ScanTask``) con varios procesos sobre un mismo archivo SQLite.
+
+Se corren con ``python -m unittest discover -s tests`` (o con pytest).
+"""
+import os
+import time
+import tempfile
+import unittest
+import multiprocessing
+from datetime import datetime, timedelta
+
+TAREAS = 60
+PROCESOS = 4
+
+
+def _app(ruta):
+    from flask import Flask
+    from config import Config
+    from app.extensions import extensiones
+    from app.utils.migracion import _modelos
+
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    app.config.update(SQLALCHEMY_DATABASE_URI=f"sqlite:///{ruta}",
+                      SQLALCHEMY_ENGINE_OPTIONS={'connect_args': {'timeout': 30}})
+    extensiones.db.init_app(app)
+    _modelos()
+    return app
+
+
+def _reintentar(funcion, *args):
+    """SQLite puede devolver "database is locked" con varios escritores; la operación se reintenta."""
+    from sqlalchemy.exc import OperationalError
+    from app.extensions import extensiones
+    while True:
+        try:
+            return funcion(*args)
+        except OperationalError:
+            extensiones.db.session.rollback()
+            time.sleep(0.01)
+
+
+def _worker(ruta, owner, local, cola):
+    """Toma tareas hasta vaciar la cola (por ``claim`` o, si ``local``, por ``acquire``) y reporta las tomadas."""
+    from app.extensions import extensiones
+    from app.models.scantaskModel import ScanTask
+
+    with _app(ruta).app_context():
+        tomadas = []
+        while True:
+            ahora = datetime.now()
+            if local:
+                candidatas = _reintentar(lambda: ScanTask.query.filter(ScanTask.status == 'pending').limit(5).all())
+                # Entre la lectura y la toma los workers siguen tomando tareas
+                time.sleep(0.005)
+                lote = [t.id for t in candidatas if _reintentar(ScanTask.acquire, t, owner, ahora)]
+                _reintentar(extensiones.db.session.commit)
+            else:
+                lote = [t.id for t in _reintentar(ScanTask.claim, owner, (), 3, timedelta(seconds=300), ahora)]
+            if not lote:
+                if not _reintentar(lambda: ScanTask.query.filter(ScanTask.status == 'pending').count()):
+                    break
+                continue
+            # Cada tarea tomada se "ejecuta": si dos procesos la toman, aparece dos veces
+            tomadas.extend(lote)
+            for id in lote:
+                _reintentar(ScanTask.finish, id, owner, dict(status='done', finished_at=datetime.now()))
+        cola.put(tomadas)
+
+
+class ColaMultiprocesoTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directorio = tempfile.TemporaryDirectory()
+        self.ruta = os.path.join(self.directorio.name, 'cola.db')
+        self.app = _app(self.ruta)
+        from app.extensions import extensiones
+        from app.models.domainModel import Domain
+        from app.models.subdomainModel import Subdomain
+        from app.models.scantaskModel import ScanTask
+
+        with self.app.app_context():
+            extensiones.db.create_all()
+            dominio = Domain(user_id=1, domain='ejemplo.com', logo='')
+            extensiones.db.session.add(dominio)
+            extensiones.db.session.flush()
+            subdominios = [Subdomain(domain_id=dominio.id, subdomain=f"h{i}.ejemplo.com", waf='') for i in range(TAREAS)]
+            extensiones.db.session.add_all(subdominios)
+            extensiones.db.session.flush()
+            vencido = datetime.now() - timedelta(minutes=5)
+            for i, subdominio in enumerate(subdominios):
+                # Un tercio de las tareas quedó en curso por un worker que murió con el lease vencido
+                huerfana = i % 3 == 0
+                extensiones.db.session.add(ScanTask(
+                    domain_id=dominio.id, subdomain_id=subdominio.id, stage='services', tool='default',
+                    command='true', output=f"/tmp/scan_{i}.xml", status='running' if huerfana else 'pending',
+                    lease_owner='muerto:1' if huerfana else None, lease_expires=vencido if huerfana else None,
+                    attempts=1 if huerfana else 0, created_at=datetime.now()))
+            extensiones.db.session.commit()
+
+    def tearDown(self):
+        from app.extensions import extensiones
+        with self.app.app_context():
+            extensiones.db.engine.dispose()
+        self.directorio.cleanup()
+
+    def test_ninguna_tarea_corre_dos_veces(self):
+        contexto = multiprocessing.get_context('spawn')
+        cola = contexto.Queue()
+        # Un proceso hace de ejecución local (``TaskController.ejecutar``) y el resto de workers de la cola
+        procesos = [
+            contexto.Process(target=_worker, args=(self.ruta, f"worker-{i}", i == 0, cola)) for i in range(PROCESOS)
+        ]
+        for proceso in procesos:
+            proceso.start()
+        tomadas = [id for _ in procesos for id in cola.get(timeout=120)]
+        for proceso in procesos:
+            proceso.join(timeout=30)
+            self.assertEqual(proceso.exitcode, 0)
+
+        self.assertEqual(len(tomadas), len(set(tomadas)), "una tarea se tomó más de una vez")
+        from app.models.scantaskModel import ScanTask
+        with self.app.app_context():
+            tareas = ScanTask.query.all()
+            self.assertEqual(sorted(tomadas), sorted(t.id for t in tareas))
+            self.assertTrue(all(t.status == 'done' for t in tareas))
+            # Las tareas con el lease vencido se volvieron a tomar una sola vez
+            huerfanas = [t for t in tareas if t.output.endswith(tuple(f"_{i}.xml" for i in range(0, TAREAS, 3)))]
+            self.assertTrue(huerfanas and all(t.attempts == 2 and t.lease_owner != 'muerto:1' for t in huerfanas))
+
+    def test_lease_vigente_no_se_toma(self):
+        from app.extensions import extensiones
+        from app.models.scantaskModel import ScanTask
+        with self.app.app_context():
+            ahora = datetime.now()
+            tomadas = ScanTask.claim('worker-a', (), TAREAS, timedelta(seconds=300), ahora)
+            self.assertEqual(len(tomadas), TAREAS)
+            self.assertEqual(ScanTask.claim('worker-b', (), TAREAS, timedelta(seconds=300), ahora), [])
+            tarea = extensiones.db.session.get(ScanTask, tomadas[0].id)
+            self.assertFalse(ScanTask.acquire(tarea, 'local', ahora))
+            extensiones.db.session.commit()
+            # Vencido el lease, otro worker la toma y el primero ya no puede cerrarla
+            despues = ahora + timedelta(seconds=301)
+            self.assertEqual(len(ScanTask.claim('worker-b', (), 1, timedelta(seconds=300), despues)), 1)
+            self.assertFalse(ScanTask.finish(tomadas[0].id, 'worker-a', dict(status='done')))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+"""
+Pruebas de la instantánea de subdominios que registra ``ReconController.searchSubdomains``.
+
+Se corren con ``python -m unittest discover -s tests`` (o con pytest).
+"""
+import os
+import tempfile
+import unittest
+from datetime import datetime
+
+from tests.test_scan_queue import _app
+
+
+class InstantaneaSubdominiosTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directorio = tempfile.TemporaryDirectory()
+        self.app = _app(os.path.join(self.directorio.name, 'instantanea.db'))
+        self.contexto = self.app.app_context()
+        self.contexto.push()
+        from app.extensions import extensiones
+        from app.models.domainModel import Domain
+        from app.models.subdomainModel import Subdomain
+
+        extensiones.db.create_all()
+        self.dominio = Domain(user_id=1, domain='ejemplo.com', logo='')
+        extensiones.db.session.add(self.dominio)
+        extensiones.db.session.flush()
+        extensiones.db.session.add_all([
+            Subdomain(domain_id=self.dominio.id, subdomain=nombre, waf='Ninguno', fingerprint=huella, source='enum')
+            for nombre, huella in (('www.ejemplo.com', 'vieja'), ('api.ejemplo.com', 'igual'))
+        ])
+        extensiones.db.session.commit()
+
+    def tearDown(self):
+        from app.extensions import extensiones
+        extensiones.db.session.remove()
+        extensiones.db.engine.dispose()
+        self.contexto.pop()
+        self.directorio.cleanup()
+
+    def _guardar(self, huellas, cambiados):
+        from app.extensions import extensiones
+        from app.models.subdomainModel import Subdomain
+        from app.controllers.reconController import ReconController
+
+        existentes = {s.subdomain: s for s in Subdomain.query.filter_by(domain_id=self.dominio.id).all()}
+        ReconController._guardarSubdominios(
+            self.dominio, existentes, list(huellas), [], cambiados, [], huellas,
+            {s: ('Ninguno', 'http') for s in cambiados}, datetime.now())
+        extensiones.db.session.commit()
+
+    def test_huella_cambiada_se_registra(self):
+        from app.models.snapshotModel import Snapshot
+
+        self._guardar({'www.ejemplo.com': 'nueva', 'api.ejemplo.com': 'igual'}, ['www.ejemplo.com'])
+        instantanea = Snapshot.lookup(self.dominio.id)[-1]
+        self.assertEqual(instantanea.changes, 1)
+        self.assertEqual(Snapshot.diff(self.dominio.id, instantanea.id - 1, instantanea.id)['subdomain']['changed'],
+                         {'www.ejemplo.com': {'before': 'vieja', 'after': 'nueva'}})
+
+    def test_sin_cambios_no_registra(self):
+        from app.models.snapshotModel import Snapshot
+
+        self._guardar({'www.ejemplo.com': 'vieja', 'api.ejemplo.com': 'igual'}, [])
+        self.assertEqual(Snapshot.lookup(self.dominio.id)[-1].changes, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()